@@ -0,0 +1,392 @@
+# -*- coding: utf-8 -*-
+"""
+基准测试：各条流水线在不同数据量下的吞吐、峰值内存和分阶段耗时
+
+用法：
+    python benchmarks/bench_pipelines.py                                  # 全部流水线 × 100 / 1000 / 10000 行
+    python benchmarks/bench_pipelines.py --sizes 100 1000 --pipelines word02 rebar
+    python benchmarks/bench_pipelines.py --set RENDER_ENGINE=plan --set WORKERS=4
+    python benchmarks/bench_pipelines.py --compare benchmarks/results/bench_旧版本.json
+
+流水线：word01（桩基灌注记录）、word02、word03（检查记录表）、tongyong（docxtpl 通用填充）、
+rebar（塔基钢筋数据合并器）。每个（流水线, 行数）在单独的子进程里运行，峰值内存互不影响；
+输入（Excel、模板）由 synthetic.py 按固定种子现场生成，每次运行都从冷缓存开始。
+
+分阶段耗时：word01 / word02 / word03 取脚本自己写出的 docfill_timing.json；
+tongyong 和钢筋合并器没有计时器，在子进程里给各步骤的函数套上 StageTimer 计时。
+
+结果（含 git 版本、Python 和依赖库版本）写到 benchmarks/results/bench_时间.json，
+用 --compare 指定旧结果即可逐项对比。全程离线。
+"""
+import argparse
+import ast
+import contextlib
+import datetime
+import functools
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+import synthetic
+from synthetic import ROOT
+
+PIPELINES = ('word01', 'word02', 'word03', 'tongyong', 'rebar')
+DEFAULT_SIZES = (100, 1000, 10000)
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+REBAR_SCRIPT = os.path.join(ROOT, 'excle', '01', '塔基钢筋数据合并.py')
+RESULT_MARK = '@@BENCH@@'  # 子进程用这个前缀交回结果
+PACKAGES = ('pandas', 'numpy', 'openpyxl', 'python-docx', 'docxtpl', 'jinja2', 'lxml')
+
+
+# -------------------------- 输入 --------------------------
+def prepare_inputs(folder, size, pipelines):
+    """按需生成某个数据量下各流水线的输入文件"""
+    os.makedirs(folder, exist_ok=True)
+    if {'word02', 'word03', 'tongyong'} & set(pipelines):
+        synthetic.make_station_workbook(os.path.join(folder, 'stations.xlsx'), size)
+    if {'word02', 'word03'} & set(pipelines):
+        synthetic.make_tower_template(os.path.join(folder, 'tower.docx'))
+    if 'tongyong' in pipelines:
+        synthetic.make_pile_template(os.path.join(folder, 'pile_tpl.docx'), fields=synthetic.PILE_TEMPLATE_FIELDS)
+    if 'word01' in pipelines:
+        _, stations = synthetic.make_pile_workbook(os.path.join(folder, 'piles.xlsx'), size)
+        template = synthetic.make_pile_template(os.path.join(folder, 'pile.docx'))
+        synthetic.copy_templates(template, os.path.join(folder, 'piles'), stations)
+    if 'rebar' in pipelines:
+        synthetic.make_rebar_workbook(os.path.join(folder, 'rebar.xlsx'), size)
+
+
+def _copy(inputs, name, run_dir):
+    """把输入文件复制到本次运行的目录（Excel / 模板旁边的缓存因此都是冷的）"""
+    target = os.path.join(run_dir, name)
+    shutil.copyfile(os.path.join(inputs, name), target)
+    return target
+
+
+# -------------------------- 子进程：各流水线 --------------------------
+def instrument(timer, owner, name, stage):
+    """给 owner.name 套上计时（计入 timer 的某个阶段）"""
+    original = getattr(owner, name)
+
+    @functools.wraps(original)
+    def wrapper(*args, **kwargs):
+        with timer.stage(stage):
+            return original(*args, **kwargs)
+
+    setattr(owner, name, wrapper)
+
+
+def _apply(target, overrides):
+    for key, value in overrides.items():
+        setattr(target, key, value)
+
+
+def _count_docx(folder):
+    """输出文件夹里的文档数（打包输出模式下数压缩包里的文档）"""
+    count = 0
+    for name in os.listdir(folder):
+        if name.endswith('.docx'):
+            count += 1
+        elif name.endswith('.zip'):
+            with zipfile.ZipFile(os.path.join(folder, name)) as zf:
+                count += sum(1 for entry in zf.namelist() if entry.endswith('.docx'))
+    return count
+
+
+def _script_stages(folder):
+    """读取脚本自己写出的计时报告：整次运行的阶段 + 各桩号阶段合计"""
+    from docfill.profiling import REPORT_NAME
+
+    with open(os.path.join(folder, REPORT_NAME + '.json'), encoding='utf-8') as f:
+        report = json.load(f)
+    return {**report['run_stages'], **report['stage_totals']}
+
+
+def setup_word01(inputs, run_dir, overrides):
+    from docfill.scripts import load_script, script_path
+
+    module = load_script(script_path('word01'))
+    out = os.path.join(run_dir, 'out')
+    module.INPUT_WORD_FOLDER = os.path.join(inputs, 'piles')
+    module.EXCEL_DATABASE = _copy(inputs, 'piles.xlsx', run_dir)
+    module.OUTPUT_FOLDER = out
+    module.STAGE_TIMING = True
+    _apply(module, overrides)
+
+    def run():
+        module.run_universal_filler()
+        return _count_docx(out), '份文档', _script_stages(out)
+
+    return run
+
+
+def _setup_filler(name):
+    def setup(inputs, run_dir, overrides):
+        from docfill.scripts import load_script, script_path
+
+        module = load_script(script_path(name))
+        config = module.Config()
+        config.EXCEL_FILE = _copy(inputs, 'stations.xlsx', run_dir)
+        config.SHEET_NAME = 'Sheet2'
+        config.PRIMARY_KEY = '设计桩号'
+        config.WORD_TEMPLATE = os.path.join(inputs, 'tower.docx')
+        config.WORD_TEMPLATE_FOLDER = ''
+        config.OUTPUT_FOLDER = os.path.join(run_dir, 'out')
+        config.INCREMENTAL = False
+        config.STAGE_TIMING = True
+        config.TABLE_CELL_MAP = dict(synthetic.TOWER_TABLE_CELL_MAP)
+        config.PLACEHOLDER_MAP = dict(synthetic.TOWER_PLACEHOLDER_MAP)
+        if hasattr(config, 'KEYWORD_APPEND_MAP'):
+            config.KEYWORD_APPEND_MAP = dict(synthetic.TOWER_KEYWORD_APPEND_MAP)
+        _apply(config, overrides)
+
+        def run():
+            module.WordFiller(config).run()
+            return _count_docx(config.OUTPUT_FOLDER), '份文档', _script_stages(config.OUTPUT_FOLDER)
+
+        return run
+
+    return setup
+
+
+def setup_tongyong(inputs, run_dir, overrides):
+    from docxtpl import DocxTemplate
+    from docfill.profiling import StageTimer
+    from docfill.scripts import load_script, script_path
+
+    module = load_script(script_path('tongyong'))
+    module.EXCEL_PATH = _copy(inputs, 'stations.xlsx', run_dir)
+    module.TEMPLATE_PATH = _copy(inputs, 'pile_tpl.docx', run_dir)
+    module.OUTPUT_DIR = 'out'
+    module.SHEET_NAME = 'Sheet2'
+    module.FILENAME_COLUMN = '设计桩号'
+    module.INT_COLUMNS = list(synthetic.PILE_INT_COLUMNS)
+    _apply(module, overrides)
+
+    timer = StageTimer()
+    instrument(timer, module.ExcelSource, 'read', 'Excel读取')
+    instrument(timer, module, 'context_records', '格式化')
+    instrument(timer, module, 'CompiledDocxTemplate', '模板编译')
+    instrument(timer, module.CompiledDocxTemplate.__wrapped__, 'render', '模板渲染')
+    instrument(timer, DocxTemplate, 'save', '保存')
+
+    def run():
+        module.main()
+        return _count_docx(os.path.join(run_dir, 'out')), '份文档', timer.run_stages
+
+    return run
+
+
+def setup_rebar(inputs, run_dir, overrides):
+    import pandas as pd
+    from docfill.profiling import StageTimer
+
+    sys.path.insert(0, os.path.dirname(REBAR_SCRIPT))  # 合并器要 import 同目录的 xlsx_stream
+    spec = importlib.util.spec_from_file_location('_bench_rebar', REBAR_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.INPUT_PATH = _copy(inputs, 'rebar.xlsx', run_dir)
+    module.OUTPUT_MODE = 'single'
+    module.OUTPUT_PATH = os.path.join(run_dir, 'out', 'rebar.xlsx')
+    module.OUTPUT_FORMAT = 'xlsx'
+    module.WORKERS = 1
+    _apply(module, overrides)
+    rows = len(pd.read_excel(module.INPUT_PATH))  # 在计时开始前数好行数
+
+    timer = StageTimer()
+    instrument(timer, pd, 'read_excel', 'Excel读取')
+    instrument(timer, module, 'clean_rebar_data', '清洗')
+    instrument(timer, module, 'tower_legs', '清洗')
+    instrument(timer, module, 'merge_rebar', '合并')
+    instrument(timer, module, 'bill_of_materials', '材料汇总')
+    instrument(timer, module, 'write_results', '写出')
+
+    def run():
+        module.main()
+        return rows, '行', timer.run_stages
+
+    return run
+
+
+SETUPS = {
+    'word01': setup_word01,
+    'word02': _setup_filler('word02'),
+    'word03': _setup_filler('word03'),
+    'tongyong': setup_tongyong,
+    'rebar': setup_rebar,
+}
+
+
+def peak_rss_mb():
+    """本进程（含已结束的子进程）的峰值常驻内存（MB）；Windows 上没有 resource 模块，返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return round(peak / (1 << 20 if sys.platform == 'darwin' else 1 << 10), 1)  # macOS 以字节计，Linux 以 KB 计
+
+
+def child(pipeline, size, inputs, run_dir, overrides):
+    """子进程入口：跑一次流水线，把结果以 JSON 打到标准输出"""
+    run = SETUPS[pipeline](inputs, run_dir, overrides)
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        items, unit, stages = run()
+        seconds = time.perf_counter() - start
+    stages = {name: round(value, 4) for name, value in stages.items()}
+    other = seconds - sum(stages.values())
+    if other > 0:
+        stages['其他'] = round(other, 4)
+    result = {
+        'pipeline': pipeline,
+        'size': size,
+        'items': items,
+        'unit': unit,
+        'seconds': round(seconds, 4),
+        'items_per_sec': round(items / seconds, 2) if seconds else None,
+        'peak_rss_mb': peak_rss_mb(),
+        'stages': stages,
+    }
+    print(RESULT_MARK + json.dumps(result, ensure_ascii=False))
+
+
+# -------------------------- 主进程 --------------------------
+def run_one(pipeline, size, inputs, run_dir, overrides):
+    """在子进程里跑一次，返回结果字典（失败时带 error）"""
+    os.makedirs(run_dir, exist_ok=True)
+    command = [sys.executable, os.path.abspath(__file__), '--child', pipeline, str(size), inputs, run_dir,
+               '--overrides', json.dumps(overrides, ensure_ascii=False)]
+    proc = subprocess.run(command, capture_output=True, text=True, encoding='utf-8')
+    for line in proc.stdout.splitlines():
+        if line.startswith(RESULT_MARK):
+            return json.loads(line[len(RESULT_MARK):])
+    tail = (proc.stderr or proc.stdout).strip().splitlines()[-5:]
+    return {'pipeline': pipeline, 'size': size, 'error': '\n'.join(tail) or f'退出码 {proc.returncode}'}
+
+
+def environment():
+    """记录本次结果对应的代码版本和运行环境"""
+    from importlib import metadata
+
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    versions = {}
+    for package in PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return {
+        'git_commit': git('rev-parse', '--short', 'HEAD'),
+        'git_dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'packages': versions,
+    }
+
+
+def format_row(result):
+    if 'error' in result:
+        return f"  {result['pipeline']:<10}{result['size']:>7}  ❌ {result['error'].splitlines()[-1]}"
+    stages = {k: v for k, v in result['stages'].items() if k != '其他'}
+    slowest = max(stages, key=stages.get) if stages else '-'
+    rss = '-' if result['peak_rss_mb'] is None else f"{result['peak_rss_mb']:.0f}"
+    return (f"  {result['pipeline']:<10}{result['size']:>7}{result['items']:>8} {result['unit']:<4}"
+            f"{result['seconds']:>10.2f}{result['items_per_sec']:>10.1f}{rss:>10}  {slowest}")
+
+
+def compare(results, baseline_path):
+    """与旧结果逐项对比（吞吐和峰值内存）"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    old = {(r['pipeline'], r['size']): r for r in baseline['results'] if 'error' not in r}
+    commit = baseline.get('environment', {}).get('git_commit') or '?'
+    print(f"\n📊 与 {os.path.basename(baseline_path)}（{commit}）对比：")
+    print(f"  {'流水线':<8}{'行数':>7}{'吞吐(旧→新)':>22}{'倍数':>8}{'峰值内存MB(旧→新)':>22}")
+    for result in results:
+        before = old.get((result['pipeline'], result['size']))
+        if before is None or 'error' in result:
+            continue
+        ratio = result['items_per_sec'] / before['items_per_sec'] if before['items_per_sec'] else float('nan')
+        rss = (f"{before['peak_rss_mb']:.0f} → {result['peak_rss_mb']:.0f}"
+               if before['peak_rss_mb'] is not None and result['peak_rss_mb'] is not None else '-')
+        print(f"  {result['pipeline']:<10}{result['size']:>7}"
+              f"{before['items_per_sec']:>12.1f} → {result['items_per_sec']:<8.1f}{ratio:>7.2f}x{rss:>20}")
+
+
+def parse_overrides(items):
+    """--set 键=值（值按 Python 字面量解析，解析不了就当字符串）"""
+    overrides = {}
+    for item in items or []:
+        key, sep, value = item.partition('=')
+        if not sep:
+            raise SystemExit(f"--set 需要写成 键=值：{item}")
+        try:
+            overrides[key.strip()] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            overrides[key.strip()] = value
+    return overrides
+
+
+def main():
+    parser = argparse.ArgumentParser(description='流水线基准测试（离线）')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help='数据行数')
+    parser.add_argument('--pipelines', nargs='+', choices=PIPELINES, default=list(PIPELINES))
+    parser.add_argument('--set', dest='overrides', action='append', metavar='键=值',
+                        help='覆盖配置项（word02/word03 改 Config，其余改脚本的全局配置），可重复')
+    parser.add_argument('--output', help='结果 JSON 路径（默认 benchmarks/results/bench_时间.json）')
+    parser.add_argument('--compare', metavar='旧结果.json', help='跑完后与旧结果对比')
+    parser.add_argument('--workdir', help='输入和输出放在这里并保留（默认用临时目录，跑完删除）')
+    args = parser.parse_args()
+    overrides = parse_overrides(args.overrides)
+
+    created = datetime.datetime.now()
+    results = []
+    with contextlib.ExitStack() as stack:
+        workdir = args.workdir or stack.enter_context(tempfile.TemporaryDirectory(prefix='docfill_bench_'))
+        print(f"  {'流水线':<8}{'行数':>7}{'产出':>9}{'':4}{'耗时(秒)':>8}{'每秒':>8}{'峰值内存MB':>8}  最慢阶段")
+        for size in args.sizes:
+            inputs = os.path.join(workdir, f'inputs_{size}')
+            prepare_inputs(inputs, size, args.pipelines)
+            for pipeline in args.pipelines:
+                run_dir = os.path.join(workdir, f'{pipeline}_{size}')
+                shutil.rmtree(run_dir, ignore_errors=True)
+                result = run_one(pipeline, size, inputs, run_dir, overrides)
+                results.append(result)
+                print(format_row(result), flush=True)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench_{created:%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'created': created.isoformat(timespec='seconds'), 'environment': environment(),
+                   'overrides': overrides, 'results': results}, f, ensure_ascii=False, indent=1)
+    print(f"\n💾 结果已保存：{output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        child_parser = argparse.ArgumentParser()
+        child_parser.add_argument('--child', nargs=4, metavar=('PIPELINE', 'SIZE', 'INPUTS', 'RUN_DIR'))
+        child_parser.add_argument('--overrides', default='{}')
+        child_args = child_parser.parse_args()
+        pipeline, size, inputs, run_dir = child_args.child
+        child(pipeline, int(size), inputs, run_dir, json.loads(child_args.overrides))
+    else:
+        main()
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+基准测试：模板缓存前后，单个文档的生成耗时对比
+
+用法：python benchmarks/bench_template_cache.py [桩号数量]
+全程离线：模板在临时目录中现场生成，输出写入临时目录后删除。
+"""
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from synthetic import make_tower_template
+from docfill.scripts import load_script, script_path
+from docfill.template_cache import TemplateCache
+
+
+def bench_open(template, stations, cache_size):
+    """只测“打开模板”这一步，返回每次的平均耗时（毫秒）"""
+    cache = TemplateCache(cache_size)
+    cache.open(template)  # 预热：缓存模式下先把母版解析好
+    start = time.perf_counter()
+    for _ in range(stations):
+        cache.open(template)
+    return (time.perf_counter() - start) / stations * 1000
+
+
+def bench(module, template, stations, cache_size, output_folder):
+    """按指定缓存大小跑一遍 word/03 的单桩号流水线，返回每个文档耗时的中位数（毫秒）"""
+    config = module.Config()
+    config.OUTPUT_FOLDER = output_folder
+    config.TEMPLATE_CACHE_SIZE = cache_size
+    config.TABLE_CELL_MAP = {'设计桩号': (1, 9), '杆塔型': (1, 12), '施工日期': (0, 19)}
+    config.PLACEHOLDER_MAP = {'{项目名称}': '项目名称', '{桩号}': '设计桩号'}
+    with contextlib.redirect_stdout(io.StringIO()):
+        filler = module.WordFiller(config)
+
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(stations):
+            row = {'设计桩号': f'N{i + 1}', '杆塔型': 'SJ2', '施工日期': '2026-03-04',
+                   '项目名称': '35kV集电线路', '编号': f'BH-{i + 1:04d}'}
+            start = time.perf_counter()
+            filler.process_single_station(template, row['设计桩号'], row)
+            timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    stations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    module = load_script(script_path('word03'))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        template = make_tower_template(os.path.join(tmp, 'tpl.docx'))
+        open_before = bench_open(template, stations, 0)
+        open_after = bench_open(template, stations, 8)
+        with contextlib.redirect_stdout(io.StringIO()):
+            bench(module, template, 5, 8, os.path.join(tmp, 'warmup'))
+        before = bench(module, template, stations, 0, os.path.join(tmp, 'before'))
+        after = bench(module, template, stations, 8, os.path.join(tmp, 'after'))
+
+    print(f"桩号数量：{stations}")
+    print(f"{'':12}{'重新打开模板':>12}{'模板缓存克隆':>12}{'提速':>8}")
+    print(f"{'打开模板':12}{open_before:>10.2f}ms{open_after:>10.2f}ms{open_before / open_after:>7.1f}x")
+    print(f"{'整份文档':12}{before:>10.2f}ms{after:>10.2f}ms{before / after:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+合成测试素材：离线生成基准测试用的 Word 模板、Excel 数据和填充规则
+
+模板：
+    - make_tower_template：仿“表D.0.8 铁塔组立检查记录表”，一个带大量横向合并单元格的大表格，
+      外加“编号：”关键字段落和若干 {占位符}
+    - make_pile_template：仿“表D.0.4 灌注桩基础检查记录表”，表头区和 15 行数据区都是合并单元格；
+      可选在表头区写入 docxtpl 的 {{ 列名 }} 标签（tongyong.py 用）
+Excel：
+    - make_station_workbook：每个设计桩号一行（word/02、word/03、tongyong.py 用）
+    - make_pile_workbook：每个桩号多行灌注记录（word/01 用）
+    - make_rebar_workbook：塔基钢筋明细，塔号为合并单元格（钢筋数据合并器用）
+所有数据由固定随机种子生成，同样的参数每次得到同样的文件。
+"""
+import datetime
+import os
+import shutil
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORD_DIR = os.path.join(ROOT, 'word')
+if WORD_DIR not in sys.path:
+    sys.path.insert(0, WORD_DIR)
+
+SEED = 20260304
+
+# 表D.0.8 的填充规则（行列号对应 make_tower_template 的表格）
+TOWER_TABLE_CELL_MAP = {
+    '设计桩号': (1, 9),
+    '杆塔型': (1, 12),
+    '呼称高': (0, 12),
+    '塔全高': (1, 16),
+    '施工日期': (0, 19),
+    '检查日期': (1, 19),
+    '直线塔结构倾斜': (16, 19),
+    '放线前': (21, 19),
+    '紧线后': (22, 19),
+}
+TOWER_PLACEHOLDER_MAP = {'{项目名称}': '项目名称', '{桩号}': '设计桩号', '{施工单位}': '施工单位'}
+TOWER_KEYWORD_APPEND_MAP = {'编号：': '编号'}
+
+# 表D.0.4 数据区：Excel 列 → 合并单元格起始的物理列号（同 word/01 的 COLUMN_MAP）
+PILE_COLUMN_MAP = {'灌1': 0, '拆2': 3, '斗3': 5, '折4': 9, '孔5': 13, '拆6': 16, '埋7': 22}
+PILE_START_ROW = 16
+PILE_DATA_ROWS = 15
+# tongyong.py 模板里的 docxtpl 标签
+PILE_TEMPLATE_FIELDS = ['设计桩号', '杆塔型', '施工日期', '根设AB', '根设BC', '根设CD', '根设DA',
+                        '根设AC', '根设BD', '间距', '桩径', '孔深', '混凝土强度']
+PILE_INT_COLUMNS = ['根设AB', '根设BC', '根设CD', '根设DA', '根设AC', '根设BD', '间距']
+
+
+def make_tower_template(path, rows=25, cols=24, merge_span=8):
+    """
+    生成铁塔组立检查记录表风格的模板
+    :param path: 输出路径
+    :param rows: 主表格行数
+    :param cols: 主表格列数
+    :param merge_span: 每行第一个合并单元格横跨的列数
+    :return: 模板路径
+    """
+    from docx import Document
+
+    doc = Document()
+    doc.add_paragraph('表D.0.8 铁塔组立检查记录表')
+    doc.add_paragraph('编号：')
+    doc.add_paragraph('工程名称：{项目名称}')
+
+    table = doc.add_table(rows=rows, cols=cols)
+    for r in range(rows):
+        # 每行开头一个横跨多列的“检查项目”单元格
+        merged = table.cell(r, 0).merge(table.cell(r, merge_span - 1))
+        merged.text = f'检查项目{r + 1}'
+    table.cell(2, merge_span).text = '{桩号}'
+
+    doc.add_paragraph('施工单位：{施工单位}')
+    doc.save(path)
+    return path
+
+
+def make_pile_template(path, fields=None, cols=24):
+    """
+    生成灌注桩基础检查记录表风格的模板
+    :param path: 输出路径
+    :param fields: 要在表头区写成 {{ 列名 }} 标签的列（None 表示不写标签，word/01 用）
+    :param cols: 表格列数（需大于 PILE_COLUMN_MAP 里最大的列号）
+    :return: 模板路径
+    """
+    from docx import Document
+
+    doc = Document()
+    doc.add_paragraph('表D.0.4 灌注桩基础检查记录表')
+    doc.add_paragraph('编号：')
+
+    rows = PILE_START_ROW + PILE_DATA_ROWS
+    table = doc.add_table(rows=rows, cols=cols)
+    # 表头区：每行“名称 | 内容 | 名称 | 内容”四个合并单元格
+    fields = list(fields or [])
+    quarter = cols // 4
+    for r in range(PILE_START_ROW):
+        for q in range(4):
+            start = q * quarter
+            end = cols - 1 if q == 3 else start + quarter - 1
+            cell = table.cell(r, start).merge(table.cell(r, end))
+            slot = r * 2 + q // 2
+            if q % 2 == 0:
+                cell.text = f'检查项目{slot + 1}'
+            elif slot < len(fields):
+                cell.text = f'{{{{ {fields[slot]} }}}}'
+    # 数据区：按 PILE_COLUMN_MAP 的起始列横向合并
+    starts = sorted(PILE_COLUMN_MAP.values()) + [cols]
+    for r in range(PILE_START_ROW, rows):
+        for start, end in zip(starts, starts[1:]):
+            if end - start > 1:
+                table.cell(r, start).merge(table.cell(r, end - 1))
+
+    doc.add_paragraph('施工单位：')
+    doc.save(path)
+    return path
+
+
+def copy_templates(template, folder, names):
+    """把一个模板复制成多份（word/01 按“桩号.docx”找模板）"""
+    os.makedirs(folder, exist_ok=True)
+    for name in names:
+        shutil.copyfile(template, os.path.join(folder, f'{name}.docx'))
+    return folder
+
+
+def _rng(seed):
+    import numpy as np
+    return np.random.default_rng(SEED if seed is None else seed)
+
+
+def station_frame(rows, seed=None):
+    """每个设计桩号一行的检查记录数据（表D.0.8 + 表D.0.4 的列）"""
+    import numpy as np
+    import pandas as pd
+
+    rng = _rng(seed)
+    start = datetime.datetime(2026, 3, 4)
+    days = rng.integers(0, 365, rows)
+    height = rng.integers(30, 90, rows) / 2  # 15.0 ~ 44.5，一半是整数
+    df = pd.DataFrame({
+        '设计桩号': [f'N{i + 1}' for i in range(rows)],
+        '杆塔型': rng.choice(['SJ1', 'SJ2', 'SZ1', 'SZ2', 'SDJ'], rows),
+        '呼称高': height,
+        '塔全高': height + 6,
+        '施工日期': [start + datetime.timedelta(days=int(d)) for d in days],
+        '检查日期': [start + datetime.timedelta(days=int(d) + 3) for d in days],
+        '直线塔结构倾斜': rng.integers(0, 30, rows) / 10,
+        '放线前': rng.integers(0, 50, rows) / 100,
+        '紧线后': rng.integers(0, 50, rows) / 100,
+        '编号': [f'BH-{i + 1:05d}' for i in range(rows)],
+        '项目名称': '35kV集电线路工程',
+        '施工单位': '某某电力建设有限公司',
+    })
+    for name in PILE_INT_COLUMNS:
+        df[name] = rng.integers(4000, 9000, rows) + rng.integers(0, 10, rows) / 10
+    df['桩径'] = rng.choice([0.8, 1.0, 1.2], rows)
+    df['孔深'] = rng.integers(60, 160, rows) / 10
+    df['混凝土强度'] = 'C30'
+    # 少量空格子，走一遍空值处理
+    df.loc[df.index % 37 == 5, '紧线后'] = np.nan
+    df.loc[df.index % 53 == 7, '孔深'] = np.nan
+    return df
+
+
+def make_station_workbook(path, rows, sheet_name='Sheet2', seed=None):
+    """生成每个设计桩号一行的 Excel（word/02、word/03、tongyong.py 用）"""
+    with _excel_writer(path) as writer:
+        station_frame(rows, seed).to_excel(writer, sheet_name=sheet_name, index=False)
+    return path
+
+
+def make_pile_workbook(path, rows, rows_per_station=5, seed=None):
+    """
+    生成灌注记录 Excel：每个桩号连续若干行（word/01 用）
+    :return: (Excel 路径, 桩号列表)
+    """
+    import pandas as pd
+
+    rng = _rng(seed)
+    stations = [f'Z{i // rows_per_station + 1}' for i in range(rows)]
+    df = pd.DataFrame({'设计桩号': stations})
+    for name in PILE_COLUMN_MAP:
+        df[name] = rng.integers(100, 2000, rows) / 100
+    with _excel_writer(path) as writer:
+        df.to_excel(writer, index=False)
+    return path, list(dict.fromkeys(stations))
+
+
+def rebar_frame(rows, seed=None):
+    """塔基钢筋明细：每基塔 4 个塔腿 × 若干规格，塔号只写在每基塔的第一行（合并单元格读出来的样子）"""
+    import numpy as np
+    import pandas as pd
+
+    rng = _rng(seed)
+    per_tower = 8  # 每基塔 8 行：4 个塔腿 × 2 种钢筋
+    towers = (rows + per_tower - 1) // per_tower
+    tower_ids = np.repeat([f'N{i + 1}' for i in range(towers)], per_tower)[:rows]
+    first = np.r_[True, tower_ids[1:] != tower_ids[:-1]]
+    legs = np.tile(['A', 'A', 'B', 'B', 'C', 'C', 'D', 'D'], towers)[:rows]
+    # 同一基塔大多数塔腿配筋相同，少数不同，覆盖“合并 / 不合并”两种情况
+    base_length = np.repeat(rng.choice([6900, 7400, 8400, 9400], towers), per_tower)[:rows]
+    odd = rng.random(rows) < 0.15
+    df = pd.DataFrame({
+        '塔号': np.where(first, tower_ids, None),
+        '塔腿': legs,
+        '规格': np.tile(['C22', 'C25'], towers * 4)[:rows],
+        '长度(mm)': base_length + np.where(odd, 500, 0),
+        '数量': np.where(odd, 24, 28),
+        '备注': '',
+    })
+    return df
+
+
+def make_rebar_workbook(path, rows, sheet_name='钢筋明细', seed=None):
+    """生成塔基钢筋明细 Excel（钢筋数据合并器用）"""
+    with _excel_writer(path) as writer:
+        rebar_frame(rows, seed).to_excel(writer, sheet_name=sheet_name, index=False)
+    return path
+
+
+def _excel_writer(path):
+    import pandas as pd
+    return pd.ExcelWriter(path, engine='openpyxl')
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+流式 xlsx 写入：边生成边写进压缩包，写文件这一步的内存占用与行数无关
+
+pandas 的 to_excel 走 openpyxl，要先在内存里搭出整张表的单元格对象模型再保存，
+几十万行时写文件比计算本身还慢、还占内存。这里直接输出 SpreadsheetML：
+    - 每个工作表的 XML 一块一块地写进 zip，不保留任何单元格对象
+    - 文字用内联字符串（inlineStr），不需要先收集整本的共享字符串表
+    - 保留表头（加粗）和按内容估算的列宽
+不依赖任何第三方库。
+
+省下的只是“写文件”这一步：传进来的 DataFrame 本身仍然整张放在内存里。
+sheets 可以是生成器，写完一张再取下一张；但塔基钢筋数据合并.py 的合并结果是整张表算出来的，
+single 模式还要攒齐全部工作簿的结果（按输入顺序写出、材料汇总要用全部数据）才开始写。
+"""
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 2000  # 每攒够这么多行写一次
+MAX_WIDTH = 80  # 列宽上限（字符）
+
+# XML 1.0 不允许出现的控制字符（Excel 单元格里偶尔会混进来）
+_ILLEGAL_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '{sheets}</Types>'
+)
+_SHEET_TYPE = ('<Override PartName="/xl/worksheets/sheet{n}.xml" '
+               'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>')
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+    'officeDocument" Target="xl/workbook.xml"/></Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>{sheets}</sheets></workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">{rels}'
+    '<Relationship Id="rIdStyles" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/></Relationships>'
+)
+# 两种格式：0 = 默认，1 = 加粗（表头）
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+def column_letter(index):
+    """列序号（0 起）→ Excel 列字母"""
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _text_width(series):
+    """一列文字的显示宽度（中文等全角字符按 2 个字符算）"""
+    text = series.astype(str)
+    return text.str.len() + text.str.count(r"[^\x00-\xff]")
+
+
+def column_widths(df):
+    """按表头和内容估算列宽（整列一次算完）"""
+    widths = []
+    for i, column in enumerate(df.columns):
+        values = df.iloc[:, i].dropna()
+        width = int(_text_width(pd.Series([column])).iloc[0])
+        if not values.empty:
+            width = max(width, int(_text_width(values).max()))
+        widths.append(min(width + 2, MAX_WIDTH))
+    return widths
+
+
+def _cell(ref, value, style=""):
+    """一个单元格的 XML；空值返回空串（不写这个格子）"""
+    if value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NaT:
+        return ""
+    if isinstance(value, (bool, np.bool_)):
+        return f'<c r="{ref}"{style} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, np.integer)):
+        return f'<c r="{ref}"{style}><v>{int(value)}</v></c>'
+    if isinstance(value, (float, np.floating)):
+        if np.isinf(value):
+            value = str(value)
+        else:
+            return f'<c r="{ref}"{style}><v>{repr(float(value))}</v></c>'
+    text = escape(_ILLEGAL_XML.sub("", str(value)))
+    space = ' xml:space="preserve"' if text != text.strip() else ""
+    return f'<c r="{ref}"{style} t="inlineStr"><is><t{space}>{text}</t></is></c>'
+
+
+def _write_sheet(stream, df):
+    """把一个 DataFrame 写成工作表 XML（按块写出，不在内存里拼整张表）"""
+    letters = [column_letter(i) for i in range(len(df.columns))]
+    cols = "".join(f'<col min="{i}" max="{i}" width="{w}" customWidth="1"/>'
+                   for i, w in enumerate(column_widths(df), start=1))
+    head = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            + (f"<cols>{cols}</cols>" if cols else "") + "<sheetData>")
+    header = "".join(_cell(f"{c}1", name, ' s="1"') for c, name in zip(letters, df.columns))
+    stream.write((head + f'<row r="1">{header}</row>').encode("utf-8"))
+
+    for start in range(0, len(df), CHUNK_ROWS):
+        chunk = df.iloc[start:start + CHUNK_ROWS].astype(object).to_numpy()
+        parts = []
+        for offset, values in enumerate(chunk, start=start + 2):
+            cells = "".join(_cell(f"{c}{offset}", v) for c, v in zip(letters, values))
+            parts.append(f'<row r="{offset}">{cells}</row>')
+        stream.write("".join(parts).encode("utf-8"))
+    stream.write(b"</sheetData></worksheet>")
+
+
+def write_xlsx(path, sheets):
+    """
+    流式写出 xlsx
+    :param path: 输出路径
+    :param sheets: [(工作表名, DataFrame)] 或逐张产出的生成器；工作表名需已合法、不重名
+    """
+    names = []
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for n, (name, df) in enumerate(sheets, start=1):
+            with zf.open(f"xl/worksheets/sheet{n}.xml", "w", force_zip64=True) as stream:
+                _write_sheet(stream, df)
+            names.append(name)
+        zf.writestr("[Content_Types].xml",
+                    _CONTENT_TYPES.format(sheets="".join(_SHEET_TYPE.format(n=n) for n in range(1, len(names) + 1))))
+        zf.writestr("_rels/.rels", _ROOT_RELS)
+        zf.writestr("xl/workbook.xml", _WORKBOOK.format(sheets="".join(
+            f'<sheet name="{escape(name, {chr(34): "&quot;"})}" sheetId="{n}" r:id="rId{n}"/>'
+            for n, name in enumerate(names, start=1))))
+        zf.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS.format(rels="".join(
+            f'<Relationship Id="rId{n}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+            f'worksheet" Target="worksheets/sheet{n}.xml"/>' for n in range(1, len(names) + 1))))
+        zf.writestr("xl/styles.xml", _STYLES)
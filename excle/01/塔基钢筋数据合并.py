@@ -1,70 +1,343 @@
 ###塔基钢筋数据合并器
+import glob
+import importlib.util
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import pandas as pd
 import numpy as np
-from collections import defaultdict
-
-# 1. 读取数据（已填入你的文件路径）
-file_path = "/Users/mac/Desktop/work/工作簿1.xlsx"
-df = pd.read_excel(file_path)
-
-# 填充合并单元格的塔号
-df["塔号"] = df["塔号"].ffill()
-
-# 2. 数据清洗
-core_columns = ["塔号", "塔腿", "规格", "长度(mm)", "数量"]
-df = df[core_columns].dropna(subset=core_columns)
-df["塔腿"] = df["塔腿"].astype(str).str.strip().str.upper()
-df["长度(mm)"] = df["长度(mm)"].astype(float).astype(int)
-df["数量"] = df["数量"].astype(float).astype(int)
-
-# 3. 核心处理逻辑（动态前缀+合并数量）
-result_data = []
-original_tower_order = df["塔号"].drop_duplicates().tolist()
-
-for tower_num, group in df.groupby("塔号"):
-    row = {"塔号": tower_num, "塔腿A": "", "塔腿B": "", "塔腿C": "", "塔腿D": ""}
-    leg_data = {}  # 存储各腿原始数据：{腿号: (规格, 长度, 数量)}
-
-    # 第一步：填充塔腿列（带A：/B：标识）
-    for _, item in group.iterrows():
-        leg = item["塔腿"]
-        spec, length, count = item["规格"], item["长度(mm)"], item["数量"]
-        row[f"塔腿{leg}"] = f"{leg}：{spec}*{length}*{count}"
-        leg_data[leg] = (spec, length, count)
-
-    # 第二步：按【规格+长度】分组，统计所有腿的数量和对应腿号
-    merge_dict = defaultdict(lambda: {"total_count": 0, "legs": []})
-    for leg, (spec, length, count) in leg_data.items():
-        key = (spec, length)
-        merge_dict[key]["total_count"] += count
-        merge_dict[key]["legs"].append(leg)
-
-    # 第三步：动态生成合并列文本
-    merge_parts = []
-    for (spec, length), info in merge_dict.items():
-        # 动态生成前缀（比如A、B、AB、C、D等）
-        leg_prefix = "".join(sorted(info["legs"]))  # 排序保证AB而非BA
-        # 拼接单条合并项
-        merge_item = f"{leg_prefix}:{spec}*{length}*{info['total_count']}"
-        merge_parts.append(merge_item)
-
-    # 最终合并列（多个项用、分隔）
-    row["合并"] = "、".join(merge_parts)
-    result_data.append(row)
-
-# 4. 按原始顺序排序
-result_df = pd.DataFrame(result_data)
-result_df["塔号排序键"] = result_df["塔号"].map(lambda x: original_tower_order.index(x))
-result_df = result_df.sort_values("塔号排序键").drop("塔号排序键", axis=1).reset_index(drop=True)
-
-# 5. 输出结果
-output_path = "/Users/mac/Desktop/整理后_钢筋数据_动态前缀版.xlsx"
-result_df.to_excel(output_path, index=False)
-
-print(f"✅ 数据整理完成！文件保存至：{output_path}")
-print("\n===== 动态合并逻辑示例 =====")
-print("场景1：只有A腿 → A:C22*6900*28")
-print("场景2：A+B腿规格长度相同 → AB:C22*6900*56")
-print("场景3：A+B腿规格长度不同 → A:C22*6900*28、B:C22*7400*28")
-print("场景4：B+C腿规格长度相同 → BC:C22*9400*56")
-print("场景5：A+C+D腿规格长度相同 → ACD:C22*8400*84")
+
+from xlsx_stream import write_xlsx  # 流式 xlsx 写入（不经过 openpyxl 的内存模型）
+
+# ================= ⚙️ 用户配置区域 (修改这里) =================
+
+# 1. 输入：单个工作簿、一个文件夹（处理其中全部 .xlsx / .xls）或通配符
+#    例如 "/Users/mac/Desktop/work/*标段*.xlsx"；每个工作簿的每个工作表都会处理
+INPUT_PATH = "/Users/mac/Desktop/work/工作簿1.xlsx"
+
+# 2. 输出方式
+#    "single"：全部结果写进一个工作簿（OUTPUT_PATH），每个来源工作表对应一个工作表
+#    "per_file"：每个输入工作簿单独输出一个结果工作簿（放在 OUTPUT_DIR，文件名前加“整理后_”）
+OUTPUT_MODE = "single"
+OUTPUT_PATH = "/Users/mac/Desktop/整理后_钢筋数据_动态前缀版.xlsx"
+OUTPUT_DIR = "/Users/mac/Desktop/整理后_钢筋数据"
+
+# 3. 输出格式
+#    "xlsx"：流式写 Excel（写文件时不搭 openpyxl 的单元格模型，保留表头和列宽）
+#           注意：合并结果本身仍在内存里，single 模式要攒齐全部工作簿的结果才写出；内存吃紧时改用 per_file
+#    "csv"：每个工作表一个 .csv（UTF-8 带 BOM，Excel 可直接打开），最快
+#    "parquet"：每个工作表一个 .parquet 列式文件（需要安装 pyarrow），适合交给其他程序继续处理
+OUTPUT_FORMAT = "xlsx"
+
+# 4. 并行进程数：0 = 按 CPU 核数；1 = 不开进程池（只有一个工作簿时也不开）
+WORKERS = 0
+
+# 5. 钢筋材料汇总：在结果后面追加三张表（single 模式汇总全部来源，per_file 模式各文件各自汇总）
+#    材料汇总（规格×长度的根数、总长度）、分塔小计（每塔各规格根数、总长度）、规格×塔腿（交叉表）
+#    填 False 则只输出合并结果
+BOM_SHEETS = True
+
+# =============================================================
+
+CORE_COLUMNS = ["塔号", "塔腿", "规格", "长度(mm)", "数量"]
+LEG_COLUMNS = ["塔腿A", "塔腿B", "塔腿C", "塔腿D"]
+
+
+def clean_rebar_data(df):
+    """填充合并单元格的塔号，只保留核心列并统一类型"""
+    df = df.copy()
+    # 填充合并单元格的塔号
+    df["塔号"] = df["塔号"].ffill()
+
+    df = df[CORE_COLUMNS].dropna(subset=CORE_COLUMNS)
+    df["塔腿"] = df["塔腿"].astype(str).str.strip().str.upper()
+    df["长度(mm)"] = df["长度(mm)"].astype(float).astype(int)
+    df["数量"] = df["数量"].astype(float).astype(int)
+    return df
+
+
+def tower_legs(df):
+    """
+    每塔每腿一行（合并列用；材料汇总按清洗后的全部行统计，见 bill_of_materials）
+    :param df: clean_rebar_data 清洗后的数据
+    :return: _塔（塔号按首次出现顺序的编号）、塔号、塔腿、规格、长度(mm)、数量；
+             同一塔同一腿出现多次时：数值取最后一次，位置按第一次出现
+    """
+    tower_code, towers = pd.factorize(df["塔号"])
+    data = df.assign(_塔=tower_code).reset_index(drop=True)
+
+    keys = ["_塔", "塔腿"]
+    first = data.loc[~data.duplicated(keys, keep="first"), keys]
+    last = data.drop_duplicates(keys, keep="last").drop(columns="塔号")
+    legs = first.merge(last, on=keys, how="left").sort_values("_塔", kind="stable").reset_index(drop=True)
+    legs.insert(1, "塔号", towers.take(legs["_塔"].to_numpy()))
+    return legs
+
+
+def merge_rebar(legs):
+    """
+    核心处理逻辑（动态前缀+合并数量），所有塔一次算完
+    :param legs: tower_legs 整理出的每塔每腿数据
+    :return: 每塔一行：塔号、塔腿A~D、合并（塔号按首次出现的顺序）
+    """
+    legs = legs.copy()
+    keys = ["_塔", "塔腿"]
+    towers = pd.Index(legs.drop_duplicates("_塔")["塔号"])
+
+    # 第一步：塔腿列（带A：/B：标识）
+    length_text = legs["长度(mm)"].astype(str)
+    legs["单腿"] = legs["塔腿"] + "：" + legs["规格"].astype(str) + "*" + length_text + "*" + legs["数量"].astype(str)
+    leg_table = legs.set_index(keys)["单腿"].unstack()
+
+    # 第二步：按【塔号+规格+长度】分组，统计所有腿的数量和对应腿号（组的顺序 = 首次出现的顺序）
+    legs["_组"] = legs.groupby(["_塔", "规格", "长度(mm)"], sort=False).ngroup()
+    by_group = legs.sort_values(["_组", "塔腿"], kind="stable").groupby("_组", sort=True)
+    groups = by_group.agg(_塔=("_塔", "first"), 规格=("规格", "first"), 长度=("长度(mm)", "first"),
+                          总数=("数量", "sum"), 前缀=("塔腿", "sum"))  # 腿号已排序，拼起来就是 AB 而非 BA
+
+    # 第三步：合并列文本（多个项用、分隔）
+    items = (groups["前缀"] + ":" + groups["规格"].astype(str) + "*"
+             + groups["长度"].astype(str) + "*" + groups["总数"].astype(str))
+    last_item = ~groups["_塔"].duplicated(keep="last")  # 各塔最后一项后面不加、
+    merged = items.where(last_item, items + "、").groupby(groups["_塔"], sort=True).sum()
+
+    # 第四步：拼成结果表（已按原始顺序）
+    result_df = pd.DataFrame({"塔号": towers})
+    for column in LEG_COLUMNS:
+        leg = column[2:]
+        result_df[column] = leg_table[leg].fillna("") if leg in leg_table else ""
+
+    # A~D 以外的腿号单独成列（没有该腿的塔留空）；列的位置与逐塔拼字典时一致：
+    # 按塔号排序后第一座塔带的排在“合并”前面，其余的依次排在最后
+    extra = legs.loc[~legs["塔腿"].isin([c[2:] for c in LEG_COLUMNS])]
+    # 排名用 factorize(sort=True)：与 groupby 排序规则相同，塔号混有数字和文字时也能排（数字在前）
+    sorted_rank = pd.Series(pd.factorize(towers, sort=True)[0])
+    extra = extra.assign(_序=extra["_塔"].map(sorted_rank)).sort_values("_序", kind="stable")
+    extra = extra.drop_duplicates("塔腿")
+    for leg in extra.loc[extra["_序"] == 0, "塔腿"]:
+        result_df[f"塔腿{leg}"] = leg_table[leg].values
+    result_df["合并"] = merged.reindex(range(len(towers))).values
+    for leg in extra.loc[extra["_序"] != 0, "塔腿"]:
+        result_df[f"塔腿{leg}"] = leg_table[leg].values
+    return result_df
+
+
+def bill_of_materials(rows):
+    """
+    钢筋材料汇总（所有塔、所有腿一次算完）
+    :param rows: clean_rebar_data 清洗后的全部行（同一条腿有几种规格 / 长度就有几行，都要计入）；
+                 多个来源拼在一起时带“来源”列
+    :return: [(表名, 表)]：材料汇总、分塔小计、规格×塔腿
+    """
+    data = rows.assign(规格=rows["规格"].astype(str), 总长度=rows["长度(mm)"] * rows["数量"] / 1000)
+
+    # 1. 材料汇总：规格×长度
+    bom = (data.groupby(["规格", "长度(mm)"], sort=True)
+           .agg(根数=("数量", "sum"), 总长度=("总长度", "sum")).reset_index())
+
+    # 2. 分塔小计：每塔各规格根数 + 合计（塔号按首次出现的顺序；多个来源时按来源区分同名塔号）
+    tower_keys = ["来源", "塔号"] if "来源" in data else ["塔号"]
+    data["_序"] = data.groupby(tower_keys, sort=False).ngroup()
+    per_tower = data.pivot_table(index="_序", columns="规格", values="数量", aggfunc="sum", fill_value=0)
+    per_tower.columns = [f"{spec} 根数" for spec in per_tower.columns]
+    totals = data.groupby("_序").agg(根数=("数量", "sum"), 总长度=("总长度", "sum"))
+    names = data.drop_duplicates("_序").set_index("_序")[tower_keys]
+    per_tower = pd.concat([names, per_tower, totals], axis=1).reset_index(drop=True)
+
+    # 3. 规格×塔腿：各规格在每条腿上的根数
+    cross = data.pivot_table(index="规格", columns="塔腿", values="数量", aggfunc="sum", fill_value=0)
+    cross.columns = [f"{leg}腿" for leg in cross.columns]
+    cross = cross.join(data.groupby("规格").agg(根数=("数量", "sum"), 总长度=("总长度", "sum"))).reset_index()
+
+    tables = []
+    for name, table in (("材料汇总", bom), ("分塔小计", per_tower), ("规格×塔腿", cross)):
+        table = table.rename(columns={"总长度": "总长度(m)"})
+        table["总长度(m)"] = table["总长度(m)"].round(3)
+        tables.append((name, table))
+    return tables
+
+
+def find_workbooks(input_path):
+    """输入路径 → 工作簿列表（单个文件 / 文件夹 / 通配符），跳过 Excel 打开时留下的 ~$ 临时文件"""
+    if os.path.isdir(input_path):
+        paths = [os.path.join(input_path, name) for name in os.listdir(input_path)]
+    elif os.path.isfile(input_path):
+        paths = [input_path]
+    else:
+        paths = glob.glob(input_path)
+    return sorted(p for p in paths
+                  if p.lower().endswith((".xlsx", ".xls")) and not os.path.basename(p).startswith("~$"))
+
+
+def merge_workbook(path):
+    """
+    处理一个工作簿的全部工作表（进程池里执行）
+    :return: (已合并的 [(工作表名, 结果表)], 跳过的 [(工作表名, 原因)], 各工作表清洗后的数据 [(工作表名, 数据)])
+    """
+    results, skipped, rows_list = [], [], []
+    for sheet_name, sheet in pd.read_excel(path, sheet_name=None).items():
+        sheet.columns = [c.strip() if isinstance(c, str) else c for c in sheet.columns]
+        missing = [c for c in CORE_COLUMNS if c not in sheet.columns]
+        if missing:
+            skipped.append((sheet_name, f"缺少列 {missing}"))
+            continue
+        df = clean_rebar_data(sheet)
+        if df.empty:
+            skipped.append((sheet_name, "没有有效数据"))
+            continue
+        results.append((sheet_name, merge_rebar(tower_legs(df))))
+        rows_list.append((sheet_name, df))
+    return results, skipped, rows_list if BOM_SHEETS else []
+
+
+def combined_rows(sources):
+    """把多个来源清洗后的数据拼在一起（只有一个来源时不加“来源”列）"""
+    if len(sources) == 1:
+        return sources[0][1]
+    return pd.concat([rows.assign(来源=name) for name, rows in sources], ignore_index=True)
+
+
+def per_file_output(path):
+    """per_file 模式下一个输入工作簿对应的输出路径"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(OUTPUT_DIR, f"整理后_{stem}.xlsx")  # csv / parquet 时按工作表拆成多个文件
+
+
+def merge_and_save(path):
+    """per_file 模式：处理一个工作簿并直接在进程里写出结果（结果表不用再传回主进程）"""
+    results, skipped, rows_list = merge_workbook(path)
+    sheets = results + (bill_of_materials(combined_rows(rows_list)) if rows_list else [])
+    written = write_results(per_file_output(path), sheets) if results else []
+    return [(name, len(df)) for name, df in results], skipped, written
+
+
+def excel_sheet_name(name, used):
+    """Excel 工作表名：去掉非法字符、不超过 31 个字、不重名"""
+    base = re.sub(r"[\\/?*\[\]:]", "_", str(name)).strip("'") or "Sheet"
+    candidate, n = base[:31], 1
+    while candidate.lower() in used:
+        n += 1
+        suffix = f"_{n}"
+        candidate = base[:31 - len(suffix)] + suffix
+    used.add(candidate.lower())
+    return candidate
+
+
+def write_results(output_path, sheets):
+    """
+    按 OUTPUT_FORMAT 写出结果
+    :param output_path: xlsx 输出路径（csv / parquet 时由它派生出每个工作表的文件名）
+    :param sheets: [(工作表名, 结果表)]
+    :return: 实际写出的文件路径列表
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    used = set()
+    sheets = [(excel_sheet_name(name, used), df) for name, df in sheets]
+    if OUTPUT_FORMAT == "xlsx":
+        write_xlsx(output_path, sheets)
+        return [output_path]
+
+    if OUTPUT_FORMAT not in ("csv", "parquet"):
+        raise ValueError(f"不支持的输出格式：{OUTPUT_FORMAT}（可选 xlsx / csv / parquet）")
+    stem = os.path.splitext(output_path)[0]
+    written = []
+    for name, df in sheets:
+        path = f"{stem}.{OUTPUT_FORMAT}" if len(sheets) == 1 else f"{stem}_{name}.{OUTPUT_FORMAT}"
+        if OUTPUT_FORMAT == "csv":
+            df.to_csv(path, index=False, encoding="utf-8-sig")
+        else:
+            df.to_parquet(path, index=False)
+        written.append(path)
+    return written
+
+
+def current_settings():
+    """当前的配置项（全部大写的模块变量，含配置文件 / --set 改过的值），用于传给子进程"""
+    return {name: value for name, value in globals().items() if name.isupper()}
+
+
+def _init_worker(settings):
+    """
+    子进程初始化：套用主进程的配置
+    （spawn 方式启动的子进程——macOS / Windows 的默认方式——会重新导入本脚本，拿到的是上面写死的默认值）
+    """
+    globals().update(settings)
+
+
+def run_batch(paths, task, workers):
+    """逐个（或在进程池里并行）执行 task(工作簿)，按完成顺序产出 (工作簿, 结果, 异常)"""
+    if workers == 1 or len(paths) == 1:
+        for path in paths:
+            try:
+                yield path, task(path), None
+            except Exception as e:
+                yield path, None, e
+        return
+    with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(paths)),
+                             initializer=_init_worker, initargs=(current_settings(),)) as pool:
+        futures = {pool.submit(task, path): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
+
+
+def main():
+    if OUTPUT_FORMAT == "parquet" and not any(importlib.util.find_spec(m) for m in ("pyarrow", "fastparquet")):
+        print("❌ 输出 parquet 需要先安装 pyarrow（pip install pyarrow），或把 OUTPUT_FORMAT 改成 xlsx / csv")
+        return
+    paths = find_workbooks(INPUT_PATH)
+    if not paths:
+        print(f"❌ 没有找到要处理的工作簿：{INPUT_PATH}")
+        return
+    print(f"📄 共 {len(paths)} 个工作簿，开始处理...")
+
+    per_file = OUTPUT_MODE == "per_file"
+    task = merge_and_save if per_file else merge_workbook
+    collected = {}  # single 模式：{工作簿: 结果}，最后按输入顺序写出
+    for path, result, error in run_batch(paths, task, WORKERS):
+        name = os.path.basename(path)
+        if error is not None:
+            print(f"  ❌ {name} 处理失败: {error}")
+            continue
+        results, skipped = result[:2]
+        for sheet_name, reason in skipped:
+            print(f"  ⚠️ {name} [{sheet_name}] 已跳过：{reason}")
+        if per_file:
+            if results:
+                print(f"  ✅ {name}：{len(results)} 个工作表 → {'、'.join(result[2])}")
+        else:
+            collected[path] = result
+            print(f"  ✅ {name}：{len(results)} 个工作表")
+
+    if not per_file:
+        def source_name(path, sheet_name):
+            # 多个来源时工作表名带上工作簿名，方便区分
+            return sheet_name if len(paths) == 1 else f"{os.path.splitext(os.path.basename(path))[0]}_{sheet_name}"
+
+        sheets, sources = [], []
+        for path in paths:
+            if path in collected:
+                results, _, rows_list = collected[path]
+                sheets += [(source_name(path, name), df) for name, df in results]
+                sources += [(source_name(path, name), rows) for name, rows in rows_list]
+        if not sheets:
+            print("❌ 没有可输出的结果")
+            return
+        if sources:
+            sheets += bill_of_materials(combined_rows(sources))  # 全部来源一起汇总
+        written = write_results(OUTPUT_PATH, sheets)
+        print(f"✅ 数据整理完成！文件保存至：{'、'.join(written)}")
+
+    print("\n===== 动态合并逻辑示例 =====")
+    print("场景1：只有A腿 → A:C22*6900*28")
+    print("场景2：A+B腿规格长度相同 → AB:C22*6900*56")
+    print("场景3：A+B腿规格长度不同 → A:C22*6900*28、B:C22*7400*28")
+    print("场景4：B+C腿规格长度相同 → BC:C22*9400*56")
+    print("场景5：A+C+D腿规格长度相同 → ACD:C22*8400*84")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+测试公共设置：把 word（docfill 所在目录）和 benchmarks（合成测试素材）放进 sys.path，
+并提供按流水线名加载脚本的夹具
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in (os.path.join(ROOT, 'word'), os.path.join(ROOT, 'benchmarks')):
+    if folder not in sys.path:
+        sys.path.insert(0, folder)
+
+
+@pytest.fixture(scope='session')
+def load():
+    """按流水线名加载脚本模块（同 docfill.cli._load，但不套用配置）"""
+    from docfill.scripts import load_script, script_path
+
+    def _load(pipeline):
+        path = script_path(pipeline)
+        if pipeline == 'rebar':
+            # 钢筋合并器要从自己的目录导入 xlsx_stream
+            if os.path.dirname(path) not in sys.path:
+                sys.path.insert(0, os.path.dirname(path))
+            return load_script(path, os.path.splitext(os.path.basename(path))[0])
+        return load_script(path)
+
+    return _load
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""docfill.docxtpl_cache：编译缓存渲染出的文档与逐行 DocxTemplate(...).render(...) 一致"""
+import io
+import shutil
+import zipfile
+
+import pytest
+from docx import Document
+from docxtpl import DocxTemplate
+
+import synthetic
+from docfill.docxtpl_cache import CACHE_DIR_NAME, CompiledDocxTemplate
+
+# 渲染后要比较的部件：正文、页眉页脚、文档属性
+PARTS = ('word/document.xml', 'word/header1.xml', 'word/footer1.xml', 'docProps/core.xml')
+
+
+@pytest.fixture(scope='module')
+def master(tmp_path_factory):
+    """灌注桩记录表模板，页眉、页脚、文档属性里也放上标签（生成一次，各测试各拷一份）"""
+    path = str(tmp_path_factory.mktemp('master') / 'pile.docx')
+    synthetic.make_pile_template(path, synthetic.PILE_TEMPLATE_FIELDS)
+    doc = Document(path)
+    section = doc.sections[0]
+    section.header.paragraphs[0].text = '{{ 杆塔型 }} 检查记录'
+    section.footer.paragraphs[0].text = '施工日期：{{ 施工日期 }}'
+    doc.core_properties.title = '{{ 设计桩号 }}'
+    doc.core_properties.subject = '{% if 间距 %}间距 {{ 间距 }}{% endif %}'
+    doc.add_paragraph('{% for item in 备注 %}{{ item }}；{% endfor %}')
+    doc.save(path)
+    return path
+
+
+def _template(master, tmp_path):
+    return shutil.copy(master, str(tmp_path / 'pile.docx'))
+
+
+def _contexts(rows):
+    contexts = synthetic.station_frame(rows).astype(str).to_dict('records')
+    for pos, context in enumerate(contexts):
+        context['备注'] = [f'第{pos}行', '换行\n制表\t']  # 换行、制表符由 docxtpl 展开成 Word 的换行和制表
+    return contexts
+
+
+def _parts(tpl):
+    buffer = io.BytesIO()
+    tpl.save(buffer)
+    with zipfile.ZipFile(buffer) as zf:
+        return {name: zf.read(name) for name in PARTS}
+
+
+@pytest.mark.parametrize('disk_cache', [False, True])
+def test_matches_docxtpl(master, tmp_path, disk_cache):
+    """逐行结果与 DocxTemplate.render 相同；第二次运行从磁盘缓存加载，结果仍相同"""
+    path = _template(master, tmp_path)
+    contexts = _contexts(6)
+    expected = []
+    for context in contexts:
+        tpl = DocxTemplate(path)
+        tpl.render(context)
+        expected.append(_parts(tpl))
+
+    compiled = CompiledDocxTemplate(path, disk_cache=disk_cache)
+    assert not compiled.loaded_from_disk
+    assert [_parts(compiled.render(context)) for context in contexts] == expected
+
+    reloaded = CompiledDocxTemplate(path, disk_cache=disk_cache)
+    assert reloaded.loaded_from_disk == disk_cache
+    assert (tmp_path / CACHE_DIR_NAME).exists() == disk_cache
+    assert [_parts(reloaded.render(context)) for context in contexts] == expected
+
+
+def test_documents_are_independent(master, tmp_path):
+    """先渲染好几份再统一保存：每份都是自己那一行的内容"""
+    path = _template(master, tmp_path)
+    contexts = _contexts(3)
+    compiled = CompiledDocxTemplate(path, disk_cache=False)
+    docs = [compiled.render(context) for context in contexts]
+    assert len({id(doc) for doc in docs}) == len(docs)
+    for doc, context in zip(docs, contexts):
+        tpl = DocxTemplate(path)
+        tpl.render(context)
+        assert _parts(doc) == _parts(tpl)
+
+
+def test_patch_once_and_stale_cache(master, tmp_path, monkeypatch):
+    """patch_xml 每个部件只整理一次；模板改过之后旧的字节码缓存被清掉，不会误用"""
+    path = _template(master, tmp_path)
+    calls = []
+    original = DocxTemplate.patch_xml
+    monkeypatch.setattr(DocxTemplate, 'patch_xml', lambda self, xml: calls.append(xml) or original(self, xml))
+    compiled = CompiledDocxTemplate(path, disk_cache=True)
+    for context in _contexts(4):
+        compiled.render(context)
+    assert len(calls) == len(set(calls))
+
+    folder = tmp_path / CACHE_DIR_NAME
+    stale = sorted(p.name for p in folder.iterdir())
+    assert stale
+    doc = Document(path)
+    doc.add_paragraph('{{ 设计桩号 }}')
+    doc.save(path)
+    changed = CompiledDocxTemplate(path, disk_cache=True)
+    assert not changed.loaded_from_disk
+    assert not set(stale) & {p.name for p in folder.iterdir()}
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""docfill.excel_source：缓存、流式读取与 pd.read_excel 的结果一致"""
+import datetime
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+from pandas._libs.parsers import STR_NA_VALUES as PANDAS_NA_VALUES
+
+import synthetic
+from docfill import excel_source
+from docfill.excel_source import STR_NA_VALUES, ExcelSource, SheetStream
+
+# 各种取值混在一起的列：read_excel 会推断成 int64 / float64 / bool / datetime64 / str / object
+MIXED_COLUMNS = {
+    '整数': [1, 2, 3, 4, 5, 6],
+    '整数带空': [1, 2, None, 4, 5, 6],
+    '小数': [1.5, 2, 3, 4, 5, 6.25],
+    '数字文本': ['3.10', 2, 3, ' 4 ', 5, 6],
+    '混合': ['a', 2, 3.0, None, datetime.datetime(2026, 1, 1), datetime.time(8, 30)],
+    '布尔': [True, False, None, True, True, False],
+    '布尔文本': ['True', False, True, 'false', True, True],
+    '日期': [datetime.datetime(2026, 1, 1), None, datetime.datetime(2026, 1, 3), None, None,
+             datetime.datetime(2026, 1, 6, 12)],
+    '日期混文本': [datetime.datetime(2026, 1, 1), 'x', None, datetime.datetime(2026, 1, 4), '/', None],
+    '空值文本': ['N/A', 'NULL', 3, None, '#N/A', 'nan'],
+    '全空': [None] * 6,
+    '文本': ['N1', 'N2', 'N3', 'N4', 'N5', 'N6'],
+    3: ['数字表头', None, 'x', 'y', 'z', 'w'],
+}
+
+
+def _write(path, columns, rows=None):
+    book = Workbook()
+    sheet = book.active
+    sheet.append(list(columns))
+    for i in range(rows or len(next(iter(columns.values())))):
+        sheet.append([values[i % len(values)] for values in columns.values()])
+    book.save(path)
+    return path
+
+
+def _assert_same(left, right):
+    """表完全相同：列名、dtype、逐格的值和值的类型"""
+    pd.testing.assert_frame_equal(left, right)
+    for col in left:
+        assert [type(v) for v in left[col]] == [type(v) for v in right[col]], col
+
+
+def test_na_values_match_pandas():
+    """照抄的空值文本清单与所装 pandas 的默认清单相同"""
+    assert STR_NA_VALUES == PANDAS_NA_VALUES
+
+
+@pytest.mark.parametrize('columns', [None, ['数字文本', '日期', 3]])
+def test_cache_round_trip(tmp_path, columns):
+    path = _write(tmp_path / 'mixed.xlsx', MIXED_COLUMNS)
+    first = ExcelSource(path, cache=True)
+    df, header = first.read(0, columns)
+    assert first.cache_hits == 0
+
+    cached = ExcelSource(path, cache=True)
+    df_cached, header_cached = cached.read(0, columns)
+    assert cached.cache_hits == 1
+    assert header_cached == header
+    _assert_same(df_cached, df)
+    wanted = None if columns is None else {str(c) for c in columns}
+    _assert_same(df, pd.read_excel(path, usecols=None if wanted is None else lambda c: str(c) in wanted))
+
+
+def test_cache_is_json_and_bounded(tmp_path):
+    path = synthetic.make_station_workbook(tmp_path / 'stations.xlsx', 20)
+    source = ExcelSource(path, cache=True)
+    names = list(synthetic.station_frame(1).columns)
+    for i in range(excel_source.CACHE_MAX_FRAMES + 3):
+        source.read('Sheet2', names[:i + 1])
+    with open(source.cache_path, encoding='utf-8') as f:
+        entry = json.load(f)
+    assert len(entry['frames']) == excel_source.CACHE_MAX_FRAMES
+    assert entry['frames'][-1][1] == sorted(names[:excel_source.CACHE_MAX_FRAMES + 3])
+
+
+def test_cache_off_by_default(tmp_path):
+    path = synthetic.make_station_workbook(tmp_path / 'stations.xlsx', 5)
+    ExcelSource(path).read('Sheet2')
+    assert not (tmp_path / excel_source.CACHE_DIR_NAME).exists()
+
+
+def test_stale_cache_ignored(tmp_path):
+    path = synthetic.make_station_workbook(tmp_path / 'stations.xlsx', 5)
+    ExcelSource(path, cache=True).read('Sheet2')
+    synthetic.make_station_workbook(path, 8)
+    source = ExcelSource(path, cache=True)
+    assert len(source.read('Sheet2')[0]) == 8
+    assert source.cache_hits == 0
+
+
+def _streamed(path, columns=None, chunk_size=4, **kwargs):
+    stream = SheetStream(path, 0, columns, chunk_size, **kwargs)
+    return pd.concat(list(stream))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 4, 5, 100])
+def test_stream_matches_read_excel(tmp_path, chunk_size):
+    """逐块读出的表拼起来与 read_excel 读整张表完全相同（dtype、值、值的类型）"""
+    path = _write(tmp_path / 'mixed.xlsx', MIXED_COLUMNS, rows=11)
+    _assert_same(_streamed(path, chunk_size=chunk_size), pd.read_excel(path))
+
+
+def test_stream_matches_read_excel_random(tmp_path):
+    """随机拼出的列（每列从一组值里抽）：每块的类型都按整列推断"""
+    pool = [1, -3, 2.5, 0.0, '', None, 'N/A', '3.10', ' 7 ', '1e3', 'abc', True, False, 'true', 'FALSE',
+            datetime.datetime(2026, 3, 4), datetime.date(2026, 3, 5), datetime.time(8, 0), 'inf']
+    rng = np.random.default_rng(synthetic.SEED)
+    columns = {}
+    for i in range(60):
+        choices = rng.choice(len(pool), size=rng.integers(1, 4), replace=False)
+        columns[f'列{i}'] = [pool[j] for j in rng.choice(choices, size=13)]
+    path = _write(tmp_path / 'random.xlsx', columns)
+    _assert_same(_streamed(path, chunk_size=3), pd.read_excel(path))
+
+
+def test_stream_columns_and_blank_rows(tmp_path):
+    """只取部分列；中间的空行保留、末尾的空行忽略（同 read_excel）"""
+    book = Workbook()
+    sheet = book.active
+    sheet.append([' 桩号 ', '高', None, '备注'])
+    for row in [['N1', 1], [None, None], ['N2', 2.5], ['N3', None, None, 'x'], [None], [None]]:
+        sheet.append(row)
+    path = tmp_path / 'blank.xlsx'
+    book.save(path)
+    expected = pd.read_excel(path)
+    expected.columns = [c.strip() for c in expected.columns]
+    _assert_same(_streamed(path, chunk_size=2), expected)
+    _assert_same(_streamed(path, ['桩号', '高'], 2), expected[['桩号', '高']])
+
+
+def test_stream_duplicates_found_before_iterating(tmp_path):
+    """重复主键在开始产出数据之前就能查到；数字列里 "1" 和 1 算同一个；可按行区间过滤"""
+    path = _write(tmp_path / 'keys.xlsx', {'桩号': ['N1', 'N2', 'N1', None, 'N3', 'N2', 'N1'], '值': [1] * 7})
+    stream = SheetStream(path, 0, None, 2, key='桩号')
+    assert stream.duplicates() == {'N1': 3, 'N2': 2}
+    assert stream.duplicates(1, 6) == {'N2': 2}
+    assert stream.duplicates(3) == {}
+    reused = SheetStream(path, 0, None, 2, key='桩号', layout=stream.layout)
+    _assert_same(pd.concat(list(reused)), pd.read_excel(path))
+
+    path = _write(tmp_path / 'numbers.xlsx', {'桩号': [1, '1', 2.5, '2.5', 3], '值': [1] * 5})
+    assert SheetStream(path, 0, None, 2, key='桩号').duplicates() == {1.0: 2, 2.5: 2}
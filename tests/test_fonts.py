@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""docfill.fonts：预先搭好的 rPr 与原来逐个 run 设置字体、字号的 XML 完全一致"""
+import pytest
+from docx import Document
+from docx.enum.text import WD_COLOR_INDEX
+from docx.oxml.ns import qn
+from docx.shared import Pt, RGBColor
+
+from docfill.fonts import FontStyle, font_style
+
+
+def _old_way(run, name, size):
+    """原来每个 run 的设置方式"""
+    run.font.size = size
+    run.font.name = name
+    run._element.rPr.rFonts.set(qn('w:eastAsia'), name)
+
+
+def _runs(doc):
+    """各种起始状态的 run"""
+    p = doc.add_paragraph()
+    p.add_run('新 run，没有 rPr')
+    p.add_run('加粗').bold = True
+    other = p.add_run('别的字体、字号、颜色')
+    other.font.name = 'Arial'
+    other.font.size = Pt(12)
+    other.font.color.rgb = RGBColor(0xFF, 0, 0)
+    done = p.add_run('已经是宋体10号')
+    _old_way(done, '宋体', Pt(10))
+    half = p.add_run('只有西文字体')
+    half.font.name = '宋体'
+    size_only = p.add_run('只有字号')
+    size_only.font.size = Pt(10)
+    hint = p.add_run('带 hint 和高亮')
+    hint.font.highlight_color = WD_COLOR_INDEX.YELLOW
+    _old_way(hint, '宋体', Pt(10))
+    hint._element.rPr.rFonts.set(qn('w:hint'), 'eastAsia')
+    empty = p.add_run('空 rPr')
+    empty._element.get_or_add_rPr()
+    return p.runs
+
+
+@pytest.mark.parametrize('name, size', [('宋体', Pt(10)), ('仿宋_GB2312', Pt(10.5)), ('宋体', None)])
+def test_same_xml_as_old_way(name, size):
+    """每种起始状态的 run 套上格式后，XML 与原来逐项设置的结果相同"""
+    doc = Document()
+    runs = _runs(doc)
+    style = FontStyle(name, size)
+    for run in runs:
+        style.apply(run)
+
+    expected = Document()
+    for run in _runs(expected):
+        _old_way(run, name, size)
+    assert [r._element.xml for r in runs] == [r._element.xml for r in expected.paragraphs[0].runs]
+
+
+def test_clones_are_independent():
+    """每个 run 拿到的是自己的一份 rPr，改一个不影响别的"""
+    doc = Document()
+    style = font_style('宋体', Pt(10))
+    assert font_style('宋体', Pt(10)) is style
+    first, second = doc.add_paragraph().add_run('甲'), doc.add_paragraph().add_run('乙')
+    style.apply(first)
+    style.apply(second)
+    first.bold = True
+    assert second.bold is None
+    assert second._element.rPr is not first._element.rPr
+    third = doc.add_paragraph().add_run('丙')
+    style.apply(third)
+    assert third._element.rPr.xml == second._element.rPr.xml
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""docfill.formatting：整列格式化与脚本原来的逐格函数结果一致"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import synthetic
+from docfill.excel_source import SheetStream, fill_columns
+from docfill.formatting import context_records, format_frame
+
+CHUNK_ROWS = 7
+
+# 各种“非常规”单元格：整数、浮点、数字文本、空文本、中文、日期对象、Excel 日期序列号、日期文本、布尔、超大数
+ODD_VALUES = [
+    1, 2.0, 2.5, 0.1 + 0.2, -0.0, 1e20, 12345678901234567890, '3.10', ' 4 ', '', '   ', 'nan', 'NaN', '不适用',
+    datetime(2026, 3, 4), pd.Timestamp('2026-03-05 08:30'), 45000, 45000.5, '45000', '99999999', '1.2.3',
+    '2026/3/4', '2026年3月4日', '2026-03-04 10:30:00', '3/4/2026', '2026年3月施工', True, False, np.nan, None,
+]
+
+
+def _make_filler(module, tmp_path):
+    config = module.Config()
+    config.OUTPUT_FOLDER = str(tmp_path / 'out')
+    config.STAGE_TIMING = False
+    return module.WordFiller(config)
+
+
+@pytest.fixture
+def filler(load, tmp_path):
+    """word03 的 WordFiller（输出文件夹放在临时目录）"""
+    return _make_filler(load('word03'), tmp_path)
+
+
+def _per_cell(filler, df):
+    """逐格函数的结果（改成整列格式化之前的做法）"""
+    config = filler.config
+    return {col: [filler._format_cell_value(col, value, config) for value in df[col]]
+            for col in filler._text_columns() if col in df}
+
+
+def _chunks(df, size):
+    return [df.iloc[start:start + size] for start in range(0, len(df), size)]
+
+
+@pytest.mark.parametrize('blank_rows', [slice(None), slice(0, CHUNK_ROWS + 3)])
+def test_blank_date_column(filler, tmp_path, blank_rows):
+    """日期列整列（或某几块里整块）为空：一次性读和按块读都填 "/"，不报错"""
+    df = synthetic.station_frame(30)
+    df['施工日期'] = df['施工日期'].astype(object)
+    df.loc[df.index[blank_rows], '施工日期'] = np.nan
+    if blank_rows == slice(None):
+        df['施工日期'] = df['施工日期'].astype('float64')  # 整列空白时 read_excel 读出来就是 float64
+    expected = _per_cell(filler, df)
+    columns = filler._text_columns()
+
+    texts = format_frame(df, columns, filler.config, filler._format_cell_value)
+    assert {col: texts[col].tolist() for col in expected} == expected
+
+    chunked = pd.concat([format_frame(chunk, columns, filler.config, filler._format_cell_value)
+                         for chunk in _chunks(df, CHUNK_ROWS)])
+    assert {col: chunked[col].tolist() for col in expected} == expected
+
+    path = tmp_path / 'stations.xlsx'
+    df.to_excel(path, index=False)
+    stream = SheetStream(path, 0, fill_columns(filler.config), CHUNK_ROWS)
+    streamed = pd.concat([format_frame(chunk, columns, filler.config, filler._format_cell_value)
+                          for chunk in stream])
+    assert streamed['施工日期'].tolist()[blank_rows] == expected['施工日期'][blank_rows]
+
+
+def _odd_frame():
+    """合成检查记录数据 + 每种非常规值在日期列、去零列、带单位列、普通列里各出现一次"""
+    df = synthetic.station_frame(len(ODD_VALUES))
+    odd = pd.Series(ODD_VALUES, dtype=object)
+    for col in ('检查日期', '塔全高', '放线前', '编号'):
+        df[col] = odd
+    return df
+
+
+@pytest.mark.parametrize('pipeline, unit_for_all', [('word02', False), ('word03', True)])
+def test_format_frame_matches_per_cell(load, tmp_path, pipeline, unit_for_all):
+    filler = _make_filler(load(pipeline), tmp_path)
+    config = filler.config
+    config.OPTIMIZE_DECIMAL_COLUMNS = ['呼称高', '塔全高']
+    df = _odd_frame()
+    expected = _per_cell(filler, df)
+
+    texts = format_frame(df, filler._text_columns(), config, filler._format_cell_value, unit_for_all=unit_for_all)
+    assert {col: texts[col].tolist() for col in expected} == expected
+
+
+def test_context_records_matches_process_data(load):
+    module = load('tongyong')
+    df = _odd_frame()
+    df['根设AB'] = pd.Series(ODD_VALUES, dtype=object)  # 强制取整列
+    df['桩径'] = pd.Series(ODD_VALUES, dtype=object)
+
+    records, errors = context_records(df, module.INT_COLUMNS, module.DATE_FORMAT_STR, module.process_data)
+    assert len(records) == len(df)
+    for position, row in enumerate(df.itertuples(index=False)):
+        try:
+            expected = {col: module.process_data(col, value) for col, value in zip(df.columns, row)}
+        except Exception as e:
+            assert type(errors[position]) is type(e)
+            continue
+        assert position not in errors
+        # docxtpl 按 str() 渲染，2 和 2.0 要区分开
+        assert {k: repr(v) for k, v in records[position].items()} == {k: repr(v) for k, v in expected.items()}
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""docfill.group_index：重复主键的三种处理方式、空主键、首次出现顺序"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from docfill.group_index import GroupIndex, StationStream, last_positions
+
+
+def _frame():
+    return pd.DataFrame({
+        '桩号': ['N3', 'N1', np.nan, 'N3', '', 'N2', None, 'N1', '  ', 'N3'],
+        '值': list(range(10)),
+    })
+
+
+def test_first_appearance_order():
+    """主键按首次出现的顺序排列，每个主键的行保持原始顺序"""
+    index = GroupIndex(_frame(), '桩号')
+    assert index.keys == ['N3', 'N1', '', 'N2', '  ']
+    assert index.positions('N3').tolist() == [0, 3, 9]
+    assert index.positions('N1').tolist() == [1, 7]
+    assert index.rows('N3')['值'].tolist() == [0, 3, 9]
+    assert len(index) == 5 and 'N2' in index and 'N4' not in index
+
+
+def test_missing_and_blank_keys():
+    """NaN / None 不算主键，只计入 missing_count；空字符串和空格照常分组，交给调用方判断"""
+    index = GroupIndex(_frame(), '桩号')
+    assert index.missing_count == 2
+    assert not any(pd.isna(key) for key in index.keys)
+    assert index.row('')['值'] == 4 and index.row('  ')['值'] == 8
+
+    empty = GroupIndex(pd.DataFrame({'桩号': [np.nan, None], '值': [1, 2]}), '桩号')
+    assert empty.keys == [] and empty.missing_count == 2 and empty.duplicates == {}
+
+
+@pytest.mark.parametrize('policy, expected', [('first', {'N3': 0, 'N1': 1, 'N2': 5}),
+                                              ('last', {'N3': 9, 'N1': 7, 'N2': 5})])
+def test_duplicate_policy(policy, expected, capsys):
+    """'first' 取第一行、'last' 取最后一行，并播报重复主键"""
+    index = GroupIndex(_frame(), '桩号', policy)
+    assert {key: index.row(key)['值'] for key in expected} == expected
+    assert index.check_duplicates() == {'N3': 3, 'N1': 2}
+    which = '第一行' if policy == 'first' else '最后一行'
+    assert f"按{which}生成）：N3×3、N1×2" in capsys.readouterr().out
+
+
+def test_duplicate_policy_error():
+    """'error'：播报时列出全部重复主键，取重复主键的行时报错，不重复的主键照常取"""
+    index = GroupIndex(_frame(), '桩号', 'error')
+    with pytest.raises(ValueError, match='N3×3、N1×2'):
+        index.check_duplicates()
+    with pytest.raises(ValueError, match='N1'):
+        index.row('N1')
+    assert index.row('N2')['值'] == 5
+    with pytest.raises(ValueError):
+        GroupIndex(_frame(), '桩号', 'middle')
+
+
+def test_station_stream_matches_index():
+    """流式版与 GroupIndex('first') 的主键顺序、空主键数和重复主键一致"""
+    df = _frame()
+    chunks = [df.iloc[start:start + 3] for start in range(0, len(df), 3)]
+    stream = StationStream(chunks, '桩号', 'first', lambda chunk: chunk.astype(str))
+    rows = list(stream)
+    index = GroupIndex(df, '桩号', 'first')
+    assert [key for key, _ in rows] == index.keys
+    assert [row['值'] for _, row in rows] == [str(index.row(key)['值']) for key in index.keys]
+    assert stream.missing_count == index.missing_count
+    assert stream.duplicates == index.duplicates
+    with pytest.raises(ValueError):
+        StationStream(chunks, '桩号', 'last', str)
+
+
+def test_last_positions():
+    """同名以最后一次出现为准，顺序按首次出现"""
+    last, duplicates = last_positions(['N1', 'N2', 'N1', 'N3', 'N1'])
+    assert list(last.items()) == [('N1', 4), ('N2', 1), ('N3', 3)]
+    assert duplicates == {'N1': 3}
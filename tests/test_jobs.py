@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""docfill.parallel：任务成败以 process_single_station 的返回值为准，不看控制台文字"""
+import json
+import os
+
+import synthetic
+from docfill.journal import RunJournal
+from docfill.manifest import BuildManifest
+from docfill.parallel import run_jobs
+from docfill.session import FillerSession
+
+
+def _make_filler(module, tmp_path):
+    config = module.Config()
+    config.OUTPUT_FOLDER = str(tmp_path / 'out')
+    config.STAGE_TIMING = False
+    config.TABLE_CELL_MAP = synthetic.TOWER_TABLE_CELL_MAP
+    config.PLACEHOLDER_MAP = synthetic.TOWER_PLACEHOLDER_MAP
+    if hasattr(config, 'KEYWORD_APPEND_MAP'):
+        config.KEYWORD_APPEND_MAP = synthetic.TOWER_KEYWORD_APPEND_MAP
+    return module.WordFiller(config)
+
+
+def test_job_status(load, tmp_path):
+    """桩号里带“❌ 失败”字样的任务照样算成功；模板打不开的任务带着失败原因返回"""
+    filler = _make_filler(load('word03'), tmp_path)
+    template = str(tmp_path / 'tower.docx')
+    synthetic.make_tower_template(template)
+    broken = tmp_path / 'broken.docx'
+    broken.write_bytes(b'not a docx')
+    row = synthetic.station_frame(1).iloc[0].to_dict()
+    jobs = [(template, '❌ 失败-1', row), (str(broken), 'N2', row)]
+
+    manifest = BuildManifest(filler.config.OUTPUT_FOLDER, filler.config)
+    selected = list(manifest.select(jobs, filler._output_path))
+    results = list(run_jobs(filler, selected, 1, None))
+
+    assert results[0][1] is None and '✅' in results[0][0]
+    assert results[1][1] and '❌' in results[1][0]
+    for job, (_, error) in zip(selected, results):
+        manifest.update(job, error)
+    assert manifest.rendered == 1
+    assert manifest.is_current(filler._output_path('❌ 失败-1'), manifest.job_digest(template, row))
+
+
+def test_session_status(load, tmp_path):
+    """常驻会话同样按返回值判断成败"""
+    module = load('word02')
+    filler = _make_filler(module, tmp_path)
+    template = str(tmp_path / 'tower.docx')
+    synthetic.make_tower_template(template)
+    session = FillerSession(module, filler.config)
+    row = synthetic.station_frame(1).iloc[0].to_dict()
+    session.rows = {'❌ 失败-1': ('❌ 失败-1', row)}
+
+    result = session.render_one(template, '❌ 失败-1')
+    assert result['ok'] and os.path.exists(result['output'])
+    assert not session.render_one(str(tmp_path / 'missing.docx'), '❌ 失败-1')['ok']
+
+
+def test_manifest_tracks_code(load, tmp_path):
+    """脚本（格式化函数所在）改过之后，同样的数据和模板也要重新生成"""
+    filler = _make_filler(load('word03'), tmp_path)
+    template = str(tmp_path / 'tower.docx')
+    synthetic.make_tower_template(template)
+    row = {'设计桩号': 'N1'}
+    script = tmp_path / 'script.py'
+    script.write_text('VERSION = 1\n', encoding='utf-8')
+    before = BuildManifest(str(tmp_path), filler.config, str(script)).job_digest(template, row)
+    assert BuildManifest(str(tmp_path), filler.config, str(script)).job_digest(template, row) == before
+    script.write_text('VERSION = 2\n', encoding='utf-8')
+    assert BuildManifest(str(tmp_path), filler.config, str(script)).job_digest(template, row) != before
+
+
+def test_journal_status(load, tmp_path):
+    """运行日志的成败和失败原因取自任务结果（原因不截断，桩号里的“❌ 失败”不影响判断）"""
+    filler = _make_filler(load('word03'), tmp_path)
+    template = str(tmp_path / 'tower.docx')
+    synthetic.make_tower_template(template)
+    broken = tmp_path / 'broken.docx'
+    broken.write_bytes(b'not a docx')
+    row = synthetic.station_frame(1).iloc[0].to_dict()
+    jobs = [(template, '❌ 失败-1', row), (str(broken), 'N2', row)]
+
+    journal = RunJournal(filler.config.OUTPUT_FOLDER)
+    results = list(run_jobs(filler, jobs, 1, None))
+    for job, (_, error) in zip(jobs, results):
+        journal.update(job, error, filler._output_path(job[1]))
+    journal.close()
+
+    with open(journal.path, encoding='utf-8') as f:
+        entries = [json.loads(line) for line in f]
+    assert [entry['status'] for entry in entries] == ['ok', 'failed']
+    assert entries[0]['error'] is None and entries[1]['error'] == results[1][1]
+    resumed = RunJournal(filler.config.OUTPUT_FOLDER, resume=True)
+    assert resumed.is_done(template, '❌ 失败-1', filler._output_path('❌ 失败-1'))
+    resumed.close()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""docfill.parallel：多进程与单进程的结果一致，计时记录和压缩包内容都交回主进程"""
+import zipfile
+
+import pytest
+
+import synthetic
+from docfill.packaging import ZipPackage
+from docfill.parallel import run_jobs, stream_jobs
+
+
+def _make_filler(module, folder, output_zip):
+    config = module.Config()
+    config.OUTPUT_FOLDER = str(folder)
+    config.OUTPUT_ZIP = output_zip
+    config.STAGE_TIMING = True
+    config.TABLE_CELL_MAP = synthetic.TOWER_TABLE_CELL_MAP
+    config.PLACEHOLDER_MAP = synthetic.TOWER_PLACEHOLDER_MAP
+    config.KEYWORD_APPEND_MAP = synthetic.TOWER_KEYWORD_APPEND_MAP
+    return module.WordFiller(config)
+
+
+def _run(module, jobs, folder, workers, streaming, output_zip):
+    """按给定进程数跑一遍，返回 ([(控制台输出, 失败原因)], 计时记录, {包内路径: document.xml})"""
+    filler = _make_filler(module, folder, output_zip)
+    if output_zip:
+        filler.package = ZipPackage(folder / output_zip)
+    if streaming:
+        results = [result for _, result in stream_jobs(filler, iter(jobs), workers, module.__file__)]
+    else:
+        results = list(run_jobs(filler, jobs, workers, module.__file__))
+    entries = {}
+    if output_zip:
+        filler.package.close()
+        with zipfile.ZipFile(folder / output_zip) as zf:
+            for name in zf.namelist():
+                with zipfile.ZipFile(zf.open(name)) as docx:
+                    entries[name] = docx.read('word/document.xml')
+    records = [(r['template'], r['station'], r['status']) for r in filler.timer.records]
+    return results, records, entries
+
+
+@pytest.mark.parametrize('output_zip', ['', '结果.zip'])
+@pytest.mark.parametrize('streaming', [False, True])
+def test_workers_match_single_process(load, tmp_path, streaming, output_zip):
+    """WORKERS=2 与 WORKERS=1 的输出、失败原因、计时记录、压缩包内容都相同"""
+    module = load('word03')
+    template = str(tmp_path / 'tower.docx')
+    synthetic.make_tower_template(template)
+    broken = tmp_path / 'broken.docx'
+    broken.write_bytes(b'not a docx')
+    rows = synthetic.station_frame(5).to_dict('records')
+    jobs = [(template, row['设计桩号'], row) for row in rows]
+    jobs.insert(2, (str(broken), 'N9', rows[0]))
+
+    single = _run(module, jobs, tmp_path / 'single', 1, streaming, output_zip)
+    pooled = _run(module, jobs, tmp_path / 'pooled', 2, streaming, output_zip)
+    assert pooled == single
+
+    results, records, entries = single
+    assert [error is None for _, error in results] == [True, True, False, True, True, True]
+    assert '❌' in results[2][0] and results[2][1]
+    assert [station for _, station, _ in records] == [station for _, station, _ in jobs]
+    assert [status for _, _, status in records].count('failed') == 1
+    if output_zip:
+        assert sorted(entries) == sorted(f'tower/{row["设计桩号"]}.docx' for row in rows)
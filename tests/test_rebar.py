@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""塔基钢筋数据合并器：整表合并与原来逐塔 groupby 拼字典的结果一致"""
+from collections import defaultdict
+
+import pandas as pd
+import pytest
+
+import synthetic
+
+
+def _merge_per_tower(df):
+    """原来的做法：逐塔 groupby，逐腿拼字典，最后按塔号首次出现的顺序排序"""
+    result_data = []
+    original_tower_order = df["塔号"].drop_duplicates().tolist()
+    for tower_num, group in df.groupby("塔号"):
+        row = {"塔号": tower_num, "塔腿A": "", "塔腿B": "", "塔腿C": "", "塔腿D": ""}
+        leg_data = {}
+        for _, item in group.iterrows():
+            leg = item["塔腿"]
+            spec, length, count = item["规格"], item["长度(mm)"], item["数量"]
+            row[f"塔腿{leg}"] = f"{leg}：{spec}*{length}*{count}"
+            leg_data[leg] = (spec, length, count)
+        merge_dict = defaultdict(lambda: {"total_count": 0, "legs": []})
+        for leg, (spec, length, count) in leg_data.items():
+            merge_dict[(spec, length)]["total_count"] += count
+            merge_dict[(spec, length)]["legs"].append(leg)
+        row["合并"] = "、".join(f"{''.join(sorted(info['legs']))}:{spec}*{length}*{info['total_count']}"
+                              for (spec, length), info in merge_dict.items())
+        result_data.append(row)
+    result_df = pd.DataFrame(result_data)
+    result_df["塔号排序键"] = result_df["塔号"].map(lambda x: original_tower_order.index(x))
+    return result_df.sort_values("塔号排序键").drop("塔号排序键", axis=1).reset_index(drop=True)
+
+
+def _raw_frame():
+    """合成明细 + 同一塔腿重复出现、A~D 以外的腿号、塔号混有数字和文字"""
+    df = synthetic.rebar_frame(160)
+    df.loc[10, "塔腿"] = "a "  # 大小写、空格不一致
+    df.loc[20, "塔腿"] = "E"
+    df.loc[45, "塔腿"] = "F"
+    extra = pd.DataFrame({"塔号": [None, "N3", 7, None, 12.0, None], "塔腿": ["B", "B", "A", "E", "C", "C"],
+                          "规格": ["C22", "C28", "C22", "C22", 25, 25], "长度(mm)": [6900, 7000, 8400, 8400, 900, 900],
+                          "数量": [28, 1, 28, 28, 2, 2], "备注": ""})
+    df = pd.concat([df, extra], ignore_index=True)
+    df.loc[0, "塔号"] = 3  # 第一基塔的塔号是数字
+    return df
+
+
+@pytest.mark.parametrize("rows", [slice(None), slice(0, 48)])
+def test_merge_matches_per_tower(load, rows):
+    module = load("rebar")
+    df = module.clean_rebar_data(_raw_frame().iloc[rows])
+    expected = _merge_per_tower(df)
+    result = module.merge_rebar(module.tower_legs(df))
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_merge_mixed_tower_numbers(load):
+    """塔号混有数字和文字、又有 A~D 以外的腿号时不报错，列顺序与原来一致"""
+    module = load("rebar")
+    df = module.clean_rebar_data(pd.DataFrame({
+        "塔号": ["N2", None, 10, None, "N1", 3.0],
+        "塔腿": ["A", "E", "A", "F", "B", "G"],
+        "规格": "C22", "长度(mm)": 6900, "数量": 28,
+    }))
+    result = module.merge_rebar(module.tower_legs(df))
+    pd.testing.assert_frame_equal(result, _merge_per_tower(df), check_dtype=False)
+    assert list(result.columns) == ["塔号", "塔腿A", "塔腿B", "塔腿C", "塔腿D", "塔腿G", "合并", "塔腿F", "塔腿E"]
+
+
+def test_bill_of_materials_totals(load):
+    """材料汇总按清洗后的全部行统计：同一条腿有多种规格 / 长度时一根不少"""
+    module = load("rebar")
+    df = module.clean_rebar_data(synthetic.rebar_frame(400))
+    assert df.duplicated(["塔号", "塔腿"]).any()  # 素材里确实有一条腿多行的情况
+    expected = df.groupby(["规格", "长度(mm)"])["数量"].sum()
+
+    tables = dict(module.bill_of_materials(df))
+    bom = tables["材料汇总"].set_index(["规格", "长度(mm)"])["根数"]
+    pd.testing.assert_series_equal(bom, expected, check_names=False, check_dtype=False)
+    assert tables["分塔小计"]["根数"].sum() == df["数量"].sum()
+    assert tables["规格×塔腿"]["根数"].sum() == df["数量"].sum()
+    spec_totals = tables["规格×塔腿"].set_index("规格")["根数"]
+    pd.testing.assert_series_equal(spec_totals, df.groupby("规格")["数量"].sum(), check_names=False, check_dtype=False)
+
+
+def test_bill_of_materials_sources(load):
+    """多个来源：同名塔号按来源分开小计，总数是各来源之和"""
+    module = load("rebar")
+    df = module.clean_rebar_data(synthetic.rebar_frame(120))
+    rows = module.combined_rows([("甲", df), ("乙", df)])
+    tables = dict(module.bill_of_materials(rows))
+    assert tables["材料汇总"]["根数"].sum() == 2 * df["数量"].sum()
+    per_tower = tables["分塔小计"]
+    assert list(per_tower.columns[:2]) == ["来源", "塔号"]
+    assert len(per_tower) == 2 * df["塔号"].nunique()
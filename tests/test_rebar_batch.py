@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""塔基钢筋数据合并器的批量模式：找工作簿、工作表命名、输出方式、进程池"""
+import functools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pytest
+
+import synthetic
+
+BOM = ["材料汇总", "分塔小计", "规格×塔腿"]
+FIRST = "[甲]标段塔基础钢筋明细"  # 文件名里的 [] 不能出现在工作表名里
+SHEETS = ["N1至N20号塔基础钢筋明细表第一批次A", "N1至N20号塔基础钢筋明细表第一批次B"]  # 拼上工作簿名后超过 31 个字
+
+
+@pytest.fixture
+def rebar(load, monkeypatch):
+    """钢筋合并器模块（测试里改的配置项测完自动还原）"""
+    module = load("rebar")
+    monkeypatch.setattr(module, "WORKERS", 1)
+    monkeypatch.setattr(module, "OUTPUT_FORMAT", "xlsx")
+    monkeypatch.setattr(module, "BOM_SHEETS", True)
+    return module
+
+
+def _workbook(path, sheets):
+    """{工作表名: 行数} 的钢筋明细工作簿；行数为 None 的工作表缺少核心列"""
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for name, rows in sheets.items():
+            df = synthetic.rebar_frame(rows) if rows else pd.DataFrame({"说明": ["不是钢筋明细"]})
+            df.to_excel(writer, sheet_name=name, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    """输入文件夹：两个正常工作簿、一个打不开的、一个 Excel 临时文件和一个无关文件"""
+    folder = tmp_path / "in"
+    folder.mkdir()
+    _workbook(folder / f"{FIRST}.xlsx", {SHEETS[0]: 24, SHEETS[1]: 16, "说明": None})
+    _workbook(folder / "乙标段.xlsx", {"钢筋明细": 40})
+    (folder / "丙标段.xlsx").write_bytes(b"not a workbook")
+    (folder / f"~${FIRST}.xlsx").write_bytes(b"lock")
+    (folder / "备注.txt").write_text("x", encoding="utf-8")
+    return folder
+
+
+def test_find_workbooks(rebar, inputs):
+    """文件夹 / 通配符 / 单个文件都能找到工作簿，~$ 临时文件和非 Excel 文件跳过"""
+    names = [f"{FIRST}.xlsx", "丙标段.xlsx", "乙标段.xlsx"]
+    assert rebar.find_workbooks(str(inputs)) == [str(inputs / name) for name in names]
+    assert rebar.find_workbooks(str(inputs / "*标段*.xlsx")) == [str(inputs / name) for name in names]
+    assert rebar.find_workbooks(str(inputs / "*乙*")) == [str(inputs / "乙标段.xlsx")]
+    assert rebar.find_workbooks(str(inputs / "乙标段.xlsx")) == [str(inputs / "乙标段.xlsx")]
+    assert rebar.find_workbooks(str(inputs / "没有*.xlsx")) == []
+
+
+def test_excel_sheet_name(rebar):
+    """非法字符换成下划线、最长 31 个字、重名（不分大小写）加序号"""
+    used = set()
+    assert rebar.excel_sheet_name("N1/N2", used) == "N1_N2"
+    assert rebar.excel_sheet_name("N1:N2", used) == "N1_N2_2"
+    assert rebar.excel_sheet_name("n1_n2", used) == "n1_n2_3"
+    assert rebar.excel_sheet_name("'[塔基]'", used) == "_塔基_"
+    assert rebar.excel_sheet_name("", used) == "Sheet"
+    long = "钢" * 40
+    assert rebar.excel_sheet_name(long, used) == "钢" * 31
+    assert rebar.excel_sheet_name(long, used) == "钢" * 29 + "_2"
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_single_output(rebar, inputs, tmp_path, monkeypatch, capsys, workers):
+    """single 模式：全部来源写进一个工作簿，工作表名带工作簿名并去重；坏工作簿不影响其他工作簿"""
+    output = tmp_path / "out" / "合并.xlsx"
+    for name, value in {"INPUT_PATH": str(inputs), "OUTPUT_MODE": "single", "OUTPUT_PATH": str(output),
+                        "WORKERS": workers}.items():
+        monkeypatch.setattr(rebar, name, value)
+    rebar.main()
+    printed = capsys.readouterr().out
+    assert "丙标段.xlsx 处理失败" in printed
+    assert f"{FIRST}.xlsx [说明] 已跳过" in printed
+
+    sheets = pd.read_excel(output, sheet_name=None)
+    merged = "_甲_标段塔基础钢筋明细_N1至N20号塔基础钢筋明细表第一批"
+    assert list(sheets) == [merged, merged[:29] + "_2", "乙标段_钢筋明细"] + BOM
+    expected = rebar.merge_workbook(str(inputs / f"{FIRST}.xlsx"))[0][1][1]
+    pd.testing.assert_frame_equal(sheets[merged[:29] + "_2"], expected, check_dtype=False)
+    assert set(sheets["分塔小计"]["来源"]) == {f"{FIRST}_{SHEETS[0]}", f"{FIRST}_{SHEETS[1]}", "乙标段_钢筋明细"}
+
+
+def test_per_file_output(rebar, inputs, tmp_path, monkeypatch, capsys):
+    """per_file 模式：每个工作簿各自输出一份，坏工作簿只报失败，不留输出"""
+    out = tmp_path / "out"
+    for name, value in {"INPUT_PATH": str(inputs), "OUTPUT_MODE": "per_file", "OUTPUT_DIR": str(out)}.items():
+        monkeypatch.setattr(rebar, name, value)
+    rebar.main()
+    assert "丙标段.xlsx 处理失败" in capsys.readouterr().out
+
+    assert sorted(os.listdir(out)) == [f"整理后_{FIRST}.xlsx", "整理后_乙标段.xlsx"]
+    assert list(pd.read_excel(out / f"整理后_{FIRST}.xlsx", sheet_name=None)) == SHEETS + BOM
+    assert list(pd.read_excel(out / "整理后_乙标段.xlsx", sheet_name=None)) == ["钢筋明细"] + BOM
+
+
+def test_spawn_workers_use_parent_settings(rebar, tmp_path, monkeypatch):
+    """spawn 启动的子进程（macOS / Windows 默认）同样按主进程改过的配置输出"""
+    for i in range(2):
+        synthetic.make_rebar_workbook(str(tmp_path / f"b{i}.xlsx"), 30)
+    monkeypatch.setattr(rebar, "ProcessPoolExecutor",
+                        functools.partial(ProcessPoolExecutor, mp_context=multiprocessing.get_context("spawn")))
+    monkeypatch.setattr(rebar, "OUTPUT_DIR", str(tmp_path / "out"))
+    monkeypatch.setattr(rebar, "OUTPUT_FORMAT", "csv")
+    monkeypatch.setattr(rebar, "BOM_SHEETS", False)
+
+    paths = rebar.find_workbooks(str(tmp_path))
+    results = list(rebar.run_batch(paths, rebar.merge_and_save, 2))
+    assert [error for _, _, error in results] == [None, None]
+    written = sorted(path for _, result, _ in results for path in result[2])
+    assert written == [str(tmp_path / "out" / f"整理后_b{i}.csv") for i in range(2)]
+    assert all(os.path.exists(path) for path in written)
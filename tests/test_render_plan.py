@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""docfill.render_plan：RENDER_ENGINE = 'plan' 生成的文档与普通 python-docx 流程逐部件一致"""
+import math
+import zipfile
+
+import pytest
+
+import synthetic
+
+# 会让渲染计划退回普通流程的值：{说明: (列名, 值)}
+FALLBACK_VALUES = {
+    '空字符串': ('杆塔型', ''),
+    '首尾空格': ('杆塔型', ' SJ1 '),
+    '换行': ('施工单位', '第一行\n第二行'),
+    '值里含占位符': ('项目名称', '工程{桩号}'),
+    '值里含关键字': ('杆塔型', '编号：7'),
+}
+# 可以直接拼接的特殊值：XML 特殊字符要正确转义，空格子（NaN）按格式化规则填“/”
+FAST_VALUES = {'XML 特殊字符': ('杆塔型', 'A<B>&"C\''), 'NaN': ('紧线后', math.nan)}
+
+
+def _make_filler(module, tmp_path, engine):
+    config = module.Config()
+    config.OUTPUT_FOLDER = str(tmp_path / engine)
+    config.STAGE_TIMING = False
+    config.RENDER_ENGINE = engine
+    config.TABLE_CELL_MAP = synthetic.TOWER_TABLE_CELL_MAP
+    config.PLACEHOLDER_MAP = synthetic.TOWER_PLACEHOLDER_MAP
+    if hasattr(config, 'KEYWORD_APPEND_MAP'):
+        config.KEYWORD_APPEND_MAP = synthetic.TOWER_KEYWORD_APPEND_MAP
+    return module.WordFiller(config)
+
+
+def _parts(path):
+    with zipfile.ZipFile(path) as zf:
+        return {name: zf.read(name) for name in zf.namelist()}
+
+
+@pytest.mark.parametrize('pipeline', ['word02', 'word03'])
+def test_plan_matches_docx(load, tmp_path, pipeline):
+    """正常值走计划、特殊值退回普通流程，两种引擎生成的每个部件都相同"""
+    module = load(pipeline)
+    template = str(tmp_path / 'tower.docx')
+    synthetic.make_tower_template(template)
+
+    base = synthetic.station_frame(4).to_dict('records')
+    rows = list(base)
+    special = {}  # {桩号: 说明}
+    for pos, (name, (column, value)) in enumerate({**FALLBACK_VALUES, **FAST_VALUES}.items()):
+        row = dict(base[pos % len(base)])
+        row['设计桩号'] = f'S{pos + 1}'
+        row[column] = value
+        rows.append(row)
+        special[row['设计桩号']] = name
+
+    docx = _make_filler(module, tmp_path, 'docx')
+    plan = _make_filler(module, tmp_path, 'plan')
+    engine = plan.plan_engine
+    fell_back = set()
+    for row in rows:
+        station = row['设计桩号']
+        assert docx.process_single_station(template, station, row) is None
+        before = engine.fallbacks
+        assert plan.process_single_station(template, station, row) is None
+        if engine.fallbacks > before:
+            fell_back.add(station)
+        assert _parts(plan._output_path(station)) == _parts(docx._output_path(station)), station
+
+    # 关键字追加只有 word03 有；word02 里“编号：”只是普通文字，照样走计划
+    expected = set(FALLBACK_VALUES) - ({'值里含关键字'} if not engine.keyword_map else set())
+    assert {special.get(station, station) for station in fell_back} == expected
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""docfill.scanner：一次扫描的结果与原来“每个词把全部段落扫一遍”完全一致"""
+import random
+
+import pytest
+
+from docfill.scanner import TextScanner, get_scanner
+
+
+class _Paragraph:
+    """只有 text 的段落替身"""
+
+    def __init__(self, text, pos=0):
+        self.text = text
+        self.pos = pos
+
+
+def _replace_action(values, log):
+    """替换动作：把段落里的词换成对应的值（值里可能又带着别的词），并记下执行顺序"""
+    def action(paragraph, word):
+        log.append((paragraph.pos, paragraph.text, word))
+        paragraph.text = paragraph.text.replace(word, values[word])
+    return action
+
+
+def _by_paragraph(log):
+    """执行记录按段落归拢（同一段落内保持执行顺序）"""
+    return sorted(log, key=lambda entry: entry[0])
+
+
+def _old_loop(texts, words, values):
+    """原来的做法：逐个词把全部段落扫一遍"""
+    paragraphs = [_Paragraph(t, pos) for pos, t in enumerate(texts)]
+    log = []
+    action = _replace_action(values, log)
+    for word in dict.fromkeys(w for w in words if w):
+        for paragraph in paragraphs:
+            if word in paragraph.text:
+                action(paragraph, word)
+    return [p.text for p in paragraphs], _by_paragraph(log)
+
+
+def _scanner(texts, words, values):
+    paragraphs = [_Paragraph(t, pos) for pos, t in enumerate(texts)]
+    log = []
+    count = TextScanner(words).scan(paragraphs, _replace_action(values, log))
+    assert count == len(log)
+    return [p.text for p in paragraphs], _by_paragraph(log)
+
+
+WORDS = ['{桩号}', '{桩号}编号', '编号：', '编号', 'aba', 'ab', 'b', '', '{桩号}']
+VALUES = {'{桩号}': 'N1{项目}', '{桩号}编号': '整体', '编号：': '编号：aba', '编号': '#', 'aba': 'b', 'ab': 'X', 'b': '{桩号}'}
+TEXTS = [
+    '{桩号}编号：12',  # 前缀词与更长的词在同一位置
+    'ababa',  # 重叠出现
+    '没有任何词的段落',
+    '',
+    '编号编号：{桩号}',
+    'b{桩号}b',  # 替换后又拼出前面已经处理过的词
+]
+
+
+def test_matches_old_loop():
+    """重叠词、前缀词、替换后拼出新词时，结果和执行顺序都与原来的逐词循环一致"""
+    assert _scanner(TEXTS, WORDS, VALUES) == _old_loop(TEXTS, WORDS, VALUES)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_matches_old_loop_random(seed):
+    """随机的短词（大量重叠、互为前缀）和随机替换值"""
+    rng = random.Random(seed)
+    alphabet = 'ab{}'
+    words = [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 3))) for _ in range(6)]
+    values = {w: ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 3))) for w in words}
+    texts = [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 12))) for _ in range(8)]
+    assert _scanner(texts, words, values) == _old_loop(texts, words, values)
+
+
+def test_find():
+    """同一位置的前缀词、重叠位置的词都算命中；空词和重复词忽略"""
+    scanner = TextScanner(WORDS)
+    assert scanner.words == ['{桩号}', '{桩号}编号', '编号：', '编号', 'aba', 'ab', 'b']
+    hits = {scanner.words[i] for i in scanner.find('{桩号}编号：ababa')}
+    assert hits == {'{桩号}', '{桩号}编号', '编号：', '编号', 'aba', 'ab', 'b'}
+    assert scanner.find('没有') == set() and scanner.find('') == set()
+    assert TextScanner([]).scan([_Paragraph('x')], None) == 0
+    assert get_scanner(['a', 'b']) is get_scanner(['a', 'b'])
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""docfill.server：只接受本机客户端发来的 JSON 请求"""
+import http.client
+import json
+import threading
+from http.server import HTTPServer
+
+import pytest
+
+from docfill import server
+
+
+class _Session:
+    """记下被调用了哪些接口的假会话"""
+
+    def __init__(self):
+        self.calls = []
+        self.rows = {}
+
+    def status(self):
+        self.calls.append('status')
+        return {'stations': 0}
+
+    def refresh(self, force=False):
+        self.calls.append('refresh')
+        return ''
+
+    def render(self, stations, template=None):
+        self.calls.append('render')
+        return [{'ok': True, 'station': station} for station in stations]
+
+
+@pytest.fixture
+def running():
+    httpd = HTTPServer((server.HOST, 0), server._Handler)
+    httpd.session = _Session()
+    thread = threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _send(httpd, method, path, headers, body=None):
+    conn = http.client.HTTPConnection(server.HOST, httpd.server_port, timeout=10)
+    conn.putrequest(method, path, skip_host=True)
+    for name, value in headers.items():
+        conn.putheader(name, value)
+    data = None if body is None else body.encode('utf-8')
+    if data is not None:
+        conn.putheader('Content-Length', str(len(data)))
+    conn.endheaders(data)
+    response = conn.getresponse()
+    status, reply = response.status, json.loads(response.read())
+    conn.close()
+    return status, reply
+
+
+def test_client_request(running):
+    """自带的客户端（urllib，Host 为 127.0.0.1:端口，JSON）照常可用"""
+    reply = server.render(['N1'], port=running.server_port)
+    assert reply['results'] == [{'ok': True, 'station': 'N1'}]
+    assert server.request('/status', port=running.server_port) == {'stations': 0}
+
+
+@pytest.mark.parametrize('host, content_type, status', [
+    ('localhost:{port}', 'application/json', 200),
+    ('127.0.0.1', 'application/json; charset=utf-8', 200),
+    ('evil.example:{port}', 'application/json', 403),  # DNS 重绑定：Host 是对方的域名
+    ('127.0.0.1:1', 'application/json', 403),
+    ('', 'application/json', 403),
+    ('127.0.0.1:{port}', 'text/plain', 415),  # 跨站表单 / fetch 不预检时只能发这几种
+    ('127.0.0.1:{port}', 'application/x-www-form-urlencoded', 415),
+    ('127.0.0.1:{port}', None, 415),
+])
+def test_rejects_foreign_requests(running, host, content_type, status):
+    """Host 不是本机、或 POST 不是 JSON 的请求一律拒绝，会话不被调用"""
+    headers = {'Host': host.format(port=running.server_port)}
+    if content_type:
+        headers['Content-Type'] = content_type
+    code, reply = _send(running, 'POST', '/render', headers, '{"stations": ["N1"]}')
+    assert code == status
+    assert (running.session.calls == ['refresh', 'render']) == (status == 200)
+    if status != 200:
+        assert 'error' in reply
+
+
+def test_get_checks_host(running):
+    code, _ = _send(running, 'GET', '/status', {'Host': f'evil.example:{running.server_port}'})
+    assert code == 403 and running.session.calls == []
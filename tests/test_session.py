@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""docfill.session：常驻会话与批量运行取同一行数据"""
+import zipfile
+
+import pytest
+from docx import Document
+
+import synthetic
+from docfill.preflight import plan
+from docfill.session import TongyongSession
+
+# 文件名重复时应当生成的内容：每个文件名取最后一行
+EXPECTED = {'N1': '型5', 'N2': '型4', 'N3': '型3'}
+
+
+@pytest.fixture
+def tongyong(load, tmp_path, monkeypatch):
+    """设计桩号有重复的 tongyong 配置：N1 出现 3 次、N2 出现 2 次"""
+    module = load('tongyong')
+    df = synthetic.station_frame(6)
+    df['设计桩号'] = ['N1', 'N2', 'N1', 'N3', 'N2', 'N1']
+    df['杆塔型'] = [f'型{pos}' for pos in range(len(df))]
+    path = tmp_path / 'stations.xlsx'
+    df.to_excel(path, sheet_name='Sheet2', index=False)
+    template = tmp_path / 'tpl.docx'
+    doc = Document()
+    doc.add_paragraph('{{ 杆塔型 }}')
+    doc.save(template)
+    for name, value in {'EXCEL_PATH': str(path), 'TEMPLATE_PATH': str(template), 'OUTPUT_DIR': 'out',
+                        'SHEET_NAME': 'Sheet2', 'FILENAME_COLUMN': '设计桩号', 'INT_COLUMNS': [],
+                        'EXCEL_CACHE': False, 'TEMPLATE_CACHE': False, 'RESUME': False, 'OUTPUT_ZIP': ''}.items():
+        monkeypatch.setattr(module, name, value)
+    return module
+
+
+def _text(source):
+    return Document(source).paragraphs[0].text
+
+
+def test_tongyong_duplicate_names(tongyong):
+    """文件名重复时与批量运行一致取最后一行（后生成的文档覆盖先生成的），并提示重复"""
+    session = TongyongSession(tongyong)
+    log = session.refresh()
+    assert {name: entry[0]['杆塔型'] for name, entry in session.rows.items()} == EXPECTED
+    assert '重复' in log and 'N1×3' in log and 'N2×2' in log
+
+
+@pytest.mark.parametrize('output_zip', ['', '结果.zip'])
+def test_tongyong_main_duplicate_names(tongyong, tmp_path, monkeypatch, capsys, output_zip):
+    """逐个生成文件和打包输出同样按最后一行生成，压缩包里不会因为同名而失败"""
+    monkeypatch.setattr(tongyong, 'OUTPUT_ZIP', output_zip)
+    tongyong.main()
+    printed = capsys.readouterr().out
+    assert 'N1×3' in printed and '🔴' not in printed
+
+    out = tmp_path / 'out'
+    if output_zip:
+        with zipfile.ZipFile(out / output_zip) as zf:
+            names = zf.namelist()
+            assert sorted(names) == [f'tpl/{name}.docx' for name in sorted(EXPECTED)]
+            assert {name: _text(zf.open(f'tpl/{name}.docx')) for name in EXPECTED} == EXPECTED
+    else:
+        assert sorted(p.name for p in out.glob('*.docx')) == [f'{name}.docx' for name in sorted(EXPECTED)]
+        assert {name: _text(out / f'{name}.docx') for name in EXPECTED} == EXPECTED
+
+
+@pytest.mark.parametrize('output_zip', ['', '结果.zip'])
+def test_tongyong_preflight_duplicate_names(tongyong, monkeypatch, output_zip):
+    """预检与实际运行一致：重复文件名是提醒（按最后一行生成），不是重名错误"""
+    monkeypatch.setattr(tongyong, 'OUTPUT_ZIP', output_zip)
+    result = plan('tongyong', tongyong, tongyong)
+    assert not result.errors
+    assert any('N1×3' in warning for warning in result.warnings)
+    assert [key for _, key, _ in result.jobs] == ['N1', 'N2', 'N3']
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""docfill.tables：合并单元格、嵌套表格里的每个物理单元格只访问一次；网格坐标与 table.cell 一致"""
+from docx import Document
+from docx.oxml.ns import qn
+from docx.text.paragraph import Paragraph
+
+from docfill.tables import CellGrid, walk_paragraphs, walk_stats
+
+
+def _document():
+    """正文段落 + 一张 4×5 的表（横向合并、纵向合并、跨行跨列合并）+ 单元格里嵌套的一张表"""
+    doc = Document()
+    doc.add_paragraph('正文')
+    table = doc.add_table(rows=4, cols=5)
+    table.cell(0, 0).merge(table.cell(0, 3))  # 横向合并 4 列
+    table.cell(1, 0).merge(table.cell(3, 0))  # 纵向合并 3 行
+    table.cell(1, 2).merge(table.cell(2, 4))  # 跨 2 行 3 列
+    nested = table.cell(3, 3).add_table(rows=2, cols=2)
+    nested.cell(0, 0).merge(nested.cell(0, 1))
+    doc.add_paragraph('表后')
+    # 每个物理单元格的第一个段落写上编号，方便看出哪些被重复访问
+    for pos, tc in enumerate(doc.element.body.iter(qn('w:tc'))):
+        Paragraph(tc.find(qn('w:p')), None).add_run(f'格{pos}')
+    return doc
+
+
+def test_each_cell_once():
+    """合并单元格和嵌套表格里的段落各出现一次，正文段落不漏"""
+    doc = _document()
+    paragraphs = walk_paragraphs(doc)
+    elements = [p._p for p in paragraphs]
+    assert len(elements) == len(set(elements))
+    assert set(elements) == set(doc.element.body.iter(qn('w:p')))
+
+    texts = sorted(p.text for p in paragraphs if p.text.startswith('格'))
+    tcs = list(doc.element.body.iter(qn('w:tc')))
+    assert texts == sorted(f'格{pos}' for pos in range(len(tcs)))
+
+    # row.cells 的老办法：合并格子被重复访问，嵌套表格的格子扫不到
+    grid = [cell._tc for row in doc.tables[0].rows for cell in row.cells]
+    assert len(grid) > len(set(grid))
+
+
+def test_walk_stats():
+    """统计：两张表，物理单元格数与 w:tc 数相同，按网格访问的次数按跨列数计算"""
+    doc = _document()
+    stats = walk_stats(doc)
+    tcs = list(doc.element.body.iter(qn('w:tc')))
+    assert stats.tables == 2
+    assert stats.cells == len(tcs)
+    assert stats.grid_visits == sum(tc.grid_span for tc in tcs)
+    assert stats.avoided == stats.grid_visits - stats.cells > 0
+
+
+def test_cell_grid_matches_table_cell():
+    """每个网格坐标换算出的单元格与 table.cell(r, c) 相同，越界坐标返回 None"""
+    doc = _document()
+    for table in (doc.tables[0], doc.tables[0].cell(3, 3).tables[0]):
+        grid = CellGrid(table)
+        cell_at = CellGrid.resolver(table)
+        assert (grid.row_count, grid.col_count) == (len(table.rows), len(table.columns))
+        for r in range(grid.row_count):
+            for c in range(grid.col_count):
+                assert cell_at(grid.locate(r, c))._tc is table.cell(r, c)._tc
+        assert grid.locate(grid.row_count, 0) is None and grid.locate(0, -1) is None
+        located, out_of_bounds = grid.check({'a': (0, 0), 'b': (99, 0)})
+        assert list(located) == ['a'] and out_of_bounds == [('b', 99, 0)]
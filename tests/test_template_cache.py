@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""docfill.template_cache：克隆互不影响，模板改过后重新加载"""
+import io
+import os
+
+from docx import Document
+
+import synthetic
+from docfill.template_cache import TemplateCache
+
+
+def _xml(doc):
+    return doc.element.xml
+
+
+def _saved(doc):
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return Document(buffer)
+
+
+def test_clone_is_independent(tmp_path):
+    """一个桩号的克隆填了内容，母版和下一个桩号的克隆都还是原样"""
+    template = str(tmp_path / 'tower.docx')
+    synthetic.make_tower_template(template)
+    cache = TemplateCache()
+    first = cache.open(template)
+    master = cache._get_master(template)
+    original = _xml(master)
+    assert _xml(first) == original
+
+    first.tables[0].cell(1, 9).text = 'N1'
+    first.paragraphs[0].add_run('追加的文字')
+    first.add_paragraph('新段落')
+    assert _xml(first) != original
+    assert _xml(master) == original
+
+    second = cache.open(template)
+    assert _xml(second) == original
+    assert second.tables[0].cell(1, 9).text == Document(template).tables[0].cell(1, 9).text
+    assert cache.hits == 2 and cache.misses == 1
+
+    # 保存后重新打开：内容只出现在自己那一份里
+    assert _saved(first).tables[0].cell(1, 9).text == 'N1'
+    assert _xml(_saved(second)) == _xml(Document(template))
+
+
+def test_reload_on_change(tmp_path):
+    """模板的修改时间或大小变了就重新加载"""
+    template = str(tmp_path / 'tower.docx')
+    synthetic.make_tower_template(template)
+    cache = TemplateCache()
+    cache.open(template)
+    cache.open(template)
+    assert cache.misses == 1
+
+    # 只改修改时间（内容、大小不变）
+    stat = os.stat(template)
+    os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    cache.open(template)
+    assert cache.misses == 2
+
+    # 内容改了：克隆里能看到新内容
+    doc = Document(template)
+    doc.add_paragraph('模板新增的一段')
+    doc.save(template)
+    os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))  # 修改时间与上次相同，只有大小变了
+    assert os.path.getsize(template) != stat.st_size
+    reloaded = cache.open(template)
+    assert cache.misses == 3
+    assert reloaded.paragraphs[-1].text == '模板新增的一段'
+    assert len(cache) == 1
+
+
+def test_eviction(tmp_path):
+    """超出容量时淘汰最久未使用的模板；容量为 0 时每次都重新打开"""
+    paths = [str(tmp_path / f'{name}.docx') for name in 'ab']
+    for path in paths:
+        synthetic.make_tower_template(path)
+    cache = TemplateCache(max_size=1)
+    cache.open(paths[0])
+    cache.open(paths[1])
+    cache.open(paths[0])
+    assert (cache.misses, cache.evictions, len(cache)) == (3, 2, 1)
+
+    uncached = TemplateCache(max_size=0)
+    assert _xml(uncached.open(paths[0])) == _xml(Document(paths[0]))
+    assert len(uncached) == 0 and uncached.misses == 0
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""docfill.watch：只重新生成受影响的文档；一次保存（连续改写好几次）只处理一次"""
+import os
+
+import pytest
+
+from docfill import watch
+from docfill.watch import FileWatcher, plan_changes
+
+
+class FakeSession:
+    """渲染会话替身：两个模板，每个模板对应全部桩号"""
+
+    def __init__(self, folder, digests):
+        self.excel_path = str(folder / '数据.xlsx')
+        self.templates = [str(folder / '甲.docx'), str(folder / '乙.docx')]
+        self.digests = dict(digests)
+        self.refreshes = []
+
+    def refresh(self, force=False):
+        self.refreshes.append(force)
+        return ''
+
+    def row_digests(self):
+        return dict(self.digests)
+
+    def stations_for(self, template):
+        return list(self.digests)
+
+
+SNAPSHOT = {'N1': 'a', 'N2': 'b', 'N3': 'c'}
+
+
+def test_excel_change_renders_changed_stations(tmp_path):
+    """Excel 变了：只重新生成新增和修改的桩号，删除的只提示"""
+    session = FakeSession(tmp_path, {'N1': 'a', 'N2': 'B', 'N4': 'd'})
+    pairs, snapshot, notes = plan_changes(session, {os.path.abspath(session.excel_path)}, SNAPSHOT)
+    assert pairs == [(template, station) for template in session.templates for station in ('N2', 'N4')]
+    assert snapshot == session.digests
+    assert session.refreshes == [True]
+    assert any('新增 1 个桩号，修改 1 个，删除 1 个' in note for note in notes)
+    assert any('N3' in note and '删除' in note for note in notes)
+
+
+def test_template_change_renders_that_template(tmp_path):
+    """某个模板变了：只重新生成这个模板的全部文档，Excel 不重新比较"""
+    session = FakeSession(tmp_path, SNAPSHOT)
+    changed = {os.path.abspath(session.templates[1])}
+    pairs, snapshot, notes = plan_changes(session, changed, SNAPSHOT)
+    assert pairs == [(session.templates[1], station) for station in SNAPSHOT]
+    assert snapshot is SNAPSHOT
+    assert session.refreshes == [False]
+    assert notes == ['📝 模板有变化：乙.docx']
+
+
+def test_excel_and_template_change(tmp_path):
+    """两者同时变：变了的模板全部重新生成，另一个模板只生成变了的桩号；什么都没变时没有任务"""
+    session = FakeSession(tmp_path, {'N1': 'a', 'N2': 'B', 'N3': 'c'})
+    changed = {os.path.abspath(session.excel_path), os.path.abspath(session.templates[0])}
+    pairs, _, _ = plan_changes(session, changed, SNAPSHOT)
+    assert pairs == [(session.templates[0], station) for station in SNAPSHOT] + [(session.templates[1], 'N2')]
+
+    pairs, _, _ = plan_changes(FakeSession(tmp_path, SNAPSHOT), {os.path.abspath(session.excel_path)}, SNAPSHOT)
+    assert pairs == []
+
+
+class _Stop(Exception):
+    pass
+
+
+def test_burst_handled_once(monkeypatch):
+    """防抖窗口内连续保存好几次：等安静下来只报一次变化，之后不再重复报"""
+    clock = [0.0]
+    saves = [1.0, 1.3, 1.6, 1.9]  # Excel 保存时连续改写了 4 次
+
+    def scan(paths):
+        version = sum(clock[0] >= t for t in saves)
+        return {'/data.xlsx': (version, 100 + version), '/tpl.docx': (0, 1)}
+
+    def sleep(seconds):
+        clock[0] += seconds
+        if clock[0] > 20:
+            raise _Stop
+
+    monkeypatch.setattr(watch, '_scan', scan)
+    monkeypatch.setattr(watch.time, 'sleep', sleep)
+    monkeypatch.setattr(watch.time, 'monotonic', lambda: clock[0])
+
+    watcher = FileWatcher(['/data.xlsx', '/tpl.docx'], debounce=1.0, interval=0.1)
+    assert watcher.wait() == {'/data.xlsx'}
+    assert saves[-1] + 1.0 <= clock[0] < saves[-1] + 1.5  # 最后一次改写之后安静满 1 秒才返回
+    assert watcher.state['/data.xlsx'] == (4, 104)
+    with pytest.raises(_Stop):  # 之后没有新的变化，不会再报一次
+        watcher.wait()
+
+
+def test_scan_folder(tmp_path):
+    """模板文件夹展开成其中的 .docx，跳过 ~$ 临时文件；不存在的路径记为 None"""
+    folder = tmp_path / '模板'
+    folder.mkdir()
+    for name in ('甲.docx', '~$甲.docx', '说明.txt'):
+        (folder / name).write_bytes(b'x')
+    missing = str(tmp_path / '没有.xlsx')
+    state = watch._scan([str(folder), missing])
+    assert sorted(state) == sorted([str(folder / '甲.docx'), missing])
+    assert state[missing] is None
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""word/01：只检查真正要填的行；格子超出表格时这个桩号算失败，不生成残缺的文档"""
+import os
+
+import pandas as pd
+import pytest
+from docx import Document
+
+from docfill.profiling import StageTimer
+
+
+@pytest.fixture
+def word01(load, tmp_path, monkeypatch):
+    module = load('word01')
+    monkeypatch.setattr(module, 'INPUT_WORD_FOLDER', str(tmp_path / 'in'))
+    monkeypatch.setattr(module, 'OUTPUT_FOLDER', str(tmp_path / 'out'))
+    os.makedirs(module.INPUT_WORD_FOLDER)
+    os.makedirs(module.OUTPUT_FOLDER)
+    return module
+
+
+def _template(module, station, rows):
+    """只有 rows 行的记录表模板（列数够 COLUMN_MAP 用）"""
+    doc = Document()
+    doc.add_table(rows=rows, cols=max(module.COLUMN_MAP.values()) + 1)
+    doc.save(module.station_paths(station)[0])
+
+
+def _station_rows(module, count):
+    return pd.DataFrame([{col: f'{col}-{i}' for col in module.COLUMN_MAP} for i in range(count)])
+
+
+def test_fills_short_station(word01, capsys):
+    """表格只够填 2 行、桩号也只有 2 行：正常生成，不提示越界"""
+    _template(word01, 'N1', word01.START_ROW_INDEX + 2)
+    assert word01.fill_one_station('N1', _station_rows(word01, 2), StageTimer(enabled=False))
+    out = capsys.readouterr().out
+    assert '【成功】' in out and '超出表格' not in out
+    table = Document(word01.station_paths('N1')[1]).tables[0]
+    col = word01.COLUMN_MAP['灌1']
+    assert table.cell(word01.START_ROW_INDEX + 1, col).text == '灌1-1'
+
+
+def test_out_of_bounds_fails(word01, capsys):
+    """要填的行超出表格：报【异常】、返回 False、不留下输出文件"""
+    _template(word01, 'N2', word01.START_ROW_INDEX + 1)
+    assert not word01.fill_one_station('N2', _station_rows(word01, 2), StageTimer(enabled=False))
+    out = capsys.readouterr().out
+    assert '【异常】' in out and '超出表格' in out
+    assert not os.path.exists(word01.station_paths('N2')[1])
+
+
+def test_summary_counts_failures(word01, tmp_path, monkeypatch, capsys):
+    """批量运行结束时汇总成功 / 未生成的桩号"""
+    _template(word01, 'N1', word01.START_ROW_INDEX + 2)
+    _template(word01, 'N2', word01.START_ROW_INDEX + 1)
+    df = _station_rows(word01, 6)
+    df.insert(0, word01.STATION_COLUMN_NAME, ['N1', 'N1', 'N2', 'N2', 'N3', 'N3'])
+    path = tmp_path / 'piles.xlsx'
+    df.to_excel(path, index=False)
+    monkeypatch.setattr(word01, 'EXCEL_DATABASE', str(path))
+    monkeypatch.setattr(word01, 'STAGE_TIMING', False)
+
+    word01.run_universal_filler()
+    out = capsys.readouterr().out
+    assert '成功生成 1 个，未生成 2 个' in out
+    assert 'N2、N3' in out and '恭喜' not in out
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""xlsx_stream：流式写出的工作簿用 pandas 读回来与原表一致"""
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture(scope='module')
+def xlsx_stream(load):
+    load('rebar')  # 把钢筋合并器的目录放进 sys.path
+    return importlib.import_module('xlsx_stream')
+
+
+def _frames():
+    numbers = pd.DataFrame({
+        '规格': ['C22', 'C25', 'C28', 'C32'],
+        '长度(mm)': [6900, 7400, -1, 10 ** 12],
+        '总长度(m)': [190.44, np.nan, 1e-7, 0.1 + 0.2],
+        '已核对': [True, False, True, False],
+    })
+    texts = pd.DataFrame({
+        'a&b <c>': ['A<B>&"C\'', '  前导空格', '末尾空格  ', np.nan],
+        '塔腿': ['A', 'BC', 'ACD', '中文、标点：；'],
+        '空列': [np.nan] * 4,
+    })
+    header_only = pd.DataFrame(columns=['来源', '数量'])
+    return [('钢筋明细', numbers), ('文字', texts), ('只有表头', header_only)]
+
+
+def test_round_trip(xlsx_stream, tmp_path, monkeypatch):
+    """表头、数字、布尔、空值、需要转义或带首尾空格的文字、多个工作表都原样读回"""
+    monkeypatch.setattr(xlsx_stream, 'CHUNK_ROWS', 3)  # 跨块写出
+    path = tmp_path / 'out.xlsx'
+    frames = _frames()
+    xlsx_stream.write_xlsx(str(path), iter(frames))
+
+    back = pd.read_excel(path, sheet_name=None)
+    assert list(back) == [name for name, _ in frames]
+    for name, df in frames:
+        if df.empty:
+            assert list(back[name].columns) == list(df.columns) and back[name].empty
+        else:
+            pd.testing.assert_frame_equal(back[name], df, check_dtype=False, check_exact=True)
+    assert back['钢筋明细']['长度(mm)'].dtype == np.int64
+    assert back['钢筋明细']['已核对'].dtype == bool
+
+
+def test_cell(xlsx_stream):
+    """单元格：空值不写，XML 不允许的控制字符去掉，首尾空格保留"""
+    assert xlsx_stream._cell('A1', np.nan) == ''
+    assert xlsx_stream._cell('A1', None) == ''
+    assert xlsx_stream._cell('A1', pd.NaT) == ''
+    assert xlsx_stream._cell('A1', 'a\x01b') == '<c r="A1" t="inlineStr"><is><t>ab</t></is></c>'
+    assert 'xml:space="preserve"' in xlsx_stream._cell('A1', ' x')
+    assert xlsx_stream._cell('A1', np.int64(3), ' s="1"') == '<c r="A1" s="1"><v>3</v></c>'
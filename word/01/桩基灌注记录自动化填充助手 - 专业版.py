@@ -3,10 +3,16 @@
 import pandas as pd  # 用于处理 Excel 数据的工具
 from docx import Document  # 用于处理 Word 文档的工具
 from docx.shared import Pt  # 用于设置字号大小
-from docx.oxml.ns import qn  # 用于设置中文字体兼容性
 from docx.enum.text import WD_ALIGN_PARAGRAPH  # 用于设置水平居中
 from docx.enum.table import WD_CELL_VERTICAL_ALIGNMENT  # 用于设置垂直居中
 import os  # 用于处理文件路径和文件夹
+import sys  # 用于把 word 目录加入模块搜索路径
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from docfill.group_index import GroupIndex  # 公共模块：按桩号一次性分组，取数据不再全表扫描
+from docfill.tables import CellGrid  # 公共模块：表格坐标网格，一张表只算一次坐标
+from docfill.profiling import StageTimer  # 公共模块：分阶段计时，看清时间花在哪一步
+from docfill.fonts import FontStyle  # 公共模块：提前做好的字体格式，填字时直接复制
 
 # ============================================================
 # 【第一部分：小白配置区】—— 每次换项目，只需改这里的文字
@@ -44,11 +50,30 @@ MAX_ROWS_TO_FILL = 15  # 表格数据区共有 15 行（即填到第 30 行截
 # 7. 文件后缀：填 "" 表示保持原名，填 "_已填充" 会在文件名后加注
 FILE_SUFFIX = ""
 
+# 8. 分阶段计时：填 True 会记录每个桩号“打开模板、填表格、保存”各花了多久，
+# 最后打印一张汇总表，并在输出文件夹留下 docfill_timing.json / docfill_timing.csv；填 False 不计时
+STAGE_TIMING = True
+
+# 9. 性能剖析：想知道具体哪个函数慢，填 'cprofile'（Python 自带）或 'pyinstrument'（需要另外安装）；填 '' 关闭
+PROFILER = ''
+
+# 10. 监视模式：填 True 的话，全部生成完不退出，而是一直盯着 Excel 和 word 文件夹：
+# Excel 改完一保存，只重新生成数据有变化（或新增）的桩号；改了哪个桩号的 Word 模板，就只重新生成那一个。
+# 按 Ctrl+C 退出；填 False 则生成完就结束
+WATCH_MODE = False
+
+# 11. 监视模式的等待时间（秒）：Excel、OneDrive 保存时会连着改写好几次文件，等文件这么久没再变化才开始生成
+WATCH_DEBOUNCE = 2
+
 
 # ============================================================
 # 【第二部分：核心功能区】—— 负责改字体、对齐和填数，建议不要修改
 # ============================================================
 
+# 提前做好一份“宋体 10 号”的字体格式（西文字体、中文字体、字号一次设好），
+# 每填一个格子直接复制一份过去，不用每次都重新设置三遍
+SONG_10 = FontStyle('宋体', Pt(10))
+
 def fill_cell_with_font_style(cell, text):
     """
     此函数负责：把文字填进去，并强制设为 宋体 10号 居中
@@ -68,91 +93,160 @@ def fill_cell_with_font_style(cell, text):
     # 创建文字块并填入内容
     run = para.add_run(str(text))
 
-    # 设置字号为 10 磅
-    run.font.size = Pt(10)
+    # 套上宋体 10 号（中文、西文都是宋体）
+    SONG_10.apply(run)
 
-    # 强制设置中文字体为“宋体” (兼容 Word 核心协议)
-    run.font.name = '宋体'  # 这一行设置西文字体
-    run._element.rPr.rFonts.set(qn('w:eastAsia'), '宋体')  # 这一行锁定中文字体
 
-
-def run_universal_filler():
+def station_paths(station):
     """
-    主程序：负责批量读写文件
+    此函数负责：算出一个桩号的 Word 模板路径和输出路径
+    （模板的文件名就是桩号，例如 N1.docx）
     """
-    # 如果没有输出文件夹，就自动新建一个
-    if not os.path.exists(OUTPUT_FOLDER):
-        os.makedirs(OUTPUT_FOLDER)
+    input_path = os.path.join(INPUT_WORD_FOLDER, f"{str(station).strip()}.docx")
+    output_path = os.path.join(OUTPUT_FOLDER, f"{str(station).strip()}{FILE_SUFFIX}.docx")
+    return input_path, output_path
+
 
+def load_database(timer):
+    """
+    此函数负责：读取 Excel，并按桩号一次性分组
+    出错时打印原因，返回 None
+    """
     # 检查 Excel 文件在不在
     if not os.path.exists(EXCEL_DATABASE):
         print(f"【错误】找不到 Excel 文件，请检查路径是否正确: {EXCEL_DATABASE}")
-        return
+        return None
 
     # 读取 Excel 内容
-    df = pd.read_excel(EXCEL_DATABASE)
-    # 自动把表头前后的空格删掉，防止匹配出错
-    df.columns = df.columns.str.strip()
+    with timer.stage('Excel读取'):
+        df = pd.read_excel(EXCEL_DATABASE)
+        # 自动把表头前后的空格删掉，防止匹配出错
+        df.columns = df.columns.str.strip()
 
     # 检查 Excel 里有没有“设计桩号”这一列
     if STATION_COLUMN_NAME not in df.columns:
         print(f"【错误】Excel 里没有找到 '{STATION_COLUMN_NAME}' 这一列")
-        return
+        return None
 
-    # 找到 Excel 里所有不重复的桩号，一个个开始处理
-    all_stations = df[STATION_COLUMN_NAME].unique()
-    print(f"--- 发现 {len(all_stations)} 个桩号，开始批量生产... ---")
+    # 按桩号一次性分组：每个桩号对应哪几行，一次算好，后面直接取
+    return GroupIndex(df, STATION_COLUMN_NAME)
 
-    for station in all_stations:
-        # 确定 Word 模板的文件名
-        original_file_name = f"{str(station).strip()}.docx"
-        new_file_name = f"{str(station).strip()}{FILE_SUFFIX}.docx"
 
-        # 拼接完整路径
-        input_path = os.path.join(INPUT_WORD_FOLDER, original_file_name)
-        output_path = os.path.join(OUTPUT_FOLDER, new_file_name)
+def fill_one_station(station, station_data, timer):
+    """
+    此函数负责：生成一个桩号的记录表（打开它自己的 Word 模板 → 填表格 → 另存到输出文件夹）
+    station_data 是 Excel 里属于这个桩号的所有行（保持 Excel 里的先后顺序）
+    生成成功返回 True；跳过或出错返回 False（监视模式靠它判断这个桩号有没有做成）
+    """
+    # 确定 Word 模板的文件名和完整路径
+    input_path, output_path = station_paths(station)
+    original_file_name = os.path.basename(input_path)
+    new_file_name = os.path.basename(output_path)
 
-        # 如果找不到对应的 Word 模板，就跳过
-        if not os.path.exists(input_path):
-            print(f"【跳过】文件夹里没找到模板: {original_file_name}")
-            continue
+    # 如果找不到对应的 Word 模板，就跳过
+    if not os.path.exists(input_path):
+        print(f"【跳过】文件夹里没找到模板: {original_file_name}")
+        return False
 
+    with timer.station(input_path, station):
         try:
             # 打开 Word 文档
-            doc = Document(input_path)
+            with timer.stage('模板打开'):
+                doc = Document(input_path)
             # 找到文档里的第一个表格
             table = doc.tables[0]
 
-            # 从 Excel 里筛选出属于这个桩号的所有行
-            station_data = df[df[STATION_COLUMN_NAME] == station].reset_index(drop=True)
-
-            # 开始填数（按行遍历）
-            for i in range(len(station_data)):
+            with timer.stage('表格填充'):
                 # 如果 Excel 数据多于 15 行，就只填前 15 行，防止撑破表格
-                if i >= MAX_ROWS_TO_FILL:
-                    break
-
-                excel_row = station_data.iloc[i]
-
-                # 开始填每一列的数据
-                for excel_col, word_idx in COLUMN_MAP.items():
-                    if excel_col in df.columns:
-                        # 获取 Excel 里的数值
-                        val = excel_row[excel_col]
-                        # 如果是空的，就填个斜杠 "/"；否则转成文字
-                        content = str(val) if pd.notna(val) else "/"
-
-                        # 找到对应的 Word 单元格并填入
-                        target_cell = table.cell(START_ROW_INDEX + i, word_idx)
-                        fill_cell_with_font_style(target_cell, content)
+                row_count = min(len(station_data), MAX_ROWS_TO_FILL)
+                # 一次性算好这次真正要填的每个格子在哪（行数 × 列数），并提前检查有没有超出表格
+                grid = CellGrid(table)
+                cell_map = {
+                    (i, excel_col): (START_ROW_INDEX + i, word_idx)
+                    for i in range(row_count)
+                    for excel_col, word_idx in COLUMN_MAP.items()
+                    if excel_col in station_data.columns
+                }
+                slots, out_of_bounds = grid.check(cell_map)
+                if out_of_bounds:
+                    # 有格子填不进去，这份表就不完整了：直接算失败，不生成文件
+                    _, row_idx, col_idx = out_of_bounds[0]
+                    raise IndexError(f"{original_file_name} 的表格只有 {grid.row_count} 行 {grid.col_count} 列，"
+                                     f"有 {len(out_of_bounds)} 个格子超出表格（例如第 {row_idx} 行第 {col_idx} 列），"
+                                     f"请检查 START_ROW_INDEX / COLUMN_MAP")
+                cell_at = CellGrid.resolver(table)
+
+                # 开始填数（按行遍历）
+                for i in range(row_count):
+                    excel_row = station_data.iloc[i]
+
+                    # 开始填每一列的数据
+                    for excel_col in COLUMN_MAP:
+                        if (i, excel_col) in slots:
+                            # 获取 Excel 里的数值
+                            val = excel_row[excel_col]
+                            # 如果是空的，就填个斜杠 "/"；否则转成文字
+                            content = str(val) if pd.notna(val) else "/"
+
+                            # 找到对应的 Word 单元格并填入
+                            target_cell = cell_at(slots[(i, excel_col)])
+                            fill_cell_with_font_style(target_cell, content)
 
             # 全部填完，保存到新文件夹里
-            doc.save(output_path)
+            with timer.stage('保存'):
+                doc.save(output_path)
             print(f"【成功】已生成: {new_file_name}")
+            return True
 
         except Exception as e:
             # 如果中间出错了（比如 Word 被占用），报错并继续下一个
+            timer.mark_failed()
             print(f"【异常】处理 {station} 时出错: {e}")
+            return False
+
+
+def run_universal_filler():
+    """
+    主程序：负责批量读写文件
+    """
+    # 如果没有输出文件夹，就自动新建一个
+    if not os.path.exists(OUTPUT_FOLDER):
+        os.makedirs(OUTPUT_FOLDER)
+
+    # 准备好秒表
+    timer = StageTimer(STAGE_TIMING, PROFILER)
+
+    # 读取 Excel 内容，按桩号分好组
+    index = load_database(timer)
+    if index is None:
+        return
+
+    all_stations = index.keys
+    print(f"--- 发现 {len(all_stations)} 个桩号，开始批量生产... ---")
+    if index.missing_count:
+        print(f"【提示】有 {index.missing_count} 行没有填桩号，已忽略")
+
+    success_count = 0
+    failed_stations = []  # 没生成出来的桩号（没有模板、或者出错）
+    for station in all_stations:
+        # 从索引里直接取出属于这个桩号的所有行，交给 fill_one_station 去填
+        if fill_one_station(station, index.rows(station), timer):
+            success_count += 1
+        else:
+            failed_stations.append(str(station).strip())
+
+    # 打印各步骤耗时汇总，并把明细存到输出文件夹
+    if STAGE_TIMING:
+        print("\n" + timer.summary())
+        timer.write_report(OUTPUT_FOLDER)
+
+    # 汇总：生成了几个、哪些没生成
+    print(f"\n【汇总】成功生成 {success_count} 个，未生成 {len(failed_stations)} 个")
+    if failed_stations:
+        preview = '、'.join(failed_stations[:10]) + (' 等' if len(failed_stations) > 10 else '')
+        print(f"【注意】这些桩号没有生成（原因见上面的【跳过】/【异常】）：{preview}")
+        print(f"\n处理结束，请去这里查看：{OUTPUT_FOLDER}")
+        return
 
     print(f"\n恭喜！所有文件已完成，请去这里查看：{OUTPUT_FOLDER}")
 
@@ -160,3 +254,8 @@ def run_universal_filler():
 # --- 脚本入口 ---
 if __name__ == "__main__":
     run_universal_filler()
+    # 开了监视模式的话，接着盯着 Excel 和 word 文件夹
+    if WATCH_MODE:
+        from docfill.session import Word01Session
+        from docfill.watch import watch
+        watch(Word01Session(sys.modules[__name__]), WATCH_DEBOUNCE)
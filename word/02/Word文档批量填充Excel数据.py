@@ -16,14 +16,28 @@
 # 【1. 核心库导入区】- 仅导入必要库，注释说明用途
 # ==============================================================================
 import pandas as pd  # 数据处理：读取Excel、数据格式化
-from docx import Document  # Word操作：读写文档、操作段落/表格
 from docx.shared import Pt  # Word格式：字体大小设置
-from docx.oxml.ns import qn  # Word格式：中文字体兼容（解决宋体显示问题）
 from docx.enum.text import WD_ALIGN_PARAGRAPH  # Word格式：文本对齐方式
 from docx.enum.table import WD_CELL_VERTICAL_ALIGNMENT  # Word格式：单元格垂直对齐
 import os  # 系统操作：路径处理、文件夹创建
 from datetime import datetime  # 日期处理：日期解析与格式化
 import re  # 文本处理：正则匹配、日期提取
+import sys  # 系统操作：把 word 目录加入模块搜索路径
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from docfill.template_cache import TemplateCache  # 公共模块：模板母版缓存（模板只解析一次）
+from docfill.render_plan import RenderPlanEngine  # 公共模块：渲染计划引擎（模板编译一次，之后拼接XML）
+from docfill.parallel import run_jobs, stream_jobs  # 公共模块：多进程并行生成（输出按任务顺序返回）
+from docfill.group_index import GroupIndex, StationStream, duplicate_summary  # 公共模块：主键分组索引（一次分组，按主键直接取行）
+from docfill.formatting import format_frame, prepared_row, value_formatter  # 公共模块：整列格式化
+from docfill.scanner import get_scanner  # 公共模块：多关键字扫描（一条正则一次扫完段落）
+from docfill.tables import CellGrid, walk_paragraphs, walk_stats  # 公共模块：表格遍历 / 坐标网格
+from docfill.manifest import BuildManifest  # 公共模块：增量生成清单（内容没变的文档直接跳过）
+from docfill.excel_source import ExcelSource, SheetStream, fill_columns  # 公共模块：Excel 只读用到的列，结果缓存在工作簿旁边
+from docfill.profiling import StageTimer  # 公共模块：分阶段计时 / 性能剖析
+from docfill.fonts import font_style  # 公共模块：预制字体格式（rPr 只搭一次，逐个 run 克隆）
+from docfill.packaging import PackageBuffer, ZipPackage, document_bytes, entry_name, save_document  # 公共模块：打包输出 / 原子保存
+from docfill.journal import JOURNAL_NAME, RunJournal  # 公共模块：运行日志（断点续跑）
 
 
 # ==============================================================================
@@ -48,6 +62,42 @@ class Config:
     # -------------------------- 业务配置 --------------------------
     PRIMARY_KEY = '桩号'  # 数据匹配主键（按此列生成文件）
     OUTPUT_FILE_SUFFIX = ''  # 输出文件后缀（如"_填充完成"，最终文件名为"桩号_填充完成.docx"）
+    DUPLICATE_KEY_POLICY = 'first'  # 主键重复时的处理：'first'取第一行 / 'last'取最后一行 / 'error'报错（重复主键均会提示）
+    # 打包输出：填压缩包文件名（如'检查记录表.zip'，放在输出文件夹里）时，全部文档直接写进这一个压缩包，包内为“模板名/桩号.docx”，
+    # 不再逐个生成文件（适合OneDrive等同步盘里的项目文件夹）；''为逐个生成文件。打包模式下增量生成不生效
+    OUTPUT_ZIP = ''
+    # 压缩级别：0只打包不压缩（最快，docx本身已是压缩格式）；1~9数字越大压缩包越小、越慢
+    ZIP_COMPRESSION = 0
+
+    # -------------------------- 性能配置 --------------------------
+    # 模板缓存个数：模板只解析一次，之后每个桩号使用内存克隆；超出个数时淘汰最久未用的模板（0 表示关闭缓存）
+    TEMPLATE_CACHE_SIZE = 8
+    # 渲染引擎：'docx' 逐个用 python-docx 填充；'plan' 模板编译成渲染计划后直接拼接XML（批量大时快一个数量级，结果一致）
+    RENDER_ENGINE = 'docx'
+    # 并行进程数：1为单进程；大于1时按（模板, 桩号）任务分发到多个进程并行生成
+    WORKERS = 1
+    # 增量生成：在输出文件夹记录每份文档的指纹（数据 + 模板 + 配置 + 脚本代码），下次只重新生成有变化或缺失的文档；
+    # False为每次全部生成（默认）
+    INCREMENTAL = False
+    # 断点续跑：每个任务的结果都记入输出文件夹的 .docfill_journal.jsonl；True 时跳过上次已成功生成且文件还在的任务，
+    # 只重新生成失败或缺失的文档（中途崩溃、手动停止后接着跑）；False 为重新开始记录。打包模式下不生效
+    RESUME = False
+    # 监视模式：True 时整批运行完不退出，继续监视Excel和模板；Excel保存后只重新生成数据有变化或新增的桩号，
+    # 模板修改后只重新生成该模板的文档。检测到变化后等文件WATCH_DEBOUNCE秒无变化再处理（Excel/OneDrive保存会连续写入多次）
+    WATCH_MODE = False
+    WATCH_DEBOUNCE = 2
+    # Excel缓存：True 时读取结果以 JSON 缓存在工作簿旁边的 .docfill_cache 文件夹，工作簿未修改时直接读缓存；
+    # False（默认）为每次重新解析Excel
+    EXCEL_CACHE = False
+    # 流式读取：每块行数（如2000），大于0时以只读模式分块读取Excel、边读边生成，内存占用不随行数增长；0为一次性读取整表
+    # （生成前先扫描一遍整表确定各列类型、检查重复主键，填充结果与一次性读取时一致；主键重复仅支持'first'/'error'）
+    STREAM_CHUNK_ROWS = 0
+    # 分阶段计时：记录每个桩号各阶段（模板打开、占位符替换、表格填充、保存等）耗时，结束时打印汇总表，
+    # 并在输出文件夹写出 docfill_timing.json / docfill_timing.csv；False为不计时
+    STAGE_TIMING = True
+    # 性能剖析：'cprofile' 按模板剖析生成过程（输出文件夹写出 .prof 并打印最耗时的函数）；
+    # 'pyinstrument' 同上（需另行安装，写出 .html）；''为关闭。仅单进程（WORKERS = 1）时生效
+    PROFILER = ''
 
     # -------------------------- 填充规则配置 --------------------------
     # 1. 表格坐标填充：{Excel列名: (表格行索引, 表格列索引)}（索引从0开始）
@@ -181,22 +231,51 @@ class ExcelDataProcessor:
         if not os.path.exists(config.EXCEL_FILE):
             raise FileNotFoundError(f"Excel文件不存在：{config.EXCEL_FILE}")
 
-        # 读取Excel
-        df = pd.read_excel(config.EXCEL_FILE, sheet_name=config.SHEET_NAME)
-        df.columns = df.columns.str.strip()  # 清理列名空格
+        # 读取Excel（只读取填充规则用到的列，列名已清理空格）
+        source = ExcelSource(config.EXCEL_FILE, cache=config.EXCEL_CACHE)
+        try:
+            df, header = source.read(config.SHEET_NAME, fill_columns(config))
+        finally:
+            source.close()
 
         # 验证主键列
         if config.PRIMARY_KEY not in df.columns:
-            raise ValueError(f"Excel缺少主键列：{config.PRIMARY_KEY} | 现有列：{list(df.columns)}")
+            raise ValueError(f"Excel缺少主键列：{config.PRIMARY_KEY} | 现有列：{header}")
 
         # 验证占位符对应列
         missing_cols = [col for _, col in config.PLACEHOLDER_MAP.items() if col not in df.columns]
         if missing_cols:
-            raise ValueError(f"Excel缺少列：{missing_cols} | 现有列：{list(df.columns)}")
+            raise ValueError(f"Excel缺少列：{missing_cols} | 现有列：{header}")
 
-        print(f"✅ 成功读取Excel：{len(df)}行数据，{len(df.columns)}列字段")
+        cached = "（读取缓存）" if source.cache_hits else ""
+        print(f"✅ 成功读取Excel{cached}：{len(df)}行数据，{len(header)}列字段，使用其中{len(df.columns)}列")
         return df
 
+    @staticmethod
+    def iter_excel_chunks(config, layout=None):
+        """
+        流式加载并验证Excel数据（只读模式，每块STREAM_CHUNK_ROWS行）
+        :param config: 配置类实例
+        :param layout: 之前扫描整表的结果（SheetStream.layout），传入后不再重复扫描
+        :return: SheetStream（迭代时逐块产出DataFrame，列类型与一次性读取整表时相同）
+        """
+        # 检查Excel文件是否存在
+        if not os.path.exists(config.EXCEL_FILE):
+            raise FileNotFoundError(f"Excel文件不存在：{config.EXCEL_FILE}")
+
+        stream = SheetStream(config.EXCEL_FILE, config.SHEET_NAME, fill_columns(config), config.STREAM_CHUNK_ROWS,
+                             key=config.PRIMARY_KEY, layout=layout)
+
+        # 验证主键列、占位符对应列
+        if config.PRIMARY_KEY not in stream.columns:
+            stream.close()
+            raise ValueError(f"Excel缺少主键列：{config.PRIMARY_KEY} | 现有列：{stream.header}")
+        missing_cols = [col for _, col in config.PLACEHOLDER_MAP.items() if col not in stream.columns]
+        if missing_cols:
+            stream.close()
+            raise ValueError(f"Excel缺少列：{missing_cols} | 现有列：{stream.header}")
+        return stream
+
 
 class WordFormatter:
     """Word格式处理工具类"""
@@ -208,9 +287,8 @@ class WordFormatter:
         :param run: Word的Run对象
         :param config: 配置类实例
         """
-        run.font.name = config.FONT_NAME  # 设置英文字体
-        run.font.size = config.FONT_SIZE  # 设置字体大小
-        run._element.rPr.rFonts.set(qn('w:eastAsia'), config.FONT_NAME)  # 中文字体兼容
+        # 英文字体 + 中文字体（eastAsia）+ 字号：按配置预先搭好，新 run 直接克隆，已一致的 run 跳过
+        font_style(config.FONT_NAME, config.FONT_SIZE).apply(run)
 
     @staticmethod
     def fill_table_cell(cell, text, config):
@@ -233,51 +311,53 @@ class WordFormatter:
         WordFormatter.set_font_style(run, config)
 
     @staticmethod
-    def replace_placeholders(doc, data, config):
+    def collect_paragraphs(doc):
+        """
+        收集所有段落（表格内+表格外）
+        :param doc: Word文档对象
+        :return: 段落列表
+        """
+        return walk_paragraphs(doc)
+
+    @staticmethod
+    def replace_placeholders(doc, data, config, format_func, paragraphs=None):
         """
         替换所有占位符并强制设置宋体10号
         :param doc: Word文档对象
         :param data: 单行数据字典
         :param config: 配置类实例
+        :param format_func: 值格式化函数（列名, 原始值, 配置）→ 文本
+        :param paragraphs: 已收集好的段落列表（不传则现场收集）
         """
-        # 收集所有段落（表格内+表格外）
-        all_paragraphs = []
-        all_paragraphs.extend(doc.paragraphs)
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    all_paragraphs.extend(cell.paragraphs)
+        if paragraphs is None:
+            paragraphs = WordFormatter.collect_paragraphs(doc)
 
-        # 遍历替换每个占位符
-        for placeholder, excel_col in config.PLACEHOLDER_MAP.items():
+        replace_texts = {}  # 已格式化的值（只格式化文档里真正出现的占位符）
+
+        def replace(para, placeholder):
             # 获取并格式化值
-            raw_value = data.get(excel_col, "")
-            if pd.isna(raw_value):
-                replace_text = "/"
-            elif excel_col in config.DATE_FORMAT_MAP:
-                replace_text = ExcelDataProcessor.format_date(raw_value, config.DATE_FORMAT_MAP[excel_col])
-            elif excel_col in config.OPTIMIZE_DECIMAL_COLUMNS:
-                replace_text = ExcelDataProcessor.optimize_number(raw_value)
-                if excel_col in config.UNIT_MAP:
-                    replace_text += config.UNIT_MAP[excel_col]
-            else:
-                replace_text = str(raw_value) if not pd.isna(raw_value) else "/"
+            if placeholder not in replace_texts:
+                excel_col = config.PLACEHOLDER_MAP[placeholder]
+                replace_texts[placeholder] = format_func(excel_col, data.get(excel_col, ""), config)
+            replace_text = replace_texts[placeholder]
 
             # 逐Run替换（保留原有格式，仅修改字体）
-            for para in all_paragraphs:
-                run_processed = False
+            run_processed = False
+            for run in para.runs:
+                if placeholder in run.text:
+                    run.text = run.text.replace(placeholder, replace_text)
+                    WordFormatter.set_font_style(run, config)
+                    run_processed = True
+                    break
+
+            # 兜底：段落整体替换
+            if not run_processed and placeholder in para.text:
+                para.text = para.text.replace(placeholder, replace_text)
                 for run in para.runs:
-                    if placeholder in run.text:
-                        run.text = run.text.replace(placeholder, replace_text)
-                        WordFormatter.set_font_style(run, config)
-                        run_processed = True
-                        break
+                    WordFormatter.set_font_style(run, config)
 
-                # 兜底：段落整体替换
-                if not run_processed and placeholder in para.text:
-                    para.text = para.text.replace(placeholder, replace_text)
-                    for run in para.runs:
-                        WordFormatter.set_font_style(run, config)
+        # 一次扫描找出每个段落里出现的占位符，只处理命中的段落
+        get_scanner(config.PLACEHOLDER_MAP).scan(paragraphs, replace)
 
 
 # ==============================================================================
@@ -288,6 +368,19 @@ class WordFiller:
 
     def __init__(self, config):
         self.config = config
+        self.template_cache = TemplateCache(config.TEMPLATE_CACHE_SIZE)  # 模板母版缓存
+        self.plan_engine = None  # 渲染计划引擎（RENDER_ENGINE = 'plan' 时启用）
+        self._cell_slots = {}  # {(模板路径, 修改时间, 大小): (坐标对应的单元格位置, 越界条目)}
+        self.timer = StageTimer(config.STAGE_TIMING, config.PROFILER)  # 分阶段计时器
+        self.package = None  # 打包输出的压缩包（run 时打开；单独调用 / 子进程中为 PackageBuffer）
+        self._sheet_layout = None  # 流式模式：整表扫描结果（列类型、重复桩号），各模板共用
+        if config.RENDER_ENGINE == 'plan':
+            self.plan_engine = RenderPlanEngine(
+                self.template_cache,
+                lambda doc, data_row, format_func: self._fill_document(doc, data_row, format_func, "渲染计划编译"),
+                self._format_cell_value, config,
+                max_size=max(config.TEMPLATE_CACHE_SIZE, 1)
+            )
         self._prepare_output_folder()
 
     def _prepare_output_folder(self):
@@ -334,83 +427,349 @@ class WordFiller:
         else:
             return str(raw_val)
 
-    def process_single_station(self, template_path, station, data_row):
+    def _locate_cells(self, table):
         """
-        处理单个桩号的数据填充
+        按 TABLE_CELL_MAP 一次性换算出每个坐标对应的单元格位置
+        :param table: 第一个表格
+        :return: ({Excel列名: 单元格位置}, [(Excel列名, 行, 列) 越界的条目])
+        """
+        return CellGrid(table).check(self.config.TABLE_CELL_MAP)
+
+    def _template_cells(self, template_path):
+        """
+        模板的坐标换算结果（每个模板只算一次，所有桩号共用）
         :param template_path: Word模板路径
-        :param station: 桩号名称
+        :return: _locate_cells 的结果；模板没有表格时为 None
+        """
+        path = os.path.abspath(template_path)
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        if key not in self._cell_slots:
+            doc = self.template_cache.open(path)
+            self._cell_slots[key] = self._locate_cells(doc.tables[0]) if doc.tables else None
+        return self._cell_slots[key]
+
+    def _fill_document(self, doc, data_row, format_func, station_clean, cells=None):
+        """
+        对文档执行全部填充步骤（普通渲染与渲染计划编译共用）
+        :param doc: Word文档对象
         :param data_row: 单行数据字典
+        :param format_func: 值格式化函数（列名, 原始值, 配置）→ 文本
+        :param station_clean: 桩号名称（用于提示信息）
+        :param cells: 模板的坐标换算结果（不传则按本文档现算，越界条目逐个提示）
         """
-        # 构建输出路径
-        station_clean = str(station).strip()
-        output_path = os.path.join(
+        # 步骤1：替换占位符（强制宋体10号）
+        with self.timer.stage('占位符替换'):
+            WordFormatter.replace_placeholders(doc, data_row, self.config, format_func)
+
+        # 步骤2：填充表格坐标（强制宋体10号）
+        with self.timer.stage('表格填充'):
+            self._fill_table(doc, data_row, format_func, station_clean, cells)
+
+    def _fill_table(self, doc, data_row, format_func, station_clean, cells):
+        """按 TABLE_CELL_MAP 填充第一个表格（参数同 _fill_document）"""
+        if doc.tables:
+            main_table = doc.tables[0]  # 取第一个表格
+            if cells is None:
+                cells = self._locate_cells(main_table)
+                for _, row_idx, col_idx in cells[1]:
+                    print(f"⏩ 跳过[{station_clean}]：表格行列越界（行{row_idx + 1}，列{col_idx + 1}）")
+            slots = cells[0]  # 越界条目已提前剔除
+            cell_at = CellGrid.resolver(main_table)
+            for excel_col in self.config.TABLE_CELL_MAP:
+                # 跳过不存在的列
+                if excel_col not in data_row:
+                    print(f"⏩ 跳过[{station_clean}]：缺少列{excel_col}")
+                    continue
+                if excel_col not in slots:
+                    continue
+
+                # 格式化值
+                fill_text = format_func(excel_col, data_row[excel_col], self.config)
+
+                # 填充单元格
+                WordFormatter.fill_table_cell(cell_at(slots[excel_col]), fill_text, self.config)
+
+    def _report_table_walk(self, template_path):
+        """
+        播报模板中合并单元格的去重情况（每个物理单元格只扫描一次）
+        :param template_path: Word模板路径
+        """
+        try:
+            stats = walk_stats(self.template_cache.open(template_path))
+        except Exception:
+            return  # 模板打不开时由每个任务各自报告失败
+        if stats.avoided:
+            print(f"♻️ 合并单元格：{stats.cells}个单元格只扫描一次，每份文档少扫描{stats.avoided}次重复单元格")
+
+    def _report_table_bounds(self, template_path):
+        """
+        提示模板中越界的表格坐标（每个模板只检查一次，不再逐个桩号提示）
+        :param template_path: Word模板路径
+        """
+        try:
+            cells = self._template_cells(template_path)
+        except Exception:
+            return  # 模板打不开时由每个任务各自报告失败
+        for excel_col, row_idx, col_idx in (cells[1] if cells else []):
+            print(f"⏩ 跳过[{excel_col}]：表格行列越界（行{row_idx + 1}，列{col_idx + 1}），所有桩号均不填充")
+
+    def _output_path(self, station):
+        """
+        构建输出路径
+        :param station: 桩号名称
+        :return: 输出文件路径
+        """
+        return os.path.join(
             self.config.OUTPUT_FOLDER,
-            f"{station_clean}{self.config.OUTPUT_FILE_SUFFIX}.docx"
+            f"{str(station).strip()}{self.config.OUTPUT_FILE_SUFFIX}.docx"
         )
 
-        try:
-            # 打开模板
-            doc = Document(template_path)
+    def _save_output(self, template_path, output_path, document):
+        """
+        保存一份文档：写到输出文件夹，打包模式下写进压缩包
+        :param template_path: Word模板路径（压缩包内按模板分文件夹）
+        :param output_path: 输出文件路径
+        :param document: Word文档对象，或已渲染好的docx内容（bytes）
+        :return: 用于提示的文件名
+        """
+        if not self.config.OUTPUT_ZIP:
+            save_document(document, output_path)  # 先写临时文件再改名，中途退出不会留下半个文档
+            return os.path.basename(output_path)
+
+        if self.package is None:
+            self.package = PackageBuffer()
+        name = entry_name(template_path, os.path.basename(output_path))
+        self.package.add(name, document_bytes(document))
+        return name
+
+    def _job_output(self, template_path, station):
+        """任务的输出位置（记入运行日志）：输出文件路径，打包模式下为“压缩包路径/包内路径”"""
+        output_path = self._output_path(station)
+        if isinstance(self.package, ZipPackage):
+            return os.path.join(self.package.path, entry_name(template_path, os.path.basename(output_path)))
+        return output_path
 
-            # 步骤1：替换占位符（强制宋体10号）
-            WordFormatter.replace_placeholders(doc, data_row, self.config)
+    def process_single_station(self, template_path, station, data_row):
+        """
+        处理单个桩号的数据填充
+        :param template_path: Word模板路径
+        :param station: 桩号名称
+        :param data_row: 单行数据字典
+        :return: 失败原因；成功时为 None
+        """
+        station_clean = str(station).strip()
+        output_path = self._output_path(station)
 
-            # 步骤2：填充表格坐标（强制宋体10号）
-            if doc.tables:
-                main_table = doc.tables[0]  # 取第一个表格
-                for excel_col, (row_idx, col_idx) in self.config.TABLE_CELL_MAP.items():
-                    # 跳过不存在的列
-                    if excel_col not in data_row:
-                        print(f"⏩ 跳过[{station_clean}]：缺少列{excel_col}")
-                        continue
+        with self.timer.station(template_path, station_clean):
+            try:
+                # 已整列格式化的行直接取文本，否则逐格格式化
+                format_func = value_formatter(data_row, self._format_cell_value)
+
+                # 渲染计划引擎：直接拼接 document.xml（遇到特殊值时返回 None，退回普通流程）
+                content = None
+                if self.plan_engine:
+                    with self.timer.stage('计划渲染'):
+                        content = self.plan_engine.render(template_path, data_row, format_func)
+
+                if content is not None:
+                    with self.timer.stage('保存'):
+                        saved = self._save_output(template_path, output_path, content)
+                else:
+                    # 打开模板（从缓存克隆，避免每个桩号重复解析模板）
+                    with self.timer.stage('模板打开'):
+                        doc = self.template_cache.open(template_path)
+                        cells = self._template_cells(template_path)
+                    self._fill_document(doc, data_row, format_func, station_clean, cells)
+
+                    # 保存文件
+                    with self.timer.stage('保存'):
+                        saved = self._save_output(template_path, output_path, doc)
+                print(f"✅ 成功[{station_clean}]：{saved}")
+                return None
 
-                    # 检查行列索引是否越界
-                    if row_idx >= len(main_table.rows) or col_idx >= len(main_table.columns):
-                        print(f"⏩ 跳过[{station_clean}]：表格行列越界（行{row_idx + 1}，列{col_idx + 1}）")
-                        continue
+            except Exception as e:
+                self.timer.mark_failed()
+                print(f"❌ 失败[{station_clean}]：{str(e)[:80]}")
+                return str(e) or type(e).__name__
 
-                    # 格式化值
-                    fill_text = self._format_cell_value(excel_col, data_row[excel_col], self.config)
+    def _text_columns(self):
+        """需要整列格式化的列（表格坐标 + 占位符）"""
+        return list(self.config.TABLE_CELL_MAP) + list(self.config.PLACEHOLDER_MAP.values())
 
-                    # 填充单元格
-                    WordFormatter.fill_table_cell(main_table.cell(row_idx, col_idx), fill_text, self.config)
+    def _collect_jobs(self, df, templates):
+        """
+        整表模式：一次性生成全部（模板, 桩号）任务
+        :param df: Excel数据
+        :param templates: Word模板列表
+        :return: 任务列表
+        """
+        # 按主键一次性分组（所有模板共用），并提示重复主键
+        index = GroupIndex(df, self.config.PRIMARY_KEY, self.config.DUPLICATE_KEY_POLICY)
+        index.check_duplicates()
+        if index.missing_count:
+            print(f"⏩ 跳过：空桩号（{index.missing_count}行）")
+
+        # 需要填充的列整列格式化一次（不再逐个单元格解析日期、去零）
+        with self.timer.stage('格式化'):
+            texts = format_frame(df, self._text_columns(), self.config, self._format_cell_value, unit_for_all=False)
+
+        # 获取每个桩号的数据
+        stations = []
+        for station in index.keys:
+            if str(station).strip() == "":
+                print(f"⏩ 跳过：空桩号")
+                continue
+            stations.append((station, prepared_row(texts, index.position(station))))
 
-            # 保存文件
-            doc.save(output_path)
-            print(f"✅ 成功[{station_clean}]：{os.path.basename(output_path)}")
+        return [(template, station, station_data) for template in templates for station, station_data in stations]
 
-        except Exception as e:
-            print(f"❌ 失败[{station_clean}]：{str(e)[:80]}")
+    def _scan_excel(self):
+        """
+        流式模式开工前扫描整表（只读模式，不保留数据），DUPLICATE_KEY_POLICY='error' 时在生成任何文档之前报错
+        :return: 扫描结果（SheetStream.layout），供各模板流式读取时复用
+        """
+        stream = ExcelDataProcessor.iter_excel_chunks(self.config)
+        try:
+            duplicates = stream.duplicates()
+            if duplicates and self.config.DUPLICATE_KEY_POLICY == 'error':
+                raise ValueError(f"[{self.config.PRIMARY_KEY}]存在重复值：{duplicate_summary(duplicates)}")
+            return stream.layout
+        finally:
+            stream.close()
+
+    def _stream_jobs(self, templates, streams):
+        """
+        流式模式：边读取Excel边产出（模板, 桩号）任务（每个模板重新流式读取一遍）
+        :param templates: Word模板列表
+        :param streams: 收集每个模板对应的 StationStream（用于读取完成后的统计）
+        """
+        def format_chunk(chunk):
+            with self.timer.stage('格式化'):
+                return format_frame(chunk, self._text_columns(), self.config, self._format_cell_value,
+                                    unit_for_all=False)
+
+        for template in templates:
+            with self.timer.stage('Excel读取'):
+                chunks = ExcelDataProcessor.iter_excel_chunks(self.config, self._sheet_layout)
+            stations = StationStream(
+                self.timer.timed('Excel读取', chunks),
+                self.config.PRIMARY_KEY, self.config.DUPLICATE_KEY_POLICY, format_chunk
+            )
+            streams.append(stations)
+            for station, station_data in stations:
+                if str(station).strip() == "":
+                    continue
+                yield template, station, station_data
+
+    def _report_timing(self):
+        """打印分阶段耗时汇总表，并写出计时报告（未开启计时时什么都不做）"""
+        if not self.config.STAGE_TIMING:
+            return
+        if self.config.PROFILER and self.config.WORKERS > 1:
+            print("⚠️ 性能剖析仅在单进程（WORKERS = 1）时生效，本次只汇总计时")
+        print("\n" + self.timer.summary())
+        reports = self.timer.write_report(self.config.OUTPUT_FOLDER)
+        print(f"📊 计时报告：{', '.join(os.path.basename(path) for path in reports)}")
 
     def run(self):
         """主执行函数"""
         try:
-            # 1. 加载Excel数据
-            df = ExcelDataProcessor.load_excel_data(self.config)
+            # 1. 加载Excel数据（流式模式下先扫描整表：验证表头、确定列类型、检查重复桩号，数据边读边生成）
+            streaming = self.config.STREAM_CHUNK_ROWS > 0
+            with self.timer.stage('Excel读取'):
+                if streaming:
+                    self._sheet_layout = self._scan_excel()
+                    print(f"🌊 流式读取模式：每块{self.config.STREAM_CHUNK_ROWS}行，边读取边生成")
+                else:
+                    df = ExcelDataProcessor.load_excel_data(self.config)
 
             # 2. 获取Word模板
             templates = self._get_word_templates()
 
-            # 3. 遍历每个模板
-            for template in templates:
-                template_name = os.path.basename(template)
-                print(f"\n========== 处理模板：{template_name} ==========")
-
-                # 4. 遍历每个桩号
-                unique_stations = df[self.config.PRIMARY_KEY].unique()
-                for station in unique_stations:
-                    if pd.isna(station) or str(station).strip() == "":
-                        print(f"⏩ 跳过：空桩号")
-                        continue
-
-                    # 获取当前桩号数据
-                    station_data = df[df[self.config.PRIMARY_KEY] == station].iloc[0].to_dict()
-                    # 处理单个桩号
-                    self.process_single_station(template, station, station_data)
+            # 3. 生成（模板, 桩号）任务
+            streams = []
+            jobs = self._stream_jobs(templates, streams) if streaming else self._collect_jobs(df, templates)
+
+            # 4. 断点续跑：跳过上次已成功生成的任务；增量生成：跳过指纹未变且输出文件完好的任务
+            #    （打包模式每次重新生成整个压缩包，两者都不做）
+            manifest = None
+            resume = self.config.RESUME
+            if self.config.OUTPUT_ZIP:
+                if self.config.INCREMENTAL or resume:
+                    print("📦 打包输出模式：每次重新生成整个压缩包，增量生成 / 断点续跑不生效")
+                resume = False
+            elif self.config.INCREMENTAL:
+                manifest = BuildManifest(self.config.OUTPUT_FOLDER, self.config, __file__)
+            journal = RunJournal(self.config.OUTPUT_FOLDER, resume)
+            if resume:
+                jobs = journal.select(jobs, self._output_path)
+            if manifest:
+                jobs = manifest.select(jobs, self._output_path)
+            if not streaming:
+                jobs = list(jobs)
+                if journal.skipped:
+                    retried = f"（含上次失败的{journal.retried}份）" if journal.retried else ""
+                    print(f"⏯️ 断点续跑：上次已完成{journal.skipped}份已跳过，本次生成{len(jobs)}份{retried}")
+                if manifest and manifest.skipped:
+                    print(f"⏭️ 增量模式：{manifest.skipped}份文档无变化已跳过，需重新生成{len(jobs)}份")
+
+            # 5. 执行任务（WORKERS > 1 时多进程并行，输出按任务顺序打印）
+            if self.config.OUTPUT_ZIP:
+                self.package = ZipPackage(os.path.join(self.config.OUTPUT_FOLDER, self.config.OUTPUT_ZIP),
+                                          self.config.ZIP_COMPRESSION)
+            if streaming:
+                if self.config.WORKERS > 1:
+                    print(f"🚀 多进程模式：{self.config.WORKERS}个进程，边读取边生成")
+                results = stream_jobs(self, jobs, self.config.WORKERS, __file__)
+            else:
+                if self.config.WORKERS > 1:
+                    print(f"🚀 多进程模式：{self.config.WORKERS}个进程，共{len(jobs)}个任务")
+                results = zip(jobs, run_jobs(self, jobs, self.config.WORKERS, __file__))
+            current_template = None
+            try:
+                for job, (output, error) in results:
+                    template = job[0]
+                    if template != current_template:
+                        current_template = template
+                        print(f"\n========== 处理模板：{os.path.basename(template)} ==========")
+                        self._report_table_walk(template)
+                        self._report_table_bounds(template)
+                    print(output, end='')
+                    journal.update(job, error, self._job_output(job[0], job[1]))
+                    if manifest:
+                        manifest.update(job, error)
+            finally:
+                # 保存清单（中途出错时已完成的任务同样记录）
+                if manifest:
+                    manifest.save()
+                journal.close()
+                # 关闭压缩包（中途出错时已生成的文档同样保留）
+                if isinstance(self.package, ZipPackage):
+                    self.package.close()
+
+            # 流式模式：读取完成后汇总
+            if streams:
+                print(f"\n🌊 流式读取完成：共{streams[0].rows_read}行数据")
+                streams[0].check_duplicates()
+                if streams[0].missing_count:
+                    print(f"⏩ 跳过：空桩号（{streams[0].missing_count}行）")
+            if streaming and journal.skipped:
+                print(f"⏯️ 断点续跑：上次已完成{journal.skipped}份已跳过")
+            if streaming and manifest and manifest.skipped:
+                print(f"⏭️ 增量模式：{manifest.skipped}份文档无变化已跳过")
+            if journal.failed:
+                print(f"\n❌ 失败{len(journal.failed)}份，原因已记入{JOURNAL_NAME}；将 RESUME 设为 True 重新运行即可只补生成失败/缺失的文档")
+
+            # 分阶段耗时汇总
+            self._report_timing()
 
             # 完成提示
             print(f"\n🎉 全部处理完成！")
             print(f"📁 输出目录：{os.path.abspath(self.config.OUTPUT_FOLDER)}")
+            if isinstance(self.package, ZipPackage):
+                size_mb = os.path.getsize(self.package.path) / (1 << 20)
+                print(f"📦 压缩包：{os.path.basename(self.package.path)}（{self.package.count}份文档，{size_mb:.1f}MB）")
             print(f"📌 格式说明：所有填充内容均为{self.config.FONT_NAME}{self.config.FONT_SIZE.pt}号字体")
 
         except Exception as e:
@@ -427,3 +786,8 @@ if __name__ == "__main__":
     # 创建填充实例并执行
     filler = WordFiller(config)
     filler.run()
+    # 监视模式：Excel / 模板修改后只重新生成受影响的文档（Ctrl+C退出）
+    if config.WATCH_MODE:
+        from docfill.session import FillerSession
+        from docfill.watch import watch
+        watch(FillerSession(sys.modules[__name__], config), config.WATCH_DEBOUNCE)
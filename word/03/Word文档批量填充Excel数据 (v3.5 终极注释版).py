@@ -17,14 +17,29 @@
 # 【1. 核心库导入区】 - 脚本运行所需的基础工具箱
 # ==============================================================================
 import pandas as pd  # 数据处理大神：负责读取和切片 Excel 数据
-from docx import Document  # Word 操作手：负责打开、修改和保存 Word 文档
 from docx.shared import Pt  # 格式工具：负责设置字体大小（Point）
-from docx.oxml.ns import qn  # 格式工具：负责解决中文字体（如宋体）在 Word 中的兼容性问题
 from docx.enum.text import WD_ALIGN_PARAGRAPH  # 格式工具：负责段落对齐（居中、靠左等）
 from docx.enum.table import WD_CELL_VERTICAL_ALIGNMENT  # 格式工具：负责表格单元格的垂直对齐
 import os  # 系统管家：负责创建文件夹、检查文件是否存在
 from datetime import datetime  # 时间管理：负责识别和转换各种日期格式
 import re  # 文本侦探：正则表达式库，负责从杂乱的文字中提取目标内容（如日期）
+from itertools import takewhile  # 流水闸门：流式读取时读过结束行就关闸，不再往下读
+import sys  # 路径向导：把 word 目录加入模块搜索路径，好找到公共模块 docfill
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from docfill.template_cache import TemplateCache  # 模板仓库：模板只解析一次，之后每个桩号拿一份内存克隆
+from docfill.render_plan import RenderPlanEngine  # 渲染快车道：模板编译成渲染计划，之后只拼接 XML
+from docfill.parallel import run_jobs, stream_jobs  # 多核分工：把（模板, 桩号）任务分给多个进程，结果按顺序播报
+from docfill.group_index import GroupIndex, StationStream, duplicate_summary  # 桩号索引：一次分组，按桩号取数据不用每次全表扫描
+from docfill.formatting import format_frame, prepared_row, value_formatter  # 整列翻译：要用的列提前一次性格式化好
+from docfill.scanner import get_scanner  # 雷达扫描：一条正则一次扫完段落，找出全部占位符/关键字
+from docfill.tables import CellGrid, walk_paragraphs, walk_stats  # 表格巡检 + 坐标地图：合并格子只走一遍，坐标只算一次
+from docfill.manifest import BuildManifest  # 增量清单：记下每份文档的指纹，没变的下次直接跳过
+from docfill.excel_source import ExcelSource, SheetStream, fill_columns  # Excel 快车道：只读用到的列，读过的结果存一份缓存
+from docfill.profiling import StageTimer  # 秒表：每道工序各花了多少时间，哪个模板最慢，一目了然
+from docfill.fonts import font_style  # 字体模具：宋体 10 号的“外衣”只裁一次，之后每个字直接套现成的
+from docfill.packaging import PackageBuffer, ZipPackage, document_bytes, entry_name, save_document  # 打包车间 + 安全出厂
+from docfill.journal import JOURNAL_NAME, RunJournal  # 施工日志：每份文档做完记一笔，中途崩了接着干
 
 
 # ==============================================================================
@@ -56,6 +71,43 @@ class Config:
     # 【选填】生成文件的后缀名（例如填入 '_已完成'，生成的文件名就是 '线塔1_已完成.docx'）
     OUTPUT_FILE_SUFFIX = ''
 
+    # 【选填】打包输出：填一个压缩包名字（如 '铁塔组立检查记录表.zip'，会放在输出文件夹里），
+    # 所有文档生成完直接装进这一个压缩包（包里按“模板名/桩号.docx”摆好），不再一份一份地往文件夹里扔。
+    # 项目文件夹在 OneDrive 这类同步盘里时特别有用：几千个小文件要同步几千次，一个压缩包只同步一次。
+    # 填 '' 代表照旧逐个生成文件。注意：打包模式每次都重新装一整包，增量生成（模式三）不生效。
+    OUTPUT_ZIP = ''
+
+    # 【选填】压缩力度：0 = 只装箱不压缩（最快，docx 本身已经是压缩过的）；1~9 = 数字越大箱子越小、装得越慢
+    ZIP_COMPRESSION = 0
+
+    # 【选填】Excel 缓存：填 True 的话，第一次读完会在 Excel 旁边的 .docfill_cache 文件夹里存一份（纯 JSON 文本），
+    # Excel 没改过的话下次秒读。默认 False：每次都重新解析 Excel（缓存文件夹会跟着 OneDrive 同步，按需再开）。
+    EXCEL_CACHE = False
+
+    # 【选填】流式读取：Excel 有几十万行时填每块行数（如 2000），一块一块地读、读一块生成一块，内存占用不随表格变大；
+    # 开工前会把整张表飞快地过一遍（认准每列的类型、揪出重复桩号），填出来的内容和一次性读完时一模一样。
+    # 填 0 代表一次性读完整张表（默认）。注意：流式模式下桩号重复只能选 'first' 或 'error'。
+    STREAM_CHUNK_ROWS = 0
+
+    # 【选填】模板缓存个数：模板只解析一次，之后每个桩号直接在内存里克隆一份（比反复打开快得多）
+    # 模板文件夹里模板很多时，超出这个数量会自动淘汰最久没用的模板。填 0 代表关闭缓存。
+    TEMPLATE_CACHE_SIZE = 8
+
+    # 【选填】渲染引擎：'docx' = 每个桩号都用 python-docx 逐项填充（默认）；
+    # 'plan' = 模板先“编译”成渲染计划，之后每个桩号直接拼接 XML，成千上万份时快一个数量级，生成结果完全一致。
+    RENDER_ENGINE = 'docx'
+
+    # 【选填】并行进程数：1 = 单进程依次生成；填 CPU 核数（如 8、16）可多核同时开工，桩号越多越划算
+    WORKERS = 1
+
+    # 【选填】分阶段计时：给每道工序（读 Excel、翻译数据、打开模板、替换暗号、追加关键字、填表格、存盘）掐秒表，
+    # 跑完打印一张耗时汇总表，并在输出文件夹留下 docfill_timing.json / docfill_timing.csv 明细。填 False 代表不计时。
+    STAGE_TIMING = True
+
+    # 【选填】性能剖析：想知道到底哪个模板、哪个函数慢，就填 'cprofile'（自带）或 'pyinstrument'（需另装）；
+    # 跑完会按模板打印最耗时的函数，并在输出文件夹留下剖析文件。填 '' 代表关闭。只在 WORKERS = 1 时生效。
+    PROFILER = ''
+
     # -------------------------- C. ★ 高级生成范围控制（类似打印机设置） --------------------------
     # 模式一：按“具体名称”精确指定。
     # 用法：填入需要生成的桩号，如 ['15号塔', '18号塔']。填 [] 代表全部生成。
@@ -65,6 +117,26 @@ class Config:
     # 用法：[起始行号, 结束行号]。例如 [3, 10] 表示只生成 Excel 左侧显示的第 3 行到第 10 行。填 [] 代表全部生成。
     TARGET_ROW_RANGE = []
 
+    # 模式三：增量生成（默认关闭）。填 True 后输出文件夹里会多一个 .docfill_manifest.json 清单，记下每份文档用的数据/模板/配置/脚本代码。
+    # 下次运行时只重新生成“数据改过、模板改过、配置改过、脚本改过、或者文件被删/被改”的文档，其余直接跳过（跳过时屏幕上会报数）。
+    # 填 False 代表每次都全部重新生成。
+    INCREMENTAL = False
+
+    # 模式四：断点续跑。每做完一份文档都会在输出文件夹的 .docfill_journal.jsonl 施工日志里记一笔（成功还是失败、为什么失败）。
+    # 几千份跑到一半电脑死机、或者被你手动停掉了？把这里改成 True 再运行：日志里记着已经做好、文件也还在的直接跳过，
+    # 只补做失败的和还没轮到的。填 False 代表从头开始记日志。打包输出模式下不生效（每次都重装一整包）。
+    RESUME = False
+
+    # 模式五：监视模式。填 True 的话，整批跑完不退出，而是盯着 Excel 和模板：
+    # 你在 Excel 里改完按保存，几秒后只重新生成改过的、新加的桩号；改了哪个模板，就只重做这个模板的文档。
+    # Excel / OneDrive 保存时会连着改写好几次文件，所以要等文件安静 WATCH_DEBOUNCE 秒再动手。按 Ctrl+C 退出。
+    WATCH_MODE = False
+    WATCH_DEBOUNCE = 2
+
+    # 桩号重复时怎么办？'first' = 用第一行（默认），'last' = 用最后一行，'error' = 直接报错停下来
+    # 无论哪种方式，开工前都会把重复的桩号列出来提醒你
+    DUPLICATE_KEY_POLICY = 'first'
+
     # -------------------------- D. 填充规则配置 --------------------------
     # 规则 1：【表格坐标填充】
     # 格式：'Excel表头名': (Word表格的行号, Word表格的列号) —— 注意：行号列号从 0 开始算！
@@ -187,16 +259,38 @@ class ExcelDataProcessor:
         if not os.path.exists(config.EXCEL_FILE):
             raise FileNotFoundError(f"救命，Excel文件没找到：{config.EXCEL_FILE}")
 
-        df = pd.read_excel(config.EXCEL_FILE, sheet_name=config.SHEET_NAME)
-        df.columns = df.columns.str.strip()  # 去掉表头里不小心敲进去的空格
+        # 只搬填充规则真正用到的列（表头里不小心敲进去的空格会顺手去掉）
+        source = ExcelSource(config.EXCEL_FILE, cache=config.EXCEL_CACHE)
+        try:
+            df, _ = source.read(config.SHEET_NAME, fill_columns(config))
+        finally:
+            source.close()
 
         # 检查必须存在的列，防止运行一半崩溃
         if config.PRIMARY_KEY not in df.columns:
             raise ValueError(f"Excel里找不到主键列[{config.PRIMARY_KEY}]")
 
-        print(f"✅ 成功读取Excel：包含 {len(df)} 条有效数据")
+        cached = "（Excel 没改过，直接读的缓存）" if source.cache_hits else ""
+        print(f"✅ 成功读取Excel{cached}：包含 {len(df)} 条有效数据")
         return df
 
+    @staticmethod
+    def iter_excel_chunks(config, layout=None):
+        """
+        流式读取：只读模式一块一块地搬数据（每块 STREAM_CHUNK_ROWS 行），搬之前同样先做体检。
+        搬之前还会把整张表飞快地过一遍，认准每列是什么类型（搬出来的数字和一次性读完时一模一样）；
+        layout 是上次过一遍的结果，给了就不用再过。
+        """
+        if not os.path.exists(config.EXCEL_FILE):
+            raise FileNotFoundError(f"救命，Excel文件没找到：{config.EXCEL_FILE}")
+
+        stream = SheetStream(config.EXCEL_FILE, config.SHEET_NAME, fill_columns(config), config.STREAM_CHUNK_ROWS,
+                             key=config.PRIMARY_KEY, layout=layout)
+        if config.PRIMARY_KEY not in stream.columns:
+            stream.close()
+            raise ValueError(f"Excel里找不到主键列[{config.PRIMARY_KEY}]")
+        return stream
+
 
 class WordFormatter:
     """Word 文档的美容师：负责往里面填字，并控制长相"""
@@ -204,10 +298,8 @@ class WordFormatter:
     @staticmethod
     def set_font_style(run, config):
         """底层逻辑：给被选中的字强制套上宋体 10 号"""
-        run.font.name = config.FONT_NAME
-        run.font.size = config.FONT_SIZE
-        # 中文字体必须这么设置才能在 Word 里生效
-        run._element.rPr.rFonts.set(qn('w:eastAsia'), config.FONT_NAME)
+        # 外衣（西文字体 + 中文字体 + 字号）按配置只裁一次：光着的字直接穿一件复制品，已经穿对的不再折腾
+        font_style(config.FONT_NAME, config.FONT_SIZE).apply(run)
 
     @staticmethod
     def fill_table_cell(cell, text, config):
@@ -220,84 +312,75 @@ class WordFormatter:
         WordFormatter.set_font_style(run, config)
 
     @staticmethod
-    def replace_placeholders(doc, data, config):
-        """底层逻辑：全篇扫描 {占位符} 并替换"""
-        # 把文档里所有的段落（表格里的、表格外的）全部收集起来
-        all_paragraphs = []
-        all_paragraphs.extend(doc.paragraphs)
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    all_paragraphs.extend(cell.paragraphs)
-
-        for placeholder, excel_col in config.PLACEHOLDER_MAP.items():
-            raw_value = data.get(excel_col, "")
-
-            # 拿到数据后，先根据配置进行格式化、去0、加单位
-            if pd.isna(raw_value):
-                replace_text = "/"
-            elif excel_col in config.DATE_FORMAT_MAP:
-                replace_text = ExcelDataProcessor.format_date(raw_value, config.DATE_FORMAT_MAP[excel_col])
-            else:
-                if excel_col in config.OPTIMIZE_DECIMAL_COLUMNS:
-                    replace_text = ExcelDataProcessor.optimize_number(raw_value)
-                else:
-                    replace_text = str(raw_value) if not pd.isna(raw_value) else "/"
+    def collect_paragraphs(doc):
+        """底层逻辑：把文档里所有的段落（表格里的、表格外的）全部收集起来"""
+        return walk_paragraphs(doc)
 
-                # 只要配了单位，就得加（跳过空值）
-                if excel_col in config.UNIT_MAP and replace_text != "/":
-                    replace_text += config.UNIT_MAP[excel_col]
+    @staticmethod
+    def replace_placeholders(doc, data, config, format_func, paragraphs=None):
+        """底层逻辑：全篇扫描 {占位符} 并替换（paragraphs 为已收集好的段落，不传则现场收集）"""
+        if paragraphs is None:
+            paragraphs = WordFormatter.collect_paragraphs(doc)
+
+        replace_texts = {}  # 翻译好的值：只翻译文档里真正出现的占位符
+
+        def replace(para, placeholder):
+            # 拿到数据后，交给主类的格式化大师进行格式化、去0、加单位
+            if placeholder not in replace_texts:
+                excel_col = config.PLACEHOLDER_MAP[placeholder]
+                replace_texts[placeholder] = format_func(excel_col, data.get(excel_col, ""), config)
+            replace_text = replace_texts[placeholder]
+
+            run_processed = False
+            for run in para.runs:  # 尽量在最小单元(Run)替换，以保留原有格式
+                if placeholder in run.text:
+                    run.text = run.text.replace(placeholder, replace_text)
+                    WordFormatter.set_font_style(run, config)
+                    run_processed = True
+                    break
+            # 如果被 Word 底层强行切断了，就整个段落暴力替换
+            if not run_processed and placeholder in para.text:
+                para.text = para.text.replace(placeholder, replace_text)
+                for run in para.runs:
+                    WordFormatter.set_font_style(run, config)
+
+        # 雷达一次扫完每个段落，只在真正出现占位符的段落里动手
+        get_scanner(config.PLACEHOLDER_MAP).scan(paragraphs, replace)
 
-            # 开始全篇搜索替换
-            for para in all_paragraphs:
+    @staticmethod
+    def append_keywords(doc, data, config, format_func, paragraphs=None):
+        """底层逻辑：找关键字（如“编号：”），然后在它屁股后面追加数据"""
+        if paragraphs is None:
+            paragraphs = WordFormatter.collect_paragraphs(doc)
+
+        target_replaces = {}  # 关键字 → "编号：" + "X塔数据"
+
+        def append(para, keyword):
+            if keyword not in target_replaces:
+                excel_col = config.KEYWORD_APPEND_MAP[keyword]
+                # 调用主类的格式化大师，处理去0加单位等事务
+                append_text = format_func(excel_col, data.get(excel_col, ""), config)
+                # 要替换成的最终效果 = "编号：" + "X塔数据"
+                target_replaces[keyword] = keyword + append_text
+            target_replace = target_replaces[keyword]
+
+            # 如果段落里有"编号："，并且还没被追加过数据，就开干
+            if keyword in para.text and target_replace not in para.text:
                 run_processed = False
-                for run in para.runs:  # 尽量在最小单元(Run)替换，以保留原有格式
-                    if placeholder in run.text:
-                        run.text = run.text.replace(placeholder, replace_text)
+                for run in para.runs:
+                    if keyword in run.text:
+                        run.text = run.text.replace(keyword, target_replace)
                         WordFormatter.set_font_style(run, config)
                         run_processed = True
                         break
-                # 如果被 Word 底层强行切断了，就整个段落暴力替换
-                if not run_processed and placeholder in para.text:
-                    para.text = para.text.replace(placeholder, replace_text)
+                if not run_processed:
+                    para.text = para.text.replace(keyword, target_replace)
                     for run in para.runs:
                         WordFormatter.set_font_style(run, config)
 
-    @staticmethod
-    def append_keywords(doc, data, config, format_func):
-        """底层逻辑：找关键字（如“编号：”），然后在它屁股后面追加数据"""
-        all_paragraphs = []
-        all_paragraphs.extend(doc.paragraphs)
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    all_paragraphs.extend(cell.paragraphs)
-
-        for keyword, excel_col in config.KEYWORD_APPEND_MAP.items():
-            if excel_col not in data:
-                continue
-
-            raw_value = data.get(excel_col, "")
-            # 调用主类的格式化大师，处理去0加单位等事务
-            append_text = format_func(excel_col, raw_value, config)
-
-            # 要替换成的最终效果 = "编号：" + "X塔数据"
-            target_replace = keyword + append_text
-
-            for para in all_paragraphs:
-                # 如果段落里有"编号："，并且还没被追加过数据，就开干
-                if keyword in para.text and target_replace not in para.text:
-                    run_processed = False
-                    for run in para.runs:
-                        if keyword in run.text:
-                            run.text = run.text.replace(keyword, target_replace)
-                            WordFormatter.set_font_style(run, config)
-                            run_processed = True
-                            break
-                    if not run_processed:
-                        para.text = para.text.replace(keyword, target_replace)
-                        for run in para.runs:
-                            WordFormatter.set_font_style(run, config)
+        # 数据里没有对应列的关键字不用找
+        keywords = [k for k, excel_col in config.KEYWORD_APPEND_MAP.items() if excel_col in data]
+        get_scanner(keywords).scan(paragraphs, append)
 
 
 # ==============================================================================
@@ -306,6 +389,17 @@ class WordFormatter:
 class WordFiller:
     def __init__(self, config):
         self.config = config
+        self.template_cache = TemplateCache(config.TEMPLATE_CACHE_SIZE)  # 模板仓库，避免每个桩号重新打开模板
+        self.plan_engine = None  # 渲染计划引擎（RENDER_ENGINE = 'plan' 时才启用）
+        self._cell_slots = {}  # 坐标地图：{(模板路径, 修改时间, 大小): (每个坐标落在哪个格子, 越界的坐标)}
+        self.package = None  # 打包车间的压缩包：开工（run）时才打开；单独调用或在子进程里时先攒在内存里
+        self.timer = StageTimer(config.STAGE_TIMING, config.PROFILER)  # 秒表：记录每道工序的耗时
+        self._sheet_layout = None  # 流式模式的“踩点记录”：整张表每列的类型、重复的桩号（所有模板共用）
+        if config.RENDER_ENGINE == 'plan':
+            self.plan_engine = RenderPlanEngine(
+                self.template_cache, self._fill_document, self._format_cell_value, config,
+                keyword_map=config.KEYWORD_APPEND_MAP, max_size=max(config.TEMPLATE_CACHE_SIZE, 1)
+            )
         self._prepare_output_folder()
 
     def _prepare_output_folder(self):
@@ -345,57 +439,233 @@ class WordFiller:
                 val += config.UNIT_MAP[excel_col]
             return val
 
-    def process_single_station(self, template_path, station, data_row):
-        """生成一根指定“桩号”的文档（核心组装流水线）"""
-        station_clean = str(station).strip()
-        # 组装最终存盘的路径名：输出目录 / 桩号名字 + 后缀 .docx
-        output_path = os.path.join(
+    def _locate_cells(self, table):
+        """画坐标地图：TABLE_CELL_MAP 里每个（行, 列）到底落在哪个格子上，越界的单独挑出来"""
+        return CellGrid(table).check(self.config.TABLE_CELL_MAP)
+
+    def _template_cells(self, template_path):
+        """同一个模板的坐标地图只画一次，所有桩号共用（模板改过后自动重画）"""
+        path = os.path.abspath(template_path)
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        if key not in self._cell_slots:
+            doc = self.template_cache.open(path)
+            self._cell_slots[key] = self._locate_cells(doc.tables[0]) if doc.tables else None
+        return self._cell_slots[key]
+
+    def _fill_document(self, doc, data_row, format_func, cells=None):
+        """三道填充工序（普通渲染和渲染计划编译都走这一条流水线）；cells 是模板的坐标地图，不传就现画一张"""
+        paragraphs = WordFormatter.collect_paragraphs(doc)  # 段落只收集一次，两道工序共用
+
+        # 工序 1：把里面的 {项目名称} 这种暗号替换掉
+        with self.timer.stage('占位符替换'):
+            WordFormatter.replace_placeholders(doc, data_row, self.config, format_func, paragraphs)
+
+        # 工序 2：找到“编号：”这种暗号，在后面默默补上内容
+        with self.timer.stage('关键字追加'):
+            WordFormatter.append_keywords(doc, data_row, self.config, format_func, paragraphs)
+
+        # 工序 3：定位到表格第 X 行第 Y 列，精准打入数据
+        with self.timer.stage('表格填充'):
+            if doc.tables:
+                main_table = doc.tables[0]  # 默认操作文档里的第一个表格
+                slots = (cells or self._locate_cells(main_table))[0]  # 越界的坐标在地图里已经剔掉了
+                cell_at = CellGrid.resolver(main_table)
+                for excel_col in self.config.TABLE_CELL_MAP:
+                    if excel_col not in data_row or excel_col not in slots:
+                        continue
+                    fill_text = format_func(excel_col, data_row[excel_col], self.config)
+                    WordFormatter.fill_table_cell(cell_at(slots[excel_col]), fill_text, self.config)
+
+    def _report_table_walk(self, template_path):
+        """播报模板里合并格子的去重情况：合并的大格子只扫一遍，省下的重复次数报给你看"""
+        try:
+            stats = walk_stats(self.template_cache.open(template_path))
+        except Exception:
+            return  # 模板打不开的话，交给每个任务自己去报错
+        if stats.avoided:
+            print(f"♻️ 合并格子去重：{stats.cells} 个格子各扫一遍，每份文档少扫 {stats.avoided} 次重复格子")
+
+    def _report_table_bounds(self, template_path):
+        """坐标越界提前喊一声：每个模板只查一次，而不是每个桩号都默默跳过"""
+        try:
+            cells = self._template_cells(template_path)
+        except Exception:
+            return  # 模板打不开的话，交给每个任务自己去报错
+        for excel_col, row_idx, col_idx in (cells[1] if cells else []):
+            print(f"⏩ 坐标越界：{excel_col} → 第 {row_idx + 1} 行第 {col_idx + 1} 列不在表格里，所有桩号都不填这一格")
+
+    def _output_path(self, station):
+        """组装最终存盘的路径名：输出目录 / 桩号名字 + 后缀 .docx"""
+        return os.path.join(
             self.config.OUTPUT_FOLDER,
-            f"{station_clean}{self.config.OUTPUT_FILE_SUFFIX}.docx"
+            f"{str(station).strip()}{self.config.OUTPUT_FILE_SUFFIX}.docx"
         )
 
-        try:
-            doc = Document(template_path)  # 打开模具
+    def _save_output(self, template_path, output_path, document):
+        """出厂：平时存成单独的文件；打包模式下直接装进压缩包（document 是文档对象或现成的 docx 字节）"""
+        if not self.config.OUTPUT_ZIP:
+            # 生成脱模：先存成“文件名.part”，存完再改名转正——半路断电也不会留下一个打不开的半成品
+            save_document(document, output_path)
+            return os.path.basename(output_path)
+
+        if self.package is None:
+            self.package = PackageBuffer()  # 没开工就单独调用（或在子进程里）：先攒着，交给总导演装箱
+        name = entry_name(template_path, os.path.basename(output_path))  # 包里的位置：模板名/桩号.docx
+        self.package.add(name, document_bytes(document))
+        return name
+
+    def _job_output(self, template_path, station):
+        """施工日志里记的“成品放哪了”：平时是文件路径，打包模式下是“压缩包路径/包里的位置”"""
+        output_path = self._output_path(station)
+        if isinstance(self.package, ZipPackage):
+            return os.path.join(self.package.path, entry_name(template_path, os.path.basename(output_path)))
+        return output_path
 
-            # 工序 1：把里面的 {项目名称} 这种暗号替换掉
-            WordFormatter.replace_placeholders(doc, data_row, self.config)
+    def process_single_station(self, template_path, station, data_row):
+        """生成一根指定“桩号”的文档（核心组装流水线）；成了返回 None，没成返回失败原因（交给施工日志和增量清单记账）"""
+        station_clean = str(station).strip()
+        output_path = self._output_path(station)
 
-            # 工序 2：找到“编号：”这种暗号，在后面默默补上内容
-            WordFormatter.append_keywords(doc, data_row, self.config, self._format_cell_value)
+        with self.timer.station(template_path, station_clean):  # 秒表按下：这根桩号的每道工序都记时间
+            try:
+                # 提前翻译好的数据直接拿来用；没翻译过的数据照旧逐格翻译
+                format_func = value_formatter(data_row, self._format_cell_value)
+
+                # 快车道：渲染计划直接拼出整份文档；碰到特殊值（首尾空格、换行等）会返回 None，改走普通流水线
+                content = None
+                if self.plan_engine:
+                    with self.timer.stage('计划渲染'):
+                        content = self.plan_engine.render(template_path, data_row, format_func)
+
+                if content is not None:
+                    with self.timer.stage('保存'):
+                        saved = self._save_output(template_path, output_path, content)
+                else:
+                    with self.timer.stage('模板打开'):
+                        doc = self.template_cache.open(template_path)  # 打开模具（从模板仓库克隆一份）
+                        cells = self._template_cells(template_path)
+                    self._fill_document(doc, data_row, format_func, cells)
+                    with self.timer.stage('保存'):
+                        saved = self._save_output(template_path, output_path, doc)
+                print(f"✅ 成功[{station_clean}]：{saved}")
+                return None
 
-            # 工序 3：定位到表格第 X 行第 Y 列，精准打入数据
-            if doc.tables:
-                main_table = doc.tables[0]  # 默认操作文档里的第一个表格
-                for excel_col, (row_idx, col_idx) in self.config.TABLE_CELL_MAP.items():
-                    if excel_col not in data_row:
-                        continue
-                    if row_idx >= len(main_table.rows) or col_idx >= len(main_table.columns):
-                        continue
-                    fill_text = self._format_cell_value(excel_col, data_row[excel_col], self.config)
-                    WordFormatter.fill_table_cell(main_table.cell(row_idx, col_idx), fill_text, self.config)
+            except Exception as e:
+                self.timer.mark_failed()
+                print(f"❌ 失败[{station_clean}]：{str(e)[:80]}")
+                return str(e) or type(e).__name__
+
+    def _text_columns(self):
+        """三种填充模式要用到的列（要提前翻译成文字的就是这些）"""
+        return (list(self.config.TABLE_CELL_MAP) + list(self.config.PLACEHOLDER_MAP.values())
+                + list(self.config.KEYWORD_APPEND_MAP.values()))
+
+    def _target_row_slice(self):
+        """拦截器 1 的换算：Excel 真实行号区间 → 数据行序号区间（没开启时返回 None）"""
+        if self.config.TARGET_ROW_RANGE and len(self.config.TARGET_ROW_RANGE) == 2:
+            start_row, end_row = self.config.TARGET_ROW_RANGE
+            # 换算逻辑：Excel显示的第 1 行通常是表头，真正的数据从第 2 行开始。
+            # 在 Pandas 语言里，数据的第一行索引是 0。
+            # 所以要拿真实行号减掉 2，算出计算机能懂的起始索引。
+            return max(0, start_row - 2), end_row - 1
+        return None
+
+    def _wanted(self, station):
+        """拦截器 3：空桩号不要；开启了名单模式的话，不在名单里的也不要"""
+        if str(station).strip() == "":
+            return False
+        return not (self.config.TARGET_STATIONS and station not in self.config.TARGET_STATIONS)
+
+    def _load_rows(self):
+        """一次性读完整张表（开启了行号模式的话顺手切好片）"""
+        df = ExcelDataProcessor.load_excel_data(self.config)
+
+        # ---------------- 拦截器 1：按行号精准切片 ----------------
+        row_slice = self._target_row_slice()
+        if row_slice:
+            df = df.iloc[row_slice[0]:row_slice[1]]
+            print(f"🎯 开启【行号打印模式】：已截取 Excel 第 {self.config.TARGET_ROW_RANGE[0]} 行"
+                  f"至第 {self.config.TARGET_ROW_RANGE[1]} 行的数据")
+        return df
 
-            doc.save(output_path)  # 生成脱模
-            print(f"✅ 成功[{station_clean}]：{os.path.basename(output_path)}")
+    def _collect_jobs(self, df, templates):
+        """整张表一次性排好全部（模板, 桩号）任务"""
+        # 2. 按桩号一次性建好索引（所有模板共用），顺便播报重复的桩号
+        index = GroupIndex(df, self.config.PRIMARY_KEY, self.config.DUPLICATE_KEY_POLICY)
+        index.check_duplicates()
 
-        except Exception as e:
-            print(f"❌ 失败[{station_clean}]：{str(e)[:80]}")
+        # 3. 把要填的列整列翻译好（日期、去零、单位一次做完，不用每个格子各翻译一遍）
+        with self.timer.stage('格式化'):
+            texts = format_frame(df, self._text_columns(), self.config, self._format_cell_value)
+
+        # 取出每个桩号的这一行（已翻译好的文本）
+        stations = [(station, prepared_row(texts, index.position(station)))
+                    for station in index.keys if self._wanted(station)]
+
+        # 4. 把（模板, 桩号）任务清单排好
+        return [(template, station, station_data) for template in templates for station, station_data in stations]
+
+    def _scan_excel(self):
+        """流式模式开工前踩点：桩号重复又选了 'error' 的话，一份文档都还没生成就喊停"""
+        stream = ExcelDataProcessor.iter_excel_chunks(self.config)
+        try:
+            row_slice = self._target_row_slice()  # 开了行号模式的话，只管这段里的重复
+            duplicates = stream.duplicates(*row_slice) if row_slice else stream.duplicates()
+            if duplicates and self.config.DUPLICATE_KEY_POLICY == 'error':
+                raise ValueError(f"[{self.config.PRIMARY_KEY}]存在重复值：{duplicate_summary(duplicates)}")
+            return stream.layout
+        finally:
+            stream.close()
+
+    def _stream_jobs(self, templates, streams):
+        """流式读取：边读边交出（模板, 桩号）任务；每个模板从头把 Excel 再流一遍"""
+        row_slice = self._target_row_slice()
+
+        def format_chunk(chunk):
+            with self.timer.stage('格式化'):
+                return format_frame(chunk, self._text_columns(), self.config, self._format_cell_value)
+
+        for template in templates:
+            with self.timer.stage('Excel读取'):
+                chunks = ExcelDataProcessor.iter_excel_chunks(self.config, self._sheet_layout)
+            chunks = self.timer.timed('Excel读取', chunks)  # 读每一块的时间也掐上秒表
+            if row_slice:  # 拦截器 1：按数据行序号过滤，过了结束行就不再往下读
+                start_idx, end_idx = row_slice
+                chunks = (chunk[(chunk.index >= start_idx) & (chunk.index < end_idx)]
+                          for chunk in takewhile(lambda chunk: chunk.index[0] < end_idx, chunks))
+            stations = StationStream(chunks, self.config.PRIMARY_KEY, self.config.DUPLICATE_KEY_POLICY, format_chunk)
+            streams.append(stations)
+            for station, station_data in stations:
+                if self._wanted(station):
+                    yield template, station, station_data
+
+    def _report_timing(self):
+        """秒表汇总：打印每道工序的耗时表，并把明细存进输出文件夹（没开计时就什么都不做）"""
+        if not self.config.STAGE_TIMING:
+            return
+        if self.config.PROFILER and self.config.WORKERS > 1:
+            print("⚠️ 性能剖析只在单进程（WORKERS = 1）时生效，这次只汇总计时")
+        print("\n" + self.timer.summary())
+        reports = self.timer.write_report(self.config.OUTPUT_FOLDER)
+        print(f"📊 计时明细已保存：{', '.join(os.path.basename(path) for path in reports)}")
 
     def run(self):
         """总导演开机：控制整体流程"""
         try:
             # 1. 把 Excel 拖过来
-            df = ExcelDataProcessor.load_excel_data(self.config)
-
-            # ---------------- 拦截器 1：按行号精准切片 ----------------
-            if self.config.TARGET_ROW_RANGE and len(self.config.TARGET_ROW_RANGE) == 2:
-                start_row, end_row = self.config.TARGET_ROW_RANGE
-                # 换算逻辑：Excel显示的第 1 行通常是表头，真正的数据从第 2 行开始。
-                # 在 Pandas 语言里，数据的第一行索引是 0。
-                # 所以要拿真实行号减掉 2，算出计算机能懂的起始索引。
-                start_idx = max(0, start_row - 2)
-                end_idx = end_row - 1
-                df = df.iloc[start_idx:end_idx]
-                print(f"🎯 开启【行号打印模式】：已截取 Excel 第 {start_row} 行至第 {end_row} 行的数据")
+            streaming = self.config.STREAM_CHUNK_ROWS > 0
+            if not streaming:
+                with self.timer.stage('Excel读取'):
+                    df = self._load_rows()
+            else:
+                # 流式模式：先把整张表踩一遍点（体检表头、认准每列类型、揪出重复桩号），然后边读边生成
+                with self.timer.stage('Excel读取'):
+                    self._sheet_layout = self._scan_excel()
+                print(f"🌊 开启【流式读取模式】：每次读 {self.config.STREAM_CHUNK_ROWS} 行，读一块生成一块")
+                if self.config.TARGET_ROW_RANGE and len(self.config.TARGET_ROW_RANGE) == 2:
+                    print(f"🎯 开启【行号打印模式】：只生成 Excel 第 {self.config.TARGET_ROW_RANGE[0]} 行"
+                          f"至第 {self.config.TARGET_ROW_RANGE[1]} 行的数据")
 
             templates = self._get_word_templates()
 
@@ -403,26 +673,85 @@ class WordFiller:
             if self.config.TARGET_STATIONS:
                 print(f"🎯 开启【名单打印模式】：仅处理指定名单中的 {len(self.config.TARGET_STATIONS)} 个桩号")
 
-            # 2. 对每个模板，逐行塞入数据
-            for template in templates:
-                template_name = os.path.basename(template)
-                print(f"\n========== 处理模板：{template_name} ==========")
-
-                unique_stations = df[self.config.PRIMARY_KEY].unique()
-                for station in unique_stations:
-                    if pd.isna(station) or str(station).strip() == "":
-                        continue
-
-                    # ---------------- 拦截器 3：按名单过滤 ----------------
-                    if self.config.TARGET_STATIONS and station not in self.config.TARGET_STATIONS:
-                        continue  # 如果开启了名单模式，且当前人不在这份名单里，直接跳过不干活
-
-                    # 取出属于当前桩号的这一行数据，转成字典方便使用
-                    station_data = df[df[self.config.PRIMARY_KEY] == station].iloc[0].to_dict()
-                    self.process_single_station(template, station, station_data)
+            streams = []
+            jobs = self._stream_jobs(templates, streams) if streaming else self._collect_jobs(df, templates)
+
+            # ---------------- 拦截器 4：断点续跑 + 增量生成，做好了的、没变过的文档不再重做 ----------------
+            # （打包模式每次都重装一整包，跳过的文档会从包里消失，所以这两样都不做）
+            manifest = None
+            resume = self.config.RESUME
+            if self.config.OUTPUT_ZIP:
+                if self.config.INCREMENTAL or resume:
+                    print("📦 开启【打包输出模式】：每次重新装一整包，增量模式 / 断点续跑这次不生效")
+                resume = False
+            elif self.config.INCREMENTAL:
+                manifest = BuildManifest(self.config.OUTPUT_FOLDER, self.config, __file__)
+            journal = RunJournal(self.config.OUTPUT_FOLDER, resume)  # 施工日志：每做完一份立刻记一笔
+            if resume:
+                jobs = journal.select(jobs, self._output_path)
+            if manifest:
+                jobs = manifest.select(jobs, self._output_path)
+            if not streaming:
+                jobs = list(jobs)
+                if journal.skipped:
+                    retried = f"（含上次失败的 {journal.retried} 份）" if journal.retried else ""
+                    print(f"⏯️ 开启【断点续跑】：日志里 {journal.skipped} 份已经做好，直接跳过；"
+                          f"这次要做 {len(jobs)} 份{retried}")
+                if manifest and manifest.skipped:
+                    print(f"⏭️ 开启【增量模式】：{manifest.skipped} 份文档数据/模板/配置都没变，直接跳过；"
+                          f"需要重新生成 {len(jobs)} 份")
+
+            # 5. 开工：WORKERS > 1 时多进程并行，结果仍按顺序逐条播报
+            if self.config.OUTPUT_ZIP:
+                # 打包车间开门：多进程时各进程把文档交回来，由这里按顺序装箱
+                self.package = ZipPackage(os.path.join(self.config.OUTPUT_FOLDER, self.config.OUTPUT_ZIP),
+                                          self.config.ZIP_COMPRESSION)
+            if streaming:
+                if self.config.WORKERS > 1:
+                    print(f"🚀 开启【多进程模式】：{self.config.WORKERS} 个进程边读边生成")
+                results = stream_jobs(self, jobs, self.config.WORKERS, __file__)
+            else:
+                if self.config.WORKERS > 1:
+                    print(f"🚀 开启【多进程模式】：{self.config.WORKERS} 个进程并行生成 {len(jobs)} 份文档")
+                results = zip(jobs, run_jobs(self, jobs, self.config.WORKERS, __file__))
+            current_template = None
+            try:
+                for job, (output, error) in results:
+                    template = job[0]
+                    if template != current_template:
+                        current_template = template
+                        print(f"\n========== 处理模板：{os.path.basename(template)} ==========")
+                        self._report_table_walk(template)
+                        self._report_table_bounds(template)
+                    print(output, end='')
+                    journal.update(job, error, self._job_output(job[0], job[1]))  # 施工日志记一笔
+                    if manifest:
+                        manifest.update(job, error)
+            finally:
+                if manifest:
+                    manifest.save()  # 中途出错也把已经生成好的记下来，下次接着跳过
+                journal.close()
+                if isinstance(self.package, ZipPackage):
+                    self.package.close()  # 封箱：中途出错的话，已经装进去的文档照样保留
+
+            if streams:
+                print(f"\n🌊 流式读取完成：共读取 {streams[0].rows_read} 行数据")
+                streams[0].check_duplicates()
+            if streaming and journal.skipped:
+                print(f"⏯️ 【断点续跑】：日志里 {journal.skipped} 份已经做好，已跳过")
+            if streaming and manifest and manifest.skipped:
+                print(f"⏭️ 【增量模式】：{manifest.skipped} 份文档数据/模板/配置都没变，已跳过")
+            if journal.failed:
+                print(f"\n❌ 有 {len(journal.failed)} 份没做成，原因都记在施工日志 {JOURNAL_NAME} 里；"
+                      f"把 RESUME 改成 True 再跑一次，就只补做失败和缺失的")
+
+            self._report_timing()  # 秒表汇总：每道工序花了多少时间
 
             print(f"\n🎉 全部处理完成！")
             print(f"📁 输出目录：{os.path.abspath(self.config.OUTPUT_FOLDER)}")
+            if isinstance(self.package, ZipPackage):
+                size_mb = os.path.getsize(self.package.path) / (1 << 20)
+                print(f"📦 压缩包：{os.path.basename(self.package.path)}（{self.package.count} 份文档，{size_mb:.1f} MB）")
 
         except Exception as e:
             print(f"\n❌ 执行失败：{str(e)}")
@@ -436,3 +765,7 @@ if __name__ == "__main__":
     config = Config()  # 把配置单拿到手
     filler = WordFiller(config)  # 把配置单交给执行机器
     filler.run()  # 按下启动按钮
+    if config.WATCH_MODE:  # 模式五：跑完不下班，盯着 Excel 和模板随改随出
+        from docfill.session import FillerSession
+        from docfill.watch import watch
+        watch(FillerSession(sys.modules[__name__], config), config.WATCH_DEBOUNCE)
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""
+docfill：word 目录下各填充脚本共用的公共模块
+
+各脚本（word/01、word/02、word/03、tongyong.py）仍然各自保留“配置区 + 执行区”的写法，
+需要的公共能力按模块单独导入，例如：
+    from docfill.template_cache import TemplateCache
+
+注意：这里故意不在包级别导入任何子模块，避免只想读配置时也把 pandas / python-docx 拖进来。
+"""
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""python -m docfill：统一命令行入口（见 docfill.cli）"""
+import sys
+
+from docfill.cli import main
+
+sys.exit(main())
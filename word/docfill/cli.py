@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+统一命令行入口：五条流水线一个入口，配置写在文件里，检查 / 试运行不加载重型库
+
+在 word 目录下运行：
+    python -m docfill list                          # 有哪些流水线
+    python -m docfill config word02 > word02.json   # 导出脚本里当前的配置，作为配置文件的起点
+    python -m docfill check -c word02.json          # 只检查配置（配置项名、类型、取值、输入文件、冲突）
+    python -m docfill run -c word02.json --dry-run  # 试运行：列出输入、模板、输出位置和开启的模式，不生成文档
+    python -m docfill plan -c word02.json           # 预检：读 Excel 和模板，列出全部任务和问题，不生成文档
+    python -m docfill run -c word02.json            # 检查通过后正式运行
+    python -m docfill run -c word02.json --preflight  # 先预检，没有错误才开始生成
+    python -m docfill run word03 --set WORKERS=4    # 不用配置文件，直接改脚本里的某几项
+    python -m docfill watch -c word01.json          # 监视模式（docfill.watch）
+    python -m docfill serve -c tongyong.json        # 常驻渲染服务（docfill.server）
+
+配置文件（.json，Python 3.11 起也可以用 .toml）只写要改的项，可以带 "pipeline" 指定流水线，
+其余沿用脚本里写的值；文件里的相对路径按配置文件所在的文件夹解析。--set 键=值 最后生效。
+list / config / check / run --dry-run 只用标准库，不导入 pandas / python-docx / docxtpl；
+预检（plan）和正式运行时检查通过才加载脚本（这时才导入重型库）。
+"""
+import argparse
+import json
+import os
+import sys
+
+from docfill import settings
+from docfill.settings import PIPELINES
+
+# 试运行时列出的“模式”开关：(配置项, 显示名称)
+MODE_SWITCHES = (
+    ('RENDER_ENGINE', '渲染引擎'),
+    ('WORKERS', '并行进程数'),
+    ('STREAM_CHUNK_ROWS', '流式读取（每批行数）'),
+    ('INCREMENTAL', '增量生成'),
+    ('RESUME', '断点续跑'),
+    ('OUTPUT_ZIP', '打包输出'),
+    ('EXCEL_CACHE', 'Excel 读取缓存'),
+    ('TEMPLATE_CACHE', '模板编译缓存'),
+    ('WATCH_MODE', '运行后进入监视模式'),
+    ('PROFILER', '性能剖析'),
+    ('OUTPUT_MODE', '输出方式'),
+    ('OUTPUT_FORMAT', '输出格式'),
+    ('BOM_SHEETS', '材料汇总表'),
+)
+
+
+def _resolve(args):
+    """命令行参数 → (流水线, {配置项: 值})；出错时抛 ConfigError"""
+    overrides = {}
+    pipeline = args.pipeline
+    if args.config:
+        overrides = settings.load_config_file(args.config, pipeline)
+        pipeline = pipeline or overrides.get('pipeline')
+    overrides.pop('pipeline', None)
+    overrides.update(settings.parse_overrides(args.set))
+    if pipeline not in PIPELINES:
+        raise settings.ConfigError(f"请指定流水线（命令行或配置文件里的 \"pipeline\"），可选：{list(PIPELINES)}")
+    return pipeline, overrides
+
+
+def _check(pipeline, overrides, quiet=False):
+    """检查配置并打印结果，返回合并后的配置（有错误时返回 None）"""
+    values, errors, warnings = settings.validate(pipeline, overrides)
+    for message in warnings:
+        print(f"⚠️ {message}")
+    for message in errors:
+        print(f"❌ {message}")
+    if errors:
+        print(f"❌ 配置有 {len(errors)} 处错误（{pipeline}），请修改后再运行")
+        return None
+    if not quiet:
+        print(f"✅ 配置检查通过（{pipeline}，改动 {len(overrides)} 项）")
+    return values
+
+
+def _output(pipeline, values):
+    """输出位置说明"""
+    if pipeline == 'rebar':
+        if values['OUTPUT_MODE'] == 'per_file':
+            return f"{os.path.abspath(values['OUTPUT_DIR'])}（每个工作簿一份，{values['OUTPUT_FORMAT']}）"
+        return f"{os.path.abspath(values['OUTPUT_PATH'])}（{values['OUTPUT_FORMAT']}）"
+    if pipeline == 'tongyong':
+        folder = os.path.join(os.path.dirname(os.path.abspath(values['EXCEL_PATH'])), values['OUTPUT_DIR'])
+    else:
+        folder = os.path.abspath(values['OUTPUT_FOLDER'])
+    if values.get('OUTPUT_ZIP'):
+        return os.path.join(folder, values['OUTPUT_ZIP'])
+    return folder
+
+
+def dry_run(pipeline, values, overrides):
+    """试运行：列出这次会用到的输入、模板、输出位置和开启的模式（不读 Excel、不生成文档）"""
+    spec = PIPELINES[pipeline]
+    print(f"📋 试运行：{pipeline}（{spec['title']}）")
+    if overrides:
+        print(f"   改动的配置项：{'、'.join(overrides)}")
+    print("📥 输入：")
+    for name in spec['inputs']:
+        if values.get(name):
+            print(f"   - {name}: {os.path.abspath(values[name]) if pipeline != 'rebar' else values[name]}")
+    templates = settings.input_templates(pipeline, values)
+    label = '工作簿' if pipeline == 'rebar' else '模板'
+    print(f"📄 {label}：{len(templates)} 个")
+    for path in templates[:10]:
+        print(f"   - {os.path.basename(path)}")
+    if len(templates) > 10:
+        print(f"   - ……（共 {len(templates)} 个）")
+    print(f"📤 输出：{_output(pipeline, values)}")
+    modes = [f"{title}={values[name]!r}" for name, title in MODE_SWITCHES if name in values]
+    print(f"⚙️ 模式：{'，'.join(modes)}")
+    print("✅ 试运行结束，未读取 Excel、未生成任何文件")
+
+
+def _load(pipeline, overrides):
+    """加载脚本并套用配置（此时才导入 pandas / python-docx 等）→ (模块, 配置对象)"""
+    from docfill.scripts import load_script, script_path
+
+    path = script_path(pipeline)
+    module_name = None
+    if pipeline == 'rebar':
+        # 钢筋合并器和 xlsx_stream 放在一起；进程池子进程要按模块名找回函数，模块名用脚本名
+        sys.path.insert(0, os.path.dirname(path))
+        module_name = os.path.splitext(os.path.basename(path))[0]
+    module = load_script(path, module_name)
+    target = module.Config() if hasattr(module, 'Config') else module
+    for name, value in settings.materialize(pipeline, overrides).items():
+        setattr(target, name, value)
+    return module, target
+
+
+def preflight(pipeline, overrides, show=20, jobs_path=None):
+    """预检（docfill.preflight）：打印任务清单和问题，返回 (预检结果, 模块, 配置对象)"""
+    from docfill.preflight import plan
+
+    module, target = _load(pipeline, overrides)
+    result = plan(pipeline, module, target)
+    result.report(show)
+    if jobs_path:
+        result.write_jobs(jobs_path)
+        print(f"📄 完整任务清单：{os.path.abspath(jobs_path)}")
+    return result, module, target
+
+
+def run(pipeline, overrides, loaded=None):
+    """
+    正式运行一条流水线（与直接运行脚本的效果相同）
+    :param loaded: 已加载的 (模块, 配置对象)（预检时已经加载过）
+    """
+    module, target = loaded or _load(pipeline, overrides)
+    if pipeline in ('word02', 'word03'):
+        module.WordFiller(target).run()
+        if target.WATCH_MODE:
+            from docfill.session import FillerSession
+            from docfill.watch import watch
+            watch(FillerSession(module, target), target.WATCH_DEBOUNCE)
+    elif pipeline == 'word01':
+        module.run_universal_filler()
+        if module.WATCH_MODE:
+            from docfill.session import Word01Session
+            from docfill.watch import watch
+            watch(Word01Session(module), module.WATCH_DEBOUNCE)
+    else:
+        module.main()
+
+
+def main(argv=None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('pipeline', nargs='?', choices=PIPELINES, help='流水线（配置文件里写了 "pipeline" 时可省略）')
+    common.add_argument('-c', '--config', metavar='文件', help='配置文件（.json / .toml）')
+    common.add_argument('--set', action='append', metavar='键=值', help='覆盖配置项，可重复')
+    parser = argparse.ArgumentParser(prog='python -m docfill', description='Word / Excel 批量处理统一入口')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help='列出全部流水线')
+    config_parser = commands.add_parser('config', help='导出脚本里当前的配置（JSON）')
+    config_parser.add_argument('pipeline', choices=PIPELINES)
+    commands.add_parser('check', parents=[common], help='只检查配置')
+    run_parser = commands.add_parser('run', parents=[common], help='检查配置后运行')
+    run_parser.add_argument('--dry-run', action='store_true', help='试运行：只列出输入、输出和模式，不生成文档')
+    run_parser.add_argument('--preflight', action='store_true', help='先预检，没有错误才开始生成')
+    plan_parser = commands.add_parser('plan', parents=[common], help='预检：列出全部任务和问题，不生成文档')
+    plan_parser.add_argument('--show', type=int, default=20, help='屏幕上最多列出多少个任务（默认 20）')
+    plan_parser.add_argument('--jobs', metavar='文件.csv', help='把完整任务清单导出为 CSV')
+    watch_parser = commands.add_parser('watch', parents=[common], help='监视模式（不支持 rebar）')
+    watch_parser.add_argument('--debounce', type=float, help='保存后等多久开始处理（秒，默认取 WATCH_DEBOUNCE）')
+    serve_parser = commands.add_parser('serve', parents=[common], help='常驻渲染服务（不支持 rebar）')
+    serve_parser.add_argument('--port', type=int, help='本机端口')
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        for name, spec in PIPELINES.items():
+            print(f"  {name:<9} {spec['title']}")
+        return 0
+    if args.command == 'config':
+        values = {'pipeline': args.pipeline, **settings.script_defaults(args.pipeline)}
+        print(json.dumps(values, ensure_ascii=False, indent=2))
+        return 0
+
+    try:
+        pipeline, overrides = _resolve(args)
+    except settings.ConfigError as e:
+        print(f"❌ {e}")
+        return 2
+    if args.command in ('watch', 'serve') and pipeline == 'rebar':
+        print(f"❌ {args.command} 只支持 word01 / word02 / word03 / tongyong")
+        return 2
+    values = _check(pipeline, overrides, quiet=args.command != 'check')
+    if values is None:
+        return 1
+    if args.command == 'check':
+        return 0
+    if args.command == 'plan':
+        return 0 if preflight(pipeline, overrides, args.show, args.jobs)[0].ok else 1
+    if args.command == 'run':
+        if args.dry_run:
+            dry_run(pipeline, values, overrides)
+            return 0
+        loaded = None
+        if args.preflight:
+            result, *loaded = preflight(pipeline, overrides, show=0)
+            if not result.ok:
+                return 1
+            print()
+        run(pipeline, overrides, loaded)
+        return 0
+
+    from docfill.session import open_session
+
+    materialized = settings.materialize(pipeline, overrides)
+    if args.command == 'watch':
+        from docfill.watch import DEFAULT_DEBOUNCE, watch
+
+        session = open_session(pipeline, materialized)
+        print(session.log, end='')
+        debounce = values.get('WATCH_DEBOUNCE', DEFAULT_DEBOUNCE) if args.debounce is None else args.debounce
+        watch(session, debounce)
+    else:
+        from docfill.server import DEFAULT_PORT, serve
+
+        serve(pipeline, args.port or DEFAULT_PORT, materialized)
+    return 0
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+docxtpl 模板编译缓存：模板只解析、预处理、编译一次，之后每一行数据只做 Jinja 渲染和保存
+
+DocxTemplate(模板).render(行数据) 每调用一次都要：解压解析 docx → 把正文/页眉页脚/脚注的 XML
+用一长串正则整理成 Jinja 能懂的样子（patch_xml）→ 把几百 KB 的 XML 编译成 Jinja 模板 → 渲染。
+成千上万行数据时，真正的“渲染”只占一小部分，大头都是重复的解析、整理和编译。
+
+CompiledDocxTemplate 把前面几步只做一次，渲染本身仍然走 docxtpl 的公开接口 DocxTemplate.render：
+    - 模板 docx 只解析一次，每行拿一份完整的深拷贝（各行的文档之间、与母版之间不共享任何部件）
+    - patch_xml 的结果按各部件的原始 XML 记下来：每行的拷贝与母版相同，整理结果直接复用
+    - 传给 render 的 Jinja 环境按源码记住编译结果，同一段 XML 只编译一次；
+      开启磁盘缓存时用 jinja2.FileSystemBytecodeCache 把字节码存到模板旁边的 .docfill_cache 文件夹，
+      文件名带模板内容哈希，下次运行直接加载（Jinja 自己校验源码和 Python 版本）
+因为 render 和前后处理都是 docxtpl 自己的代码，生成结果与逐行 DocxTemplate(...).render(...) 一致。
+"""
+import copy
+import glob
+import hashlib
+import os
+
+from docxtpl import DocxTemplate
+from jinja2 import Environment, FileSystemBytecodeCache, FunctionLoader
+
+CACHE_DIR_NAME = '.docfill_cache'
+
+
+def _file_digest(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class CachedEnvironment(Environment):
+    """from_string 按源码记住编译结果的 Jinja 环境（其余设置与 docxtpl 不传 jinja_env 时的默认环境一致）"""
+
+    def __init__(self, bytecode_cache=None):
+        """
+        :param bytecode_cache: jinja2 的字节码缓存（None 表示只在内存里记住）
+        """
+        self._sources = {}  # {源码哈希: 源码}：from_string 收到的源码，交给加载器按名字取
+        super().__init__(loader=FunctionLoader(self._sources.get), bytecode_cache=bytecode_cache, cache_size=-1)
+
+    def from_string(self, source, globals=None, template_class=None):
+        if globals is not None or template_class is not None:
+            return super().from_string(source, globals, template_class)
+        # 以源码哈希为模板名走加载器：命中内存缓存直接返回，否则先查字节码缓存，都没有才编译
+        name = hashlib.sha256(source.encode('utf-8')).hexdigest()
+        self._sources[name] = source
+        return self.get_template(name)
+
+
+class _RowTemplate(DocxTemplate):
+    """一行数据用的 DocxTemplate：文档是母版的深拷贝，patch_xml 的结果共用 CompiledDocxTemplate 记下的"""
+
+    def __init__(self, compiled):
+        super().__init__(compiled.template_path)
+        self.docx = copy.deepcopy(compiled.master)  # 已有文档且未渲染，render 时不再重新读文件
+        self._patched = compiled.patched
+
+    def patch_xml(self, src_xml):
+        patched = self._patched.get(src_xml)
+        if patched is None:
+            patched = self._patched[src_xml] = super().patch_xml(src_xml)
+        return patched
+
+
+class CompiledDocxTemplate:
+    """编译好的 docxtpl 模板：render(行数据) → 已渲染、可直接 save 的 DocxTemplate"""
+
+    def __init__(self, template_path, disk_cache=False):
+        """
+        :param template_path: Word 模板路径
+        :param disk_cache: 是否把编译结果存到模板旁边的 .docfill_cache（下次运行直接加载）
+        """
+        self.template_path = os.fspath(template_path)
+        tpl = DocxTemplate(self.template_path)
+        tpl.init_docx()  # 模板打不开时在这里报错，而不是每行各报一次
+        self.master = tpl.docx
+        self.master.core_properties  # 没有属性部件的模板会在这里补上，之后的拷贝都带着它
+        self.patched = {}  # {部件原始 XML: patch_xml 整理后的 XML}
+
+        bytecode_cache = None
+        self.loaded_from_disk = False
+        if disk_cache:
+            folder = os.path.join(os.path.dirname(os.path.abspath(self.template_path)), CACHE_DIR_NAME)
+            prefix = os.path.basename(self.template_path) + '.'
+            current = f"{prefix}{_file_digest(self.template_path)[:16]}."
+            try:
+                os.makedirs(folder, exist_ok=True)
+                for path in glob.glob(os.path.join(glob.escape(folder), glob.escape(prefix) + '*.jinja')):
+                    if os.path.basename(path).startswith(current):
+                        self.loaded_from_disk = True
+                    else:
+                        os.remove(path)  # 模板改过之后，旧版本的缓存用不上了
+                bytecode_cache = FileSystemBytecodeCache(folder, current.replace('%', '%%') + '%s.jinja')
+            except OSError:
+                pass  # 写不进去就只在内存里缓存
+        self.env = CachedEnvironment(bytecode_cache)
+
+    def render(self, context):
+        """
+        用一行数据渲染出一份文档
+        :param context: 渲染上下文（列名 → 值）
+        :return: 已渲染的 DocxTemplate（每次都是新实例）
+        """
+        tpl = _RowTemplate(self)
+        tpl.render(context, self.env)
+        return tpl
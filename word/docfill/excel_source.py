@@ -0,0 +1,535 @@
+# -*- coding: utf-8 -*-
+"""
+Excel 数据源：工作簿只打开一次、只读需要的列，并在工作簿旁边留一份缓存
+
+原来每次运行都要 pd.read_excel 整张表（tongyong.py 还要先 pd.ExcelFile 看一遍工作表名，
+再 pd.read_excel 重新打开一次），几十 MB 的工作簿光 openpyxl 解析就要几十秒。
+现在：
+    1. 只读取填充规则和主键实际用到的列（不需要的列不进 DataFrame）
+    2. 工作表列表和数据共用同一个 pd.ExcelFile
+    3. 开启缓存时，读出的结果存进工作簿旁边的 .docfill_cache 文件夹，按（修改时间, 大小, pandas 版本）校验；
+       工作簿没改过时，下次运行直接读缓存，完全跳过 openpyxl 解析
+
+缓存是纯 JSON（列名、各列 dtype 和逐格的值），读缓存不会执行任何代码，放在共享 / 同步盘里也安全；
+每个工作簿最多缓存 CACHE_MAX_FRAMES 份读取结果。缓存写不进去（例如工作簿所在目录只读）
+或表里有认不出的值类型时静默跳过，不影响正常读取。
+
+超大工作簿（几十万行）用 SheetStream 流式读取：只读模式逐行读，每攒够一块就交出去，
+内存占用只与块大小有关。开始前先快速扫一遍整张表确定各列类型（不保留数据），
+读出的每一块与 pd.read_excel 读整张表的对应行完全相同。
+"""
+import datetime
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR_NAME = '.docfill_cache'
+CACHE_VERSION = 2
+CACHE_MAX_FRAMES = 8  # 每个工作簿最多缓存几份读取结果（不同工作表 / 不同的列），超出时淘汰最早的
+
+# pd.read_excel 默认当作空值的文本（同 pandas 的默认 na_values；pandas 没有公开这份清单，这里照抄一份）
+STR_NA_VALUES = frozenset({
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+})
+
+
+class ExcelSource:
+    """一个 Excel 工作簿的数据源"""
+
+    def __init__(self, path, cache=False):
+        """
+        :param path: 工作簿路径
+        :param cache: 是否使用工作簿旁边的缓存
+        """
+        self.path = os.path.abspath(path)
+        self.cache = cache
+        stat = os.stat(self.path)
+        self._signature = (stat.st_mtime_ns, stat.st_size)
+        self._excel = None  # 延迟打开的 pd.ExcelFile（整个数据源只打开一次）
+        self._entry = self._load_cache() if cache else None
+        self._dirty = False
+        self.cache_hits = 0
+
+    # -------------------------- 缓存文件 --------------------------
+    @property
+    def cache_path(self):
+        """缓存文件路径：工作簿同目录下的 .docfill_cache/文件名.哈希.json"""
+        name = os.path.basename(self.path)
+        tag = hashlib.md5(self.path.encode('utf-8')).hexdigest()[:8]
+        return os.path.join(os.path.dirname(self.path), CACHE_DIR_NAME, f"{name}.{tag}.json")
+
+    def _empty_entry(self):
+        return {'version': CACHE_VERSION, 'pandas': pd.__version__, 'signature': list(self._signature),
+                'sheet_names': None, 'frames': {}}
+
+    def _load_cache(self):
+        """读取缓存；不存在、损坏、工作簿已改动或 pandas 版本不同时返回空缓存"""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if (entry['version'] != CACHE_VERSION or entry['pandas'] != pd.__version__
+                    or tuple(entry['signature']) != self._signature):
+                return self._empty_entry()
+            # 键：(工作表, 列名元组或 None)；值：(编码后的表, 完整表头)
+            entry['frames'] = {(sheet, None if columns is None else tuple(columns)): (frame, header)
+                               for sheet, columns, frame, header in entry['frames']}
+        except Exception:
+            return self._empty_entry()
+        return entry
+
+    def _save_cache(self):
+        """把新读到的内容写回缓存（写不进去就算了）"""
+        if not (self.cache and self._dirty):
+            return
+        path = self.cache_path
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            frames = [[sheet, None if columns is None else list(columns), frame, header]
+                      for (sheet, columns), (frame, header) in self._entry['frames'].items()]
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({**self._entry, 'frames': frames}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self._dirty = False
+        except OSError:
+            pass
+
+    # -------------------------- 读取 --------------------------
+    def _open(self):
+        if self._excel is None:
+            self._excel = pd.ExcelFile(self.path)
+        return self._excel
+
+    @property
+    def sheet_names(self):
+        """全部工作表名"""
+        if self._entry is not None and self._entry['sheet_names'] is not None:
+            return list(self._entry['sheet_names'])
+        names = list(self._open().sheet_names)
+        if self._entry is not None:
+            self._entry['sheet_names'] = names
+            self._dirty = True
+            self._save_cache()
+        return names
+
+    def read(self, sheet_name=0, columns=None):
+        """
+        读取一个工作表
+        :param sheet_name: 工作表名（或序号）
+        :param columns: 需要的列名（按去掉首尾空格后的表头匹配）；None 表示读取全部列
+        :return: (DataFrame, 完整表头列表)；表头已去掉首尾空格
+        """
+        wanted = None if columns is None else frozenset(str(c).strip() for c in columns)
+        key = (sheet_name, None if wanted is None else tuple(sorted(wanted)))
+
+        if self._entry is not None and key in self._entry['frames']:
+            frame, header = self._entry['frames'][key]
+            try:
+                df = _decode_frame(frame)
+            except Exception:
+                del self._entry['frames'][key]  # 缓存内容不对劲：当作没缓存，重新读
+            else:
+                self.cache_hits += 1
+                return df, list(header)
+
+        header = []
+
+        def keep(name):
+            # pandas 会用每个表头调用一次，顺便记下完整表头（用于报错时列出“现有列”）
+            header.append(str(name).strip())
+            return wanted is None or str(name).strip() in wanted
+
+        df = self._open().parse(sheet_name=sheet_name, usecols=keep)
+        df.columns = [c.strip() if isinstance(c, str) else c for c in df.columns]
+        header = list(dict.fromkeys(header))
+
+        if self._entry is not None:
+            self._remember(key, df, header)
+        return df, header
+
+    def _remember(self, key, df, header):
+        """把读取结果编码进缓存（有认不出的值类型时不缓存）"""
+        try:
+            frame = _encode_frame(df)
+        except TypeError:
+            return
+        frames = self._entry['frames']
+        frames.pop(key, None)
+        while len(frames) >= CACHE_MAX_FRAMES:
+            del frames[next(iter(frames))]  # 淘汰最早缓存的
+        frames[key] = (frame, header)
+        self._dirty = True
+        self._save_cache()
+
+    def close(self):
+        """关闭工作簿文件句柄"""
+        if self._excel is not None:
+            self._excel.close()
+            self._excel = None
+
+
+# -------------------------- 缓存的编码：DataFrame ⇄ JSON --------------------------
+def _encode_value(value):
+    """
+    单元格值 → JSON 值（日期时间等带类型标记）
+    :raises TypeError: 认不出的值类型
+    """
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, (int, np.integer)) and not isinstance(value, np.bool_):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return float(value)  # NaN / inf 由 json 写成 NaN / Infinity
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if value is pd.NaT:
+        return {'nat': None}
+    if isinstance(value, pd.Timestamp):
+        return {'ts': value.isoformat()}
+    if isinstance(value, datetime.datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {'d': value.isoformat()}
+    if isinstance(value, datetime.time):
+        return {'t': value.isoformat()}
+    if isinstance(value, pd.Timedelta):
+        return {'ptd': value.value}
+    if isinstance(value, datetime.timedelta):
+        return {'td': [value.days, value.seconds, value.microseconds]}
+    raise TypeError(f"无法缓存的值类型：{type(value).__name__}")
+
+
+_DECODERS = {
+    'nat': lambda v: pd.NaT,
+    'ts': pd.Timestamp,
+    'dt': datetime.datetime.fromisoformat,
+    'd': datetime.date.fromisoformat,
+    't': datetime.time.fromisoformat,
+    'ptd': pd.Timedelta,
+    'td': lambda v: datetime.timedelta(*v),
+}
+
+
+def _decode_value(value):
+    """JSON 值 → 单元格值（_encode_value 的逆过程）"""
+    if isinstance(value, dict):
+        (tag, raw), = value.items()
+        return _DECODERS[tag](raw)
+    return value
+
+
+def _encode_frame(df):
+    """DataFrame → JSON 结构：列名、各列 dtype、逐列的值"""
+    return {
+        'rows': len(df),
+        'columns': [_encode_value(name) for name in df.columns],
+        'dtypes': [str(dtype) for dtype in df.dtypes],
+        'data': [[_encode_value(v) for v in df.iloc[:, i].tolist()] for i in range(df.shape[1])],
+    }
+
+
+def _decode_frame(frame):
+    """JSON 结构 → DataFrame（列的 dtype 与存入时相同）"""
+    columns = []
+    for dtype, values in zip(frame['dtypes'], frame['data']):
+        series = pd.Series([_decode_value(v) for v in values], dtype=object)
+        columns.append(series if dtype == 'object' else series.astype(dtype))
+    df = pd.concat(columns, axis=1) if columns else pd.DataFrame(index=range(frame['rows']))
+    df.columns = [_decode_value(name) for name in frame['columns']]
+    return df
+
+
+def fill_columns(config):
+    """
+    填充规则实际引用的全部列（主键 + 表格坐标 + 占位符 + 关键字追加）
+    :param config: 配置类实例（没有的规则自动忽略）
+    """
+    columns = [config.PRIMARY_KEY]
+    columns += list(getattr(config, 'TABLE_CELL_MAP', {}))
+    columns += list(getattr(config, 'PLACEHOLDER_MAP', {}).values())
+    columns += list(getattr(config, 'KEYWORD_APPEND_MAP', {}).values())
+    return list(dict.fromkeys(columns))
+
+
+# 流式读取第一遍扫描时，每列每“类”值只留一个代表交给 pandas 推断列类型（见 SheetStream._kind）
+_TRUE_TEXTS = frozenset({'True', 'TRUE', 'true'})
+_BOOL_TEXTS = _TRUE_TEXTS | {'False', 'FALSE', 'false'}
+_INT_TEXT_RE = re.compile(r'\s*[+-]?\d+\s*')
+_FLOAT_TEXT_RE = re.compile(r'\s*[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?\s*')
+
+
+def _int_class(value):
+    """整数按 pandas 能放进的类型分档：int64 / uint64 / 都放不下"""
+    if value < -2 ** 63:
+        return 'huge'
+    if value < 0:
+        return 'negative'
+    if value < 2 ** 63:
+        return 'int64'
+    return 'uint64' if value < 2 ** 64 else 'huge'
+
+
+class SheetStream:
+    """
+    只读模式流式读取一个工作表，按块产出 DataFrame
+
+    结果与 pd.read_excel 读整张表完全一致（单元格取值、"N/A" 等空值文本、末尾空行、每列的 dtype）：
+    pandas 按整列推断类型（例如一列里有一个空格子，整列的整数都会变成 28.0），只看一块是推断不准的，
+    所以第一次迭代（或第一次查询重复主键）前先把整张表快速扫一遍，每列每类值只留一个代表，
+    交给 pandas 推断出整列的 dtype；之后每块都按这个 dtype 转换。
+    扫描只记列类型和主键出现的位置，内存占用与块大小、主键个数有关，与行数无关。
+    同一个工作表要读多遍时（每个模板流一遍），把第一遍的 layout 传给后面的 SheetStream，不用重复扫描。
+    """
+
+    def __init__(self, path, sheet_name=0, columns=None, chunk_size=2000, key=None, layout=None):
+        """
+        :param path: 工作簿路径
+        :param sheet_name: 工作表名（或序号）
+        :param columns: 需要的列名（按去掉首尾空格后的表头匹配）；None 表示全部列
+        :param chunk_size: 每块多少行
+        :param key: 主键列名（扫描时顺便记下重复的主键，见 duplicates）
+        :param layout: 同一工作表之前扫描的结果（另一个 SheetStream 的 layout），给了就不再扫描
+        """
+        from openpyxl import load_workbook
+
+        self.chunk_size = max(1, int(chunk_size))
+        self.key = key
+        self._layout = layout
+        self._book = load_workbook(path, read_only=True, data_only=True)
+        try:
+            if isinstance(sheet_name, int):
+                self._sheet = self._book.worksheets[sheet_name]
+            elif sheet_name in self._book.sheetnames:
+                self._sheet = self._book[sheet_name]
+            else:
+                raise ValueError(f"Worksheet named '{sheet_name}' not found")
+            first = next(self._sheet.iter_rows(max_row=1), ())
+        except Exception:
+            self.close()
+            raise
+
+        header = [self._value(cell) for cell in first]
+        while header and header[-1] is None:
+            header.pop()
+        # 与 pandas 一致：空表头记作 "Unnamed: 序号"，文字表头去掉首尾空格
+        self.header = [
+            f"Unnamed: {i}" if name is None else (name.strip() if isinstance(name, str) else name)
+            for i, name in enumerate(header)
+        ]
+        wanted = None if columns is None else {str(c).strip() for c in columns}
+        self._keep = [i for i, name in enumerate(self.header) if wanted is None or str(name) in wanted]
+        self.columns = [self.header[i] for i in self._keep]
+        self.rows_read = 0
+
+    @staticmethod
+    def _value(cell):
+        """表头单元格 → 值（空值、错误值、"N/A" 等文本视为 None）"""
+        value = cell.value
+        if value is None or getattr(cell, 'data_type', None) == 'e':
+            return None
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        if isinstance(value, str) and value in STR_NA_VALUES:
+            return None
+        return value
+
+    @staticmethod
+    def _raw(cell):
+        """数据单元格 → pandas 解析前的原始值（规则同 pandas 的 openpyxl 读取器）"""
+        value = cell.value
+        if value is None:
+            return ''
+        if cell.data_type == 'e':
+            return np.nan
+        if cell.data_type == 'n':
+            number = int(value)
+            return number if number == value else float(value)
+        return value
+
+    @staticmethod
+    def _kind(value):
+        """
+        原始值的“类”：同一类的值对 pandas 的整列类型推断作用相同（都能转成数字、都是整数、都是日期……），
+        扫描时每列每类只留第一次遇到的值
+        """
+        if isinstance(value, str):
+            if value in STR_NA_VALUES:
+                return 'na'
+            if _INT_TEXT_RE.fullmatch(value):
+                return 'int-text', _int_class(int(value))
+            if _FLOAT_TEXT_RE.fullmatch(value):
+                return 'float-text'
+            if value in _BOOL_TEXTS:
+                return 'bool-text', value
+            try:
+                float(value)  # "inf"、"1_000" 这类少见写法各自单独推断
+            except ValueError:
+                return 'text'
+            return 'odd-text', value
+        if isinstance(value, bool):
+            return 'bool', value
+        if isinstance(value, int):
+            return 'int', _int_class(value)
+        if isinstance(value, float):
+            return 'na' if value != value else 'float'
+        return type(value).__name__
+
+    def _rows(self):
+        """逐行产出需要的列的原始值：(数据行序号, 值列表)；末尾的空行忽略"""
+        keep = self._keep
+        empty = [''] * len(keep)
+        pending_empty = 0
+        position = 0
+        for row in self._sheet.iter_rows(min_row=2):
+            if all(cell.value is None for cell in row):
+                pending_empty += 1  # 先记着：后面还有数据才算数，末尾的空行直接丢掉
+                continue
+            for _ in range(pending_empty):
+                yield position, list(empty)
+                position += 1
+            pending_empty = 0
+            yield position, [self._raw(row[i]) if i < len(row) else '' for i in keep]
+            position += 1
+
+    def _parse(self, records, dtypes=None):
+        """原始值 → DataFrame（与 read_excel 同一个解析器：空值文本、数字文本、布尔文本的处理都一样）"""
+        from pandas.io.parsers import TextParser
+
+        names = list(range(len(self._keep)))
+        df = TextParser(records, names=names, header=None, skip_blank_lines=False, dtype=dtypes).read()
+        df.columns = self.columns
+        return df
+
+    @property
+    def layout(self):
+        """扫描结果：{'dtypes': 各列 dtype, 'key': 主键列名, 'repeats': {主键: [出现的数据行序号]}}"""
+        if self._layout is None:
+            self._layout = self._scan()
+        return self._layout
+
+    def _scan(self):
+        """第一遍：每列每类值留一个代表推断整列 dtype，顺便记下主键每次出现的位置"""
+        samples = [{} for _ in self._keep]
+        firsts = [{} for _ in self._keep]  # 每列第一次出现的 0 / 1 / False / True
+        mixed = set()  # 0 和 False（或 1 和 True）都出现过的列
+        key_at = self.columns.index(self.key) if self.key in self.columns else None
+        first_seen, repeats = {}, {}
+        for position, values in self._rows():
+            for i, (sample, first, value) in enumerate(zip(samples, firsts, values)):
+                sample.setdefault(self._kind(value), value)
+                if type(value) in (bool, int) and value in (0, 1):
+                    if type(first.setdefault(value, value)) is not type(value):
+                        mixed.add(i)
+            if key_at is not None:
+                mark = (values[key_at], type(values[key_at]))  # 带上类型："1" 和 1 先分开记
+                if mark in first_seen:
+                    repeats.setdefault(mark, []).append(position)
+                else:
+                    first_seen[mark] = position
+
+        dtypes, bool_texts = {}, []
+        if samples and any(samples):
+            # 各列代表个数不同，短的列用自己的第一个代表补齐（同类的值不影响推断）
+            columns = [list(sample.values()) or [''] for sample in samples]
+            height = max(len(values) for values in columns)
+            records = [[values[i] if i < len(values) else values[0] for values in columns] for i in range(height)]
+            parsed = self._parse(records)
+            dtypes = dict(enumerate(parsed.dtypes))
+            # pandas 有时会把整列的 "TRUE" / "false" 文本转成布尔值（整列只有真假值时），记下是哪些列
+            for i, values in enumerate(columns):
+                converted = parsed.iloc[:len(values), i].tolist()
+                if any(isinstance(v, str) and v in _BOOL_TEXTS and isinstance(c, (bool, np.bool_))
+                       for v, c in zip(values, converted)):
+                    bool_texts.append(i)
+        # pandas 整理文字列时，相等的值（0 和 False、1 和 True）一律换成这一列里第一次出现的那个
+        interned = {i: firsts[i] for i in sorted(mixed) if dtypes.get(i) == object}
+
+        # 主键按整列 dtype 转换后再比较（"1" 和 1 在数字列里是同一个桩号）
+        station_repeats = {}
+        if key_at is not None and first_seen:
+            raw = list(first_seen)
+            converted = self._parse([[station] + [''] * (len(self._keep) - 1) for station, _ in raw],
+                                    {0: dtypes[key_at]} if dtypes else None).iloc[:, 0]
+            merged = {}
+            for (station, kind), value in zip(raw, converted.tolist()):
+                if pd.isna(value):
+                    continue
+                positions = [first_seen[(station, kind)]] + repeats.get((station, kind), [])
+                merged.setdefault(value, []).extend(positions)
+            station_repeats = {value: sorted(positions) for value, positions in merged.items() if len(positions) > 1}
+        return {'dtypes': dtypes, 'bool_texts': bool_texts, 'interned': interned, 'key': self.key,
+                'repeats': station_repeats}
+
+    def duplicates(self, start=0, end=None):
+        """
+        重复的主键（会先扫描整张表）
+        :param start: 只看从这个数据行序号开始的行
+        :param end: 到这个数据行序号为止（不含）；None 表示到最后
+        :return: {主键: 出现次数}（按首次出现的顺序）
+        """
+        result = {}
+        for station, positions in self.layout['repeats'].items():
+            count = sum(1 for p in positions if p >= start and (end is None or p < end))
+            if count > 1:
+                result[station] = count
+        return result
+
+    def __iter__(self):
+        """逐块产出 DataFrame，索引为数据行序号（0 = Excel 第 2 行）"""
+        try:
+            records, start = [], 0
+            for _, values in self._rows():
+                records.append(values)
+                if len(records) >= self.chunk_size:
+                    yield self._frame(records, start)
+                    start += len(records)
+                    records = []
+            if records:
+                yield self._frame(records, start)
+        finally:
+            self.close()  # 读完或中途不读了都关掉工作簿
+
+    def _frame(self, records, start):
+        """一块原始值 → DataFrame，各列按整列的 dtype 转换"""
+        self.rows_read += len(records)
+        dtypes = self.layout['dtypes']
+        # 布尔列不交给解析器强制转换（强制转成 bool 会把 "false" 也当成 True）；文字列（object）也不交给它，
+        # 否则一块里恰好全是日期时会被转成 Timestamp。这两种列照 pandas 处理整列的规则自己转
+        manual = [i for i, dtype in dtypes.items() if dtype == bool or dtype == object]
+        df = self._parse(records, {i: object if i in manual else dtype for i, dtype in dtypes.items()})
+        for i in manual:
+            df.isetitem(i, self._objects([values[i] for values in records], i).astype(dtypes[i]))
+        df.index = range(start, start + len(records))
+        return df
+
+    def _objects(self, values, i):
+        """
+        一块里的一列原始值 → 整理好的 object Series（同 pandas 整理文字列）：空值文本换成 NaN，
+        0 / 1 / False / True 换成整列第一次出现的那个，整列只有真假值时把真假文本转成布尔值
+        """
+        first = self.layout['interned'].get(i, {})
+        to_bool = i in self.layout['bool_texts'] or self.layout['dtypes'][i] == bool
+        result = []
+        for v in values:
+            if isinstance(v, str):
+                if v in STR_NA_VALUES:
+                    v = np.nan
+                elif to_bool and v in _BOOL_TEXTS:
+                    v = v in _TRUE_TEXTS
+            elif type(v) in (bool, int):
+                v = first.get(v, v)
+            elif isinstance(v, float) and v != v:
+                v = np.nan
+            result.append(v)
+        return pd.Series(result, dtype=object)
+
+    def close(self):
+        """关闭工作簿（只读模式会一直占着文件句柄）"""
+        if self._book is not None:
+            self._book.close()
+            self._book = None
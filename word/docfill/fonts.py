@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+字体格式：预先搭好一份 <w:rPr>，每个新 run 直接克隆，不再逐项设置
+
+原来每填一个 run 都要走三次 python-docx 的属性设置（font.name、font.size、w:eastAsia），
+每次设置都要重新查找、按需创建 rPr / rFonts / sz 元素。模板里要填几百个格子时，
+这些零碎操作在剖析结果里相当显眼。
+
+FontStyle 按（字体名, 字号）只搭一次 rPr（用的就是 python-docx 自己的设置方法，XML 完全一样）：
+    - run 还没有 rPr（新加的 run）：直接插入一份克隆
+    - run 已有 rPr 且字体、字号已经一样：什么都不做
+    - run 已有 rPr 但不一样（模板里自带加粗等格式的 run）：按原来的方式只改这三项，保留其余格式
+"""
+from copy import deepcopy
+from functools import lru_cache
+
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.text.run import Run
+
+_RPR = qn('w:rPr')
+_RFONTS = qn('w:rFonts')
+_SZ = qn('w:sz')
+_VAL = qn('w:val')
+_FONT_ATTRS = (qn('w:ascii'), qn('w:hAnsi'), qn('w:eastAsia'))
+
+
+def _set_font(run, name, size):
+    """原来的逐项设置（西文字体、字号、中文字体）"""
+    run.font.name = name
+    run.font.size = size
+    run._element.rPr.rFonts.set(qn('w:eastAsia'), name)
+
+
+class FontStyle:
+    """一种字体格式（字体名 + 字号）"""
+
+    def __init__(self, name, size):
+        """
+        :param name: 字体名称（西文、中文都用它）
+        :param size: 字号（如 Pt(10)）
+        """
+        self.name = name
+        self.size = size
+        r = OxmlElement('w:r')
+        _set_font(Run(r, None), name, size)
+        self._rpr = r.rPr
+        sz = self._rpr.find(_SZ)
+        self._sz = None if sz is None else sz.get(_VAL)
+
+    def matches(self, rPr):
+        """rPr 的字体、字号是否已经是这个格式"""
+        rFonts = rPr.find(_RFONTS)
+        if rFonts is None or any(rFonts.get(attr) != self.name for attr in _FONT_ATTRS):
+            return False
+        sz = rPr.find(_SZ)
+        return (None if sz is None else sz.get(_VAL)) == self._sz
+
+    def apply(self, run):
+        """给一个 run 套上这个格式"""
+        r = run._element
+        rPr = r.find(_RPR)
+        if rPr is None:
+            r.insert(0, deepcopy(self._rpr))  # rPr 必须是 run 的第一个子元素
+        elif not self.matches(rPr):
+            _set_font(run, self.name, self.size)
+
+
+@lru_cache(maxsize=32)
+def font_style(name, size):
+    """按（字体名, 字号）取字体格式（同一组合只搭一次 rPr）"""
+    return FontStyle(name, size)
@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""
+整列格式化：渲染前把需要用到的列一次性格式化成最终文本
+
+原来每个单元格都单独走一遍 format_date / optimize_number（日期要逐个试 5 种 strptime，
+每次失败都是一次异常），10 万行的表大部分时间都耗在异常处理上。
+这里按列批量处理常见情况：
+    - 日期：datetime 列直接 strftime；Excel 日期序列号批量换算；常见日期字符串按格式批量解析
+    - 数值：去掉多余的 0、按配置追加单位
+    - 空值：统一为 "/"
+个别“非常规”的值（解析不了的日期、带下划线的数字等）仍交给脚本原来的逐格函数处理，
+保证格式化结果与逐格处理完全一致。
+"""
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# 与 format_date 中尝试顺序一致的日期格式
+DATE_PATTERNS = ['%Y-%m-%d', '%Y/%m/%d', '%Y年%m月%d日', '%m/%d/%Y', '%d/%m/%Y']
+
+# Excel 日期序列号的起点，以及能安全换算的最大天数（超出交给逐格函数处理）
+EXCEL_EPOCH = pd.Timestamp(1899, 12, 30)
+_MAX_SERIAL_DAYS = 100000
+
+# 与 Python float() 接受的写法一致的数字文本（含全角数字、下划线分隔、inf/nan）
+_DIGITS = r'\d(?:_?\d)*'
+FLOAT_TEXT_RE = re.compile(
+    rf'\s*[+-]?(?:(?:(?:{_DIGITS})?\.{_DIGITS}|{_DIGITS}\.?)(?:[eE][+-]?{_DIGITS})?|inf(?:inity)?|nan)\s*',
+    re.IGNORECASE
+)
+
+# 整数位数超过这个值时，float → int 的结果交给逐格函数（避免 int64 溢出）
+_MAX_SAFE_FLOAT = 2 ** 53
+
+
+class PreparedRow(dict):
+    """已经格式化成最终文本的单行数据（值可直接填入 Word）"""
+
+
+def value_formatter(data_row, format_func):
+    """
+    根据数据行选择格式化函数：已格式化的行直接取值，否则逐格格式化
+    :param data_row: 单行数据字典（PreparedRow 或原始数据）
+    :param format_func: 逐格格式化函数（列名, 原始值, 配置）→ 文本
+    """
+    if not isinstance(data_row, PreparedRow):
+        return format_func
+
+    def lookup(excel_col, raw_value, config):
+        # 数据行里没有的列（占位符引用了不存在的列）仍按原规则处理空值
+        return raw_value if excel_col in data_row else format_func(excel_col, raw_value, config)
+
+    return lookup
+
+
+def _is_datetime(value):
+    return isinstance(value, (pd.Timestamp, datetime))
+
+
+def _to_float(value):
+    """已确认是数字的值转浮点（万一转换失败返回 NaN，交给逐格函数）"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _strftime(dates, target_format):
+    """datetime 列批量 strftime：同一天只格式化一次（同一批数据里日期大量重复）"""
+    codes, uniques = pd.factorize(dates)
+    texts = np.asarray(uniques.strftime(target_format), dtype=object)
+    return pd.Series(texts[codes], index=dates.index, dtype=object)
+
+
+def _float_repr_text(values):
+    """非整数浮点数 → 文本（与 optimize_number 一致：str 后去掉小数末尾的 0）"""
+    texts = values.map(str)
+    has_dot = texts.str.contains('.', regex=False)
+    texts[has_dot] = texts[has_dot].str.rstrip('0').str.rstrip('.')
+    return texts
+
+
+def _number_text(nums):
+    """
+    浮点数列 → 去零后的文本
+    :param nums: float64 Series（不含空值）
+    :return: (文本 Series, 需要交给逐格函数的布尔掩码)
+    """
+    result = pd.Series('', index=nums.index, dtype=object)
+    finite = np.isfinite(nums)
+    is_int = finite & (nums == np.floor(nums.where(finite, 0)))
+    safe_int = is_int & (nums.abs() < _MAX_SAFE_FLOAT)
+
+    result[safe_int] = nums[safe_int].astype('int64').astype(str).astype(object)
+    other = ~is_int
+    if other.any():
+        result[other] = _float_repr_text(nums[other].astype(object))
+    return result, is_int & ~safe_int
+
+
+def _format_dates(values, target_format):
+    """
+    日期列批量格式化
+    :param values: 不含空值的原始值 Series
+    :param target_format: 目标格式
+    :return: (文本 Series, 需要交给逐格函数的布尔掩码)
+    """
+    result = pd.Series('', index=values.index, dtype=object)
+    fallback = pd.Series(False, index=values.index)
+
+    if values.empty:
+        return result, fallback
+    if pd.api.types.is_datetime64_any_dtype(values):
+        result[:] = _strftime(values, target_format)
+        return result, fallback
+    # 整列都是数字（或整列空白）时 Series 是 float64，转成 object 后 .str 才能用
+    values = values.astype(object)
+
+    is_dt = values.map(_is_datetime).astype(bool)
+    if is_dt.any():
+        result[is_dt] = values[is_dt].map(lambda v: v.strftime(target_format))
+
+    rest = values[~is_dt].map(str)
+    stripped = rest.str.strip()
+    blank = (values[~is_dt].map(lambda v: isinstance(v, str) and v == '')) | (stripped == 'nan')
+    result[blank[blank].index] = '/'
+    pending = stripped[~blank].str.split(' ', n=1).str[0]
+
+    # Excel 日期序列号（纯数字/小数）
+    serial = pending.str.replace('.', '', regex=False).str.isdigit()
+    if serial.any():
+        days = pd.to_numeric(pending[serial], errors='coerce')
+        ok = days.notna() & (days >= 0) & (days < _MAX_SERIAL_DAYS)
+        good = days[ok]
+        result[good.index] = _strftime(EXCEL_EPOCH + pd.to_timedelta(good, unit='D'), target_format)
+        fallback[days[~ok].index] = True
+    pending = pending[~serial]
+
+    # 常见日期文本：按原来的尝试顺序逐个格式批量解析
+    for pattern in DATE_PATTERNS:
+        if pending.empty:
+            break
+        parsed = pd.to_datetime(pending, format=pattern, errors='coerce')
+        ok = parsed.notna()
+        if ok.any():
+            result[ok[ok].index] = _strftime(parsed[ok], target_format)
+            pending = pending[~ok]
+
+    # 剩下的（中文混排、解析不了的）交给逐格函数
+    fallback[pending.index] = True
+    return result, fallback
+
+
+def _format_numbers(values):
+    """
+    去零列批量格式化
+    :param values: 不含空值的原始值 Series
+    :return: (文本 Series, 需要交给逐格函数的布尔掩码)
+    """
+    if pd.api.types.is_bool_dtype(values):
+        return pd.Series('', index=values.index, dtype=object), pd.Series(True, index=values.index)
+    if pd.api.types.is_numeric_dtype(values):
+        return _number_text(values.astype('float64'))
+
+    result = pd.Series('', index=values.index, dtype=object)
+    fallback = pd.Series(False, index=values.index)
+
+    is_num = values.map(lambda v: isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool))
+    is_num = is_num.astype(bool)
+    is_text = values.map(lambda v: isinstance(v, str)).astype(bool)
+    numeric_text = is_text & values.where(is_text, '').astype(str).str.fullmatch(FLOAT_TEXT_RE).astype(bool)
+
+    # 数字和“数字文本”统一转成浮点再去零；其它文本原样保留（与 float() 失败时一致）
+    convert = is_num | numeric_text
+    if convert.any():
+        nums = values[convert].map(_to_float).astype('float64')
+        failed = nums.isna() & ~values[convert].map(lambda v: isinstance(v, str) and v.strip().lower() == 'nan')
+        texts, unsafe = _number_text(nums)
+        result[texts.index] = texts
+        fallback[unsafe[unsafe].index] = True
+        fallback[failed[failed].index] = True
+    plain = is_text & ~numeric_text
+    result[plain] = values[plain]
+    fallback |= ~(convert | plain)
+    return result, fallback
+
+
+def format_frame(df, columns, config, fallback_func, unit_for_all=True):
+    """
+    把 df 中需要填充的列整列格式化成最终文本
+    :param df: 原始数据表
+    :param columns: 需要格式化的列名（不在 df 里的列自动忽略）
+    :param config: 配置类实例（读取 DATE_FORMAT_MAP / OPTIMIZE_DECIMAL_COLUMNS / UNIT_MAP）
+    :param fallback_func: 脚本原来的逐格格式化函数（列名, 原始值, 配置）→ 文本
+    :param unit_for_all: True = 只要配置了单位就追加（word/03 规则）；False = 只给去零列追加单位（word/02 规则）
+    :return: 与 df 行对应、值全部为文本的 DataFrame
+    """
+    frame = df.reset_index(drop=True)  # 内部统一按行位置处理
+    texts = {}
+    for col in dict.fromkeys(columns):
+        if col not in frame.columns:
+            continue
+        series = frame[col]
+        result = pd.Series('/', index=frame.index, dtype=object)  # 空值统一为 "/"
+        present = series.notna()
+        values = series[present]
+
+        if col in config.DATE_FORMAT_MAP:
+            formatted, fallback = _format_dates(values, config.DATE_FORMAT_MAP[col])
+            add_unit = False
+        elif col in config.OPTIMIZE_DECIMAL_COLUMNS:
+            formatted, fallback = _format_numbers(values)
+            add_unit = True
+        else:
+            formatted = values.map(str).astype(object)
+            fallback = pd.Series(False, index=values.index)
+            add_unit = unit_for_all
+
+        unit = config.UNIT_MAP.get(col, "") if add_unit else ""
+        if unit:
+            fast = ~fallback & (formatted != '/') if unit_for_all else ~fallback
+            formatted[fast] = formatted[fast] + unit
+
+        # 非常规值逐格处理（结果已含单位）
+        for idx in fallback[fallback].index:
+            formatted[idx] = fallback_func(col, values[idx], config)
+
+        result[formatted.index] = formatted
+        texts[col] = result.to_numpy()
+
+    return pd.DataFrame(texts, index=df.index, dtype=object)
+
+
+def prepared_row(texts, position):
+    """
+    从整列格式化结果中取出一行
+    :param texts: format_frame 的结果
+    :param position: 行位置
+    :return: PreparedRow
+    """
+    return PreparedRow(zip(texts.columns, texts.iloc[position].tolist()))
+
+
+def _context_numbers(nums, truncate):
+    """
+    tongyong.py 的数值规则（整列版）：整数或强制取整列 → int，其它保留两位小数
+    :param nums: float64 Series（不含空值）
+    :param truncate: 是否强制去掉小数（INT_COLUMNS）
+    :return: (值列表 Series, 需要交给逐格函数的布尔掩码)
+    """
+    result = pd.Series(None, index=nums.index, dtype=object)
+    finite = np.isfinite(nums)
+    safe = finite & (nums.abs() < _MAX_SAFE_FLOAT)
+    as_int = safe & (truncate | (nums == np.floor(nums.where(finite, 0))))
+    result[as_int] = pd.Series(np.trunc(nums[as_int]).astype('int64').tolist(), index=nums[as_int].index, dtype=object)
+    rounded = safe & ~as_int
+    result[rounded] = nums[rounded].astype(object).map(lambda v: round(v, 2))
+    return result, ~safe
+
+
+def context_records(df, int_columns, date_format, fallback_func):
+    """
+    tongyong.py 的 process_data 整列版：一次性生成每一行的渲染上下文
+    :param df: 原始数据表
+    :param int_columns: 强制取整的列
+    :param date_format: 日期输出格式
+    :param fallback_func: 原来的逐格函数 process_data(列名, 值)
+    :return: (每行上下文字典列表, {行位置: 逐格处理时抛出的异常})
+    """
+    frame = df.reset_index(drop=True)
+    columns = {}
+    errors = {}
+    for col in frame.columns:
+        series = frame[col]
+        result = pd.Series("", index=frame.index, dtype=object)  # 空值 → ""
+        present = series.notna()
+        values = series[present]
+        truncate = col in int_columns
+
+        if pd.api.types.is_datetime64_any_dtype(values):
+            formatted = _strftime(values, date_format)
+            fallback = pd.Series(False, index=values.index)
+        elif pd.api.types.is_bool_dtype(values):
+            formatted = values.astype(int).astype(object)
+            fallback = pd.Series(False, index=values.index)
+        elif pd.api.types.is_numeric_dtype(values):
+            formatted, fallback = _context_numbers(values.astype('float64'), truncate)
+        else:
+            formatted = values.astype(object).copy()
+            fallback = pd.Series(False, index=values.index)
+
+            is_dt = values.map(_is_datetime).astype(bool)
+            if is_dt.any():
+                formatted[is_dt] = values[is_dt].map(lambda v: v.strftime(date_format))
+
+            # Python 数字（含 bool）和“数字文本”都按数值规则处理；其它值原样保留
+            is_num = values.map(lambda v: isinstance(v, (int, float)) and not _is_datetime(v)).astype(bool)
+            is_text = values.map(lambda v: isinstance(v, str)).astype(bool)
+            numeric_text = is_text & values.where(is_text, '').astype(str).str.fullmatch(FLOAT_TEXT_RE).astype(bool)
+            convert = is_num | numeric_text
+            if convert.any():
+                nums = values[convert].map(_to_float).astype('float64')
+                numbers, fallback_num = _context_numbers(nums, truncate)
+                formatted[numbers.index] = numbers
+                fallback[fallback_num[fallback_num].index] = True
+
+        # 非常规值逐格处理；逐格处理会报错的行，记下异常留给渲染时报告
+        for idx in fallback[fallback].index:
+            try:
+                formatted[idx] = fallback_func(col, values[idx])
+            except Exception as e:
+                errors.setdefault(idx, e)
+
+        result[formatted.index] = formatted
+        columns[col] = result.tolist()
+
+    names = list(columns)
+    records = [dict(zip(names, row)) for row in zip(*columns.values())] if names else [{} for _ in range(len(frame))]
+    return records, errors
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+主键分组索引：一次扫描建立“主键 → 行位置”的对照表
+
+原来每个桩号都要 df[df[主键] == 桩号] 整列比较一遍，桩号数一多就是 O(N²)，
+而且每换一个模板还要重来一遍。这里只做一次 factorize + 稳定排序，
+之后按桩号取行就是直接下标访问，多个模板共用同一份索引。
+
+主键重复时的处理方式由 duplicate_policy 决定：
+    'first'：取第一行（与原来的行为一致）
+    'last' ：取最后一行（适合“后录入的数据覆盖先录入的”）
+    'error'：直接报错，把所有重复主键列出来
+"""
+import numpy as np
+import pandas as pd
+
+from docfill.formatting import prepared_row
+
+DUPLICATE_POLICIES = ('first', 'last', 'error')
+
+
+def duplicate_summary(duplicates, preview=10):
+    """
+    重复主键的播报文字
+    :param duplicates: {重复主键: 出现次数}
+    :param preview: 最多列出多少个
+    :return: 如 "N1×2、N5×3 等12个"
+    """
+    items = list(duplicates.items())
+    shown = '、'.join(f"{k}×{c}" for k, c in items[:preview])
+    return shown + (f" 等{len(items)}个" if len(items) > preview else "")
+
+
+def last_positions(keys):
+    """
+    同名以最后一次出现为准（tongyong 的文件名：后一行覆盖前一行）
+    :param keys: 按行顺序排列的主键
+    :return: ({主键: 最后出现的位置}, {重复主键: 出现次数})，前者按首次出现的顺序排列
+    """
+    last = {}
+    duplicates = {}
+    for pos, key in enumerate(keys):
+        if key in last:
+            duplicates[key] = duplicates.get(key, 1) + 1
+        last[key] = pos
+    return last, duplicates
+
+
+class GroupIndex:
+    """DataFrame 按主键分组后的行位置索引"""
+
+    def __init__(self, df, key, duplicate_policy='first'):
+        """
+        :param df: 数据表
+        :param key: 主键列名
+        :param duplicate_policy: 主键重复时取哪一行（'first' / 'last' / 'error'）
+        """
+        if duplicate_policy not in DUPLICATE_POLICIES:
+            raise ValueError(f"主键重复处理方式只能是 {DUPLICATE_POLICIES}，当前为：{duplicate_policy}")
+
+        self.df = df
+        self.key = key
+        self.duplicate_policy = duplicate_policy
+
+        # 一次性分组：codes 为每行所属分组号（空主键为 -1），uniques 按首次出现顺序排列
+        codes, uniques = pd.factorize(df[key], sort=False)
+        order = np.argsort(codes, kind='stable')  # 稳定排序：组内保持原始行顺序
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        self.missing_count = int((codes < 0).sum())  # 主键为空的行数
+        starts = self.missing_count + np.concatenate(([0], np.cumsum(counts)[:-1]))  # 每组在 order 中的起点
+
+        self.keys = list(uniques)  # 全部主键（首次出现顺序，不含空值）
+        self._positions = {
+            k: order[start:start + count] for k, start, count in zip(self.keys, starts, counts)
+        }
+        self.duplicates = {k: int(c) for k, c in zip(self.keys, counts) if c > 1}  # {重复主键: 出现次数}
+        self._rows = {}  # 已取出的单行数据缓存（多个模板共用）
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self._positions
+
+    def positions(self, key):
+        """该主键对应的全部行位置（按原始行顺序）"""
+        return self._positions[key]
+
+    def rows(self, key):
+        """该主键对应的全部行（按原始行顺序，索引重新从 0 编号）"""
+        return self.df.iloc[self._positions[key]].reset_index(drop=True)
+
+    def position(self, key):
+        """
+        按重复处理方式选出该主键使用的行位置
+        :param key: 主键值
+        :return: 行位置
+        """
+        positions = self._positions[key]
+        if len(positions) > 1 and self.duplicate_policy == 'error':
+            raise ValueError(f"主键重复：{key}（共{len(positions)}行）")
+        return int(positions[-1] if self.duplicate_policy == 'last' else positions[0])
+
+    def row(self, key):
+        """
+        按重复处理方式取出该主键的单行数据
+        :param key: 主键值
+        :return: 单行数据字典
+        """
+        if key not in self._rows:
+            self._rows[key] = self.df.iloc[self.position(key)].to_dict()
+        return self._rows[key]
+
+    def check_duplicates(self, preview=10):
+        """
+        播报重复主键（'error' 模式下直接抛出异常）
+        :param preview: 最多列出多少个重复主键
+        :return: 重复主键字典 {主键: 出现次数}
+        """
+        if not self.duplicates:
+            return self.duplicates
+
+        if self.duplicate_policy == 'error':
+            raise ValueError(f"[{self.key}]存在重复值：{duplicate_summary(self.duplicates, preview)}")
+
+        which = '第一行' if self.duplicate_policy == 'first' else '最后一行'
+        print(f"⚠️ [{self.key}]存在重复值（按{which}生成）：{duplicate_summary(self.duplicates, preview)}")
+        return self.duplicates
+
+
+class StationStream:
+    """
+    流式版 GroupIndex：数据按块到达，按首次出现顺序逐个产出（主键, 格式化后的单行）
+
+    只记住已出现过的主键，不保留整张表。重复主键只能按 'first'（后出现的行跳过）
+    或 'error'（读到重复行时报错）处理；'last' 需要先读完整张表，流式模式下不支持。
+    'error' 想在生成任何文档之前就报错，要先用 SheetStream.duplicates 查（整张表扫一遍）。
+    """
+
+    def __init__(self, chunks, key, duplicate_policy, format_chunk):
+        """
+        :param chunks: 逐块产出 DataFrame 的可迭代对象（如 SheetStream）
+        :param key: 主键列名
+        :param duplicate_policy: 'first' / 'error'
+        :param format_chunk: 函数 DataFrame → 同样行数的已格式化文本 DataFrame（如 format_frame）
+        """
+        if duplicate_policy not in DUPLICATE_POLICIES:
+            raise ValueError(f"主键重复处理方式只能是 {DUPLICATE_POLICIES}，当前为：{duplicate_policy}")
+        if duplicate_policy == 'last':
+            raise ValueError("流式读取时不支持 DUPLICATE_KEY_POLICY = 'last'（需要读完整张表才知道哪一行是最后一行）")
+        self.chunks = chunks
+        self.key = key
+        self.duplicate_policy = duplicate_policy
+        self.format_chunk = format_chunk
+        self.rows_read = 0  # 已读到的行数
+        self.missing_count = 0  # 主键为空的行数
+        self.duplicates = {}  # {重复主键: 出现次数}
+        self._seen = set()
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.rows_read += len(chunk)
+            texts = None  # 整块里全是重复/空主键时不用格式化
+            for pos, station in enumerate(chunk[self.key].tolist()):
+                if pd.isna(station):
+                    self.missing_count += 1
+                    continue
+                if station in self._seen:
+                    if self.duplicate_policy == 'error':
+                        raise ValueError(f"[{self.key}]存在重复值：{station}")
+                    self.duplicates[station] = self.duplicates.get(station, 1) + 1
+                    continue
+                self._seen.add(station)
+                if texts is None:
+                    texts = self.format_chunk(chunk)
+                yield station, prepared_row(texts, pos)
+
+    def check_duplicates(self, preview=10):
+        """读完之后播报重复主键（已按第一行生成）"""
+        if self.duplicates:
+            print(f"⚠️ [{self.key}]存在重复值（按第一行生成）：{duplicate_summary(self.duplicates, preview)}")
+        return self.duplicates
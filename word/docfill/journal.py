@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+运行日志与断点续跑：几千份文档跑到一半崩了，不用从头再来
+
+每完成一个（模板, 桩号）任务，就往 OUTPUT_FOLDER 里的 .docfill_journal.jsonl 追加一行：
+    {"template": 模板路径, "station": 桩号, "output": 输出文件路径, "status": "ok" / "failed", "error": 失败原因}
+每行写完立即落盘，进程被强行终止也只会丢掉最后半行（读取时自动忽略）。
+
+RESUME = True 时读取上一次的日志：状态为 ok 且输出文件还在的任务直接跳过，
+失败的、没跑到的、输出文件被删掉的任务重新生成；新结果继续追加在日志后面。
+RESUME = False 时日志从头记起。
+
+与增量清单（manifest.py）的区别：清单按“数据 + 模板 + 配置”的指纹判断文档是否过期，
+运行结束时才统一保存；日志只记“这个任务做完没有”，每个任务做完就写，专门应对中途崩溃。
+"""
+import json
+import os
+import time
+
+JOURNAL_NAME = '.docfill_journal.jsonl'
+
+
+def _key(template_path, station):
+    return os.path.abspath(template_path), str(station).strip()
+
+
+class RunJournal:
+    """OUTPUT_FOLDER 里的运行日志"""
+
+    def __init__(self, output_folder, resume=False):
+        """
+        :param output_folder: 输出文件夹（日志文件也放在这里）
+        :param resume: 是否接着上一次的日志续跑（False 时清空日志重新记）
+        """
+        self.path = os.path.join(output_folder, JOURNAL_NAME)
+        self._last = self._load() if resume else {}  # {(模板, 桩号): 上一次的最后一条记录}
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+        self.skipped = 0  # 上次已完成、本次跳过的任务数
+        self.retried = 0  # 上次失败、本次重新生成的任务数
+        self.failed = []  # 本次失败的 [(桩号, 原因)]
+
+    def _load(self):
+        """读取日志（同一任务以最后一条为准；写了一半的行直接忽略）"""
+        last = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        last[_key(entry['template'], entry['station'])] = entry
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        except OSError:
+            pass
+        return last
+
+    def is_done(self, template_path, station, output_path):
+        """上一次是否已成功生成，且输出文件还在"""
+        entry = self._last.get(_key(template_path, station))
+        return entry is not None and entry.get('status') == 'ok' and os.path.exists(output_path)
+
+    def select(self, jobs, output_path_func):
+        """
+        跳过上一次已完成的任务（按需逐个筛，任务清单可以是边读边产出的生成器）
+        :param jobs: 可迭代的 [(模板路径, 桩号, 单行数据字典)]
+        :param output_path_func: 桩号 → 输出文件路径
+        """
+        for job in jobs:
+            template_path, station = job[0], job[1]
+            if self.is_done(template_path, station, output_path_func(station)):
+                self.skipped += 1
+                continue
+            entry = self._last.get(_key(template_path, station))
+            if entry is not None and entry.get('status') == 'failed':
+                self.retried += 1
+            yield job
+
+    def record(self, template_path, station, output_path, error=None):
+        """
+        记下一个任务的结果（立即落盘）
+        :param error: 失败原因；None 表示成功
+        """
+        entry = {
+            'template': os.path.abspath(template_path),
+            'station': str(station).strip(),
+            'output': os.path.abspath(output_path) if output_path else None,
+            'status': 'ok' if error is None else 'failed',
+            'error': error,
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+        if error is not None:
+            self.failed.append((entry['station'], error))
+
+    def update(self, job, error, output_path):
+        """
+        记下一个任务的结果
+        :param job: (模板路径, 桩号, 单行数据字典)
+        :param error: 任务的失败原因（None 表示成功，见 docfill.parallel.run_job）
+        :param output_path: 任务的输出文件路径
+        """
+        self.record(job[0], job[1], output_path, error)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+增量生成清单：只重新生成“内容变了”或“文件不见了”的文档
+
+每生成一份文档，就在 OUTPUT_FOLDER 里的清单文件中记下它的“指纹”：
+    该桩号格式化后的整行数据 + 模板文件内容 + 影响生成结果的配置项 + 生成代码（脚本和 docfill 公共模块）
+改了格式化或渲染代码（包括升级脚本）后，旧记录全部失效，所有文档重新生成一次。
+下次运行时指纹相同、输出文件也原封未动（大小和修改时间与记录一致）的文档直接跳过。
+改了 Excel 里两个格子，重跑时就只重新生成这两个桩号。
+
+注意：多个模板输出同名文件时，文件内容取决于最后一个模板，这类任务每次都会重新生成。
+"""
+import glob
+import hashlib
+import json
+import os
+
+MANIFEST_NAME = '.docfill_manifest.json'
+MANIFEST_VERSION = 1
+
+# 影响生成结果的配置项（脚本里没有的项自动忽略）
+CONFIG_KEYS = (
+    'TABLE_CELL_MAP', 'PLACEHOLDER_MAP', 'KEYWORD_APPEND_MAP', 'DATE_FORMAT_MAP', 'UNIT_MAP',
+    'OPTIMIZE_DECIMAL_COLUMNS', 'FONT_NAME', 'FONT_SIZE', 'CELL_ALIGNMENT',
+)
+
+
+def _digest(*parts):
+    """把若干可 JSON 化（或可转成文本）的部分合成一个 sha256 指纹"""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def config_digest(config):
+    """配置指纹：只看影响生成结果的配置项"""
+    return _digest({key: getattr(config, key) for key in CONFIG_KEYS if hasattr(config, key)})
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """文件内容指纹"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def code_digest(script_file=None):
+    """
+    生成代码指纹：docfill 公共模块 + 脚本本身（格式化函数写在脚本里）
+    :param script_file: 脚本文件路径；None 时只看公共模块
+    """
+    files = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*.py')))
+    if script_file:
+        files.append(os.path.abspath(script_file))
+    return _digest([file_digest(path) for path in files])
+
+
+def _file_state(path):
+    """输出文件当前的（大小, 修改时间），文件不存在时为 None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class BuildManifest:
+    """OUTPUT_FOLDER 里的增量生成清单"""
+
+    def __init__(self, output_folder, config, script_file=None):
+        """
+        :param output_folder: 输出文件夹（清单文件也放在这里）
+        :param config: 配置类实例（用于计算配置指纹）
+        :param script_file: 生成文档的脚本文件（用于计算代码指纹）
+        """
+        self.path = os.path.join(output_folder, MANIFEST_NAME)
+        self._config_digest = _digest(config_digest(config), code_digest(script_file))
+        self._template_digests = {}  # {(模板路径, 修改时间, 大小): 模板内容指纹}
+        self._entries = self._load()  # {输出文件名: {'hash': 指纹, 'file': [大小, 修改时间]}}
+        self._pending = {}  # {(模板路径, 桩号): (输出文件路径, 指纹)}：已交出、还没更新的任务
+        self.skipped = 0
+        self.rendered = 0
+
+    def _load(self):
+        """读取清单；文件不存在、损坏或版本不符时当作空清单"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get('version') != MANIFEST_VERSION:
+            return {}
+        return data.get('entries', {})
+
+    def _template_digest(self, template_path):
+        """模板指纹（同一个模板文件只读一次）"""
+        path = os.path.abspath(template_path)
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        if key not in self._template_digests:
+            self._template_digests[key] = file_digest(path)
+        return self._template_digests[key]
+
+    def job_digest(self, template_path, data_row):
+        """
+        一个（模板, 桩号）任务的指纹
+        :param template_path: Word 模板路径
+        :param data_row: 单行数据字典（格式化后的文本）
+        """
+        row = sorted((str(k), v) for k, v in data_row.items())
+        return _digest(self._config_digest, self._template_digest(template_path), row)
+
+    def is_current(self, output_path, digest):
+        """输出文件是否已是最新：指纹一致，且文件还在、没被改动过"""
+        entry = self._entries.get(os.path.basename(output_path))
+        return (entry is not None and entry.get('hash') == digest
+                and entry.get('file') == _file_state(output_path))
+
+    def record(self, output_path, digest):
+        """记录一份刚生成好的文档"""
+        state = _file_state(output_path)
+        if state is not None:
+            self._entries[os.path.basename(output_path)] = {'hash': digest, 'file': state}
+
+    def select(self, jobs, output_path_func):
+        """
+        筛出需要重新生成的任务（按需逐个筛，任务清单可以是边读边产出的生成器）
+        :param jobs: 可迭代的 [(模板路径, 桩号, 单行数据字典)]
+        :param output_path_func: 桩号 → 输出文件路径
+        :return: 需要生成的任务（生成器）；每个任务的输出路径和指纹暂存起来，等 update 时取用
+        """
+        for job in jobs:
+            template_path, station, data_row = job
+            output_path = output_path_func(station)
+            digest = self.job_digest(template_path, data_row)
+            if self.is_current(output_path, digest):
+                self.skipped += 1
+                continue
+            self._pending[(template_path, station)] = (output_path, digest)
+            yield job
+
+    def update(self, job, error):
+        """
+        根据任务结果更新记录：失败的任务删除记录，成功的记下新指纹
+        :param job: select 交出的任务
+        :param error: 任务的失败原因（None 表示成功，见 docfill.parallel.run_job）
+        """
+        output_path, digest = self._pending.pop((job[0], job[1]))
+        if error is not None:
+            self.forget(output_path)
+        else:
+            self.rendered += 1
+            self.record(output_path, digest)
+
+    def forget(self, output_path):
+        """删除一份文档的记录（生成失败时调用，下次一定重新生成）"""
+        self._entries.pop(os.path.basename(output_path), None)
+
+    def save(self):
+        """写回清单（先写临时文件再替换，中途退出也不会留下半个清单）"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'entries': self._entries}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+打包输出：生成的文档直接写进一个 zip 压缩包，输出文件夹里不再出现成千上万个小文件
+
+项目文件夹放在 OneDrive 等同步盘里时，每写一个 .docx 就触发一次同步，
+几千个小文件能把同步客户端拖得很慢。打包模式下每份文档渲染完直接以字节写进压缩包，
+中途不落地任何单个文件，整次运行只产生一个文件：
+    压缩包/模板名/桩号.docx
+压缩包先写成“文件名.part”，运行结束（包括中途出错）时关闭并改回正式文件名，
+同步客户端只会看到一个写完的文件。
+
+多进程模式下子进程不碰压缩包：文档字节随任务结果交回主进程（PackageBuffer），
+由主进程按任务顺序写入。
+
+逐个生成文件时同样不直接写目标文件：save_document 先写“文件名.part”再改名，
+进程中途被终止也不会在输出文件夹里留下半个 .docx。
+
+docx 本身已经是压缩过的 zip，再压缩一遍收益有限：
+压缩级别 0 只打包不压缩（最快），1~9 数字越大包越小、越慢。
+"""
+import io
+import os
+import zipfile
+
+
+def entry_name(template_path, filename):
+    """压缩包内路径：模板名/文件名"""
+    stem = os.path.splitext(os.path.basename(template_path))[0]
+    return f"{stem}/{filename}"
+
+
+def document_bytes(document):
+    """文档 → docx 文件内容（已经是字节的原样返回）"""
+    if isinstance(document, bytes):
+        return document
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def save_document(document, path):
+    """
+    原子保存一份文档：先写临时文件，写完再改名为正式文件名
+    :param document: Word 文档对象（有 save 方法），或 docx 文件内容（bytes）
+    :param path: 输出路径
+    """
+    part = f"{path}.part"
+    try:
+        if isinstance(document, bytes):
+            with open(part, 'wb') as f:
+                f.write(document)
+        else:
+            document.save(part)
+        os.replace(part, path)
+    except BaseException:
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+
+
+class ZipPackage:
+    """输出压缩包（主进程持有，逐份写入）"""
+
+    def __init__(self, path, level=6):
+        """
+        :param path: 压缩包路径
+        :param level: 压缩级别：0 只打包不压缩，1~9 为 deflate 压缩级别
+        """
+        self.path = os.path.abspath(path)
+        self._part = self.path + '.part'
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        level = max(0, min(int(level or 0), 9))
+        self._zip = zipfile.ZipFile(self._part, 'w', allowZip64=True,
+                                    compression=zipfile.ZIP_DEFLATED if level else zipfile.ZIP_STORED,
+                                    compresslevel=level or None)
+        self._names = set()
+        self.count = 0
+
+    def add(self, name, data):
+        """写入一份文档（压缩包里不允许同名）"""
+        if name in self._names:
+            raise ValueError(f"压缩包里已有同名文件：{name}")
+        self._zip.writestr(name, data)
+        self._names.add(name)
+        self.count += 1
+
+    def add_entries(self, entries):
+        """写入子进程交回的 [(包内路径, 内容)]"""
+        for name, data in entries or ():
+            self.add(name, data)
+
+    def close(self):
+        """写完目录并改回正式文件名"""
+        if self._zip is None:
+            return
+        self._zip.close()
+        self._zip = None
+        os.replace(self._part, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PackageBuffer:
+    """子进程用：文档先攒在内存里，随任务结果交回主进程写进压缩包"""
+
+    def __init__(self):
+        self.entries = []
+
+    def add(self, name, data):
+        self.entries.append((name, data))
+
+    def pop(self):
+        """取走攒下的文档"""
+        entries, self.entries = self.entries, []
+        return entries
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+多进程并行生成：把（模板, 桩号）任务分发到进程池
+
+每个子进程按脚本路径重新加载脚本、用同一份配置创建自己的 WordFiller，
+模板缓存 / 渲染计划在子进程里各自保持热状态。
+任务结果按任务顺序依次返回给主进程：(控制台输出, 失败原因)，失败原因为 None 表示成功。
+控制台输出（即原来打印的 ✅/❌ 文字）只用于显示，成功与否以 process_single_station 的返回值为准。
+单个任务失败只影响它自己；子进程意外退出时，剩余任务统一记为失败。
+子进程里的分阶段计时记录随结果一起交回，并入主进程填充器的计时器；
+打包输出模式下子进程生成的文档字节也随结果交回，由主进程按任务顺序写进压缩包。
+
+任务清单是边读边产出的生成器时（流式读取 Excel）用 stream_jobs：
+进程池里最多同时挂着 workers × 4 个任务，任务清单不会被一次性展开。
+"""
+import contextlib
+import io
+import os
+from collections import deque
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from docfill.scripts import load_script
+
+_worker_filler = None  # 子进程内的 WordFiller 实例
+
+
+def config_values(config):
+    """提取配置实例上的全部配置项（大写属性），用于传给子进程"""
+    return {name: getattr(config, name) for name in dir(config) if name.isupper()}
+
+
+def _init_worker(script_file, values):
+    """子进程初始化：加载脚本、还原配置、创建填充器"""
+    global _worker_filler
+    module = load_script(script_file)
+    config = module.Config()
+    for name, value in values.items():
+        setattr(config, name, value)
+    config.WORKERS = 1  # 子进程内部不再开进程池
+    with contextlib.redirect_stdout(io.StringIO()):
+        _worker_filler = module.WordFiller(config)
+
+
+def _run_job(job):
+    """子进程执行单个任务，返回（(控制台输出, 失败原因), 分阶段计时记录, 待写进压缩包的文档）"""
+    result = run_job(_worker_filler, job)
+    timer = getattr(_worker_filler, 'timer', None)
+    package = getattr(_worker_filler, 'package', None)
+    return (result, timer.pop_records() if timer is not None else None,
+            package.pop() if package is not None else None)
+
+
+def _collect(filler, result):
+    """主进程收下子进程的结果：计时记录并入计时器、文档写进压缩包，返回 (控制台输出, 失败原因)"""
+    (output, error), records, entries = result
+    timer = getattr(filler, 'timer', None)
+    if timer is not None:
+        timer.add_records(records)
+    if entries:
+        try:
+            filler.package.add_entries(entries)
+        except ValueError as e:
+            output += f"❌ 失败：{e}\n"
+            error = error or str(e)
+    return output, error
+
+
+def _broken(station, e):
+    """子进程意外退出时，没拿到结果的任务记为失败"""
+    error = f"子进程异常退出（{str(e)[:60]}）"
+    return f"❌ 失败[{str(station).strip()}]：{error}\n", error
+
+
+def call(func, *args):
+    """执行函数，返回（它打印到控制台的内容, 函数的返回值）"""
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        value = func(*args)
+    return buffer.getvalue(), value
+
+
+def capture(func, *args):
+    """执行函数并收集它打印到控制台的内容"""
+    return call(func, *args)[0]
+
+
+def run_job(filler, job):
+    """
+    在当前进程执行单个任务
+    :param filler: WordFiller
+    :param job: (模板路径, 桩号, 单行数据字典)
+    :return: (控制台输出, 失败原因)，失败原因为 None 表示成功
+    """
+    return call(filler.process_single_station, *job)
+
+
+def run_jobs(filler, jobs, workers, script_file):
+    """
+    按任务顺序逐个产出每个任务的 (控制台输出, 失败原因)
+    :param filler: 主进程的 WordFiller（单进程模式下直接使用）
+    :param jobs: [(模板路径, 桩号, 单行数据字典)]
+    :param workers: 进程数（<=1 表示在当前进程依次执行）
+    :param script_file: 脚本文件路径（子进程据此重新加载脚本）
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            yield run_job(filler, job)
+        return
+
+    workers = min(workers, len(jobs), os.cpu_count() or 1)
+    # 每个子进程一次领一批连续任务：同一模板的任务挨在一起，模板缓存命中率高
+    chunksize = max(1, len(jobs) // (workers * 4))
+    done = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(script_file, config_values(filler.config))) as pool:
+            for result in pool.map(_run_job, jobs, chunksize=chunksize):
+                done += 1
+                yield _collect(filler, result)
+    except BrokenProcessPool as e:
+        for _, station, _ in jobs[done:]:
+            yield _broken(station, e)
+
+
+def stream_jobs(filler, jobs, workers, script_file, window=4):
+    """
+    按任务顺序逐个产出（任务, (控制台输出, 失败原因)），任务清单按需读取
+    :param filler: 主进程的 WordFiller（单进程模式下直接使用）
+    :param jobs: 可迭代的 [(模板路径, 桩号, 单行数据字典)]（可以是生成器）
+    :param workers: 进程数（<=1 表示在当前进程依次执行）
+    :param script_file: 脚本文件路径（子进程据此重新加载脚本）
+    :param window: 每个进程最多排队几个任务（决定同时在内存里的任务数）
+    """
+    if workers <= 1:
+        for job in jobs:
+            yield job, run_job(filler, job)
+        return
+
+    workers = min(workers, os.cpu_count() or 1)
+    jobs = iter(jobs)
+    queue = deque()  # [(任务, future)]，按提交顺序排列
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(script_file, config_values(filler.config))) as pool:
+            for job in jobs:
+                queue.append((job, pool.submit(_run_job, job)))
+                if len(queue) >= workers * window:
+                    job, future = queue.popleft()
+                    yield job, _collect(filler, future.result())
+            while queue:
+                job, future = queue.popleft()
+                yield job, _collect(filler, future.result())
+    except BrokenProcessPool as e:
+        for job in chain((job for job, _ in queue), jobs):
+            yield job, _broken(job[1], e)
@@ -0,0 +1,389 @@
+# -*- coding: utf-8 -*-
+"""
+预检：不渲染、不写任何文档，一次性查出整批任务会遇到的问题，并列出完整任务清单
+
+原来这些问题要等渲染到一半才一个个冒出来（“⏩ 跳过”一行行刷屏，word03 里干脆默默 continue），
+几千份文档跑了几分钟才发现坐标写错了一格。预检只读 Excel 和模板，按各脚本的规则把
+（模板, 主键）任务全部排出来，连同预期的输出位置，再对照：
+    - 模板第一个表格的网格：TABLE_CELL_MAP / COLUMN_MAP 的坐标是否越界、是否两项落在同一个合并格子里
+    - Excel 的表头：主键列、各填充规则引用的列是否存在；工作表是否存在
+    - 主键：空值、重复值（按 DUPLICATE_KEY_POLICY 说明会用哪一行）、名单 / 行号模式里对不上的桩号
+    - 输出：文件名含非法字符或为空、多个任务写到同一个文件（含只差大小写，Windows / macOS 上是同一个文件）
+    - word01：没有模板的桩号、超过 MAX_ROWS_TO_FILL 的桩号（多出的行不会填）、没有数据的模板
+    - tongyong：模板里用到、Excel 里却没有的变量（渲染出来是空白）
+
+用法（在 word 目录下）：
+    python -m docfill plan -c word02.json                 # 打印问题和任务清单前 20 个
+    python -m docfill plan word01 --jobs 任务清单.csv       # 完整任务清单导出为 CSV
+    python -m docfill run -c word03.json --preflight       # 先预检，没有错误才开始生成
+
+错误（❌）会导致文档缺内容、被覆盖或生成失败；提醒（⚠️）是按规则会被跳过、截断或忽略的数据。
+"""
+import csv
+import os
+from collections import defaultdict
+
+import pandas as pd
+from docx import Document
+
+from docfill.excel_source import ExcelSource, fill_columns
+from docfill.group_index import GroupIndex, duplicate_summary, last_positions
+from docfill.packaging import entry_name
+from docfill.settings import input_templates
+from docfill.tables import CellGrid, walk_paragraphs
+
+INVALID_FILENAME_CHARS = '<>:"/\\|?*'  # Windows 文件名不能包含的字符（/ 在哪里都会变成子文件夹）
+PREVIEW = 10  # 每类问题最多列出多少个例子
+
+
+def _preview(items, limit=PREVIEW):
+    """列出前几个例子：a、b、c 等N个"""
+    items = [str(item) for item in items]
+    more = f" 等{len(items)}个" if len(items) > limit else ""
+    return '、'.join(items[:limit]) + more
+
+
+def _bad_filename(name):
+    """文件名（不含扩展名）有问题时返回原因，否则返回 None"""
+    if not name:
+        return '文件名为空'
+    bad = sorted({char for char in name if char in INVALID_FILENAME_CHARS or char < ' '})
+    if bad:
+        return f"含非法字符 {''.join(bad)!r}"
+    return None
+
+
+class Preflight:
+    """一次预检的结果：任务清单 + 错误 / 提醒"""
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.jobs = []  # [(模板 / 输入, 主键, 输出位置)]
+        self.errors = []
+        self.warnings = []
+        self.summary = []  # 概况（数据行数、模板数等）
+
+    def add_job(self, template, key, output):
+        self.jobs.append((template, key, output))
+
+    def check_outputs(self):
+        """输出重名：多个任务写到同一个文件（只差大小写也算，Windows / macOS 上是同一个文件）"""
+        targets = defaultdict(list)
+        for template, key, output in self.jobs:
+            targets[os.path.normpath(output).lower()].append((template, key, output))
+        clashes = [jobs for jobs in targets.values() if len(jobs) > 1]
+        if clashes:
+            examples = [f"{os.path.basename(jobs[0][2])}（{'、'.join(str(key) for _, key, _ in jobs)}）" for jobs in clashes]
+            self.errors.append(f"{len(clashes)} 个输出文件重名，后生成的会覆盖先生成的：{_preview(examples)}")
+        bad = [(key, reason) for key, reason in ((key, _bad_filename(str(key).strip())) for _, key, _ in self.jobs)
+               if reason]
+        if bad:
+            self.errors.append(f"{len(bad)} 个任务的文件名有问题，保存会失败或存到别处："
+                               f"{_preview(f'{key!r}（{reason}）' for key, reason in bad)}")
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def report(self, show=20):
+        """
+        打印预检结果
+        :param show: 任务清单在屏幕上最多列出多少个（完整清单用 write_jobs 导出）
+        """
+        print(f"🧭 预检：{self.pipeline}")
+        for line in self.summary:
+            print(f"   {line}")
+        print(f"📋 任务清单：共 {len(self.jobs)} 个" + (f"（前 {show} 个）" if len(self.jobs) > show else ""))
+        for template, key, output in self.jobs[:show]:
+            print(f"   {os.path.basename(str(template))} | {key} → {output}")
+        for message in self.warnings:
+            print(f"⚠️ {message}")
+        for message in self.errors:
+            print(f"❌ {message}")
+        if self.errors:
+            print(f"❌ 预检发现 {len(self.errors)} 类问题，还没有生成任何文档，请修改后再运行")
+        else:
+            print(f"✅ 预检通过：{len(self.jobs)} 个任务" + (f"，{len(self.warnings)} 条提醒" if self.warnings else ""))
+
+    def write_jobs(self, path):
+        """完整任务清单写成 CSV（UTF-8 带 BOM，Excel 可直接打开）"""
+        with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(['模板', '主键', '输出位置'])
+            for template, key, output in self.jobs:
+                writer.writerow([template, key, output])
+
+
+# -------------------------- 模板 --------------------------
+def _open_template(result, path):
+    """打开模板（只读）；打不开时记一条错误并返回 None"""
+    try:
+        return Document(path)
+    except Exception as e:
+        result.errors.append(f"模板打不开：{os.path.basename(path)}（{e}）")
+        return None
+
+
+def _check_cell_map(result, name, doc, cell_map):
+    """TABLE_CELL_MAP 对照模板第一个表格的网格：越界、两项落在同一个格子"""
+    if not cell_map:
+        return
+    if not doc.tables:
+        result.errors.append(f"{name} 里没有表格，TABLE_CELL_MAP 的 {len(cell_map)} 项都不会填")
+        return
+    grid = CellGrid(doc.tables[0])
+    located, out_of_bounds = grid.check(cell_map)
+    if out_of_bounds:
+        shown = _preview(f"{col}→({row}, {column})" for col, row, column in out_of_bounds)
+        result.errors.append(f"{name} 的表格只有 {grid.row_count} 行 {grid.col_count} 列，"
+                             f"{len(out_of_bounds)} 个坐标越界，所有桩号都不会填：{shown}")
+    cells = defaultdict(list)
+    for col, slot in located.items():
+        cells[slot].append(col)
+    shared = ['+'.join(cols) for cols in cells.values() if len(cols) > 1]
+    if shared:
+        result.warnings.append(f"{name} 里这些列落在同一个（合并）格子，后填的会覆盖先填的：{_preview(shared)}")
+
+
+def _check_markers(result, name, doc, markers, label):
+    """占位符 / 关键字在模板里找不到（按段落文字查找，与脚本的匹配方式一致）"""
+    if not markers:
+        return
+    texts = [para.text for para in walk_paragraphs(doc)]
+    missing = [marker for marker in markers if not any(marker in text for text in texts)]
+    if missing:
+        result.warnings.append(f"{name} 里找不到这些{label}，对应的数据不会出现在文档里：{_preview(missing)}")
+
+
+# -------------------------- 主键 --------------------------
+def _check_keys(result, index, policy=None):
+    """空主键、重复主键（policy 为 None 时一个主键本来就对应多行，不查重复）"""
+    if index.missing_count:
+        result.warnings.append(f"{index.missing_count} 行没有填 [{index.key}]，不会生成")
+    blank = [key for key in index.keys if str(key).strip() == '']
+    if blank:
+        result.warnings.append(f"{len(blank)} 个 [{index.key}] 只有空格，不会生成")
+    if policy and index.duplicates:
+        shown = _preview(f"{key}×{count}" for key, count in index.duplicates.items())
+        if policy == 'error':
+            result.errors.append(f"[{index.key}] 有 {len(index.duplicates)} 个重复值（DUPLICATE_KEY_POLICY = 'error'，"
+                                 f"运行时会直接报错）：{shown}")
+        else:
+            which = '第一行' if policy == 'first' else '最后一行'
+            result.warnings.append(f"[{index.key}] 有 {len(index.duplicates)} 个重复值，只按{which}生成，"
+                                   f"其余行被忽略：{shown}")
+
+
+def _read_sheet(result, path, sheet_name, columns, cache):
+    """按脚本的方式读取工作表；工作表不存在时记一条错误并返回 (None, None)"""
+    source = ExcelSource(path, cache=cache)
+    try:
+        sheets = source.sheet_names
+        if sheet_name is None:
+            sheet_name = sheets[0]
+        if isinstance(sheet_name, str) and sheet_name not in sheets:
+            result.errors.append(f"Excel 里没有工作表 {sheet_name!r}，现有：{sheets}")
+            return None, None
+        return source.read(sheet_name, columns)
+    finally:
+        source.close()
+
+
+# -------------------------- 各流水线 --------------------------
+def _plan_filler(result, config):
+    """word02 / word03：（模板, 桩号）任务、坐标网格、列、主键"""
+    df, header = _read_sheet(result, config.EXCEL_FILE, config.SHEET_NAME, fill_columns(config), config.EXCEL_CACHE)
+    if df is None:
+        return
+    keyword_map = getattr(config, 'KEYWORD_APPEND_MAP', {})
+    if config.PRIMARY_KEY not in df.columns:
+        result.errors.append(f"Excel 里没有主键列 [{config.PRIMARY_KEY}]，现有列：{header}")
+        return
+    for label, columns in (('TABLE_CELL_MAP', list(config.TABLE_CELL_MAP)),
+                           ('PLACEHOLDER_MAP', list(config.PLACEHOLDER_MAP.values())),
+                           ('KEYWORD_APPEND_MAP', list(keyword_map.values()))):
+        missing = [col for col in dict.fromkeys(columns) if col not in df.columns]
+        if missing:
+            result.errors.append(f"{label} 引用的列在 Excel 里不存在，所有文档这几项都是空的：{_preview(missing)}")
+
+    # word03 的行号模式 / 名单模式（与 WordFiller 的拦截器一致）
+    row_range = getattr(config, 'TARGET_ROW_RANGE', None)
+    if row_range and len(row_range) == 2:
+        start, end = max(0, row_range[0] - 2), row_range[1] - 1
+        if start >= len(df):
+            result.warnings.append(f"TARGET_ROW_RANGE 从 Excel 第 {row_range[0]} 行开始，但数据只到第 {len(df) + 1} 行")
+        df = df.iloc[start:end]
+    index = GroupIndex(df, config.PRIMARY_KEY, config.DUPLICATE_KEY_POLICY)
+    _check_keys(result, index, config.DUPLICATE_KEY_POLICY)
+    stations = [key for key in index.keys if str(key).strip() != '']
+    targets = getattr(config, 'TARGET_STATIONS', None)
+    if targets:
+        absent = [station for station in targets if station not in index]
+        if absent:
+            result.warnings.append(f"TARGET_STATIONS 里有 {len(absent)} 个桩号在 Excel 里找不到：{_preview(absent)}")
+        stations = [station for station in stations if station in targets]
+
+    templates = input_templates(result.pipeline, {'WORD_TEMPLATE': config.WORD_TEMPLATE,
+                                                  'WORD_TEMPLATE_FOLDER': config.WORD_TEMPLATE_FOLDER})
+    for template in templates:
+        doc = _open_template(result, template)
+        if doc is None:
+            continue
+        name = os.path.basename(template)
+        _check_cell_map(result, name, doc, config.TABLE_CELL_MAP)
+        _check_markers(result, name, doc, list(config.PLACEHOLDER_MAP), '占位符')
+        _check_markers(result, name, doc, list(keyword_map), '关键字')
+
+    # 输出位置（与 WordFiller._output_path / 打包模式的包内路径一致）
+    for template in templates:
+        for station in stations:
+            filename = f"{str(station).strip()}{config.OUTPUT_FILE_SUFFIX}.docx"
+            if config.OUTPUT_ZIP:
+                output = os.path.join(config.OUTPUT_FOLDER, config.OUTPUT_ZIP, entry_name(template, filename))
+            else:
+                output = os.path.join(config.OUTPUT_FOLDER, filename)
+            result.add_job(template, station, os.path.abspath(output))
+    if len(templates) > 1 and not config.OUTPUT_ZIP:
+        result.warnings.append(f"{len(templates)} 个模板输出到同一个文件夹，且文件名只按桩号命名")
+    result.summary.append(f"Excel：{len(df)} 行，{len(stations)} 个桩号；模板 {len(templates)} 个")
+
+
+def _plan_word01(result, module):
+    """word01：每个桩号一个模板，按桩号的多行数据逐行往下填"""
+    timer = module.StageTimer(False)
+    index = module.load_database(timer)  # 找不到文件 / 缺桩号列时脚本自己会说明原因
+    if index is None:
+        result.errors.append("Excel 读取失败（原因见上一行）")
+        return
+    missing = [col for col in module.COLUMN_MAP if col not in index.df.columns]
+    if missing:
+        result.errors.append(f"COLUMN_MAP 引用的列在 Excel 里不存在，所有桩号这几列都是空的：{_preview(missing)}")
+    _check_keys(result, index)
+
+    no_template, overflow, out_of_bounds, no_table = [], [], [], []
+    used = set()
+    for station in index.keys:
+        input_path, output_path = module.station_paths(station)
+        if not os.path.exists(input_path):
+            no_template.append(station)
+            continue
+        used.add(os.path.normcase(os.path.abspath(input_path)))
+        rows = len(index.positions(station))
+        if rows > module.MAX_ROWS_TO_FILL:
+            overflow.append(f"{station}({rows}行)")
+        doc = _open_template(result, input_path)
+        if doc is None:
+            continue
+        if not doc.tables:
+            no_table.append(station)
+            continue
+        grid = CellGrid(doc.tables[0])
+        cell_map = {
+            (i, col): (module.START_ROW_INDEX + i, word_idx)
+            for i in range(min(rows, module.MAX_ROWS_TO_FILL)) for col, word_idx in module.COLUMN_MAP.items()
+        }
+        outside = grid.check(cell_map)[1]
+        if outside:
+            out_of_bounds.append(f"{station}（表格 {grid.row_count} 行 {grid.col_count} 列，{len(outside)} 格）")
+        result.add_job(input_path, station, os.path.abspath(output_path))
+
+    if no_template:
+        result.errors.append(f"{len(no_template)} 个桩号在 {module.INPUT_WORD_FOLDER} 里没有模板，不会生成："
+                             f"{_preview(no_template)}")
+    if no_table:
+        result.errors.append(f"{len(no_table)} 个模板里没有表格，会生成失败：{_preview(no_table)}")
+    if out_of_bounds:
+        result.errors.append(f"{len(out_of_bounds)} 个桩号要填的格子超出表格（从第 {module.START_ROW_INDEX + 1} 行开始），"
+                             f"超出的不会填：{_preview(out_of_bounds)}")
+    if overflow:
+        result.warnings.append(f"{len(overflow)} 个桩号超过 MAX_ROWS_TO_FILL = {module.MAX_ROWS_TO_FILL} 行，"
+                               f"多出的行不会填：{_preview(overflow)}")
+    folder = module.INPUT_WORD_FOLDER
+    unused = [os.path.basename(path) for path in input_templates('word01', {'INPUT_WORD_FOLDER': folder})
+              if os.path.normcase(os.path.abspath(path)) not in used] if os.path.isdir(folder) else []
+    if unused:
+        result.warnings.append(f"{len(unused)} 个模板在 Excel 里没有对应桩号，不会生成：{_preview(unused)}")
+    result.summary.append(f"Excel：{len(index.df)} 行，{len(index.keys)} 个桩号；模板文件夹：{os.path.abspath(folder)}")
+
+
+def _plan_tongyong(result, module):
+    """tongyong：每行一份文档，文件名取 FILENAME_COLUMN"""
+    df, header = _read_sheet(result, module.EXCEL_PATH, module.SHEET_NAME, None, module.EXCEL_CACHE)
+    if df is None:
+        return
+    if module.FILENAME_COLUMN not in df.columns:
+        result.errors.append(f"Excel 里没有文件名列 [{module.FILENAME_COLUMN}]，现有列：{header}")
+        return
+
+    from docxtpl import DocxTemplate
+
+    try:
+        variables = DocxTemplate(module.TEMPLATE_PATH).get_undeclared_template_variables()
+    except Exception as e:
+        result.errors.append(f"模板解析失败：{e}")
+        variables = set()
+    missing = sorted(name for name in variables if name not in df.columns)
+    if missing:
+        result.warnings.append(f"模板里用到、Excel 里没有的变量（渲染出来是空白）：{_preview(missing)}")
+
+    output_dir = os.path.join(os.path.dirname(os.path.abspath(module.EXCEL_PATH)), module.OUTPUT_DIR)
+    # 与 main() 一致：文件名列为空时 process_data 返回空字符串；同名的按最后一行生成
+    fnames = [module.clean_filename(module.process_data(module.FILENAME_COLUMN, value))
+              for value in df[module.FILENAME_COLUMN]]
+    last, duplicates = last_positions(fnames)
+    if duplicates:
+        result.warnings.append(f"[{module.FILENAME_COLUMN}]存在重复值，只按最后一行生成：{duplicate_summary(duplicates)}")
+    for fname in last:
+        if module.OUTPUT_ZIP:
+            output = os.path.join(output_dir, module.OUTPUT_ZIP, entry_name(module.TEMPLATE_PATH, f"{fname}.docx"))
+        else:
+            output = os.path.join(output_dir, f"{fname}.docx")
+        result.add_job(module.TEMPLATE_PATH, fname, output)
+    result.summary.append(f"Excel：{len(df)} 行，模板变量 {len(variables)} 个")
+
+
+def _plan_rebar(result, module):
+    """钢筋合并器：每个工作簿的工作表是否带齐核心列、per_file 模式下输出是否重名"""
+    paths = module.find_workbooks(module.INPUT_PATH)
+    usable = 0
+    for path in paths:
+        try:
+            sheets = pd.read_excel(path, sheet_name=None, nrows=0)
+        except Exception as e:
+            result.errors.append(f"工作簿打不开：{os.path.basename(path)}（{e}）")
+            continue
+        for sheet_name, sheet in sheets.items():
+            columns = [c.strip() if isinstance(c, str) else c for c in sheet.columns]
+            missing = [c for c in module.CORE_COLUMNS if c not in columns]
+            if missing:
+                result.warnings.append(f"{os.path.basename(path)} [{sheet_name}] 缺少列 {missing}，会被跳过")
+            else:
+                usable += 1
+        if module.OUTPUT_MODE == 'per_file':
+            result.add_job(path, os.path.basename(path), os.path.abspath(module.per_file_output(path)))
+    if module.OUTPUT_MODE != 'per_file':
+        result.add_job(module.INPUT_PATH, f"{len(paths)} 个工作簿", os.path.abspath(module.OUTPUT_PATH))
+    if paths and not usable:
+        result.errors.append(f"没有一个工作表带齐 {module.CORE_COLUMNS}，不会有任何结果")
+    result.summary.append(f"工作簿 {len(paths)} 个，可处理的工作表 {usable} 个")
+
+
+def plan(pipeline, module, target):
+    """
+    预检一条流水线（只读 Excel 和模板，不渲染、不写文件）
+    :param pipeline: 流水线名称
+    :param module: 已加载并套用配置的脚本模块
+    :param target: 配置对象（word02 / word03 为 Config 实例，其余为模块本身）
+    :return: Preflight
+    """
+    result = Preflight(pipeline)
+    if pipeline in ('word02', 'word03'):
+        _plan_filler(result, target)
+    elif pipeline == 'word01':
+        _plan_word01(result, module)
+    elif pipeline == 'tongyong':
+        _plan_tongyong(result, module)
+    else:
+        _plan_rebar(result, module)
+    result.check_outputs()
+    return result
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+分阶段计时与性能剖析：看清时间花在了哪一步、哪个模板上
+
+StageTimer 记录每个（模板, 桩号）任务各阶段的耗时：
+    Excel读取 → 格式化 → 模板打开 → 占位符替换 → 关键字追加 → 表格填充 → 计划渲染 → 保存
+（Excel读取、整列格式化属于整次运行，不算在单个桩号头上）
+运行结束时打印汇总表（按阶段、按模板），并在输出文件夹写出 docfill_timing.json / docfill_timing.csv。
+
+阶段可以嵌套（例如渲染计划首次编译时会走一遍普通填充流程），只有最外层的阶段计时，
+各阶段之和不会超过实际耗时。
+
+剖析器（PROFILER = 'cprofile' / 'pyinstrument'）按模板分别剖析每个桩号的生成过程，
+结果写到输出文件夹（docfill_profile_模板名.prof / .html），并打印每个模板最耗时的函数。
+多进程模式下桩号在子进程里生成，剖析器不生效（计时照常汇总）。
+"""
+import csv
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+
+STAGES = ('Excel读取', '格式化', '模板打开', '占位符替换', '关键字追加', '表格填充', '计划渲染', '保存')
+REPORT_NAME = 'docfill_timing'
+PROFILE_NAME = 'docfill_profile'
+TOP_TEMPLATES = 10  # 汇总表里最多列出几个模板
+
+
+class StageTimer:
+    """分阶段计时器（每个 WordFiller 一个）"""
+
+    def __init__(self, enabled=True, profiler=''):
+        """
+        :param enabled: 是否计时（False 时所有方法都是空操作）
+        :param profiler: 剖析器：'' 不剖析 / 'cprofile' / 'pyinstrument'
+        """
+        self.enabled = enabled
+        self.profiler = (profiler or '').lower()
+        if self.profiler not in ('', 'cprofile', 'pyinstrument'):
+            raise ValueError(f"不支持的剖析器：{profiler}（可选 'cprofile' / 'pyinstrument'）")
+        if self.profiler == 'pyinstrument':
+            import pyinstrument  # noqa: F401  没装的话现在就报错，而不是跑到一半
+        self.run_stages = {}  # {阶段: 秒}：整次运行的阶段
+        self.records = []  # [{'template', 'station', 'status', 'stages': {阶段: 秒}, 'total': 秒}]
+        self._current = None  # 正在计时的桩号记录
+        self._active = False  # 是否已在某个阶段里（嵌套阶段不重复计时）
+        self._profilers = {}  # {模板路径: 剖析器}
+
+    # -------------------------- 计时 --------------------------
+    @contextmanager
+    def stage(self, name):
+        """计时一个阶段：在桩号任务里记到该桩号名下，否则记为整次运行的阶段"""
+        if not self.enabled or self._active:
+            yield
+            return
+        self._active = True
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._active = False
+            target = self._current['stages'] if self._current is not None else self.run_stages
+            target[name] = target.get(name, 0.0) + elapsed
+
+    def timed(self, name, iterable):
+        """逐个取出可迭代对象的元素，取的过程计入某个阶段（用于流式读取）"""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                item = next(iterator, StopIteration)
+            if item is StopIteration:
+                return
+            yield item
+
+    @contextmanager
+    def station(self, template_path, station):
+        """计时一个（模板, 桩号）任务；开启剖析器时顺便剖析"""
+        if not self.enabled:
+            yield
+            return
+        record = {'template': os.path.basename(template_path), 'station': str(station),
+                  'status': 'ok', 'stages': {}, 'total': 0.0}
+        self._current = record
+        profiler = self._profiler(template_path)
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.start() if self.profiler == 'pyinstrument' else profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.stop() if self.profiler == 'pyinstrument' else profiler.disable()
+            record['total'] = time.perf_counter() - start
+            self._current = None
+            self.records.append(record)
+
+    def mark_failed(self):
+        """把当前桩号标记为失败"""
+        if self._current is not None:
+            self._current['status'] = 'failed'
+
+    def pop_records(self):
+        """取走已完成的桩号记录（子进程把记录交回主进程时用）"""
+        records, self.records = self.records, []
+        return records
+
+    def add_records(self, records):
+        """并入子进程交回的桩号记录"""
+        if self.enabled and records:
+            self.records.extend(records)
+
+    def _profiler(self, template_path):
+        """某个模板的剖析器（每个模板一个，跨桩号累计）"""
+        if not self.profiler:
+            return None
+        if template_path not in self._profilers:
+            if self.profiler == 'pyinstrument':
+                from pyinstrument import Profiler
+                self._profilers[template_path] = Profiler()
+            else:
+                import cProfile
+                self._profilers[template_path] = cProfile.Profile()
+        return self._profilers[template_path]
+
+    # -------------------------- 汇总 --------------------------
+    def _stage_totals(self):
+        totals = {}
+        for record in self.records:
+            for name, seconds in record['stages'].items():
+                totals[name] = totals.get(name, 0.0) + seconds
+        return totals
+
+    def _template_totals(self):
+        """{模板名: {'count': 份数, 'total': 秒, 'stages': {阶段: 秒}}}"""
+        templates = {}
+        for record in self.records:
+            entry = templates.setdefault(record['template'], {'count': 0, 'total': 0.0, 'stages': {}})
+            entry['count'] += 1
+            entry['total'] += record['total']
+            for name, seconds in record['stages'].items():
+                entry['stages'][name] = entry['stages'].get(name, 0.0) + seconds
+        return templates
+
+    @staticmethod
+    def _ordered(stages):
+        """按固定阶段顺序排列（未知阶段排在后面）"""
+        return sorted(stages.items(), key=lambda item: (STAGES.index(item[0]) if item[0] in STAGES else len(STAGES),
+                                                        item[0]))
+
+    def summary(self):
+        """汇总表文本（按阶段、按模板）"""
+        if not self.enabled:
+            return ''
+        count = len(self.records)
+        station_totals = self._stage_totals()
+        rows = [(name, seconds, None) for name, seconds in self._ordered(self.run_stages)]
+        rows += [(name, seconds, seconds / count * 1000) for name, seconds in self._ordered(station_totals)]
+        station_time = sum(record['total'] for record in self.records)
+        other = station_time - sum(station_totals.values())
+        if count and other > 0:
+            rows.append(('其他', other, other / count * 1000))
+        overall = sum(self.run_stages.values()) + station_time
+
+        lines = [f"⏱️ 分阶段耗时（共 {count} 份文档）",
+                 f"  {'阶段':<8}{'总耗时(秒)':>12}{'每份(毫秒)':>12}{'占比':>8}"]
+        for name, seconds, per_doc in rows:
+            share = f"{seconds / overall * 100:.1f}%" if overall else '-'
+            per_doc = f"{per_doc:.1f}" if per_doc is not None else '-'
+            lines.append(f"  {name:<8}{seconds:>12.3f}{per_doc:>12}{share:>8}")
+
+        templates = self._template_totals()
+        if len(templates) > 1 or self._profilers:
+            ranked = sorted(templates.items(), key=lambda item: -item[1]['total'] / item[1]['count'])
+            lines.append("  按模板（每份最慢的在前）：" if len(ranked) <= TOP_TEMPLATES
+                         else f"  按模板（共 {len(ranked)} 个，列出每份最慢的 {TOP_TEMPLATES} 个）：")
+            for name, entry in ranked[:TOP_TEMPLATES]:
+                slowest = max(entry['stages'].items(), key=lambda item: item[1])[0] if entry['stages'] else '-'
+                lines.append(f"    {name}：{entry['count']} 份，每份 {entry['total'] / entry['count'] * 1000:.1f} 毫秒，"
+                             f"最慢阶段 {slowest}")
+        return '\n'.join(lines)
+
+    def write_report(self, folder):
+        """
+        在输出文件夹写出计时报告（JSON 含全部明细和汇总，CSV 每个桩号一行）
+        :return: [写出的文件路径]
+        """
+        if not self.enabled:
+            return []
+        base = os.path.join(folder, REPORT_NAME)
+        report = {
+            'run_stages': self.run_stages,
+            'stage_totals': self._stage_totals(),
+            'templates': self._template_totals(),
+            'stations': self.records,
+        }
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+
+        stages = [name for name in STAGES if any(name in r['stages'] for r in self.records)]
+        with open(base + '.csv', 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['模板', '桩号', '状态'] + [f"{name}(毫秒)" for name in stages] + ['合计(毫秒)'])
+            for r in self.records:
+                writer.writerow([r['template'], r['station'], r['status']]
+                                + [round(r['stages'].get(name, 0.0) * 1000, 3) for name in stages]
+                                + [round(r['total'] * 1000, 3)])
+        return [base + '.json', base + '.csv'] + self._write_profiles(folder)
+
+    def _write_profiles(self, folder, top=8):
+        """写出每个模板的剖析结果，并打印最耗时的函数"""
+        written = []
+        for template_path, profiler in self._profilers.items():
+            stem = re.sub(r'[\\/:*?"<>|]', '_', os.path.splitext(os.path.basename(template_path))[0])
+            print(f"\n🔬 性能剖析[{os.path.basename(template_path)}]：")
+            if self.profiler == 'pyinstrument':
+                path = os.path.join(folder, f"{PROFILE_NAME}_{stem}.html")
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(profiler.output_html())
+                print(profiler.output_text(unicode=True, color=False))
+            else:
+                import pstats
+                path = os.path.join(folder, f"{PROFILE_NAME}_{stem}.prof")
+                profiler.dump_stats(path)
+                pstats.Stats(profiler).sort_stats('cumulative').print_stats(top)
+            written.append(path)
+        return written
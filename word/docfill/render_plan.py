@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+渲染计划引擎：模板编译一次，之后每个桩号只做字符串拼接
+
+编译过程：
+    1. 从模板缓存克隆一份文档，用“哨兵文本”代替每一列的真实值，走一遍脚本原有的填充流程
+       （占位符替换、关键字追加、表格坐标填充、宋体10号样式全部照常执行）；
+    2. 把结果序列化，document.xml 在每个哨兵处切开，得到“固定片段 + 值插槽”的渲染计划；
+    3. 其余部件（样式、主题、图片、页眉页脚等）在编译时压缩好，之后原样拷贝，不再重复压缩。
+
+渲染时只需：格式化值 → XML 转义 → 拼接 document.xml → 压缩这一个部件 → 写出 zip。
+由于计划就是用原流程“录制”出来的，生成的各部件内容与 python-docx 流程逐字节一致。
+
+少数值会让原流程产生不同的 XML 结构（首尾空格、制表符/换行、空字符串、值里又含占位符等），
+遇到这种值时 render() 返回 None，由调用方退回到普通的 python-docx 流程。
+"""
+import io
+import os
+import re
+import struct
+import time
+import zipfile
+import zlib
+from collections import OrderedDict
+
+from docx.text.paragraph import Paragraph
+from docx.oxml.ns import qn
+
+# 哨兵：私有区字符包裹的列序号，不含空白，也不会出现在正常数据里
+_SENTINEL = '\ue000{}\ue001'
+_SENTINEL_RE = re.compile('\ue000(\\d+)\ue001')
+
+# 会改变 python-docx 生成结构的字符（制表符、换行、回车），以及 XML 不允许的控制字符
+_UNSAFE_CHARS_RE = re.compile('[\x00-\x1f\x7f]')
+
+
+def _xml_escape(text):
+    """与 lxml 序列化文本节点时一致的转义"""
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _dos_datetime(timestamp):
+    """zip 文件头使用的 DOS 日期时间"""
+    t = time.localtime(timestamp)
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dos_date = ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return dos_time, dos_date
+
+
+def _deflate(data):
+    """与 zipfile.ZIP_DEFLATED 默认级别一致的原始 deflate 压缩"""
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush()
+
+
+class _ZipMember:
+    """预先压缩好的 zip 成员"""
+
+    __slots__ = ('name', 'crc', 'size', 'data')
+
+    def __init__(self, name, raw):
+        self.name = name.encode('utf-8')
+        self.crc = zlib.crc32(raw) & 0xffffffff
+        self.size = len(raw)
+        self.data = _deflate(raw)
+
+
+def _write_zip(members, dos_time, dos_date):
+    """
+    把预压缩的成员直接拼成 zip 字节流（不经过 zipfile 再压缩一遍）
+    :param members: _ZipMember 列表（按写入顺序）
+    :return: zip 文件字节
+    """
+    out = io.BytesIO()
+    central = []
+    for m in members:
+        offset = out.tell()
+        out.write(struct.pack('<IHHHHHIIIHH', 0x04034b50, 20, 0, zipfile.ZIP_DEFLATED,
+                              dos_time, dos_date, m.crc, len(m.data), m.size, len(m.name), 0))
+        out.write(m.name)
+        out.write(m.data)
+        central.append(struct.pack('<IHHHHHHIIIHHHHHII', 0x02014b50, 20, 20, 0, zipfile.ZIP_DEFLATED,
+                                   dos_time, dos_date, m.crc, len(m.data), m.size, len(m.name),
+                                   0, 0, 0, 0, 0o600 << 16, offset) + m.name)
+
+    cd_offset = out.tell()
+    for entry in central:
+        out.write(entry)
+    cd_size = out.tell() - cd_offset
+    out.write(struct.pack('<IHHHHIIH', 0x06054b50, 0, 0, len(members), len(members), cd_size, cd_offset, 0))
+    return out.getvalue()
+
+
+class RenderPlan:
+    """单个模板（+ 一组 Excel 列）编译出的渲染计划"""
+
+    def __init__(self, all_columns, segments, slots, members, main_index, keyword_checks):
+        """
+        :param all_columns: 编译时的全部列名（哨兵序号即此列表下标）
+        :param segments: document.xml 的固定片段（比插槽多一个）
+        :param slots: 每个插槽对应的 Excel 列名
+        :param members: 其余 zip 成员（预压缩），main_index 位置留给 document.xml
+        :param main_index: document.xml 在成员列表中的位置
+        :param keyword_checks: [(关键字, 列名, 段落哨兵文本, 预期出现次数)]，用来复核“已追加过就不再追加”的判断
+        """
+        self.all_columns = all_columns
+        self.segments = segments
+        self.slots = slots
+        self.members = members
+        self.main_index = main_index
+        self.keyword_checks = keyword_checks
+        self.columns = sorted(set(slots), key=str)  # 真正出现在正文里的列，只需格式化这些
+        self.dos_time, self.dos_date = _dos_datetime(time.time())
+
+    def render(self, texts):
+        """
+        按计划拼出整份 docx
+        :param texts: {列名: 已格式化的文本}
+        :return: docx 文件字节
+        """
+        parts = [self.segments[0]]
+        for col, segment in zip(self.slots, self.segments[1:]):
+            parts.append(_xml_escape(texts[col]))
+            parts.append(segment)
+        main = _ZipMember(self.members[self.main_index].name.decode('utf-8'), ''.join(parts).encode('utf-8'))
+
+        members = list(self.members)
+        members[self.main_index] = main
+        return _write_zip(members, self.dos_time, self.dos_date)
+
+    def fill_sentinels(self, text, texts):
+        """把一段含哨兵的文本还原成真实值"""
+        return _SENTINEL_RE.sub(lambda m: texts.get(self.all_columns[int(m.group(1))], m.group(0)), text)
+
+
+class RenderPlanEngine:
+    """渲染计划的编译与缓存（按模板 + 列集合缓存，LRU 淘汰）"""
+
+    def __init__(self, template_cache, fill_func, format_func, config, keyword_map=None, max_size=8):
+        """
+        :param template_cache: TemplateCache 实例（编译时从这里克隆模板）
+        :param fill_func: 脚本原有的填充流程 fill_func(doc, data_row, format_func)
+        :param format_func: 脚本原有的值格式化函数 format_func(列名, 原始值, 配置)
+        :param config: 配置类实例
+        :param keyword_map: 关键字追加映射 {关键字: 列名}（没有关键字追加模式的脚本留空）
+        :param max_size: 最多缓存多少份渲染计划
+        """
+        self.template_cache = template_cache
+        self.fill_func = fill_func
+        self.format_func = format_func
+        self.config = config
+        self.keyword_map = keyword_map or {}
+        self.max_size = max_size
+        self._plans = OrderedDict()  # {(模板路径, 文件签名, 列集合): RenderPlan 或 None}
+        # 值里一旦出现这些文字，原流程可能会“二次替换”，只能走普通流程
+        self._trigger_words = [k for k in list(config.PLACEHOLDER_MAP) + list(self.keyword_map) if k]
+        self.fast_renders = 0
+        self.fallbacks = 0
+
+    # -------------------------- 编译 --------------------------
+    def compile(self, template_path, columns):
+        """
+        编译渲染计划
+        :param template_path: Word 模板路径
+        :param columns: 数据行包含的列名（决定哪些填充项会被跳过）
+        :return: RenderPlan；模板结构不适合编译时返回 None
+        """
+        columns = sorted(columns, key=str)
+        sentinels = {col: _SENTINEL.format(i) for i, col in enumerate(columns)}
+        config = self.config
+
+        def sentinel_format(excel_col, raw_value, cfg):
+            # 数据行里有的列 → 哨兵；没有的列原始值恒为 ""，直接按原规则格式化成常量
+            if excel_col in sentinels:
+                return sentinels[excel_col]
+            return self.format_func(excel_col, raw_value, cfg)
+
+        doc = self.template_cache.open(template_path)
+        self.fill_func(doc, dict(sentinels), sentinel_format)
+
+        # 记录关键字追加所在段落的文本，渲染时复核“段落里是否本来就有 关键字+值”
+        keyword_checks = []
+        if self.keyword_map:
+            for p in doc.element.body.iter(qn('w:p')):
+                text = Paragraph(p, None).text
+                for keyword, excel_col in self.keyword_map.items():
+                    if excel_col in sentinels:
+                        marker = keyword + sentinels[excel_col]
+                        if marker in text:
+                            keyword_checks.append((keyword, excel_col, text, text.count(marker)))
+
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        main_name = doc.part.partname.membername
+
+        members, segments, slots, main_index = [], None, None, None
+        with zipfile.ZipFile(buffer) as zf:
+            for info in zf.infolist():
+                raw = zf.read(info.filename)
+                if info.filename == main_name:
+                    pieces = _SENTINEL_RE.split(raw.decode('utf-8'))
+                    segments = pieces[0::2]
+                    slots = [columns[int(i)] for i in pieces[1::2]]
+                    main_index = len(members)
+                    members.append(_ZipMember(info.filename, b''))
+                else:
+                    if '\ue000'.encode('utf-8') in raw:  # 哨兵跑到了别的部件里，说明模板结构超出计划能力
+                        return None
+                    members.append(_ZipMember(info.filename, raw))
+
+        if segments is None:
+            return None
+        return RenderPlan(columns, segments, slots, members, main_index, keyword_checks)
+
+    def _get_plan(self, template_path, columns):
+        """取出（必要时编译）渲染计划"""
+        path = os.path.abspath(template_path)
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size, frozenset(columns))
+        if key in self._plans:
+            self._plans.move_to_end(key)
+            return self._plans[key]
+
+        plan = self.compile(path, columns)
+        self._plans[key] = plan
+        while len(self._plans) > self.max_size:
+            self._plans.popitem(last=False)
+        return plan
+
+    # -------------------------- 渲染 --------------------------
+    def _is_plain(self, text):
+        """值能否直接拼接：非空、无首尾空白、无制表/换行/控制字符、不含任何占位符或关键字"""
+        if not text or text != text.strip() or _UNSAFE_CHARS_RE.search(text):
+            return False
+        return not any(word in text for word in self._trigger_words)
+
+    def render(self, template_path, data_row, format_func=None):
+        """
+        用渲染计划生成一份文档
+        :param template_path: Word 模板路径
+        :param data_row: 单行数据字典
+        :param format_func: 本行使用的值格式化函数（默认用编译时的格式化函数）
+        :return: docx 文件字节；该行不适合走计划时返回 None
+        """
+        format_func = format_func or self.format_func
+        plan = self._get_plan(template_path, data_row.keys())
+        if plan is None:
+            self.fallbacks += 1
+            return None
+
+        texts = {}
+        for col in plan.columns:
+            text = format_func(col, data_row[col], self.config)
+            if not isinstance(text, str) or not self._is_plain(text):
+                self.fallbacks += 1
+                return None
+            texts[col] = text
+
+        # 原流程中段落里已经有“关键字+值”时不会再追加，这种情况交回普通流程
+        for keyword, excel_col, para_text, expected in plan.keyword_checks:
+            filled = plan.fill_sentinels(para_text, texts)
+            if filled.count(keyword + texts[excel_col]) > expected:
+                self.fallbacks += 1
+                return None
+
+        self.fast_renders += 1
+        return plan.render(texts)
+
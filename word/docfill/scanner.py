@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+多关键字扫描：一条正则一次扫完段落，找出其中出现的全部占位符 / 关键字
+
+原来每个占位符都要把全部段落扫一遍（段落数 × 占位符数），模板里占位符一多就很慢。
+现在所有词编译成一条“零宽前瞻 + 多选一”的正则，每个段落只扫一遍；
+没有命中的段落直接跳过，命中的段落再按配置顺序逐个执行原来的替换逻辑。
+
+替换后的文字可能“拼”出新的词（比如值里本身带着别的占位符），
+所以每执行一次替换都会对该段落重新扫描，结果与原来逐词全篇替换的顺序完全一致。
+"""
+import re
+from functools import lru_cache
+
+
+class TextScanner:
+    """一组词（按配置顺序）的多模式扫描器"""
+
+    def __init__(self, words):
+        """
+        :param words: 要查找的词（按配置顺序，空字符串和重复项自动忽略）
+        """
+        self.words = list(dict.fromkeys(w for w in words if w))
+        order = {w: i for i, w in enumerate(self.words)}
+
+        # 同一位置优先匹配最长的词；比它短、又是它前缀的词一并算作命中
+        alternation = '|'.join(re.escape(w) for w in sorted(self.words, key=len, reverse=True))
+        self._pattern = re.compile(f'(?=({alternation}))') if self.words else None
+        self._implied = {w: [order[v] for v in self.words if w.startswith(v)] for w in self.words}
+
+    def find(self, text):
+        """
+        找出文本中出现的词
+        :param text: 段落文本
+        :return: 命中词在 self.words 中的下标集合
+        """
+        found = set()
+        if self._pattern is None or not text:
+            return found
+        for m in self._pattern.finditer(text):
+            found.update(self._implied[m.group(1)])
+        return found
+
+    def apply(self, paragraph, action):
+        """
+        对单个段落按配置顺序执行命中词的处理函数
+        :param paragraph: python-docx 段落对象
+        :param action: 处理函数 action(段落, 词)
+        :return: 执行次数
+        """
+        hits = self.find(paragraph.text)
+        done, count = -1, 0
+        while True:
+            pending = [i for i in hits if i > done]
+            if not pending:
+                return count
+            done = min(pending)
+            action(paragraph, self.words[done])
+            count += 1
+            hits = self.find(paragraph.text)  # 替换后重新扫描，后面的词以替换后的文字为准
+
+    def scan(self, paragraphs, action):
+        """
+        扫描全部段落，没有命中任何词的段落直接跳过
+        :param paragraphs: 段落列表
+        :param action: 处理函数 action(段落, 词)
+        :return: 执行次数
+        """
+        if self._pattern is None:
+            return 0
+        return sum(self.apply(para, action) for para in paragraphs)
+
+
+@lru_cache(maxsize=32)
+def _cached_scanner(words):
+    return TextScanner(words)
+
+
+def get_scanner(words):
+    """按词列表取扫描器（同一组词只编译一次正则）"""
+    return _cached_scanner(tuple(words))
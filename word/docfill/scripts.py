@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+脚本定位与加载工具：按文件路径加载 word 目录下的各个填充脚本
+
+脚本文件名含中文和空格，无法直接 import，这里统一用 importlib 按路径加载，
+供基准测试、并行子进程等需要“在别处复用脚本里的 Config / WordFiller”的地方使用。
+"""
+import hashlib
+import importlib.util
+import os
+import sys
+
+# word 目录（docfill 的上一级）
+WORD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 各流水线对应的脚本路径（相对 word 目录）
+SCRIPT_PATHS = {
+    'word01': os.path.join('01', '桩基灌注记录自动化填充助手 - 专业版.py'),
+    'word02': os.path.join('02', 'Word文档批量填充Excel数据.py'),
+    'word03': os.path.join('03', 'Word文档批量填充Excel数据 (v3.5 终极注释版).py'),
+    'tongyong': 'tongyong.py',
+    'rebar': os.path.join('..', 'excle', '01', '塔基钢筋数据合并.py'),
+}
+
+
+def script_path(name):
+    """
+    获取流水线脚本的绝对路径
+    :param name: 流水线名称（如 'word03'）
+    :return: 脚本绝对路径
+    """
+    if name not in SCRIPT_PATHS:
+        raise ValueError(f"未知的流水线：{name} | 可选：{list(SCRIPT_PATHS)}")
+    return os.path.normpath(os.path.join(WORD_DIR, SCRIPT_PATHS[name]))
+
+
+def load_script(path, module_name=None):
+    """
+    按文件路径加载脚本模块（同一路径只加载一次）
+    :param path: 脚本路径
+    :param module_name: 模块名（默认按文件路径生成）
+    :return: 模块对象
+    """
+    path = os.path.abspath(path)
+    if module_name is None:
+        module_name = "_docfill_script_" + hashlib.md5(path.encode('utf-8')).hexdigest()[:12]
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except Exception:
+        del sys.modules[module_name]
+        raise
+    return module
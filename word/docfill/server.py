@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+本机常驻渲染服务：启动一次，之后改一个桩号只要几十毫秒
+
+服务端在本机（127.0.0.1）监听一个端口，内存里常驻一个渲染会话（docfill.session）：
+模板、Excel 数据、整列格式化结果都只加载一次，Excel / 模板改过后下一次请求前自动重新读取。
+全程离线，不会访问网络；请求按顺序一个一个处理。
+只接受 Host 为 127.0.0.1 / localhost 的请求，POST 必须是 Content-Type: application/json：
+浏览器里打开的网页没法借用户的浏览器调 /render、/shutdown（跨站表单发不出 JSON，DNS 重绑定的 Host 对不上）。
+
+启动服务（在 word 目录下运行；配置取脚本里当前写的值）：
+    python -m docfill.server serve word02
+    python -m docfill.server serve tongyong --port 8766 --set OUTPUT_DIR=新文件夹
+重出指定桩号（另开一个终端）：
+    python -m docfill.server render N1 N2
+    python -m docfill.server render N1 --template 杆塔检查记录表
+其他命令：
+    python -m docfill.server status   # 查看会话概况
+    python -m docfill.server reload   # 强制重新读取 Excel
+    python -m docfill.server stop     # 关闭服务
+
+接口（JSON）：
+    POST /render  {"stations": [桩号...], "template": 模板名或 null}  → {"results": [...], "log": ..., "seconds": ...}
+    GET  /status                                                    → 会话概况
+    POST /reload                                                    → {"log": ...}
+    POST /shutdown
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+HOST = '127.0.0.1'  # 只监听本机
+ALLOWED_HOSTS = ('127.0.0.1', 'localhost')  # 请求头里的 Host 只能是这几个
+DEFAULT_PORT = 8765
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """把请求转给会话处理（HTTPServer 单线程，会话不会被并发访问）"""
+
+    def log_message(self, format, *args):
+        pass  # 每个请求由 do_* 自己打印一行摘要
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def _rejected(self, post=False):
+        """
+        拦下不是本机客户端发来的请求（已回复错误时返回 True）
+        :param post: 是否是 POST（还要检查 Content-Type）
+        """
+        host = (self.headers.get('Host') or '').strip().lower()
+        name, sep, port = host.rpartition(':')
+        if not sep:
+            name, port = host, ''
+        if name not in ALLOWED_HOSTS or port not in ('', str(self.server.server_port)):
+            print(f"⛔ 拒绝请求：Host 不是本机（{host or '空'}）")
+            self._reply(403, {'error': f"只接受本机请求（Host: {'/'.join(ALLOWED_HOSTS)}）"})
+            return True
+        content_type = (self.headers.get('Content-Type') or '').split(';', 1)[0].strip().lower()
+        if post and content_type != 'application/json':
+            print(f"⛔ 拒绝请求：Content-Type 不是 application/json（{content_type or '空'}）")
+            self._reply(415, {'error': "请求内容必须是 JSON（Content-Type: application/json）"})
+            return True
+        return False
+
+    def do_GET(self):
+        if self._rejected():
+            return
+        if self.path == '/status':
+            self._reply(200, self.server.session.status())
+        else:
+            self._reply(404, {'error': f"没有这个接口：{self.path}"})
+
+    def do_POST(self):
+        if self._rejected(post=True):
+            return
+        session = self.server.session
+        start = time.perf_counter()
+        try:
+            if self.path == '/render':
+                request = self._body()
+                log = session.refresh()
+                results = session.render(request.get('stations') or [], request.get('template'))
+                seconds = time.perf_counter() - start
+                ok = sum(result['ok'] for result in results)
+                print(f"📨 渲染 {len(results)} 份（成功 {ok}），{seconds * 1000:.0f} 毫秒")
+                self._reply(200, {'results': results, 'log': log, 'seconds': seconds})
+            elif self.path == '/reload':
+                log = session.refresh(force=True)
+                print(f"🔄 已重新读取 Excel：{len(session.rows)} 个桩号")
+                self._reply(200, {'log': log, 'seconds': time.perf_counter() - start})
+            elif self.path == '/shutdown':
+                self._reply(200, {'log': '服务已关闭'})
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            else:
+                self._reply(404, {'error': f"没有这个接口：{self.path}"})
+        except Exception as e:
+            print(f"❌ 请求失败：{e}")
+            self._reply(400, {'error': str(e)})
+
+
+def serve(pipeline, port=DEFAULT_PORT, overrides=None):
+    """
+    启动常驻服务（阻塞，直到收到 stop 或 Ctrl+C）
+    :param pipeline: 'word01' / 'word02' / 'word03' / 'tongyong'
+    :param port: 本机端口
+    :param overrides: {配置项: 值}，覆盖脚本里的配置
+    """
+    from docfill.session import open_session
+
+    start = time.perf_counter()
+    session = open_session(pipeline, overrides)
+    print(session.log, end='')
+    print(session.refresh(), end='')
+    session.warm_up()
+    server = HTTPServer((HOST, port), _Handler)
+    server.session = session
+    print(f"🚀 渲染服务已就绪（{pipeline}，{len(session.rows)} 个桩号，{len(session.templates)} 个模板，"
+          f"预热 {time.perf_counter() - start:.1f} 秒）：http://{HOST}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("👋 渲染服务已关闭")
+
+
+def request(path, payload=None, port=DEFAULT_PORT, timeout=600):
+    """
+    客户端：向本机服务发一个请求
+    :param path: 接口路径（如 '/render'）
+    :param payload: 请求内容（None 时发 GET）
+    :return: 服务端返回的 JSON
+    """
+    url = f"http://{HOST}:{port}{path}"
+    data = None if payload is None else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json; charset=utf-8'})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read())
+
+
+def render(stations, template=None, port=DEFAULT_PORT):
+    """客户端：请服务重出指定桩号，返回 /render 的结果"""
+    return request('/render', {'stations': list(stations), 'template': template}, port)
+
+
+def main(argv=None):
+    from docfill.session import SESSION_PIPELINES
+    from docfill.settings import parse_overrides
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'本机端口（默认 {DEFAULT_PORT}）')
+    parser = argparse.ArgumentParser(prog='python -m docfill.server', description='本机常驻渲染服务')
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_parser = commands.add_parser('serve', parents=[common], help='启动服务')
+    serve_parser.add_argument('pipeline', choices=SESSION_PIPELINES)
+    serve_parser.add_argument('--set', action='append', metavar='键=值', help='覆盖脚本里的配置项，可重复')
+    render_parser = commands.add_parser('render', parents=[common], help='重出指定桩号（不写桩号则全部重出）')
+    render_parser.add_argument('stations', nargs='*')
+    render_parser.add_argument('--template', help='只用这个模板（文件名，可不带 .docx）')
+    commands.add_parser('status', parents=[common], help='查看会话概况')
+    commands.add_parser('reload', parents=[common], help='强制重新读取 Excel')
+    commands.add_parser('stop', parents=[common], help='关闭服务')
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        serve(args.pipeline, args.port, parse_overrides(args.set))
+        return 0
+
+    try:
+        if args.command == 'render':
+            reply = render(args.stations, args.template, args.port)
+        elif args.command == 'status':
+            reply = request('/status', port=args.port)
+        else:
+            reply = request({'reload': '/reload', 'stop': '/shutdown'}[args.command], {}, port=args.port)
+    except urllib.error.URLError:
+        print(f"❌ 连不上渲染服务（端口 {args.port}），请先运行：python -m docfill.server serve 流水线名")
+        return 1
+
+    if 'error' in reply:
+        print(f"❌ {reply['error']}")
+        return 1
+    if reply.get('log'):
+        print(reply['log'].rstrip())
+    if args.command == 'render':
+        for result in reply['results']:
+            print(f"  {result['message']}")
+        ok = sum(result['ok'] for result in reply['results'])
+        print(f"🎉 {ok}/{len(reply['results'])} 份成功，服务端耗时 {reply['seconds'] * 1000:.0f} 毫秒")
+        return 0 if ok == len(reply['results']) else 1
+    if args.command == 'status':
+        for name, value in reply.items():
+            print(f"  {name}: {value}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
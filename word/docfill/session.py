@@ -0,0 +1,431 @@
+# -*- coding: utf-8 -*-
+"""
+常驻渲染会话：模板、Excel 数据、整列格式化结果都留在内存里，按需渲染指定桩号
+
+批量脚本每跑一次都要重新导入 pandas / python-docx、读 Excel、解析模板，
+改了一个格子只想重出一个桩号时，这些启动成本占了绝大部分时间。会话把它们都留在内存里：
+    - FillerSession（word02 / word03）：脚本自己的 WordFiller（模板母版缓存、渲染计划、坐标换算结果）
+      + 按主键分好组、整列格式化好的每行数据
+    - TongyongSession（tongyong.py）：编译好的 docxtpl 模板 + 每行的渲染上下文
+    - Word01Session（word01）：按桩号分好组的数据；每个桩号有自己的模板（桩号.docx）
+Excel 或模板文件被改过（修改时间 / 大小变化）时，下一次渲染前自动重新读取。
+
+常驻服务（docfill.server）和监视模式（docfill.watch）共用这里的会话。
+会话只逐份写文件：打包输出、流式读取、多进程、分阶段计时在会话里都不启用。
+开启了增量生成（INCREMENTAL）时，渲染结果同样记入清单，之后整批运行不会重复生成。
+"""
+import contextlib
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from docfill.parallel import call, capture, run_job
+from docfill.scripts import load_script, script_path
+
+SESSION_PIPELINES = ('word01', 'word02', 'word03', 'tongyong')
+
+
+def file_signature(path):
+    """文件签名：（修改时间, 大小），文件不存在时为 None"""
+    try:
+        stat = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _template_names(template_path):
+    """模板可以用哪些名字指定：绝对路径、文件名、不带扩展名的文件名"""
+    path = os.path.abspath(template_path)
+    name = os.path.basename(path)
+    return {path, name, os.path.splitext(name)[0]}
+
+
+def _digest(value):
+    """一个桩号数据的指纹（用于比较两次读取之间哪些桩号变了）"""
+    payload = json.dumps(value, ensure_ascii=False, sort_keys=True, default=repr)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class RenderSession:
+    """常驻会话的公共部分：子类负责读取数据（_load）和渲染单个任务（render_one）"""
+
+    manifest = None  # 增量生成清单（只有 WordFiller 会话使用）
+
+    def __init__(self):
+        self.rows = {}  # {桩号: 该桩号的数据}
+        self.templates = []  # 当前的模板路径列表
+        self.excel_signature = None
+        self.loaded_at = None  # 最近一次读取 Excel 的时间
+        self.loads = 0  # 读取 Excel 的次数
+        self.rendered = 0  # 渲染成功的文档数
+
+    @property
+    def excel_path(self):
+        raise NotImplementedError
+
+    @property
+    def output_folder(self):
+        raise NotImplementedError
+
+    @property
+    def watch_paths(self):
+        """需要监视的文件 / 文件夹（Excel + 模板）"""
+        raise NotImplementedError
+
+    def refresh(self, force=False):
+        """
+        Excel 改过（或 force）时重新读取；模板列表每次都重新确认
+        :return: 读取过程打印的内容（没有重新读取时为 ''）
+        """
+        signature = file_signature(self.excel_path)
+        if not force and self.loads and signature == self.excel_signature:
+            self._find_templates()
+            return ''
+        return capture(self._load, signature)
+
+    def _load(self, signature):
+        raise NotImplementedError
+
+    def _loaded(self, signature):
+        """读取成功后记下 Excel 签名和时间"""
+        self.excel_signature = signature
+        self.loaded_at = time.time()
+        self.loads += 1
+
+    def _find_templates(self):
+        pass
+
+    def warm_up(self):
+        """预先加载模板（第一份文档不用再等模板解析）"""
+
+    def row_digests(self):
+        """{桩号: 数据指纹}"""
+        return {station: _digest(entry) for station, entry in self.rows.items()}
+
+    def stations_for(self, template_path):
+        """用这个模板生成的桩号"""
+        return list(self.rows)
+
+    def match_templates(self, template=None):
+        """
+        按名字找模板
+        :param template: 模板路径、文件名或不带扩展名的文件名；None 表示全部模板
+        """
+        if not template:
+            return list(self.templates)
+        matched = [path for path in self.templates if template in _template_names(path)]
+        if not matched:
+            names = [os.path.basename(path) for path in self.templates]
+            raise ValueError(f"没有这个模板：{template} | 可选：{names}")
+        return matched
+
+    def _pairs(self, stations, template):
+        """要渲染的（模板, 桩号）任务：指定的桩号 × 指定的模板"""
+        return [(path, station) for path in self.match_templates(template)
+                for station in (stations or self.stations_for(path))]
+
+    def render_one(self, template_path, station):
+        """
+        渲染一个（模板, 桩号）任务
+        :return: {'template', 'station', 'output', 'ok', 'message'}
+        """
+        raise NotImplementedError
+
+    def render_pairs(self, pairs):
+        """渲染一批（模板, 桩号）任务，返回 [render_one 的结果]"""
+        try:
+            results = [self.render_one(path, station) for path, station in pairs]
+        finally:
+            if self.manifest is not None:
+                self.manifest.save()
+        self.rendered += sum(result['ok'] for result in results)
+        return results
+
+    def render(self, stations, template=None):
+        """
+        渲染指定桩号（Excel / 模板改过时先重新读取）
+        :param stations: 桩号列表；空列表表示全部桩号
+        :param template: 只用这个模板（见 match_templates）；None 表示全部模板
+        :return: [render_one 的结果]
+        """
+        self.refresh()
+        return self.render_pairs(self._pairs([str(station).strip() for station in stations], template))
+
+    @staticmethod
+    def _result(template_path, station, output_path, ok, message):
+        return {'template': os.path.basename(template_path), 'station': station,
+                'output': os.path.abspath(output_path), 'ok': ok, 'message': message}
+
+    def status(self):
+        """会话概况（模板、桩号数、读取次数等）"""
+        return {
+            'excel': os.path.abspath(self.excel_path),
+            'templates': [os.path.basename(path) for path in self.templates],
+            'stations': len(self.rows),
+            'loads': self.loads,
+            'loaded_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.loaded_at)) if self.loaded_at else None,
+            'rendered': self.rendered,
+            'output_folder': os.path.abspath(self.output_folder),
+        }
+
+
+class FillerSession(RenderSession):
+    """word02 / word03 的常驻会话（基于脚本里的 WordFiller）"""
+
+    def __init__(self, module, config):
+        """
+        :param module: 脚本模块（docfill.scripts.load_script 加载的，或直接运行时的 __main__）
+        :param config: 脚本的 Config 实例
+        """
+        super().__init__()
+        config.OUTPUT_ZIP = ''
+        config.STREAM_CHUNK_ROWS = 0
+        config.WORKERS = 1
+        config.STAGE_TIMING = False
+        config.PROFILER = ''
+        self.module = module
+        self.config = config
+        self.log = capture(self._create_filler)
+
+    def _create_filler(self):
+        from docfill.manifest import BuildManifest
+
+        self.filler = self.module.WordFiller(self.config)
+        self.manifest = None
+        if self.config.INCREMENTAL:
+            self.manifest = BuildManifest(self.config.OUTPUT_FOLDER, self.config, getattr(self.module, '__file__', None))
+
+    @property
+    def excel_path(self):
+        return self.config.EXCEL_FILE
+
+    @property
+    def output_folder(self):
+        return self.config.OUTPUT_FOLDER
+
+    @property
+    def watch_paths(self):
+        return [path for path in (self.config.EXCEL_FILE, self.config.WORD_TEMPLATE,
+                                  self.config.WORD_TEMPLATE_FOLDER) if path]
+
+    def _find_templates(self):
+        with contextlib.redirect_stdout(None):
+            self.templates = self.filler._get_word_templates()
+
+    def _load(self, signature):
+        filler = self.filler
+        if hasattr(filler, '_load_rows'):
+            df = filler._load_rows()
+        else:
+            df = self.module.ExcelDataProcessor.load_excel_data(self.config)
+        self.templates = filler._get_word_templates()
+        # 借用批量流程的任务清单：同一套分组、重复主键提示、整列格式化
+        jobs = filler._collect_jobs(df, self.templates[:1])
+        self.rows = {str(station).strip(): (station, data_row) for _, station, data_row in jobs}
+        self._loaded(signature)
+
+    def warm_up(self):
+        for template in self.templates:
+            try:
+                self.filler.template_cache.open(template)
+            except Exception:
+                pass  # 打不开的模板留到渲染时各自报告
+
+    def render_one(self, template_path, station):
+        key = str(station).strip()
+        output_path = self.filler._output_path(key)
+        entry = self.rows.get(key)
+        if entry is None:
+            message, ok = f"❌ 失败[{key}]：Excel里没有这个桩号", False
+        else:
+            original, data_row = entry
+            output, error = run_job(self.filler, (template_path, original, data_row))
+            message, ok = output.strip(), error is None
+        if self.manifest is not None and entry is not None:
+            if ok:
+                self.manifest.record(output_path, self.manifest.job_digest(template_path, entry[1]))
+            else:
+                self.manifest.forget(output_path)
+        return self._result(template_path, key, output_path, ok, message)
+
+
+class TongyongSession(RenderSession):
+    """tongyong.py 的常驻会话（单模板，docxtpl 渲染；配置是脚本的模块级常量）"""
+
+    def __init__(self, module):
+        """
+        :param module: 已加载的 tongyong.py 模块
+        """
+        super().__init__()
+        self.module = module
+        self.log = ''
+        self.templates = [os.path.abspath(module.TEMPLATE_PATH)]
+        self._compiled = None
+        self._template_signature = None
+
+    @property
+    def excel_path(self):
+        return self.module.EXCEL_PATH
+
+    @property
+    def output_folder(self):
+        return Path(self.module.EXCEL_PATH).parent / self.module.OUTPUT_DIR
+
+    @property
+    def watch_paths(self):
+        return [self.module.EXCEL_PATH, self.module.TEMPLATE_PATH]
+
+    def _load(self, signature):
+        from docfill.excel_source import ExcelSource
+        from docfill.formatting import context_records
+        from docfill.group_index import duplicate_summary, last_positions
+
+        module = self.module
+        source = ExcelSource(module.EXCEL_PATH, cache=module.EXCEL_CACHE)
+        try:
+            sheet = module.SHEET_NAME if module.SHEET_NAME is not None else source.sheet_names[0]
+            df, _ = source.read(sheet)
+        finally:
+            source.close()
+        if module.FILENAME_COLUMN not in df.columns:
+            raise ValueError(f"在表 [{sheet}] 中找不到列名: [{module.FILENAME_COLUMN}]")
+
+        contexts, errors = context_records(df, module.INT_COLUMNS, module.DATE_FORMAT_STR, module.process_data)
+        fnames = [module.clean_filename(context.get(module.FILENAME_COLUMN, f'Result_{index}'))
+                  for index, context in zip(df.index, contexts)]
+        last, duplicates = last_positions(fnames)  # 与批量运行一致：同名文件按最后一行生成
+        # {文件名: (渲染上下文, 该行清洗时的异常)}
+        self.rows = {fname: (contexts[pos], errors.get(pos)) for fname, pos in last.items()}
+        print(f"✅ 读取成功，共 {len(df)} 条数据")
+        if duplicates:
+            print(f"⚠️ [{module.FILENAME_COLUMN}]存在重复值（按最后一行生成）：{duplicate_summary(duplicates)}")
+        self._loaded(signature)
+
+    def _template(self):
+        """编译好的模板（模板文件改过时重新编译）"""
+        from docfill.docxtpl_cache import CompiledDocxTemplate
+
+        signature = file_signature(self.module.TEMPLATE_PATH)
+        if self._compiled is None or signature != self._template_signature:
+            self._compiled = CompiledDocxTemplate(self.module.TEMPLATE_PATH, disk_cache=self.module.TEMPLATE_CACHE)
+            self._template_signature = signature
+        return self._compiled
+
+    def warm_up(self):
+        try:
+            self._template()
+        except Exception:
+            pass  # 模板解析失败留到渲染时报告
+
+    def render_one(self, template_path, station):
+        from docfill.packaging import save_document
+
+        key = str(station).strip()
+        output_path = self.output_folder / f"{key}.docx"
+        try:
+            entry = self.rows.get(key)
+            if entry is None:
+                raise ValueError(f"Excel里没有这个文件名：{key}")
+            context, error = entry
+            if error is not None:
+                raise error
+            doc = self._template().render(context)
+            self.output_folder.mkdir(parents=True, exist_ok=True)
+            save_document(doc, output_path)
+            ok, message = True, f"🟢 {output_path.name}"
+        except Exception as e:
+            ok, message = False, f"🔴 失败: {e}"
+        return self._result(template_path, key, output_path, ok, message)
+
+
+class Word01Session(RenderSession):
+    """word01 的常驻会话（每个桩号一个模板：INPUT_WORD_FOLDER/桩号.docx；配置是脚本的模块级常量）"""
+
+    def __init__(self, module):
+        """
+        :param module: word01 脚本模块（docfill.scripts.load_script 加载的，或直接运行时的 __main__）
+        """
+        from docfill.profiling import StageTimer
+
+        super().__init__()
+        self.module = module
+        self.log = ''
+        self.timer = StageTimer(enabled=False)
+        os.makedirs(module.OUTPUT_FOLDER, exist_ok=True)
+
+    @property
+    def excel_path(self):
+        return self.module.EXCEL_DATABASE
+
+    @property
+    def output_folder(self):
+        return self.module.OUTPUT_FOLDER
+
+    @property
+    def watch_paths(self):
+        return [self.module.EXCEL_DATABASE, self.module.INPUT_WORD_FOLDER]
+
+    def _find_templates(self):
+        paths = (self.module.station_paths(station)[0] for station in self.rows)
+        self.templates = [path for path in paths if os.path.exists(path)]
+
+    def _load(self, signature):
+        index = self.module.load_database(self.timer)
+        if index is None:
+            raise ValueError("Excel 读取失败")
+        columns = [col for col in self.module.COLUMN_MAP if col in index.df.columns]
+        self.rows = {}  # {桩号: (原始桩号, 要填的列的值（比较用）, 该桩号的所有行)}
+        for station in index.keys:
+            rows = index.rows(station)
+            self.rows[str(station).strip()] = (station, rows[columns].values.tolist(), rows)
+        self._find_templates()
+        print(f"--- 发现 {len(self.rows)} 个桩号，其中 {len(self.templates)} 个有模板 ---")
+        self._loaded(signature)
+
+    def row_digests(self):
+        return {station: _digest(entry[:2]) for station, entry in self.rows.items()}
+
+    def stations_for(self, template_path):
+        station = os.path.splitext(os.path.basename(template_path))[0]
+        return [station] if station in self.rows else []
+
+    def _pairs(self, stations, template):
+        """每个桩号只用它自己的模板"""
+        if not stations:
+            return super()._pairs(stations, template)
+        allowed = {os.path.abspath(path) for path in self.match_templates(template)} if template else None
+        pairs = [(self.module.station_paths(station)[0], station) for station in stations]
+        return [(path, station) for path, station in pairs if allowed is None or os.path.abspath(path) in allowed]
+
+    def render_one(self, template_path, station):
+        key = str(station).strip()
+        output_path = self.module.station_paths(key)[1]
+        entry = self.rows.get(key)
+        if entry is None:
+            message, ok = f"【异常】Excel 里没有桩号 {key}", False
+        else:
+            output, ok = call(self.module.fill_one_station, entry[0], entry[2], self.timer)
+            message = output.strip()
+        return self._result(template_path, key, output_path, ok, message)
+
+
+def open_session(pipeline, overrides=None):
+    """
+    按流水线名称创建会话（配置取脚本里当前写的值）
+    :param pipeline: 'word01' / 'word02' / 'word03' / 'tongyong'
+    :param overrides: {配置项: 值}，覆盖脚本里的配置
+    """
+    if pipeline not in SESSION_PIPELINES:
+        raise ValueError(f"常驻会话只支持：{list(SESSION_PIPELINES)}，当前为：{pipeline}")
+    module = load_script(script_path(pipeline))
+    target = module.Config() if hasattr(module, 'Config') else module
+    for name, value in (overrides or {}).items():
+        setattr(target, name, value)
+    if pipeline == 'tongyong':
+        return TongyongSession(module)
+    if pipeline == 'word01':
+        return Word01Session(module)
+    return FillerSession(module, target)
@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+"""
+配置文件与配置检查：不导入 pandas / python-docx 就能读取、校验各流水线的配置
+
+各脚本的配置写在脚本里（word02 / word03 的 Config 类，word01 / tongyong / 钢筋合并器的模块级常量），
+而脚本一加载就会导入 pandas、python-docx 等重型库，光是看个帮助、发现一个配置写错都要等一两秒。
+这里用 ast 直接读脚本源码里的配置项（名称 + 默认值），不执行脚本：
+    - 配置文件（.json；Python 3.11 起也可以用 .toml）只写要改的项，其余沿用脚本里写的值，
+      文件里的相对路径按配置文件所在的文件夹解析
+    - 配置项名写错、类型不对、取值不在可选范围、输入文件不存在、互相冲突的开关，一次性全部报告
+    - 真正运行时才加载脚本、把配置套上去：FONT_SIZE 写磅数（如 10），CELL_ALIGNMENT 写名称（如 'CENTER'）
+
+本模块只用标准库，命令行入口（python -m docfill）的检查、试运行都不会碰到重型库。
+"""
+import ast
+import glob
+import importlib.util
+import json
+import os
+from functools import lru_cache
+
+from docfill.scripts import script_path
+
+# 各流水线：配置写在哪（Config 类 / 模块级常量）、哪些配置项是输入 / 输出路径
+PIPELINES = {
+    'word01': {
+        'title': '桩基灌注记录（每个桩号一个 Word 模板）',
+        'config_class': None,
+        'inputs': ('EXCEL_DATABASE', 'INPUT_WORD_FOLDER'),
+        'outputs': ('OUTPUT_FOLDER',),
+    },
+    'word02': {
+        'title': 'Word 批量填充（表格坐标 + 占位符）',
+        'config_class': 'Config',
+        'inputs': ('EXCEL_FILE', 'WORD_TEMPLATE', 'WORD_TEMPLATE_FOLDER'),
+        'outputs': ('OUTPUT_FOLDER',),
+    },
+    'word03': {
+        'title': 'Word 批量填充（表格坐标 + 占位符 + 关键字追加）',
+        'config_class': 'Config',
+        'inputs': ('EXCEL_FILE', 'WORD_TEMPLATE', 'WORD_TEMPLATE_FOLDER'),
+        'outputs': ('OUTPUT_FOLDER',),
+    },
+    'tongyong': {
+        'title': 'docxtpl 模板填充（每行一份文档）',
+        'config_class': None,
+        'inputs': ('EXCEL_PATH', 'TEMPLATE_PATH'),
+        'outputs': (),  # OUTPUT_DIR 是 Excel 旁边的文件夹名，不是路径
+    },
+    'rebar': {
+        'title': '塔基钢筋数据合并',
+        'config_class': None,
+        'inputs': ('INPUT_PATH',),
+        'outputs': ('OUTPUT_PATH', 'OUTPUT_DIR'),
+        'internal': ('CORE_COLUMNS', 'LEG_COLUMNS'),  # 配置区下面的列名常量，不是配置项
+    },
+}
+
+# 取值只能是这几个的配置项
+CHOICES = {
+    'RENDER_ENGINE': ('docx', 'plan'),
+    'DUPLICATE_KEY_POLICY': ('first', 'last', 'error'),
+    'PROFILER': ('', 'cprofile', 'pyinstrument'),
+    'OUTPUT_MODE': ('single', 'per_file'),
+    'OUTPUT_FORMAT': ('xlsx', 'csv', 'parquet'),
+}
+# 数值范围：(最小值, 最大值)，None 表示不限
+RANGES = {
+    'WORKERS': (0, None),
+    'ZIP_COMPRESSION': (0, 9),
+    'STREAM_CHUNK_ROWS': (0, None),
+    'TEMPLATE_CACHE_SIZE': (0, None),
+    'WATCH_DEBOUNCE': (0, None),
+    'START_ROW_INDEX': (0, None),
+    'MAX_ROWS_TO_FILL': (1, None),
+}
+NULLABLE = ('SHEET_NAME',)  # 可以填 None 的配置项（tongyong：None 表示第一个工作表）
+ALIGNMENTS = ('LEFT', 'CENTER', 'RIGHT', 'JUSTIFY', 'DISTRIBUTE', 'JUSTIFY_MED', 'JUSTIFY_HI', 'JUSTIFY_LOW',
+              'THAI_JUSTIFY')  # WD_ALIGN_PARAGRAPH 的成员名
+
+
+class ConfigError(ValueError):
+    """配置文件本身读不了（格式错误、不是键值对等）"""
+
+
+# -------------------------- 读取脚本里的配置 --------------------------
+def _setting_value(node):
+    """
+    配置项的值：(值, 类型标记)
+    普通字面量的类型标记为 None；Pt(10) → (10, 'pt')；WD_ALIGN_PARAGRAPH.CENTER → ('CENTER', 'align')
+    其余表达式（不能写进配置文件）返回 None
+    """
+    try:
+        return ast.literal_eval(node), None
+    except ValueError:
+        pass
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == 'Pt'
+            and len(node.args) == 1 and not node.keywords):
+        try:
+            return ast.literal_eval(node.args[0]), 'pt'
+        except ValueError:
+            return None
+    if (isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name)
+            and node.value.id == 'WD_ALIGN_PARAGRAPH'):
+        return node.attr, 'align'
+    return None
+
+
+def _assignments(body):
+    """语句列表里的大写名称赋值：{名称: 值节点}（遇到第一个函数 / 类定义为止）"""
+    found = {}
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+            break
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            name = node.targets[0].id
+            if name.isupper():
+                found[name] = node.value
+    return found
+
+
+@lru_cache(maxsize=None)
+def script_settings(pipeline):
+    """
+    脚本里当前写的配置（只解析源码，不执行脚本）
+    :param pipeline: 流水线名称
+    :return: {配置项: (值, 类型标记)}
+    """
+    spec = PIPELINES[pipeline]
+    with open(script_path(pipeline), encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    if spec['config_class']:
+        body = next(node.body for node in tree.body
+                    if isinstance(node, ast.ClassDef) and node.name == spec['config_class'])
+        nodes = _assignments(body)
+    else:
+        nodes = _assignments(tree.body)
+    settings = {}
+    for name, node in nodes.items():
+        if name in spec.get('internal', ()):
+            continue
+        value = _setting_value(node)
+        if value is not None and not isinstance(value[0], set):
+            settings[name] = value
+    return settings
+
+
+def script_defaults(pipeline):
+    """脚本里当前写的配置：{配置项: 值}（Pt / 对齐方式写成磅数 / 名称，与配置文件写法一致）"""
+    return {name: value for name, (value, _) in script_settings(pipeline).items()}
+
+
+# -------------------------- 配置文件 --------------------------
+def parse_overrides(items):
+    """命令行的 键=值 列表（值按 Python 字面量解析，解析不了就当字符串）→ {配置项: 值}"""
+    values = {}
+    for item in items or ():
+        name, _, text = item.partition('=')
+        try:
+            values[name.strip()] = ast.literal_eval(text)
+        except (ValueError, SyntaxError):
+            values[name.strip()] = text
+    return values
+
+
+def load_config_file(path, pipeline=None):
+    """
+    读取配置文件
+    :param path: .json / .toml 文件
+    :param pipeline: 流水线名称（命令行指定的优先，否则取文件里的 "pipeline"）
+    :return: {配置项: 值}（可以带 "pipeline": 流水线名称）；路径类配置项的相对路径按配置文件所在文件夹解析
+    """
+    try:
+        if path.lower().endswith('.toml'):
+            try:
+                import tomllib
+            except ImportError:
+                raise ConfigError("读取 .toml 配置需要 Python 3.11 以上，请改用 .json")
+            with open(path, 'rb') as f:
+                values = tomllib.load(f)
+        else:
+            with open(path, encoding='utf-8-sig') as f:
+                values = json.load(f)
+    except OSError as e:
+        raise ConfigError(f"打不开配置文件：{path}（{e.strerror}）")
+    except ValueError as e:
+        raise ConfigError(f"配置文件格式有误：{path}（{e}）")
+    if not isinstance(values, dict):
+        raise ConfigError(f"配置文件的最外层必须是 {{配置项: 值}}：{path}")
+
+    base = os.path.dirname(os.path.abspath(path))
+    pipeline = pipeline or values.get('pipeline')
+    if pipeline in PIPELINES:
+        spec = PIPELINES[pipeline]
+        for name in spec['inputs'] + spec['outputs']:
+            value = values.get(name)
+            if isinstance(value, str) and value and not os.path.isabs(os.path.expanduser(value)):
+                values[name] = os.path.normpath(os.path.join(base, value))
+    return values
+
+
+# -------------------------- 检查 --------------------------
+def _type_error(name, value, default, kind):
+    """值的类型与脚本里的写法不符时返回说明，否则返回 None"""
+    if kind == 'pt':
+        ok = isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0
+        return None if ok else f"{name} 应为字号磅数（如 10、10.5），当前为：{value!r}"
+    if kind == 'align':
+        return None if value in ALIGNMENTS else f"{name} 应为 {list(ALIGNMENTS)} 之一，当前为：{value!r}"
+    if default is None or (value is None and name in NULLABLE):
+        return None
+    if isinstance(default, bool):
+        expected, ok = '布尔值（True / False）', isinstance(value, bool)
+    elif isinstance(default, (int, float)):
+        expected, ok = '数字', isinstance(value, (int, float)) and not isinstance(value, bool)
+    elif isinstance(default, str):
+        expected, ok = '文字', isinstance(value, str)
+    elif isinstance(default, (list, tuple)):
+        expected, ok = '列表', isinstance(value, (list, tuple))
+    elif isinstance(default, dict):
+        expected, ok = '{键: 值}', isinstance(value, dict)
+    else:
+        return None
+    return None if ok else f"{name} 应为{expected}，当前为：{value!r}"
+
+
+def _is_index(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def _shape_errors(values):
+    """几个有固定结构的配置项"""
+    errors = []
+    for col, pos in (values.get('TABLE_CELL_MAP') or {}).items():
+        if not (isinstance(pos, (list, tuple)) and len(pos) == 2 and all(_is_index(v) for v in pos)):
+            errors.append(f"TABLE_CELL_MAP['{col}'] 应为 (行号, 列号)，两个从 0 开始的整数，当前为：{pos!r}")
+    for col, idx in (values.get('COLUMN_MAP') or {}).items():
+        if not _is_index(idx):
+            errors.append(f"COLUMN_MAP['{col}'] 应为从 0 开始的列号，当前为：{idx!r}")
+    for name in ('PLACEHOLDER_MAP', 'KEYWORD_APPEND_MAP', 'DATE_FORMAT_MAP', 'UNIT_MAP'):
+        for key, value in (values.get(name) or {}).items():
+            if not isinstance(value, str):
+                errors.append(f"{name}['{key}'] 应为文字，当前为：{value!r}")
+    row_range = values.get('TARGET_ROW_RANGE')
+    if row_range:
+        if not (len(row_range) == 2 and all(_is_index(v) for v in row_range) and row_range[0] <= row_range[1]):
+            errors.append(f"TARGET_ROW_RANGE 应为 [起始行号, 结束行号]，当前为：{list(row_range)!r}")
+    return errors
+
+
+def input_workbooks(input_path):
+    """钢筋合并器的输入（单个文件 / 文件夹 / 通配符）→ 工作簿列表，与脚本里的 find_workbooks 一致"""
+    if os.path.isdir(input_path):
+        paths = [os.path.join(input_path, name) for name in os.listdir(input_path)]
+    elif os.path.isfile(input_path):
+        paths = [input_path]
+    else:
+        paths = glob.glob(input_path)
+    return sorted(p for p in paths
+                  if p.lower().endswith(('.xlsx', '.xls')) and not os.path.basename(p).startswith('~$'))
+
+
+def _docx_files(folder):
+    """文件夹里的 Word 模板（跳过 Word 打开时生成的 ~$ 临时文件）"""
+    return sorted(os.path.join(folder, name) for name in os.listdir(folder)
+                  if name.endswith('.docx') and not name.startswith('~$'))
+
+
+def input_templates(pipeline, values):
+    """
+    这次会用到的模板（钢筋合并器为输入工作簿），与各脚本找模板的规则一致
+    :param values: {配置项: 值}（输入路径需已检查存在）
+    """
+    if pipeline in ('word02', 'word03'):
+        folder = values['WORD_TEMPLATE_FOLDER']
+        templates = _docx_files(folder) if folder and os.path.isdir(folder) else []
+        return templates or [values['WORD_TEMPLATE']]
+    if pipeline == 'word01':
+        return _docx_files(values['INPUT_WORD_FOLDER'])
+    if pipeline == 'tongyong':
+        return [values['TEMPLATE_PATH']]
+    return input_workbooks(values['INPUT_PATH'])
+
+
+def _path_errors(pipeline, values):
+    """输入文件 / 文件夹是否存在"""
+    errors, warnings = [], []
+    if pipeline in ('word02', 'word03'):
+        folder, template = values.get('WORD_TEMPLATE_FOLDER'), values.get('WORD_TEMPLATE')
+        folder_ok = bool(folder) and os.path.isdir(folder)
+        if folder and not folder_ok:
+            warnings.append(f"WORD_TEMPLATE_FOLDER 不存在，将改用单模板：{folder}")
+        if not folder_ok and not (template and os.path.isfile(template)):
+            errors.append(f"找不到 Word 模板：WORD_TEMPLATE = {template!r}，WORD_TEMPLATE_FOLDER = {folder!r}")
+        names = ('EXCEL_FILE',)
+    elif pipeline == 'rebar':
+        pattern = values.get('INPUT_PATH') or ''
+        if not input_workbooks(pattern):
+            errors.append(f"INPUT_PATH 找不到要处理的工作簿：{pattern}")
+        names = ()
+    else:
+        names = PIPELINES[pipeline]['inputs']
+    for name in names:
+        path = values.get(name)
+        if not path or not os.path.exists(path):
+            errors.append(f"{name} 不存在：{path}")
+    return errors, warnings
+
+
+def _conflicts(values):
+    """互相冲突、或在当前组合下不生效的开关"""
+    errors, warnings = [], []
+    if values.get('STREAM_CHUNK_ROWS') and values.get('DUPLICATE_KEY_POLICY') == 'last':
+        errors.append("流式读取（STREAM_CHUNK_ROWS > 0）时 DUPLICATE_KEY_POLICY 只能是 'first' 或 'error'")
+    if values.get('OUTPUT_ZIP'):
+        off = [name for name in ('INCREMENTAL', 'RESUME') if values.get(name)]
+        if off:
+            warnings.append(f"打包输出（OUTPUT_ZIP）模式下 {'、'.join(off)} 不生效")
+    if values.get('PROFILER') and (values.get('WORKERS') or 1) > 1:
+        warnings.append("性能剖析（PROFILER）只在 WORKERS = 1 时生效")
+    if values.get('PROFILER') == 'pyinstrument' and importlib.util.find_spec('pyinstrument') is None:
+        errors.append("PROFILER = 'pyinstrument' 需要先安装：pip install pyinstrument")
+    if values.get('OUTPUT_FORMAT') == 'parquet' and not any(
+            importlib.util.find_spec(m) for m in ('pyarrow', 'fastparquet')):
+        errors.append("OUTPUT_FORMAT = 'parquet' 需要先安装 pyarrow：pip install pyarrow")
+    return errors, warnings
+
+
+def validate(pipeline, overrides):
+    """
+    检查配置（脚本里的值 + 配置文件 / 命令行改的值），不加载脚本、不读 Excel
+    :param pipeline: 流水线名称
+    :param overrides: {配置项: 值}
+    :return: (合并后的配置, [错误], [提醒])
+    """
+    settings = script_settings(pipeline)
+    errors, warnings = [], []
+    for name, value in overrides.items():
+        if name not in settings:
+            import difflib  # 只有写错配置项名时才用得到
+
+            close = difflib.get_close_matches(name, settings, n=1)
+            errors.append(f"没有这个配置项：{name}" + (f"（是不是 {close[0]}？）" if close else ""))
+            continue
+        default, kind = settings[name]
+        message = _type_error(name, value, default, kind)
+        if message:
+            errors.append(message)
+    if errors:
+        return None, errors, warnings
+
+    values = {**script_defaults(pipeline), **overrides}
+    for name, choices in CHOICES.items():
+        if name in values and values[name] not in choices:
+            errors.append(f"{name} 只能是 {list(choices)} 之一，当前为：{values[name]!r}")
+    for name, (low, high) in RANGES.items():
+        value = values.get(name)
+        if isinstance(value, (int, float)) and ((low is not None and value < low) or (high is not None and value > high)):
+            bound = f"在 {low} ~ {high} 之间" if high is not None else f"不小于 {low}"
+            errors.append(f"{name} 应{bound}，当前为：{value}")
+    errors += _shape_errors(values)
+    path_errors, path_warnings = _path_errors(pipeline, values)
+    conflict_errors, conflict_warnings = _conflicts(values)
+    return values, errors + path_errors + conflict_errors, warnings + path_warnings + conflict_warnings
+
+
+# -------------------------- 套用到脚本 --------------------------
+def materialize(pipeline, overrides):
+    """
+    把配置文件里的写法换成脚本里的对象（运行前调用；只有用到时才导入 python-docx）
+    :return: {配置项: 可以直接 setattr 到脚本 / Config 上的值}
+    """
+    settings = script_settings(pipeline)
+    values = {}
+    for name, value in overrides.items():
+        default, kind = settings[name]
+        if kind == 'pt':
+            from docx.shared import Pt
+            value = Pt(value)
+        elif kind == 'align':
+            from docx.enum.text import WD_ALIGN_PARAGRAPH
+            value = WD_ALIGN_PARAGRAPH[value]
+        elif isinstance(default, tuple) and isinstance(value, list):
+            value = tuple(value)
+        elif isinstance(default, dict) and default and isinstance(value, dict):
+            # 脚本里字典的值是元组（如 TABLE_CELL_MAP 的坐标）时，JSON 里的列表也换成元组
+            if all(isinstance(v, tuple) for v in default.values()):
+                value = {k: tuple(v) if isinstance(v, list) else v for k, v in value.items()}
+        values[name] = value
+    return values
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+表格遍历：每个物理单元格（<w:tc>）只访问一次
+
+python-docx 的 row.cells 按“网格”返回单元格：横向合并了 8 列的格子会被重复返回 8 次，
+纵向合并的续行又会指回最上面那个格子。按 row.cells 收集段落时，同一批段落会被重复扫描、
+重复设置字体，“关键字追加”也有被追加两次的风险；嵌套在单元格里的表格则完全扫不到。
+这里直接按 XML 结构走 w:tr/w:tc，每个单元格只出现一次，嵌套表格按文档顺序一并收集。
+
+注意：按坐标填表（TABLE_CELL_MAP）仍然使用网格坐标，与 Word坐标探测.py 的输出对应。
+网格坐标到物理单元格的换算由 CellGrid 按模板算一次：python-docx 的 table.cell(r, c) 和
+len(table.columns) 每调用一次都要把整张表的网格重建一遍，按坐标填 N 个格子就是 N 次重建。
+"""
+from docx.oxml.ns import qn
+from docx.oxml.simpletypes import ST_Merge
+from docx.table import Table, _Cell
+
+
+class WalkStats:
+    """一次遍历的统计：物理单元格数 / 按网格遍历时的访问次数"""
+
+    def __init__(self):
+        self.tables = 0  # 表格数（含嵌套表格）
+        self.cells = 0  # 物理单元格数（每个 w:tc 记一次）
+        self.grid_visits = 0  # 按 row.cells 遍历时的访问次数（合并单元格按跨列数重复计算）
+
+    @property
+    def avoided(self):
+        """省掉的重复访问次数"""
+        return self.grid_visits - self.cells
+
+
+def iter_tables(doc):
+    """按文档顺序产出正文里的全部表格元素（含嵌套表格、内容控件里的表格）"""
+    return doc.element.body.iter(qn('w:tbl'))
+
+
+def iter_cells(doc, stats=None):
+    """
+    按文档顺序产出每个物理单元格（每个 w:tc 只出现一次）
+    :param doc: Word文档对象
+    :param stats: WalkStats 实例（需要统计时传入）
+    """
+    for tbl in iter_tables(doc):
+        table = Table(tbl, doc)
+        if stats is not None:
+            stats.tables += 1
+        for tc in tbl.iter_tcs():
+            if stats is not None:
+                stats.cells += 1
+                stats.grid_visits += tc.grid_span
+            yield _Cell(tc, table)
+
+
+def walk_paragraphs(doc, stats=None):
+    """
+    收集全部段落：正文段落 + 每个物理单元格里的段落（含嵌套表格）
+    :param doc: Word文档对象
+    :param stats: WalkStats 实例（需要统计时传入）
+    :return: 段落列表
+    """
+    all_paragraphs = list(doc.paragraphs)
+    for cell in iter_cells(doc, stats):
+        all_paragraphs.extend(cell.paragraphs)
+    return all_paragraphs
+
+
+def walk_stats(doc):
+    """只统计不收集：模板里表格 / 物理单元格 / 网格访问次数"""
+    stats = WalkStats()
+    for _ in iter_cells(doc, stats):
+        pass
+    return stats
+
+
+class CellGrid:
+    """
+    表格的网格坐标表：(行, 列) → 第几个 w:tr 里的第几个 w:tc
+
+    换算规则与 python-docx 的 table.cell(r, c) 完全一致（横向合并指向最左格，纵向合并续行指向最上格）。
+    记录的是“位置”而不是元素本身，所以在模板母版上算一次，就能套用到它的每一份克隆上。
+    """
+
+    def __init__(self, table):
+        """
+        :param table: python-docx 的 Table 对象
+        """
+        tbl = table._tbl
+        self.row_count = len(tbl.tr_lst)  # 等同 len(table.rows)
+        self.col_count = tbl.col_count  # 等同 len(table.columns)
+
+        slots = []  # 按网格顺序排列的 (w:tr 序号, w:tc 序号)
+        for tr_idx, tr in enumerate(tbl.tr_lst):
+            for tc_idx, tc in enumerate(tr.tc_lst):
+                for span_idx in range(tc.grid_span):
+                    if tc.vMerge == ST_Merge.CONTINUE:
+                        slots.append(slots[-self.col_count])
+                    elif span_idx > 0:
+                        slots.append(slots[-1])
+                    else:
+                        slots.append((tr_idx, tc_idx))
+        self._slots = slots
+
+    def locate(self, row_idx, col_idx):
+        """
+        网格坐标对应的物理单元格位置
+        :return: (w:tr 序号, w:tc 序号)；坐标越界时返回 None
+        """
+        if not (0 <= row_idx < self.row_count and 0 <= col_idx < self.col_count):
+            return None
+        index = row_idx * self.col_count + col_idx
+        return self._slots[index] if index < len(self._slots) else None
+
+    def check(self, cell_map):
+        """
+        一次性检查坐标映射是否越界
+        :param cell_map: {列名: (行, 列)}
+        :return: ({列名: (w:tr 序号, w:tc 序号)}, [(列名, 行, 列) 越界的条目])
+        """
+        located, out_of_bounds = {}, []
+        for name, (row_idx, col_idx) in cell_map.items():
+            slot = self.locate(row_idx, col_idx)
+            if slot is None:
+                out_of_bounds.append((name, row_idx, col_idx))
+            else:
+                located[name] = slot
+        return located, out_of_bounds
+
+    @staticmethod
+    def resolver(table):
+        """
+        在具体文档的表格上按位置取单元格（每行的 w:tc 列表只取一次）
+        :param table: 与建表时结构相同的 Table（母版本身或它的克隆）
+        :return: 函数 (w:tr 序号, w:tc 序号) → _Cell
+        """
+        trs = table._tbl.tr_lst
+        rows = {}
+
+        def cell_at(slot):
+            tr_idx, tc_idx = slot
+            tcs = rows.get(tr_idx)
+            if tcs is None:
+                tcs = rows[tr_idx] = trs[tr_idx].tc_lst
+            return _Cell(tcs[tc_idx], table)
+
+        return cell_at
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+模板缓存：同一个 Word 模板只解压、解析一次，之后每个桩号拿一份内存克隆
+
+原来的做法是每个桩号都 Document(template_path)，2000 个塔就要把同一个模板解压解析 2000 次。
+现在模板第一次使用时解析成“母版”，之后每次只深拷贝正文部件（document.xml 的元素树），
+样式、主题、图片等填充过程中不会改动的部件直接共享，克隆成本只有重新打开的零头。
+"""
+import copy
+import os
+from collections import OrderedDict
+
+from docx import Document
+
+
+class TemplateCache:
+    """按 LRU 淘汰的模板母版缓存"""
+
+    def __init__(self, max_size=8):
+        """
+        :param max_size: 最多缓存多少个模板母版（<=0 表示不缓存，每次都从磁盘重新打开）
+        """
+        self.max_size = max_size
+        self._masters = OrderedDict()  # {模板绝对路径: (文件签名, 母版Document)}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _signature(path):
+        """文件签名：修改时间 + 大小，模板被改过后自动失效"""
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _get_master(self, path):
+        """取出（必要时加载）模板母版，并把它标记为最近使用"""
+        key = os.path.abspath(path)
+        signature = self._signature(key)
+
+        entry = self._masters.get(key)
+        if entry is not None and entry[0] == signature:
+            self._masters.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        master = Document(key)
+        self._masters[key] = (signature, master)
+        self._masters.move_to_end(key)
+
+        # 超出容量时淘汰最久未使用的模板
+        while len(self._masters) > self.max_size:
+            self._masters.popitem(last=False)
+            self.evictions += 1
+        return master
+
+    @staticmethod
+    def clone(master):
+        """
+        克隆母版：只深拷贝正文部件，其余部件与母版共享
+        :param master: 母版 Document（母版本身绝不能被修改或访问段落/表格）
+        :return: 可以随意修改、保存的新 Document
+        """
+        main_part = master.part
+        # 预先把“正文以外的部件”放进 memo，deepcopy 时就会直接引用而不是复制
+        memo = {id(part): part for part in main_part.package.iter_parts() if part is not main_part}
+        return copy.deepcopy(master, memo)
+
+    def open(self, template_path):
+        """
+        打开模板：命中缓存时返回克隆，未开启缓存时等同 Document(template_path)
+        :param template_path: Word 模板路径
+        :return: Document 对象
+        """
+        if self.max_size <= 0:
+            return Document(template_path)
+        return self.clone(self._get_master(template_path))
+
+    def clear(self):
+        """清空全部母版"""
+        self._masters.clear()
+
+    def __len__(self):
+        return len(self._masters)
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+监视模式：Excel 或模板一保存，只重新生成受影响的文档
+
+工程师一整天都在改数据表，改完再整批重跑一遍太慢。监视模式常驻一个渲染会话（docfill.session），
+每秒检查一次 Excel、模板（单模板 / 模板文件夹；word01 为 INPUT_WORD_FOLDER）的修改时间和大小：
+    - Excel 变了：重新读取，按主键和上一次的快照逐个比较，只重新生成数据变了的和新增的桩号
+      （Excel 里删掉的桩号只提示，已生成的文档保留）
+    - 某个模板变了（或新加了模板）：只重新生成这个模板的文档
+Excel / OneDrive 保存时会在短时间内连续改写好几次文件，检测到变化后要等文件
+“安静”DEBOUNCE 秒（期间没有再变化）才开始处理，一次保存只处理一次。
+Excel 读取失败（例如还没保存完）时保留上一次的快照，下次保存后再比较。
+
+脚本里把 WATCH_MODE 设为 True：整批运行完之后接着进入监视模式；也可以在 word 目录下直接运行：
+    python -m docfill.watch word02
+    python -m docfill.watch word01 --debounce 5 --set EXCEL_DATABASE=数据.xlsx
+按 Ctrl+C 退出。全程不访问网络，也不依赖第三方的文件监视库（轮询修改时间，同步盘里同样可靠）。
+"""
+import argparse
+import os
+import sys
+import time
+
+POLL_INTERVAL = 1.0  # 检查间隔（秒）
+DEFAULT_DEBOUNCE = 2.0  # 变化后要“安静”多久才处理（秒）
+
+
+def _scan(paths):
+    """
+    当前状态：{绝对路径: (修改时间, 大小)}
+    文件夹展开为其中的 .docx（跳过 Word 打开时生成的 ~$ 临时文件），不存在的路径记为 None
+    """
+    from docfill.session import file_signature
+
+    state = {}
+    for path in paths:
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            for name in os.listdir(path):
+                if name.endswith('.docx') and not name.startswith('~$'):
+                    full = os.path.join(path, name)
+                    state[full] = file_signature(full)
+        else:
+            state[path] = file_signature(path)
+    return state
+
+
+class FileWatcher:
+    """轮询式文件监视（带防抖）"""
+
+    def __init__(self, paths, debounce=DEFAULT_DEBOUNCE, interval=POLL_INTERVAL):
+        """
+        :param paths: 要监视的文件 / 文件夹
+        :param debounce: 变化后要安静多久才算保存完成（秒）
+        :param interval: 检查间隔（秒）
+        """
+        self.paths = list(paths)
+        self.debounce = debounce
+        self.interval = interval
+        self.state = _scan(self.paths)
+
+    def wait(self):
+        """
+        阻塞到有文件变化、且之后 debounce 秒内没有再变化
+        :return: 变化了的路径（新增、修改、删除）集合
+        """
+        while True:
+            time.sleep(self.interval)
+            current = _scan(self.paths)
+            if current == self.state:
+                continue
+            # 防抖：一直等到连续 debounce 秒没有新的变化
+            quiet_since = time.monotonic()
+            while time.monotonic() - quiet_since < self.debounce:
+                time.sleep(self.interval)
+                latest = _scan(self.paths)
+                if latest != current:
+                    current, quiet_since = latest, time.monotonic()
+            changed = {path for path in set(current) | set(self.state) if current.get(path) != self.state.get(path)}
+            self.state = current
+            return changed
+
+
+def plan_changes(session, changed, snapshot):
+    """
+    根据变化的文件算出要重新生成的任务
+    :param session: 渲染会话
+    :param changed: 变化了的路径集合
+    :param snapshot: 上一次的 {桩号: 数据指纹}
+    :return: ([(模板, 桩号)], 新快照, 说明文字列表)
+    """
+    notes = []
+    dirty = set()
+    if os.path.abspath(session.excel_path) in changed:
+        log = session.refresh(force=True)
+        if log.strip():
+            notes.append(log.rstrip())
+        digests = session.row_digests()
+        added = [station for station in digests if station not in snapshot]
+        modified = [station for station in digests if station in snapshot and digests[station] != snapshot[station]]
+        removed = [station for station in snapshot if station not in digests]
+        dirty.update(added, modified)
+        notes.append(f"📊 Excel 有变化：新增 {len(added)} 个桩号，修改 {len(modified)} 个，删除 {len(removed)} 个")
+        if removed:
+            preview = '、'.join(removed[:10]) + ('……' if len(removed) > 10 else '')
+            notes.append(f"⚠️ 这些桩号已从 Excel 删除（已生成的文档保留）：{preview}")
+        snapshot = digests
+    else:
+        session.refresh()  # 重新确认模板列表
+
+    templates_changed = [path for path in session.templates if os.path.abspath(path) in changed]
+    for path in templates_changed:
+        notes.append(f"📝 模板有变化：{os.path.basename(path)}")
+
+    pairs = []
+    for path in session.templates:
+        stations = session.stations_for(path)
+        if path not in templates_changed:
+            stations = [station for station in stations if station in dirty]
+        pairs += [(path, station) for station in stations]
+    return pairs, snapshot, notes
+
+
+def watch(session, debounce=DEFAULT_DEBOUNCE, interval=POLL_INTERVAL):
+    """
+    进入监视模式（阻塞，Ctrl+C 退出）
+    :param session: 渲染会话（docfill.session）
+    :param debounce: 变化后要安静多久才处理（秒）
+    :param interval: 检查间隔（秒）
+    """
+    print(session.refresh(), end='')
+    session.warm_up()
+    snapshot = session.row_digests()
+    watcher = FileWatcher(session.watch_paths, debounce, interval)
+    print(f"\n👀 监视模式：盯着 {len(session.watch_paths)} 个文件 / 文件夹（{len(snapshot)} 个桩号，"
+          f"{len(session.templates)} 个模板），保存后 {debounce:g} 秒开始处理，按 Ctrl+C 退出")
+    for path in session.watch_paths:
+        print(f"   - {os.path.abspath(path)}")
+
+    try:
+        while True:
+            changed = watcher.wait()
+            print(f"\n[{time.strftime('%H:%M:%S')}] 🔔 检测到 {len(changed)} 个文件有变化")
+            start = time.perf_counter()
+            try:
+                pairs, snapshot, notes = plan_changes(session, changed, snapshot)
+            except Exception as e:
+                print(f"❌ 读取失败（保留上一次的数据，下次保存后重试）：{e}")
+                continue
+            for note in notes:
+                print(note)
+            if not pairs:
+                print("✅ 没有需要重新生成的文档")
+                continue
+            results = session.render_pairs(pairs)
+            for result in results:
+                print(f"  {result['message']}")
+            ok = sum(result['ok'] for result in results)
+            print(f"🎉 重新生成 {ok}/{len(results)} 份，耗时 {time.perf_counter() - start:.2f} 秒")
+    except KeyboardInterrupt:
+        print("\n👋 已退出监视模式")
+
+
+def main(argv=None):
+    from docfill.session import SESSION_PIPELINES, open_session
+    from docfill.settings import parse_overrides
+
+    parser = argparse.ArgumentParser(prog='python -m docfill.watch', description='监视模式：只重新生成受影响的文档')
+    parser.add_argument('pipeline', choices=SESSION_PIPELINES)
+    parser.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE, help='保存后等多久开始处理（秒）')
+    parser.add_argument('--set', action='append', metavar='键=值', help='覆盖脚本里的配置项，可重复')
+    args = parser.parse_args(argv)
+
+    session = open_session(args.pipeline, parse_overrides(args.set))
+    print(session.log, end='')
+    watch(session, args.debounce)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,17 @@
 import pandas as pd
-from docxtpl import DocxTemplate
 from pathlib import Path
 import datetime
 import time
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))  # 让脚本能找到同目录下的 docfill 公共模块
+from docfill.formatting import context_records  # 整列清洗：process_data 的批量版本
+from docfill.excel_source import ExcelSource  # Excel 只打开一次，读取结果缓存在 Excel 旁边
+from docfill.docxtpl_cache import CompiledDocxTemplate  # 模板只编译一次，逐行直接渲染
+from docfill.packaging import ZipPackage, document_bytes, entry_name, save_document  # 打包输出 / 原子保存
+from docfill.journal import JOURNAL_NAME, RunJournal  # 运行日志：中途崩溃后可以接着跑
+from docfill.group_index import duplicate_summary, last_positions  # 文件名重复时按最后一行生成
 
 # ================= ⚙️ 用户配置区域 (修改这里) =================
 
@@ -32,6 +41,27 @@ INT_COLUMNS = [
 # 如果数据在特定表，请填入名称，例如 'Sheet1' 或 '数据录入'
 SHEET_NAME = '检验批数据'
 
+# 8. Excel 缓存：填 True 时读过一次后在 Excel 旁边的 .docfill_cache 文件夹存一份（JSON），Excel 没改过时下次直接读缓存
+# 填 False（默认）则每次都重新解析 Excel
+EXCEL_CACHE = False
+
+# 9. 模板编译缓存：填 True 时把模板的编译结果存在模板旁边的 .docfill_cache 文件夹，模板没改过时下次直接加载
+# 填 False（默认）则每次运行都重新编译（同一次运行里模板仍然只编译一次）
+TEMPLATE_CACHE = False
+
+# 10. 打包输出：填压缩包文件名（如 '灌注桩基础检查记录表.zip'，放在结果输出文件夹里）时，
+# 全部文档直接写进这一个压缩包（包内为 “模板名/文件名.docx”），不再逐个生成文件，
+# 适合 OneDrive 等同步盘里的项目文件夹（几千个小文件要同步几千次）；填 '' 则逐个生成文件
+OUTPUT_ZIP = ''
+
+# 11. 压缩级别：0 只打包不压缩（最快，docx 本身已是压缩格式）；1~9 数字越大压缩包越小、越慢
+ZIP_COMPRESSION = 0
+
+# 12. 断点续跑：每生成一份文档就在结果输出文件夹的 .docfill_journal.jsonl 里记一笔，
+# 填 True 时跳过上次已成功生成（且文件还在）的行，只重新生成失败的和没跑到的；
+# 填 False 则全部重新生成（打包输出模式下不支持续跑）
+RESUME = False
+
 
 # =============================================================
 
@@ -99,10 +129,11 @@ def main():
 
     # 2. 读取 Excel 信息
     print("⏳ 正在分析 Excel 文件结构...")
+    source = None
     try:
-        # 先加载 Excel 文件对象，查看有哪些 Sheet
-        xls = pd.ExcelFile(excel_file)
-        sheet_names = xls.sheet_names
+        # 先加载 Excel 文件对象，查看有哪些 Sheet（后面读数据也用这同一个对象，不再重复打开）
+        source = ExcelSource(excel_file, cache=EXCEL_CACHE)
+        sheet_names = source.sheet_names
         print(f"📄 发现工作表: {sheet_names}")
 
         # 确定要读取哪个 Sheet
@@ -122,11 +153,16 @@ def main():
 
         # 读取指定 Sheet 的数据
         print(f"📖 正在读取工作表: [{target_sheet}] ...")
-        df = pd.read_excel(excel_file, sheet_name=target_sheet)
+        df, _ = source.read(target_sheet)
+        if source.cache_hits:
+            print("⚡ Excel 未修改，已直接读取缓存")
 
     except Exception as e:
         print(f"❌ 读取 Excel 失败: {e}")
         return
+    finally:
+        if source is not None:
+            source.close()
 
     # 检查文件名列
     if FILENAME_COLUMN not in df.columns:
@@ -140,27 +176,82 @@ def main():
 
     success_count = 0
 
-    for index, row in df.iterrows():
-        try:
-            context = {k: process_data(k, v) for k, v in row.items()}
-
-            doc = DocxTemplate(template_file)
-            doc.render(context)
-
-            fname = clean_filename(context.get(FILENAME_COLUMN, f'Result_{index}'))
-            save_path = output_path / f"{fname}.docx"
-
-            doc.save(save_path)
-            success_count += 1
-            print(f"  [{(index + 1):03d}/{total}] 🟢 {fname}.docx")
+    # 模板只解析、编译一次，之后每行直接渲染
+    try:
+        compiled = CompiledDocxTemplate(template_file, disk_cache=TEMPLATE_CACHE)
+    except Exception as e:
+        print(f"❌ 模板解析失败: {e}")
+        return
+    if compiled.loaded_from_disk:
+        print("⚡ 模板未修改，已直接加载编译缓存")
+
+    # 整表一次性清洗（结果与逐格 process_data 一致；个别行清洗出错时在该行报告失败）
+    contexts, errors = context_records(df, INT_COLUMNS, DATE_FORMAT_STR, process_data)
+
+    # 文件名重复时只生成最后一行（逐个生成文件、打包输出、常驻会话都是这个规则）
+    fnames = [clean_filename(context.get(FILENAME_COLUMN, f'Result_{index}'))
+              for index, context in zip(df.index, contexts)]
+    last, duplicates = last_positions(fnames)
+    if duplicates:
+        print(f"⚠️ [{FILENAME_COLUMN}]存在重复值（按最后一行生成）：{duplicate_summary(duplicates)}")
+
+    # 打包输出：渲染好的文档直接写进压缩包，不逐个落地
+    package = ZipPackage(output_path / OUTPUT_ZIP, ZIP_COMPRESSION) if OUTPUT_ZIP else None
+
+    # 运行日志：逐行记下成败；续跑时跳过上次已生成的行
+    resume = RESUME
+    if resume and package is not None:
+        print("⚠️ 打包输出模式下不支持断点续跑，本次全部重新生成")
+        resume = False
+    journal = RunJournal(output_path, resume)
+    skipped_count = 0
 
-        except Exception as e:
-            print(f"  [{(index + 1):03d}/{total}] 🔴 失败: {e}")
+    try:
+        for pos, (index, context) in enumerate(zip(df.index, contexts)):
+            fname = fnames[pos]
+            if last[fname] != pos:
+                continue  # 同名的后面还有一行，以那一行为准
+            target = output_path / (OUTPUT_ZIP or f"{fname}.docx")
+            if resume and journal.is_done(template_file, fname, target):
+                skipped_count += 1
+                continue
+            try:
+                if pos in errors:
+                    raise errors[pos]
+
+                doc = compiled.render(context)
+
+                if package is not None:
+                    saved = entry_name(template_file, f"{fname}.docx")
+                    package.add(saved, document_bytes(doc))
+                else:
+                    saved = f"{fname}.docx"
+                    save_document(doc, output_path / saved)  # 先写临时文件再改名，中途崩溃不留半个文件
+                success_count += 1
+                journal.record(template_file, fname, target)
+                print(f"  [{(index + 1):03d}/{total}] 🟢 {saved}")
+
+            except Exception as e:
+                journal.record(template_file, fname, target, str(e))
+                print(f"  [{(index + 1):03d}/{total}] 🔴 失败: {e}")
+    finally:
+        journal.close()
+        if package is not None:
+            package.close()  # 中途出错时已生成的文档同样保留在压缩包里
 
     duration = time.time() - start_time
     print("\n" + "=" * 50)
     print(f"🎉 处理完成！耗时: {duration:.2f} 秒")
-    print(f"📂 文件已保存在: {output_path}")
+    if skipped_count:
+        print(f"⏭️ 断点续跑：跳过上次已生成的 {skipped_count} 份")
+    if journal.failed:
+        print(f"⚠️ {len(journal.failed)} 份生成失败，详见 {output_path / JOURNAL_NAME}；"
+              f"修好后把 RESUME 改为 True 再运行，只会重新生成这些")
+    if package is not None:
+        size_mb = os.path.getsize(package.path) / (1 << 20)
+        print(f"📦 已打包 {package.count} 份文档: {package.path}（{size_mb:.1f} MB）")
+    else:
+        print(f"📂 文件已保存在: {output_path}")
 
 
 if __name__ == '__main__':